@@ -4,29 +4,54 @@ Phase 3c: Canvas UI API Endpoints
 REST API for managing investigation canvas visualization.
 
 Endpoints:
+- GET /api/canvas - List canvases the user may read
 - GET /api/canvas/{canvas_id} - Get canvas with nodes and edges
 - POST /api/canvas - Create new canvas
 - PUT /api/canvas/{canvas_id} - Update canvas
+- PATCH /api/canvas/{canvas_id} - Apply a batch of node/edge operations atomically
 - DELETE /api/canvas/{canvas_id} - Delete canvas
 - POST /api/canvas/{canvas_id}/nodes - Add node to canvas
+- PUT /api/canvas/{canvas_id}/nodes/{node_id} - Update node
 - DELETE /api/canvas/{canvas_id}/nodes/{node_id} - Remove node
 - POST /api/canvas/{canvas_id}/edges - Add edge to canvas
 - DELETE /api/canvas/{canvas_id}/edges/{edge_id} - Remove edge
 - GET /api/canvas/{canvas_id}/analysis - Get analysis/recommendations
+- GET /api/canvas/{canvas_id}/layout - Get server-computed node positions
+- GET /api/canvas/{canvas_id}/viewport - Get nodes/edges inside a bounding box
+- GET /api/canvas/{canvas_id}/stream - Server-Sent Events stream of canvas changes
+
+Mutations publish CanvasChangeEvents to the EventStream, which the SSE
+endpoint relays to connected clients.
+
+Canvas responses carry a strong ETag built from the canvas revision. GET
+honours If-None-Match (304 without loading the canvas); PUT and PATCH
+honour If-Match (412 if the canvas changed since the client read it). The
+matched revision is also passed to the store's save, so a write from
+another worker landing between load and save still yields 412.
 """
 
-from flask import Blueprint, request, jsonify
-from typing import Dict, Optional
+import json
+import time
+from flask import Blueprint, Response, request, jsonify
+from typing import Dict, Iterator, Optional
 from datetime import datetime
 from src.models.canvas import (
     Canvas, CanvasNode, CanvasEdge, CanvasStore,
-    NodeType, EdgeType
+    NodeType, EdgeType, RevisionConflictError,
 )
+from src.models.canvas_version import VersionStore
 from src.models.investigation import Investigation
+from src.services.access_control import AccessControl, Permission
+from src.services.event_stream import (
+    CanvasChangeEvent, EventStream, EventSubscription, EventType, OverflowPolicy,
+    SubscriberQueue, coalesce_events, get_event_stream,
+)
+from src.services.canvas_layout import LayoutEngine
+from src.services.canvas_patch import CanvasPatch, PatchError
+from src.services.canvas_viewport import build_viewport
+from src.services.graph_analytics import CanvasAnalyzer
 from src.store.investigation_store import InvestigationStore
-
-# Create Blueprint
-canvas_bp = Blueprint('canvas', __name__, url_prefix='/api/canvas')
+from src.utils.http_cache import if_match_failed, not_modified, revision_etag, with_etag
 
 # Global store (would be dependency injected in production)
 canvas_store = CanvasStore()
@@ -36,28 +61,92 @@ investigation_store = None  # Set via initialize
 class CanvasUIAPI:
     """Canvas UI API handler"""
 
-    def __init__(self, canvas_store: CanvasStore, inv_store: InvestigationStore):
+    # Updates to the same element within this window are sent once (seconds)
+    SSE_COALESCE_WINDOW = 0.1
+    # Comment line sent on idle streams to keep proxies from closing them
+    SSE_HEARTBEAT_INTERVAL = 15.0
+    # Events buffered for a slow client before the oldest are dropped
+    SSE_MAX_QUEUE_SIZE = 1000
+
+    def __init__(
+        self,
+        canvas_store: CanvasStore,
+        inv_store: InvestigationStore,
+        event_stream: Optional[EventStream] = None,
+        version_store: Optional[VersionStore] = None,
+        access_control: Optional[AccessControl] = None,
+    ):
         self.canvas_store = canvas_store
         self.inv_store = inv_store
+        self.event_stream = event_stream or get_event_stream()
+        self.version_store = version_store or VersionStore()
+        self.access_control = access_control  # None disables list filtering
+        self.analyzer = CanvasAnalyzer()
+        self.layout_engine = LayoutEngine()
 
     def register_routes(self, app):
         """Register all canvas endpoints"""
 
+        # One blueprint per registration so several apps can host the API
+        canvas_bp = Blueprint('canvas', __name__, url_prefix='/api/canvas')
+
+        @canvas_bp.route('', methods=['GET'])
+        def list_canvases():
+            """
+            List canvases the current user may read
+
+            Query parameters:
+            - investigation_id: str (only canvases of this investigation)
+
+            Returns:
+            - 200: Canvas summaries (without nodes and edges)
+            """
+            try:
+                investigation_id = request.args.get('investigation_id')
+                if investigation_id:
+                    canvases = self.canvas_store.get_by_investigation(investigation_id)
+                else:
+                    canvases = self.canvas_store.get_all()
+
+                if self.access_control is not None:
+                    # One permission evaluation for the whole page of results
+                    allowed = set(self.access_control.filter_authorized(
+                        self._current_user(), Permission.CANVAS_READ, [c.id for c in canvases]
+                    ))
+                    canvases = [c for c in canvases if c.id in allowed]
+
+                return jsonify({
+                    'canvases': [self._canvas_summary(c) for c in canvases],
+                    'total_count': len(canvases),
+                }), 200
+
+            except Exception as e:
+                return jsonify({'error': str(e)}), 500
+
         @canvas_bp.route('/<canvas_id>', methods=['GET'])
         def get_canvas(canvas_id):
             """
             Get canvas by ID
             
             Returns:
-            - 200: Canvas data with all nodes and edges
+            - 200: Canvas data with all nodes and edges (with ETag)
+            - 304: Canvas unchanged since the If-None-Match ETag
             - 404: Canvas not found
             """
             try:
+                revision = self.canvas_store.get_revision(canvas_id)
+                if revision is None:
+                    return jsonify({'error': 'Canvas not found'}), 404
+
+                unchanged = not_modified(revision_etag(canvas_id, revision))
+                if unchanged is not None:
+                    return unchanged
+
                 canvas = self.canvas_store.get(canvas_id)
                 if not canvas:
                     return jsonify({'error': 'Canvas not found'}), 404
 
-                return jsonify(canvas.to_dict()), 200
+                return self._with_canvas_etag(jsonify(canvas.to_dict()), canvas), 200
 
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
@@ -103,6 +192,10 @@ class CanvasUIAPI:
                 )
 
                 self.canvas_store.add(canvas)
+                self._publish(EventType.CANVAS_CREATED, canvas.id, {
+                    'title': canvas.title,
+                    'investigation_id': canvas.investigation_id,
+                })
 
                 return jsonify(canvas.to_dict()), 201
 
@@ -121,25 +214,131 @@ class CanvasUIAPI:
             }
             
             Returns:
-            - 200: Updated canvas
+            - 200: Updated canvas (with its new ETag)
             - 404: Canvas not found
+            - 412: If-Match does not match the current ETag
             """
             try:
                 canvas = self.canvas_store.get(canvas_id)
                 if not canvas:
                     return jsonify({'error': 'Canvas not found'}), 404
+                if if_match_failed(revision_etag(canvas.id, canvas.revision)):
+                    return self._precondition_failed(canvas)
+                expected_revision = canvas.revision if request.if_match else None
 
                 data = request.get_json()
+                # Put back if the save loses: the store may hand out a shared canvas
+                previous = (canvas.title, canvas.description, canvas.revision, canvas.updated_at)
 
                 if 'title' in data:
                     canvas.title = data['title']
                 if 'description' in data:
                     canvas.description = data['description']
 
-                canvas.updated_at = datetime.utcnow().isoformat()
-                self.canvas_store.update(canvas)
+                canvas.touch()
+                try:
+                    self.canvas_store.save_metadata(canvas, expected_revision=expected_revision)
+                except RevisionConflictError:
+                    (canvas.title, canvas.description,
+                     canvas.revision, canvas.updated_at) = previous
+                    return self._revision_conflict(canvas_id)
+                self._publish(EventType.CANVAS_UPDATED, canvas_id, {
+                    'title': canvas.title,
+                    'description': canvas.description,
+                })
+
+                return self._with_canvas_etag(jsonify(canvas.to_dict()), canvas), 200
+
+            except Exception as e:
+                return jsonify({'error': str(e)}), 500
 
-                return jsonify(canvas.to_dict()), 200
+        @canvas_bp.route('/<canvas_id>', methods=['PATCH'])
+        def patch_canvas(canvas_id):
+            """
+            Apply a batch of node/edge operations all-or-nothing
+            
+            Request body:
+            {
+                "operations": [
+                    {"op": "add_node", "node": {"id": "n1", "type": "EVENT", "title": "..."}},
+                    {"op": "add_edge",
+                     "edge": {"source_id": "n1", "target_id": "n2", "type": "TRIGGERS"}},
+                    {"op": "update_node", "id": "n2", "node": {"position": {"x": 10}}},
+                    {"op": "remove_edge", "id": "edge-1"}
+                ],
+                "message": "Optional version message"
+            }
+            
+            The whole batch is persisted together, recorded as one version
+            and published as one canvas_patched event. A batch that leaves
+            the canvas as it was is answered with the current revision and
+            latest version, without saving, versioning or publishing.
+            
+            Returns:
+            - 200: {"revision", "version_id", "version_number", "results": [...]}
+            - 400: Invalid operation ("operation" is its index); nothing applied
+            - 404: Canvas not found
+            - 412: If-Match does not match the current ETag
+            """
+            try:
+                canvas = self.canvas_store.get(canvas_id)
+                if not canvas:
+                    return jsonify({'error': 'Canvas not found'}), 404
+                if if_match_failed(revision_etag(canvas.id, canvas.revision)):
+                    return self._precondition_failed(canvas)
+                expected_revision = canvas.revision if request.if_match else None
+
+                data = request.get_json() or {}
+
+                try:
+                    patch = CanvasPatch(data.get('operations'))
+                    result = patch.apply(canvas)
+                except PatchError as e:
+                    return jsonify({'error': e.message, 'operation': e.index}), 400
+
+                if not result.changes:
+                    # Content already matches: no save, version or event
+                    latest = self.version_store.get_latest_version(canvas_id)
+                    return self._with_canvas_etag(jsonify({
+                        'canvas_id': canvas_id,
+                        'revision': canvas.revision,
+                        'version_id': latest.version_id if latest else None,
+                        'version_number': latest.version_number if latest else None,
+                        'results': result.results,
+                    }), canvas), 200
+
+                try:
+                    self.canvas_store.save_batch(
+                        canvas, result.node_ids, result.edge_ids,
+                        expected_revision=expected_revision,
+                    )
+                except RevisionConflictError:
+                    patch.rollback()
+                    return self._revision_conflict(canvas_id)
+                except Exception:
+                    patch.rollback()
+                    raise
+
+                version = self.version_store.create_version(
+                    canvas_id,
+                    canvas.to_dict(),
+                    result.changes,
+                    author=self._current_user(),
+                    message=data.get('message', ''),
+                )
+                self._publish(EventType.CANVAS_PATCHED, canvas_id, {
+                    'version_id': version.version_id,
+                    'version_number': version.version_number,
+                    'operations': result.results,
+                })
+
+                return self._with_canvas_etag(jsonify({
+                    'canvas_id': canvas_id,
+                    'revision': canvas.revision,
+                    'version_id': version.version_id,
+                    'version_number': version.version_number,
+                    'results': result.results,
+                }), canvas), 200
 
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
@@ -159,6 +358,7 @@ class CanvasUIAPI:
                     return jsonify({'error': 'Canvas not found'}), 404
 
                 self.canvas_store.delete(canvas_id)
+                self._publish(EventType.CANVAS_DELETED, canvas_id, {})
                 return '', 204
 
             except Exception as e:
@@ -207,7 +407,11 @@ class CanvasUIAPI:
                 )
 
                 canvas.add_node(node)
-                self.canvas_store.update(canvas)
+                self.canvas_store.save_node(canvas, node)
+                self._publish(EventType.NODE_ADDED, canvas_id, {
+                    'node_id': node.id,
+                    'node': node.to_dict(),
+                })
 
                 return jsonify(node.to_dict()), 201
 
@@ -216,6 +420,67 @@ class CanvasUIAPI:
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
 
+        @canvas_bp.route('/<canvas_id>/nodes/<node_id>', methods=['PUT'])
+        def update_node(canvas_id, node_id):
+            """
+            Update node on canvas
+            
+            Request body (all fields optional):
+            {
+                "title": "Node title",
+                "description": "Description",
+                "data": {"key": "value"},
+                "position": {"x": 100, "y": 200},
+                "size": {"width": 200, "height": 100}
+            }
+            
+            Returns:
+            - 200: Updated node
+            - 404: Canvas or node not found
+            """
+            try:
+                canvas = self.canvas_store.get(canvas_id)
+                if not canvas:
+                    return jsonify({'error': 'Canvas not found'}), 404
+
+                node = canvas.get_node(node_id)
+                if node is None:
+                    return jsonify({'error': 'Node not found'}), 404
+
+                data = request.get_json() or {}
+
+                if 'title' in data:
+                    node.title = data['title']
+                if 'description' in data:
+                    node.description = data['description']
+                if 'data' in data:
+                    node.data = data['data']
+                if 'position' in data or 'size' in data:
+                    position = data.get('position', {})
+                    size = data.get('size', {})
+                    canvas.move_node(
+                        node_id,
+                        position=(position.get('x', node.position[0]),
+                                  position.get('y', node.position[1])),
+                        size=(size.get('width', node.size[0]),
+                              size.get('height', node.size[1])),
+                    )
+                else:
+                    # move_node already touches the canvas
+                    canvas.touch()
+
+                node.updated_at = datetime.utcnow().isoformat()
+                self.canvas_store.save_node(canvas, node)
+                self._publish(EventType.NODE_UPDATED, canvas_id, {
+                    'node_id': node.id,
+                    'node': node.to_dict(),
+                })
+
+                return jsonify(node.to_dict()), 200
+
+            except Exception as e:
+                return jsonify({'error': str(e)}), 500
+
         @canvas_bp.route('/<canvas_id>/nodes/<node_id>', methods=['DELETE'])
         def remove_node(canvas_id, node_id):
             """
@@ -234,7 +499,8 @@ class CanvasUIAPI:
                     return jsonify({'error': 'Node not found'}), 404
 
                 canvas.remove_node(node_id)
-                self.canvas_store.update(canvas)
+                self.canvas_store.delete_node(canvas, node_id)
+                self._publish(EventType.NODE_DELETED, canvas_id, {'node_id': node_id})
 
                 return '', 204
 
@@ -284,7 +550,11 @@ class CanvasUIAPI:
                 )
 
                 canvas.add_edge(edge)
-                self.canvas_store.update(canvas)
+                self.canvas_store.save_edge(canvas, edge)
+                self._publish(EventType.EDGE_ADDED, canvas_id, {
+                    'edge_id': edge.id,
+                    'edge': edge.to_dict(),
+                })
 
                 return jsonify(edge.to_dict()), 201
 
@@ -311,7 +581,8 @@ class CanvasUIAPI:
                     return jsonify({'error': 'Edge not found'}), 404
 
                 canvas.remove_edge(edge_id)
-                self.canvas_store.update(canvas)
+                self.canvas_store.delete_edge(canvas, edge_id)
+                self._publish(EventType.EDGE_DELETED, canvas_id, {'edge_id': edge_id})
 
                 return '', 204
 
@@ -334,7 +605,12 @@ class CanvasUIAPI:
                 "event_nodes": 3,
                 "resolution_nodes": 1,
                 "most_connected_node": "node-1",
-                "causality_chains": [[...], ...],
+                "central_nodes": [["node-2", 0.5], ...],
+                "causal_cycles": [["node-4", "node-5"]],
+                "longest_causal_path": ["node-1", "node-2", ...],
+                "root_cause_candidates": ["node-1"],
+                "components": [["node-1", "node-2", ...], ...],
+                "revision": 12,
                 "insights": [...],
                 "timestamp": "2024-01-28T10:00:00Z"
             }
@@ -349,14 +625,9 @@ class CanvasUIAPI:
                 resolution_count = len(canvas.get_nodes_by_type(NodeType.RESOLUTION))
                 insight_count = len(canvas.get_nodes_by_type(NodeType.INSIGHT))
 
-                # Find most connected node
-                most_connected = None
-                max_connections = 0
-                for node in canvas.nodes.values():
-                    connected = canvas.get_connected_nodes(node.id)
-                    if len(connected) > max_connections:
-                        max_connections = len(connected)
-                        most_connected = node.id
+                # Graph metrics (cached until the canvas changes)
+                analysis = self.analyzer.analyze(canvas)
+                most_connected, max_connections = analysis.most_connected
 
                 # Generate insights
                 insights = []
@@ -366,6 +637,19 @@ class CanvasUIAPI:
                         'message': f'High complexity detected: {max_connections} connections',
                     })
 
+                if analysis.causal_cycles:
+                    insights.append({
+                        'type': 'warning',
+                        'message': (f'Circular causality detected in '
+                                    f'{len(analysis.causal_cycles)} place(s)'),
+                    })
+
+                if len(analysis.components) > 1:
+                    insights.append({
+                        'type': 'info',
+                        'message': f'Canvas has {len(analysis.components)} disconnected groups',
+                    })
+
                 if resolution_count == 0:
                     insights.append({
                         'type': 'info',
@@ -386,6 +670,12 @@ class CanvasUIAPI:
                     'insight_nodes': insight_count,
                     'most_connected_node': most_connected,
                     'connections_to_most_connected': max_connections,
+                    'central_nodes': analysis.top_betweenness(),
+                    'causal_cycles': analysis.causal_cycles,
+                    'longest_causal_path': analysis.longest_causal_path,
+                    'root_cause_candidates': analysis.root_cause_candidates,
+                    'components': analysis.components,
+                    'revision': analysis.revision,
                     'insights': insights,
                     'timestamp': datetime.utcnow().isoformat(),
                 }), 200
@@ -393,11 +683,225 @@ class CanvasUIAPI:
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
 
+        @canvas_bp.route('/<canvas_id>/layout', methods=['GET'])
+        def get_canvas_layout(canvas_id):
+            """
+            Get node positions computed on the server
+            
+            Query params:
+            - type: force-directed, hierarchical or grid
+              (defaults to the canvas layout_type)
+            
+            Returns:
+            - 200: {"layout_type": ..., "revision": ..., "positions": {node_id: {"x", "y"}}}
+            - 400: Unknown layout type
+            - 404: Canvas not found
+            """
+            try:
+                canvas = self.canvas_store.get(canvas_id)
+                if not canvas:
+                    return jsonify({'error': 'Canvas not found'}), 404
+
+                layout = self.layout_engine.layout(canvas, request.args.get('type'))
+                return jsonify(layout.to_dict()), 200
+
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            except Exception as e:
+                return jsonify({'error': str(e)}), 500
+
+        @canvas_bp.route('/<canvas_id>/viewport', methods=['GET'])
+        def get_canvas_viewport(canvas_id):
+            """
+            Get the nodes and edges inside a bounding box
+            
+            Query params:
+            - min_x, min_y, max_x, max_y: Viewport in canvas coordinates (required)
+            - max_nodes: Node limit before clustering (default 500)
+            
+            Returns:
+            - 200: {"lod": "detail", "nodes": [...], "edges": [...]} or
+                   {"lod": "clusters", "clusters": [...], "cluster_edges": [...]}
+            - 400: Missing or invalid bounds
+            - 404: Canvas not found
+            """
+            try:
+                canvas = self.canvas_store.get(canvas_id)
+                if not canvas:
+                    return jsonify({'error': 'Canvas not found'}), 404
+
+                try:
+                    bounds = [float(request.args[k]) for k in ('min_x', 'min_y', 'max_x', 'max_y')]
+                    max_nodes = int(request.args.get('max_nodes', 500))
+                except KeyError as e:
+                    return jsonify({'error': f'Missing {e.args[0]}'}), 400
+
+                return jsonify(build_viewport(canvas, *bounds, max_nodes=max_nodes)), 200
+
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            except Exception as e:
+                return jsonify({'error': str(e)}), 500
+
+        @canvas_bp.route('/<canvas_id>/stream', methods=['GET'])
+        def stream_canvas(canvas_id):
+            """
+            Stream canvas changes as Server-Sent Events
+            
+            Each event carries the change type (node_added, edge_updated, ...)
+            and the CanvasChangeEvent as JSON data. Bursts of updates to the
+            same node/edge are coalesced. Reconnecting clients send the
+            Last-Event-ID header (or last_event_id query parameter) to
+            receive the changes they missed.
+            
+            Returns:
+            - 200: text/event-stream
+            - 404: Canvas not found
+            """
+            if not self.canvas_store.get(canvas_id):
+                return jsonify({'error': 'Canvas not found'}), 404
+
+            last_event_id = (request.headers.get('Last-Event-ID')
+                             or request.args.get('last_event_id'))
+
+            return Response(
+                self.stream_canvas_events(canvas_id, last_event_id),
+                mimetype='text/event-stream',
+                headers={
+                    'Cache-Control': 'no-cache',
+                    'X-Accel-Buffering': 'no',
+                },
+            )
+
         # Register blueprint
         app.register_blueprint(canvas_bp)
 
-
-def register_canvas_ui_api(app, canvas_store: CanvasStore, inv_store: InvestigationStore):
+    def stream_canvas_events(
+        self,
+        canvas_id: str,
+        last_event_id: Optional[str] = None,
+    ) -> Iterator[str]:
+        """
+        Generate SSE frames for one canvas until the client disconnects.
+        
+        Args:
+            canvas_id: Canvas to follow
+            last_event_id: ID of the last event the client received
+            
+        Yields:
+            SSE-formatted strings
+        """
+        # Bounded like async subscriptions: a client that stops reading
+        # collapses repeated updates, then loses its oldest events
+        pending = SubscriberQueue(
+            EventSubscription(canvas_id=canvas_id),
+            max_size=self.SSE_MAX_QUEUE_SIZE,
+            overflow_policy=OverflowPolicy.COALESCE,
+        )
+
+        replay = {}
+        if last_event_id:
+            if self.event_stream.event_log is not None and last_event_id.isdigit():
+                replay['offset'] = int(last_event_id) + 1
+            else:
+                replay['after_event_id'] = last_event_id
+
+        subscription_id = self.event_stream.subscribe_from(
+            pending.put,
+            canvas_id=canvas_id,
+            **replay,
+        )
+
+        try:
+            yield f"retry: {int(self.SSE_HEARTBEAT_INTERVAL * 1000)}\n\n"
+
+            while True:
+                event = pending.get(timeout=self.SSE_HEARTBEAT_INTERVAL)
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                batch = [event]
+
+                # Collect the rest of the burst, then send it coalesced
+                deadline = time.monotonic() + self.SSE_COALESCE_WINDOW
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    event = pending.get(timeout=remaining)
+                    if event is None:
+                        break
+                    batch.append(event)
+
+                yield ''.join(self._format_sse(event) for event in coalesce_events(batch))
+        finally:
+            self.event_stream.unsubscribe(subscription_id)
+            pending.close()
+
+    @staticmethod
+    def _format_sse(event: CanvasChangeEvent) -> str:
+        """Format an event as an SSE frame."""
+        event_id = event.offset if event.offset is not None else event.event_id
+        return (
+            f"id: {event_id}\n"
+            f"event: {event.event_type.value}\n"
+            f"data: {json.dumps(event.to_dict())}\n\n"
+        )
+
+    def _publish(self, event_type: EventType, canvas_id: str, data: Dict) -> None:
+        """Publish a canvas change to the event stream."""
+        self.event_stream.publish(CanvasChangeEvent(
+            event_type=event_type,
+            canvas_id=canvas_id,
+            user_id=self._current_user(),
+            data=data,
+        ))
+
+    @staticmethod
+    def _with_canvas_etag(response: Response, canvas: Canvas) -> Response:
+        """Tag a response with the canvas's current revision."""
+        return with_etag(response, revision_etag(canvas.id, canvas.revision))
+
+    def _precondition_failed(self, canvas: Canvas):
+        """412 response carrying the ETag the client should re-read."""
+        response = jsonify({'error': 'Canvas has changed', 'revision': canvas.revision})
+        return self._with_canvas_etag(response, canvas), 412
+
+    def _revision_conflict(self, canvas_id: str):
+        """412 response after a conditional save lost to another writer."""
+        current = self.canvas_store.get(canvas_id)
+        if current is None:
+            return jsonify({'error': 'Canvas not found'}), 404
+        return self._precondition_failed(current)
+
+    @staticmethod
+    def _canvas_summary(canvas: Canvas) -> Dict:
+        """Canvas fields for list responses."""
+        return {
+            'id': canvas.id,
+            'investigation_id': canvas.investigation_id,
+            'title': canvas.title,
+            'description': canvas.description,
+            'node_count': len(canvas.nodes),
+            'edge_count': len(canvas.edges),
+            'created_at': canvas.created_at,
+            'updated_at': canvas.updated_at,
+        }
+
+    @staticmethod
+    def _current_user() -> str:
+        """ID of the authenticated user, if the auth middleware set one."""
+        return getattr(request, 'user_id', '') or ''
+
+
+def register_canvas_ui_api(
+    app,
+    canvas_store: CanvasStore,
+    inv_store: InvestigationStore,
+    event_stream: Optional[EventStream] = None,
+    version_store: Optional[VersionStore] = None,
+    access_control: Optional[AccessControl] = None,
+):
     """
     Register canvas UI API with Flask app
     
@@ -405,5 +909,5 @@ def register_canvas_ui_api(app, canvas_store: CanvasStore, inv_store: Investigat
         from src.api.canvas_ui_api import register_canvas_ui_api
         register_canvas_ui_api(app, canvas_store, investigation_store)
     """
-    api = CanvasUIAPI(canvas_store, inv_store)
+    api = CanvasUIAPI(canvas_store, inv_store, event_stream, version_store, access_control)
     api.register_routes(app)
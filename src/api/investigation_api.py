@@ -19,23 +19,30 @@ from flask import Blueprint, request, jsonify
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 from src.store.investigation_store import InvestigationStore
-from src.models.investigation import Investigation, InvestigationStatus, EventSeverity
-from src.models.event import Event, EventStore
-
-# Create Blueprint
-investigation_bp = Blueprint('investigations', __name__, url_prefix='/api/investigations')
+from src.models.investigation import Investigation, InvestigationStatus
+from src.models.event import Event, EventSeverity, EventStore
+from src.services.access_control import AccessControl, Permission
 
 
 class InvestigationAPI:
     """Investigation API handler"""
 
-    def __init__(self, investigation_store: InvestigationStore, event_store: EventStore):
+    def __init__(
+        self,
+        investigation_store: InvestigationStore,
+        event_store: EventStore,
+        access_control: Optional[AccessControl] = None,
+    ):
         self.inv_store = investigation_store
         self.event_store = event_store
+        self.access_control = access_control  # None disables list filtering
 
     def register_routes(self, app):
         """Register all investigation endpoints with Flask app"""
 
+        # One blueprint per registration so several apps can host the API
+        investigation_bp = Blueprint('investigations', __name__, url_prefix='/api/investigations')
+
         @investigation_bp.route('', methods=['POST'])
         def create_investigation():
             """
@@ -127,6 +134,15 @@ class InvestigationAPI:
                 # Get all investigations
                 all_investigations = self.inv_store.get_all()
 
+                # Keep those the user may read (one permission evaluation for the list)
+                if self.access_control is not None:
+                    allowed = set(self.access_control.filter_authorized(
+                        self._current_user(),
+                        Permission.CANVAS_READ,
+                        [i.id for i in all_investigations],
+                    ))
+                    all_investigations = [i for i in all_investigations if i.id in allowed]
+
                 # Apply filters
                 filtered = all_investigations
                 if status_filter:
@@ -399,9 +415,14 @@ class InvestigationAPI:
         # Register blueprint
         app.register_blueprint(investigation_bp)
 
+    @staticmethod
+    def _current_user() -> str:
+        """ID of the authenticated user, if the auth middleware set one."""
+        return getattr(request, 'user_id', '') or ''
+
 
 # Export for use in app.py
-def register_investigation_api(app, investigation_store, event_store):
+def register_investigation_api(app, investigation_store, event_store, access_control=None):
     """
     Register investigation API endpoints with Flask app
     
@@ -409,5 +430,5 @@ def register_investigation_api(app, investigation_store, event_store):
         from src.api.investigation_api import register_investigation_api
         register_investigation_api(app, investigation_store, event_store)
     """
-    api = InvestigationAPI(investigation_store, event_store)
+    api = InvestigationAPI(investigation_store, event_store, access_control)
     api.register_routes(app)
@@ -4,11 +4,14 @@ import os
 
 from src.connectors import git_connector, ci_connector
 from src.store import sql_store
-from src.store.investigation_store import InvestigationStore
+from src.store.investigation_store import InvestigationStore, RevisionConflictError
 from src.services.event_linker import EventLinker
+from src.services.event_clustering import EventClusterer
 from src.services.email_notifier import EmailNotifier, NotificationPreferences
+from src.services.event_stream import init_event_stream
 from src.middleware import require_auth, init_auth, init_revocation
 from src.utils.logging import setup_logging, log_request_response, LogContext
+from src.utils.http_cache import if_match_failed, not_modified, revision_etag, with_etag
 
 
 def create_app(db_path: str = 'investigations.db'):
@@ -35,11 +38,14 @@ def create_app(db_path: str = 'investigations.db'):
     init_auth(app)
     init_revocation(app)
 
+    # Initialize canvas event stream (cross-worker relay when configured)
+    init_event_stream(app)
+
     # Initialize investigation store
     investigation_store = InvestigationStore(db_path=db_path)
 
-    # Initialize event linker
-    event_linker = EventLinker(investigation_store)
+    # Initialize event linker (near-duplicate events collapse by cluster)
+    event_linker = EventLinker(investigation_store, clusterer=EventClusterer())
 
     # Initialize email notifier (with same database for preferences persistence)
     email_notifier = EmailNotifier(
@@ -408,31 +414,69 @@ def create_investigation():
         return jsonify({'error': str(e)}), 400
 
 
+def _investigation_etag(investigation_id: str) -> str | None:
+    """ETag for an investigation's current revision (None if it doesn't exist).
+    
+    The revision also changes when linked events or annotations change, so
+    the same tag validates the investigation's sub-resources.
+    """
+    revision = app.investigation_store.get_revision(investigation_id)
+    return None if revision is None else revision_etag(investigation_id, revision)
+
+
 @app.get('/api/investigations/<investigation_id>')
 @log_request_response
 def get_investigation(investigation_id: str):
-    """Fetch investigation details (public read)."""
+    """Fetch investigation details (public read).
+    
+    Honours If-None-Match: returns 304 without loading the investigation.
+    """
+    etag = _investigation_etag(investigation_id)
+    if etag is None:
+        return jsonify({'error': 'Investigation not found'}), 404
+    unchanged = not_modified(etag)
+    if unchanged is not None:
+        return unchanged
+    
     investigation = app.investigation_store.get_investigation(investigation_id)
     
     if not investigation:
         return jsonify({'error': 'Investigation not found'}), 404
     
-    return jsonify(investigation.to_dict())
+    return with_etag(jsonify(investigation.to_dict()), etag)
 
 
 @app.patch('/api/investigations/<investigation_id>')
 @require_auth(allowed_roles={'admin', 'engineer'})
 @log_request_response
 def update_investigation(investigation_id: str):
-    """Update investigation details (requires auth)."""
+    """Update investigation details (requires auth).
+    
+    With If-Match, the update only applies if the investigation is still at
+    that ETag's revision; otherwise 412 is returned.
+    """
     data = request.json or {}
+    data.pop('expected_revision', None)
     
     try:
-        investigation = app.investigation_store.update_investigation(investigation_id, **data)
+        expected_revision = None
+        if request.if_match:
+            revision = app.investigation_store.get_revision(investigation_id)
+            if revision is None:
+                return jsonify({'error': 'Investigation not found'}), 404
+            if if_match_failed(revision_etag(investigation_id, revision)):
+                return jsonify({'error': 'Investigation has changed'}), 412
+            expected_revision = revision
+        
+        investigation = app.investigation_store.update_investigation(
+            investigation_id, expected_revision=expected_revision, **data
+        )
         if not investigation:
             return jsonify({'error': 'Investigation not found'}), 404
         
-        return jsonify(investigation.to_dict())
+        return with_etag(jsonify(investigation.to_dict()), _investigation_etag(investigation_id))
+    except RevisionConflictError as e:
+        return jsonify({'error': str(e)}), 412
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
@@ -460,12 +504,18 @@ def add_annotation(investigation_id: str):
 def list_annotations(investigation_id: str):
     """List annotations for investigation (public read)."""
     try:
+        etag = _investigation_etag(investigation_id)
+        unchanged = not_modified(etag) if etag else None
+        if unchanged is not None:
+            return unchanged
+        
         annotations = app.investigation_store.get_annotations(investigation_id)
-        return jsonify({
+        response = jsonify({
             'investigation_id': investigation_id,
             'annotations': [ann.to_dict() for ann in annotations],
             'count': len(annotations)
         })
+        return with_etag(response, etag) if etag else response
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
@@ -520,6 +570,11 @@ def get_investigation_events(investigation_id: str):
         type_filter = request.args.get('event_type')
         limit = int(request.args.get('limit', '50'))
         
+        etag = _investigation_etag(investigation_id)
+        unchanged = not_modified(etag) if etag else None
+        if unchanged is not None:
+            return unchanged
+        
         events = app.investigation_store.get_investigation_events(investigation_id)
         
         # Filter by source
@@ -530,11 +585,12 @@ def get_investigation_events(investigation_id: str):
         if type_filter:
             events = [e for e in events if e.event_type == type_filter]
         
-        return jsonify({
+        response = jsonify({
             'investigation_id': investigation_id,
             'events': [evt.to_dict() for evt in events[:limit]],
             'count': len(events),
         })
+        return with_etag(response, etag) if etag else response
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
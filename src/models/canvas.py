@@ -18,7 +18,8 @@ Connection Types:
 """
 
 from enum import Enum
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import math
 from datetime import datetime
 import json
 
@@ -160,6 +161,9 @@ class CanvasEdge:
 class Canvas:
     """Investigation Canvas - visual workspace for analysis"""
 
+    # Side of a spatial index cell, in canvas coordinates
+    SPATIAL_CELL_SIZE = 512.0
+
     def __init__(
         self,
         id: str,
@@ -177,11 +181,93 @@ class Canvas:
         self.edges: Dict[str, CanvasEdge] = {}
         self.created_at = datetime.utcnow().isoformat()
         self.updated_at = datetime.utcnow().isoformat()
+        # Bumped on every change; keys caches of derived data (analysis, layout)
+        self.revision = 0
+
+        # Adjacency indexes: node_id -> edge type -> edge IDs (insertion-ordered)
+        self._outgoing: Dict[str, Dict[EdgeType, Dict[str, None]]] = {}
+        self._incoming: Dict[str, Dict[EdgeType, Dict[str, None]]] = {}
+
+        # Spatial index: grid cell -> node IDs whose bounding box overlaps it
+        self._cells: Dict[Tuple[int, int], Dict[str, None]] = {}
+        self._node_cells: Dict[str, List[Tuple[int, int]]] = {}
+
+    def _index_edge(self, edge: CanvasEdge) -> None:
+        """Add an edge to the adjacency indexes"""
+        self._outgoing.setdefault(edge.source_id, {}).setdefault(edge.type, {})[edge.id] = None
+        self._incoming.setdefault(edge.target_id, {}).setdefault(edge.type, {})[edge.id] = None
+
+    def _unindex_edge(self, edge: CanvasEdge) -> None:
+        """Remove an edge from the adjacency indexes"""
+        for index, node_id in ((self._outgoing, edge.source_id), (self._incoming, edge.target_id)):
+            by_type = index.get(node_id)
+            if by_type is None:
+                continue
+            edge_ids = by_type.get(edge.type)
+            if edge_ids is not None:
+                edge_ids.pop(edge.id, None)
+                if not edge_ids:
+                    del by_type[edge.type]
+            if not by_type:
+                del index[node_id]
+
+    def _adjacent_edges(
+        self,
+        index: Dict[str, Dict[EdgeType, Dict[str, None]]],
+        node_id: str,
+        edge_type: Optional[EdgeType],
+    ) -> Iterator[CanvasEdge]:
+        """Iterate a node's edges from one adjacency index"""
+        by_type = index.get(node_id)
+        if not by_type:
+            return
+        if edge_type is not None:
+            edge_ids = list(by_type.get(edge_type, ()))
+        else:
+            edge_ids = [e_id for ids in by_type.values() for e_id in ids]
+        for e_id in edge_ids:
+            yield self.edges[e_id]
+
+    def _cell_range(
+        self, min_x: float, min_y: float, max_x: float, max_y: float
+    ) -> List[Tuple[int, int]]:
+        """Grid cells overlapping a rectangle"""
+        size = self.SPATIAL_CELL_SIZE
+        return [
+            (cx, cy)
+            for cx in range(math.floor(min_x / size), math.floor(max_x / size) + 1)
+            for cy in range(math.floor(min_y / size), math.floor(max_y / size) + 1)
+        ]
+
+    def _index_node(self, node: CanvasNode) -> None:
+        """Add a node's bounding box to the spatial index"""
+        x, y = node.position
+        width, height = node.size
+        cells = self._cell_range(x, y, x + width, y + height)
+        for cell in cells:
+            self._cells.setdefault(cell, {})[node.id] = None
+        self._node_cells[node.id] = cells
+
+    def _unindex_node(self, node_id: str) -> None:
+        """Remove a node from the spatial index"""
+        for cell in self._node_cells.pop(node_id, ()):
+            members = self._cells.get(cell)
+            if members is not None:
+                members.pop(node_id, None)
+                if not members:
+                    del self._cells[cell]
+
+    def touch(self) -> None:
+        """Record a change to the canvas (bumps revision and updated_at)"""
+        self.revision += 1
+        self.updated_at = datetime.utcnow().isoformat()
 
     def add_node(self, node: CanvasNode) -> None:
         """Add a node to the canvas"""
+        self._unindex_node(node.id)
         self.nodes[node.id] = node
-        self.updated_at = datetime.utcnow().isoformat()
+        self._index_node(node)
+        self.touch()
 
     def add_edge(self, edge: CanvasEdge) -> None:
         """Add an edge to the canvas"""
@@ -191,8 +277,13 @@ class Canvas:
         if edge.target_id not in self.nodes:
             raise ValueError(f"Target node {edge.target_id} not found")
 
+        previous = self.edges.get(edge.id)
+        if previous is not None:
+            self._unindex_edge(previous)
+
         self.edges[edge.id] = edge
-        self.updated_at = datetime.utcnow().isoformat()
+        self._index_edge(edge)
+        self.touch()
 
     def remove_node(self, node_id: str) -> None:
         """Remove a node from the canvas"""
@@ -200,23 +291,76 @@ class Canvas:
             raise ValueError(f"Node {node_id} not found")
 
         # Remove all edges connected to this node
-        edges_to_remove = [
-            e_id for e_id, e in self.edges.items()
-            if e.source_id == node_id or e.target_id == node_id
-        ]
-        for e_id in edges_to_remove:
-            del self.edges[e_id]
+        edges_to_remove = list(self._adjacent_edges(self._outgoing, node_id, None))
+        edges_to_remove += self._adjacent_edges(self._incoming, node_id, None)
+        for edge in edges_to_remove:
+            if edge.id in self.edges:
+                self._unindex_edge(edge)
+                del self.edges[edge.id]
 
         del self.nodes[node_id]
-        self.updated_at = datetime.utcnow().isoformat()
+        self._unindex_node(node_id)
+        self.touch()
 
     def remove_edge(self, edge_id: str) -> None:
         """Remove an edge from the canvas"""
         if edge_id not in self.edges:
             raise ValueError(f"Edge {edge_id} not found")
 
-        del self.edges[edge_id]
-        self.updated_at = datetime.utcnow().isoformat()
+        self._unindex_edge(self.edges.pop(edge_id))
+        self.touch()
+
+    def move_node(
+        self,
+        node_id: str,
+        position: Optional[Tuple[float, float]] = None,
+        size: Optional[Tuple[float, float]] = None,
+    ) -> None:
+        """Change a node's position and/or size, keeping the spatial index current
+
+        Node geometry must be changed through this method (not by assigning
+        ``node.position``) for region queries to see the new location.
+        """
+        node = self.nodes.get(node_id)
+        if node is None:
+            raise ValueError(f"Node {node_id} not found")
+
+        if position is not None:
+            node.position = position
+        if size is not None:
+            node.size = size
+        self._unindex_node(node_id)
+        self._index_node(node)
+        self.touch()
+
+    def query_region(
+        self, min_x: float, min_y: float, max_x: float, max_y: float
+    ) -> List[CanvasNode]:
+        """Get nodes whose bounding box intersects a rectangle
+
+        Uses the spatial index, falling back to a scan when the rectangle
+        covers more cells than the canvas has nodes.
+        """
+        size = self.SPATIAL_CELL_SIZE
+        cell_count = (
+            (math.floor(max_x / size) - math.floor(min_x / size) + 1)
+            * (math.floor(max_y / size) - math.floor(min_y / size) + 1)
+        )
+        if cell_count > len(self.nodes):
+            candidates = self.nodes.keys()
+        else:
+            candidates = {}
+            for cell in self._cell_range(min_x, min_y, max_x, max_y):
+                candidates.update(self._cells.get(cell, {}))
+
+        result = []
+        for node_id in candidates:
+            node = self.nodes[node_id]
+            x, y = node.position
+            width, height = node.size
+            if x <= max_x and x + width >= min_x and y <= max_y and y + height >= min_y:
+                result.append(node)
+        return result
 
     def get_node(self, node_id: str) -> Optional[CanvasNode]:
         """Get a node by ID"""
@@ -226,16 +370,26 @@ class Canvas:
         """Get an edge by ID"""
         return self.edges.get(edge_id)
 
+    def get_outgoing_edges(
+        self, node_id: str, edge_type: Optional[EdgeType] = None
+    ) -> List[CanvasEdge]:
+        """Get edges leaving a node, optionally of one type"""
+        return list(self._adjacent_edges(self._outgoing, node_id, edge_type))
+
+    def get_incoming_edges(
+        self, node_id: str, edge_type: Optional[EdgeType] = None
+    ) -> List[CanvasEdge]:
+        """Get edges entering a node, optionally of one type"""
+        return list(self._adjacent_edges(self._incoming, node_id, edge_type))
+
     def get_connected_nodes(self, node_id: str) -> List[CanvasNode]:
         """Get all nodes connected to a given node"""
-        connected_ids = set()
+        connected_ids: Dict[str, None] = {}
 
-        # Find edges where this node is source or target
-        for edge in self.edges.values():
-            if edge.source_id == node_id:
-                connected_ids.add(edge.target_id)
-            elif edge.target_id == node_id:
-                connected_ids.add(edge.source_id)
+        for edge in self._adjacent_edges(self._outgoing, node_id, None):
+            connected_ids[edge.target_id] = None
+        for edge in self._adjacent_edges(self._incoming, node_id, None):
+            connected_ids[edge.source_id] = None
 
         return [self.nodes[n_id] for n_id in connected_ids if n_id in self.nodes]
 
@@ -248,25 +402,24 @@ class Canvas:
         return [e for e in self.edges.values() if e.type == edge_type]
 
     def get_causality_chain(self, node_id: str) -> List[CanvasNode]:
-        """Get the chain of cause-effect relationships"""
+        """Get the chain of cause-effect relationships (depth-first order)"""
         chain = []
         visited = set()
+        stack = [node_id]
 
-        def traverse(current_id: str):
+        # Iterative DFS; children are pushed reversed so they pop in edge order
+        while stack:
+            current_id = stack.pop()
             if current_id in visited:
-                return
+                continue
             visited.add(current_id)
 
             if current_id in self.nodes:
                 chain.append(self.nodes[current_id])
 
-            # Find cause-effect edges
-            for edge in self.edges.values():
-                if edge.type == EdgeType.CAUSE_EFFECT:
-                    if edge.source_id == current_id:
-                        traverse(edge.target_id)
+            effects = self._adjacent_edges(self._outgoing, current_id, EdgeType.CAUSE_EFFECT)
+            stack.extend(reversed([e.target_id for e in effects if e.target_id not in visited]))
 
-        traverse(node_id)
         return chain
 
     def to_dict(self) -> Dict:
@@ -309,15 +462,30 @@ class Canvas:
         return canvas
 
 
+class RevisionConflictError(Exception):
+    """A write expected a revision the canvas no longer has."""
+
+
 class CanvasStore:
-    """Store for managing canvases"""
+    """Store for managing canvases (in memory)
+
+    Persistent stores (see ``src.store.canvas_store``) implement the same
+    interface; the ``save_*``/``delete_*`` methods let them write a single
+    node or edge instead of the whole canvas.
+
+    ``save_metadata`` and ``save_batch`` take an ``expected_revision``: the
+    write only happens if the stored canvas is still at that revision, and
+    raises RevisionConflictError otherwise.
+    """
 
     def __init__(self):
         self.canvases: Dict[str, Canvas] = {}
+        # Revision of each canvas as of its last save (canvases are shared objects)
+        self._saved_revisions: Dict[str, int] = {}
 
     def add(self, canvas: Canvas) -> None:
         """Add a canvas to the store"""
-        self.canvases[canvas.id] = canvas
+        self.update(canvas)
 
     def get(self, canvas_id: str) -> Optional[Canvas]:
         """Get a canvas by ID"""
@@ -327,14 +495,64 @@ class CanvasStore:
         """Get all canvases for an investigation"""
         return [c for c in self.canvases.values() if c.investigation_id == investigation_id]
 
+    def get_revision(self, canvas_id: str) -> Optional[int]:
+        """Get a canvas's revision without loading it (None if missing)"""
+        canvas = self.canvases.get(canvas_id)
+        return canvas.revision if canvas else None
+
     def delete(self, canvas_id: str) -> None:
         """Delete a canvas"""
         if canvas_id in self.canvases:
             del self.canvases[canvas_id]
+            self._saved_revisions.pop(canvas_id, None)
 
     def update(self, canvas: Canvas) -> None:
         """Update a canvas"""
         self.canvases[canvas.id] = canvas
+        self._saved_revisions[canvas.id] = canvas.revision
+
+    def save_metadata(self, canvas: Canvas, expected_revision: Optional[int] = None) -> None:
+        """Persist canvas fields after a change"""
+        self._check_revision(canvas.id, expected_revision)
+        self.update(canvas)
+
+    def save_node(self, canvas: Canvas, node: CanvasNode) -> None:
+        """Persist a node added to or updated on a canvas"""
+        self.update(canvas)
+
+    def delete_node(self, canvas: Canvas, node_id: str) -> None:
+        """Persist the removal of a node (and its edges)"""
+        self.update(canvas)
+
+    def save_edge(self, canvas: Canvas, edge: CanvasEdge) -> None:
+        """Persist an edge added to or updated on a canvas"""
+        self.update(canvas)
+
+    def delete_edge(self, canvas: Canvas, edge_id: str) -> None:
+        """Persist the removal of an edge"""
+        self.update(canvas)
+
+    def save_batch(
+        self,
+        canvas: Canvas,
+        node_ids: Iterable[str],
+        edge_ids: Iterable[str],
+        expected_revision: Optional[int] = None,
+    ) -> None:
+        """Persist several node/edge changes at once
+
+        Ids still on the canvas are saved, the others are deleted.
+        """
+        self._check_revision(canvas.id, expected_revision)
+        self.update(canvas)
+
+    def _check_revision(self, canvas_id: str, expected_revision: Optional[int]) -> None:
+        """Raise RevisionConflictError if the last save was not at expected_revision"""
+        if (expected_revision is not None
+                and self._saved_revisions.get(canvas_id) != expected_revision):
+            raise RevisionConflictError(
+                f'Canvas {canvas_id} is no longer at revision {expected_revision}'
+            )
 
     def get_all(self) -> List[Canvas]:
         """Get all canvases"""
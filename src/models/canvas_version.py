@@ -9,11 +9,38 @@ Key Responsibilities:
 - Track changes between versions
 - Support version rollback
 - Provide version comparison
+
+Versions are stored as deltas against the previous version, with a full
+snapshot (keyframe) every ``keyframe_interval`` versions. Reading a version
+replays deltas forward from the nearest keyframe, so memory grows with the
+size of the edits rather than canvas size × version count, and a read costs
+at most ``keyframe_interval - 1`` delta applications. Each canvas's
+versions are kept in a list indexed by version number, so lookups by
+number, the latest version and the count are O(1) (by number, a binary
+search once retention has squashed versions), and history is read as
+cursor-paged slices.
+
+A ``RetentionPolicy`` bounds history: older versions are squashed into the
+next version that is kept (their change lists are merged into it), and the
+kept versions are re-encoded. Retention runs a few canvases at a time,
+either when called or from a background thread (``RetentionRunner``).
+
+Comparing two versions fingerprints every node, edge and top-level field
+by a hash of its canonical JSON, so the comparison is one pass over each
+snapshot and only elements whose hashes differ are inspected field by
+field. Fingerprints and diffs are cached, since versions never change.
 """
 
-from dataclasses import dataclass, field, asdict
-from datetime import datetime
-from typing import Dict, List, Optional, Any
+import copy
+import hashlib
+import json
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from collections.abc import Hashable
+from dataclasses import dataclass, field, asdict, replace
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any, Sequence, Tuple
 from enum import Enum
 from uuid import uuid4
 
@@ -60,6 +87,7 @@ class CanvasVersion:
     author: str
     timestamp: datetime = field(default_factory=datetime.utcnow)
     message: str = ""
+    tags: List[str] = field(default_factory=list)  # Tagged versions are never squashed
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary."""
@@ -73,6 +101,7 @@ class CanvasVersion:
             'author': self.author,
             'timestamp': self.timestamp.isoformat(),
             'message': self.message,
+            'tags': list(self.tags),
         }
     
     @classmethod
@@ -91,23 +120,402 @@ class CanvasVersion:
         return cls(**data)
 
 
+# ----------------------------------------------------------------------
+# Snapshot deltas
+# ----------------------------------------------------------------------
+
+_IMMUTABLE_SCALARS = (str, int, float, bool, type(None))
+
+
+def _clone(value: Any) -> Any:
+    """Deep copy of JSON-like data (much faster than copy.deepcopy for it)."""
+    if isinstance(value, dict):
+        return {key: _clone(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_clone(item) for item in value]
+    if isinstance(value, _IMMUTABLE_SCALARS):
+        return value
+    return copy.deepcopy(value)
+
+
+def is_keyed_list(value: Any) -> bool:
+    """True for a list of dicts with distinct hashable 'id's (e.g. canvas nodes/edges)."""
+    if not isinstance(value, list):
+        return False
+    ids = set()
+    for item in value:
+        if not isinstance(item, dict) or not isinstance(item.get('id'), Hashable):
+            return False
+        ids.add(item['id'])
+    return len(ids) == len(value)
+
+
+def diff_snapshots(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Compute the delta that turns snapshot ``old`` into ``new``.
+    
+    Top-level keys that changed are stored whole, except keyed lists
+    (lists of dicts with an 'id'), which store only the items added,
+    changed or removed, plus the new order if it is not the natural one.
+    
+    Returns:
+        Delta dictionary for ``apply_delta``
+    """
+    delta: Dict[str, Any] = {}
+    for key, value in new.items():
+        if key in old and old[key] == value:
+            continue
+        if key in old and is_keyed_list(old[key]) and is_keyed_list(value):
+            delta.setdefault('lists', {})[key] = _diff_keyed_list(old[key], value)
+        else:
+            delta.setdefault('set', {})[key] = value
+    removed = [key for key in old if key not in new]
+    if removed:
+        delta['unset'] = removed
+    return delta
+
+
+def _diff_keyed_list(old: List[Dict], new: List[Dict]) -> Dict[str, Any]:
+    old_by_id = {item['id']: item for item in old}
+    new_ids = [item['id'] for item in new]
+    new_id_set = set(new_ids)
+
+    change: Dict[str, Any] = {
+        'upsert': [item for item in new if old_by_id.get(item['id']) != item],
+        'remove': [item_id for item_id in old_by_id if item_id not in new_id_set],
+    }
+    # apply_delta keeps surviving items in place and appends new ones
+    natural = [i for i in old_by_id if i in new_id_set] + [i for i in new_ids if i not in old_by_id]
+    if natural != new_ids:
+        change['order'] = new_ids
+    return change
+
+
+def apply_delta(snapshot: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply a ``diff_snapshots`` delta, returning a new snapshot.
+    
+    The input snapshot is not modified; unchanged values are shared with it.
+    """
+    result = dict(snapshot)
+    for key in delta.get('unset', ()):
+        result.pop(key, None)
+    result.update(delta.get('set', {}))
+    for key, change in delta.get('lists', {}).items():
+        by_id = {item['id']: item for item in result.get(key, [])}
+        for item_id in change['remove']:
+            del by_id[item_id]
+        for item in change['upsert']:
+            by_id[item['id']] = item
+        if 'order' in change:
+            result[key] = [by_id[item_id] for item_id in change['order']]
+        else:
+            result[key] = list(by_id.values())
+    return result
+
+
+# ----------------------------------------------------------------------
+# Structural diffs
+# ----------------------------------------------------------------------
+
+def content_hash(value: Any) -> str:
+    """SHA-256 of the canonical JSON form of a value."""
+    payload = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def fingerprint_snapshot(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """Hash every top-level field and every item of every keyed list.
+    
+    Returns:
+        ``{'fields': {key: hash}, 'lists': {key: {item_id: hash}}}``
+        (list item dicts keep the snapshot's order)
+    """
+    fingerprint: Dict[str, Any] = {'fields': {}, 'lists': {}}
+    for key, value in snapshot.items():
+        if isinstance(value, list) and value and is_keyed_list(value):
+            fingerprint['lists'][key] = {item['id']: content_hash(item) for item in value}
+        else:
+            fingerprint['fields'][key] = content_hash(value)
+    return fingerprint
+
+
+def compare_fingerprints(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Find what differs between two ``fingerprint_snapshot`` results.
+    
+    Only hashes are compared. A keyed list that is missing (or empty) on one
+    side counts as having no items.
+    
+    Returns:
+        ``{'fields': [changed keys], 'lists': {key: {'added': [ids],
+        'removed': [ids], 'modified': [ids]}}}``
+    """
+    old_fields, new_fields = old['fields'], new['fields']
+    changed = [key for key in new_fields if old_fields.get(key) != new_fields[key]]
+    changed += [key for key in old_fields if key not in new_fields]
+    
+    lists: Dict[str, Any] = {}
+    for key in list(new['lists']) + [k for k in old['lists'] if k not in new['lists']]:
+        before = old['lists'].get(key, {})
+        after = new['lists'].get(key, {})
+        lists[key] = {
+            'added': [item_id for item_id in after if item_id not in before],
+            'removed': [item_id for item_id in before if item_id not in after],
+            'modified': [
+                item_id for item_id, digest in after.items()
+                if item_id in before and before[item_id] != digest
+            ],
+        }
+    # A list key that became empty on one side shows up as a plain field too
+    changed = [key for key in changed if key not in lists]
+    return {'fields': changed, 'lists': lists}
+
+
+def field_changes(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Per-field ``{'old', 'new'}`` values for two versions of one item."""
+    return {
+        name: {'old': old.get(name), 'new': new.get(name)}
+        for name in list(new) + [n for n in old if n not in new]
+        if name not in old or name not in new or old[name] != new[name]
+    }
+
+
+def describe_diff(
+    comparison: Dict[str, Any],
+    old_fields: Dict[str, Any],
+    new_fields: Dict[str, Any],
+    old_items: Dict[str, Dict[Any, Dict[str, Any]]],
+    new_items: Dict[str, Dict[Any, Dict[str, Any]]],
+) -> Dict[str, Any]:
+    """Expand a ``compare_fingerprints`` result into a readable diff.
+    
+    Args:
+        comparison: Output of ``compare_fingerprints``
+        old_fields: Top-level values of the old snapshot
+        new_fields: Top-level values of the new snapshot
+        old_items: ``{list key: {item_id: item}}`` for (at least) the
+            removed and modified items of the old snapshot
+        new_items: Same for the added and modified items of the new snapshot
+    
+    Returns:
+        ``{'fields': {key: {'old', 'new'}}, <list key>: {'added': [items],
+        'removed': [items], 'modified': [{'id', 'fields'}]}, 'summary': counts}``
+    """
+    diff: Dict[str, Any] = {
+        'fields': {
+            key: {'old': old_fields.get(key), 'new': new_fields.get(key)}
+            for key in comparison['fields']
+        },
+    }
+    summary = {'fields': len(comparison['fields'])}
+    for key, ids in comparison['lists'].items():
+        before = old_items.get(key, {})
+        after = new_items.get(key, {})
+        diff[key] = {
+            'added': [after[item_id] for item_id in ids['added']],
+            'removed': [before[item_id] for item_id in ids['removed']],
+            'modified': [
+                {'id': item_id, 'fields': field_changes(before[item_id], after[item_id])}
+                for item_id in ids['modified']
+            ],
+        }
+        for kind in ('added', 'removed', 'modified'):
+            summary[f'{key}_{kind}'] = len(ids[kind])
+    diff['summary'] = summary
+    return diff
+
+
+def _split_snapshot(snapshot: Dict[str, Any]):
+    """Top-level fields and ``{list key: {item_id: item}}`` of a snapshot."""
+    fields, items = {}, {}
+    for key, value in snapshot.items():
+        if isinstance(value, list) and value and is_keyed_list(value):
+            items[key] = {item['id']: item for item in value}
+        else:
+            fields[key] = value
+    return fields, items
+
+
+# ----------------------------------------------------------------------
+# Retention
+# ----------------------------------------------------------------------
+
+@dataclass
+class RetentionPolicy:
+    """Which versions of a canvas survive squashing.
+    
+    A version is kept if it is one of the latest ``keep_last``, is tagged,
+    is younger than ``hourly_after``, or is the latest version of its hour.
+    If ``max_versions`` is set, the oldest untagged versions outside the
+    latest ``keep_last`` are squashed as well until the canvas is within it.
+    """
+    
+    keep_last: int = 50
+    hourly_after: timedelta = timedelta(days=1)
+    max_versions: Optional[int] = None
+    
+    def __post_init__(self):
+        if self.keep_last < 1:
+            raise ValueError("keep_last must be at least 1")
+        if self.max_versions is not None and self.max_versions < self.keep_last:
+            raise ValueError("max_versions must be at least keep_last")
+    
+    def retained(self, versions: Sequence[Tuple[datetime, bool]], now: datetime) -> List[bool]:
+        """Decide which versions to keep.
+        
+        Args:
+            versions: ``(timestamp, tagged)`` per version, oldest first
+            now: Current time
+        
+        Returns:
+            One flag per version; the latest version is always kept
+        """
+        count = len(versions)
+        protected = max(0, count - self.keep_last)
+        keep = [index >= protected or tagged for index, (_, tagged) in enumerate(versions)]
+        
+        cutoff = now - self.hourly_after
+        latest_in_hour: Dict[datetime, int] = {}
+        for index, (timestamp, _) in enumerate(versions[:protected]):
+            if timestamp > cutoff:
+                keep[index] = True
+            else:
+                latest_in_hour[timestamp.replace(minute=0, second=0, microsecond=0)] = index
+        for index in latest_in_hour.values():
+            keep[index] = True
+        
+        if self.max_versions is not None:
+            excess = sum(keep) - self.max_versions
+            for index in range(protected):
+                if excess <= 0:
+                    break
+                if keep[index] and not versions[index][1]:
+                    keep[index] = False
+                    excess -= 1
+        return keep
+
+
+class RetentionRunner:
+    """Calls a version store's ``apply_retention`` from a background thread.
+    
+    Works with any store that has ``apply_retention(max_canvases=...)``.
+    Each pass handles at most ``max_canvases`` canvases, so a store with
+    many canvases is worked through over several passes.
+    """
+    
+    def __init__(self, store: Any, interval: float = 60.0, max_canvases: int = 10):
+        """Initialize the runner.
+        
+        Args:
+            store: Version store with a retention policy
+            interval: Seconds between passes
+            max_canvases: Canvases processed per pass
+        """
+        self.store = store
+        self.interval = interval
+        self.max_canvases = max_canvases
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self) -> None:
+        """Start the background thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="version-retention", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the background thread.
+        
+        Args:
+            timeout: Maximum seconds to wait for the current pass to finish
+        """
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.store.apply_retention(max_canvases=self.max_canvases)
+
+
+@dataclass
+class _VersionRecord:
+    """A stored version: metadata plus a keyframe or a delta."""
+    
+    version_id: str
+    canvas_id: str
+    version_number: int
+    previous_version_id: Optional[str]
+    changes: List[Change]
+    author: str
+    timestamp: datetime
+    message: str
+    keyframe: Optional[Dict[str, Any]] = None  # Full snapshot
+    delta: Optional[Dict[str, Any]] = None  # Change from the previous version
+    tags: List[str] = field(default_factory=list)
+    
+    def materialize(self, data: Dict[str, Any]) -> CanvasVersion:
+        """Build the public version object for this record's snapshot."""
+        return CanvasVersion(
+            version_id=self.version_id,
+            canvas_id=self.canvas_id,
+            version_number=self.version_number,
+            previous_version_id=self.previous_version_id,
+            data=data,
+            changes=self.changes,
+            author=self.author,
+            timestamp=self.timestamp,
+            message=self.message,
+            tags=list(self.tags),
+        )
+
+
 class VersionStore:
     """
     Manages canvas versions with full history tracking.
     
     Provides:
-    - Version creation and storage
+    - Version creation and storage (delta-encoded, with keyframes)
     - Version retrieval and listing
     - Rollback capabilities
     - Version comparison
+    - Retention (squashing old versions) and tagging
     """
     
-    def __init__(self):
-        """Initialize version store."""
-        self.versions: Dict[str, CanvasVersion] = {}
-        self.canvas_versions: Dict[str, List[str]] = {}  # canvas_id -> [version_ids]
-        self.version_counter: Dict[str, int] = {}  # canvas_id -> next version number
-    
+    def __init__(
+        self,
+        keyframe_interval: int = 50,
+        diff_cache_size: int = 128,
+        retention: Optional[RetentionPolicy] = None,
+    ):
+        """Initialize version store.
+        
+        Args:
+            keyframe_interval: Store a full snapshot every this many versions
+                of a canvas (1 stores every version in full)
+            diff_cache_size: Number of version fingerprints and of version
+                diffs kept for repeated comparisons
+            retention: Policy applied by ``apply_retention`` (None keeps
+                every version)
+        """
+        if keyframe_interval < 1:
+            raise ValueError("keyframe_interval must be at least 1")
+        self.keyframe_interval = keyframe_interval
+        self.retention = retention
+        self.versions: Dict[str, _VersionRecord] = {}
+        # canvas_id -> records in version order; version N is at index N - 1
+        # until retention squashes versions, then found by binary search
+        self.canvas_versions: Dict[str, List[_VersionRecord]] = {}
+        self._heads: Dict[str, Dict[str, Any]] = {}  # canvas_id -> latest snapshot
+        self.diff_cache_size = diff_cache_size
+        self._fingerprints: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._diffs: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        
+        self._lock = threading.RLock()
+        self._retention_queue: "OrderedDict[str, None]" = OrderedDict()  # Canvases to check next
+
     def create_version(
         self,
         canvas_id: str,
@@ -129,64 +537,80 @@ class VersionStore:
         Returns:
             CanvasVersion: The created version
         """
-        if canvas_id not in self.version_counter:
-            self.version_counter[canvas_id] = 1
-        else:
-            self.version_counter[canvas_id] += 1
-        
-        version_number = self.version_counter[canvas_id]
-        previous_version_id = None
-        
-        # Get the previous version ID if versions exist
-        if canvas_id in self.canvas_versions and self.canvas_versions[canvas_id]:
-            previous_version_id = self.canvas_versions[canvas_id][-1]
+        # Copy so later changes to the caller's dict can't alter history
+        snapshot = _clone(canvas_data)
+        with self._lock:
+            return self._append(canvas_id, canvas_data, snapshot, changes, author, message)
+    
+    def _append(self, canvas_id, canvas_data, snapshot, changes, author, message) -> CanvasVersion:
+        records = self.canvas_versions.setdefault(canvas_id, [])
+        version_number = records[-1].version_number + 1 if records else 1
+        previous_version_id = records[-1].version_id if records else None
         
-        version = CanvasVersion(
+        record = _VersionRecord(
             version_id=str(uuid4()),
             canvas_id=canvas_id,
             version_number=version_number,
             previous_version_id=previous_version_id,
-            data=canvas_data,
             changes=changes,
             author=author,
+            timestamp=datetime.utcnow(),
             message=message,
         )
+        if len(records) % self.keyframe_interval == 0:
+            record.keyframe = snapshot
+        else:
+            record.delta = diff_snapshots(self._heads[canvas_id], snapshot)
         
-        self.versions[version.version_id] = version
-        
-        if canvas_id not in self.canvas_versions:
-            self.canvas_versions[canvas_id] = []
-        self.canvas_versions[canvas_id].append(version.version_id)
+        self.versions[record.version_id] = record
+        records.append(record)
+        self._heads[canvas_id] = snapshot
+        if self.retention is not None and len(records) > self.retention.keep_last:
+            self._retention_queue[canvas_id] = None
         
-        return version
+        return record.materialize(canvas_data)
     
     def get_version(self, version_id: str) -> Optional[CanvasVersion]:
         """Get a specific version."""
-        return self.versions.get(version_id)
+        with self._lock:
+            record = self.versions.get(version_id)
+            if record is None:
+                return None
+            return record.materialize(self._reconstruct(record))
     
     def get_canvas_versions(self, canvas_id: str) -> List[CanvasVersion]:
         """Get all versions of a canvas."""
-        version_ids = self.canvas_versions.get(canvas_id, [])
-        versions = [self.versions[vid] for vid in version_ids]
-        return versions
+        with self._lock:
+            return [
+                record.materialize(_clone(state))
+                for record, state in self._replay(self.canvas_versions.get(canvas_id, []))
+            ]
     
     def get_latest_version(self, canvas_id: str) -> Optional[CanvasVersion]:
         """Get the latest version of a canvas."""
-        versions = self.get_canvas_versions(canvas_id)
-        return versions[-1] if versions else None
+        with self._lock:
+            records = self.canvas_versions.get(canvas_id)
+            if not records:
+                return None
+            return records[-1].materialize(_clone(self._heads[canvas_id]))
     
     def get_version_by_number(self, canvas_id: str, version_number: int) -> Optional[CanvasVersion]:
-        """Get a specific version by number."""
-        versions = self.get_canvas_versions(canvas_id)
-        for v in versions:
-            if v.version_number == version_number:
-                return v
-        return None
-    
+        """Get a specific version by number (None if unknown or squashed)."""
+        with self._lock:
+            records = self.canvas_versions.get(canvas_id, [])
+            position = _position(records, version_number)
+            if position is None:
+                return None
+            record = records[position]
+            return record.materialize(self._reconstruct(record))
+
     def rollback(self, canvas_id: str, version_id: str) -> Optional[Dict[str, Any]]:
         """
         Rollback canvas to a specific version.
         
+        Rolling back to the latest version returns the current state as is;
+        nothing is replayed.
+        
         Args:
             canvas_id: Canvas to rollback
             version_id: Version to rollback to
@@ -194,35 +618,58 @@ class VersionStore:
         Returns:
             Canvas data from that version, or None if not found
         """
-        version = self.get_version(version_id)
-        if not version or version.canvas_id != canvas_id:
-            return None
-        return version.data
+        with self._lock:
+            record = self.versions.get(version_id)
+            if not record or record.canvas_id != canvas_id:
+                return None
+            if record is self.canvas_versions[canvas_id][-1]:
+                return _clone(self._heads[canvas_id])
+            return self._reconstruct(record)
     
     def get_version_diff(self, version_id1: str, version_id2: str) -> Dict[str, Any]:
         """
         Compare two versions.
         
+        Any two versions can be compared, in either order. The structural
+        part lists nodes and edges added, removed or modified (with
+        field-level old/new values) going from version 1 to version 2.
+        
         Args:
             version_id1: First version
             version_id2: Second version
         
         Returns:
-            Dictionary with differences
+            Dictionary with differences (a copy; the cached diff is not exposed)
         """
-        v1 = self.get_version(version_id1)
-        v2 = self.get_version(version_id2)
-        
-        if not v1 or not v2:
-            return {}
-        
-        return {
-            'version1_id': version_id1,
-            'version1_number': v1.version_number,
-            'version2_id': version_id2,
-            'version2_number': v2.version_number,
-            'changes': [c.to_dict() for c in v2.changes],  # Changes from v1 to v2
-        }
+        with self._lock:
+            v1 = self.versions.get(version_id1)
+            v2 = self.versions.get(version_id2)
+            
+            if not v1 or not v2:
+                return {}
+            
+            key = (version_id1, version_id2)
+            cached = _cache_get(self._diffs, key)
+            if cached is not None:
+                return _clone(cached)
+            
+            old, new = self._reconstruct(v1), self._reconstruct(v2)
+            comparison = compare_fingerprints(
+                self._fingerprint(v1, old), self._fingerprint(v2, new),
+            )
+            old_fields, old_items = _split_snapshot(old)
+            new_fields, new_items = _split_snapshot(new)
+            
+            diff = {
+                'version1_id': version_id1,
+                'version1_number': v1.version_number,
+                'version2_id': version_id2,
+                'version2_number': v2.version_number,
+                'changes': [c.to_dict() for c in self._changes_between(v1, v2)],
+            }
+            diff.update(describe_diff(comparison, old_fields, new_fields, old_items, new_items))
+            _cache_put(self._diffs, key, diff, self.diff_cache_size)
+            return _clone(diff)
     
     def get_version_history(self, canvas_id: str, limit: int = 10) -> List[Dict[str, Any]]:
         """
@@ -235,25 +682,41 @@ class VersionStore:
         Returns:
             List of version summaries
         """
-        versions = self.get_canvas_versions(canvas_id)
-        
-        # Return latest versions first
-        history = []
-        for version in reversed(versions[-limit:]):
-            history.append({
-                'version_id': version.version_id,
-                'version_number': version.version_number,
-                'author': version.author,
-                'timestamp': version.timestamp.isoformat(),
-                'message': version.message,
-                'changes_count': len(version.changes),
-            })
-        
-        return history
+        return self.get_version_history_page(canvas_id, limit=limit)['versions']
+    
+    def get_version_history_page(
+        self,
+        canvas_id: str,
+        limit: int = 10,
+        cursor: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Get one page of version history, latest first.
+        
+        Args:
+            canvas_id: Canvas to get history for
+            limit: Maximum number of versions to return
+            cursor: ``next_cursor`` of the previous page (None = latest)
+        
+        Returns:
+            Dictionary with 'versions' (summaries) and 'next_cursor'
+            (None on the last page)
+        """
+        with self._lock:
+            records = self.canvas_versions.get(canvas_id, [])
+            # The cursor is the version number the next page ends before
+            end = len(records) if cursor is None else _insertion_point(records, cursor)
+            start = max(0, end - max(limit, 0))
+            
+            history = [_summary(records[i]) for i in range(end - 1, start - 1, -1)]
+            return {
+                'versions': history,
+                'next_cursor': records[start].version_number if start > 0 else None,
+            }
     
     def get_version_count(self, canvas_id: str) -> int:
         """Get total version count for a canvas."""
-        return len(self.get_canvas_versions(canvas_id))
+        return len(self.canvas_versions.get(canvas_id, ()))
     
     def compare_with_latest(self, canvas_id: str, version_id: str) -> Dict[str, Any]:
         """
@@ -266,11 +729,13 @@ class VersionStore:
         Returns:
             Comparison result
         """
-        version = self.get_version(version_id)
-        latest = self.get_latest_version(canvas_id)
-        
-        if not version or not latest:
-            return {}
+        with self._lock:
+            version = self.versions.get(version_id)
+            records = self.canvas_versions.get(canvas_id)
+            
+            if not version or not records:
+                return {}
+            latest = records[-1]
         
         return {
             'comparing_version': version_id,
@@ -279,3 +744,214 @@ class VersionStore:
             'latest_number': latest.version_number,
             'versions_ahead': latest.version_number - version.version_number,
         }
+    
+    def tag_version(self, version_id: str, tag: str) -> bool:
+        """Tag a version, which exempts it from retention.
+        
+        Returns:
+            True if the version exists
+        """
+        with self._lock:
+            record = self.versions.get(version_id)
+            if record is None:
+                return False
+            if tag not in record.tags:
+                record.tags.append(tag)
+            return True
+    
+    def untag_version(self, version_id: str, tag: str) -> bool:
+        """Remove a tag from a version.
+        
+        Returns:
+            True if the version had the tag
+        """
+        with self._lock:
+            record = self.versions.get(version_id)
+            if record is None or tag not in record.tags:
+                return False
+            record.tags.remove(tag)
+            if self.retention is not None:
+                self._retention_queue[record.canvas_id] = None
+            return True
+    
+    def apply_retention(
+        self,
+        canvas_id: Optional[str] = None,
+        max_canvases: Optional[int] = None,
+        now: Optional[datetime] = None,
+    ) -> int:
+        """
+        Squash versions the retention policy does not keep.
+        
+        Without ``canvas_id``, canvases that gained versions since they were
+        last checked go first; when none are pending, every canvas with more
+        than ``keep_last`` versions is queued again (versions age into the
+        hourly rule without any new writes).
+        
+        Args:
+            canvas_id: Only this canvas
+            max_canvases: Most canvases processed by this call (None = all
+                queued)
+            now: Current time (for testing)
+        
+        Returns:
+            Number of versions removed
+        """
+        if self.retention is None:
+            return 0
+        now = now or datetime.utcnow()
+        
+        if canvas_id is not None:
+            with self._lock:
+                self._retention_queue.pop(canvas_id, None)
+                return self._squash(canvas_id, now)
+        
+        with self._lock:
+            if not self._retention_queue:
+                self._retention_queue.update(
+                    (cid, None) for cid, records in self.canvas_versions.items()
+                    if len(records) > self.retention.keep_last
+                )
+        
+        removed = 0
+        processed = 0
+        while max_canvases is None or processed < max_canvases:
+            # One canvas per lock hold, so writers are not blocked for long
+            with self._lock:
+                if not self._retention_queue:
+                    break
+                next_id, _ = self._retention_queue.popitem(last=False)
+                removed += self._squash(next_id, now)
+            processed += 1
+        return removed
+    
+    def _squash(self, canvas_id: str, now: datetime) -> int:
+        """Apply the retention policy to one canvas (lock held)."""
+        records = self.canvas_versions.get(canvas_id)
+        if not records:
+            return 0
+        keep = self.retention.retained([(r.timestamp, bool(r.tags)) for r in records], now)
+        if all(keep):
+            return 0
+        
+        survivors: List[_VersionRecord] = []
+        previous_state: Optional[Dict[str, Any]] = None
+        merged: List[Change] = []
+        for (record, state), kept in zip(self._replay(records), keep):
+            if not kept:
+                merged.extend(record.changes)
+                del self.versions[record.version_id]
+                self._fingerprints.pop(record.version_id, None)
+                continue
+            
+            # Re-encode against the new predecessor; keyframe spacing follows
+            # positions in the squashed list
+            survivor = replace(
+                record,
+                previous_version_id=survivors[-1].version_id if survivors else None,
+                changes=merged + record.changes if merged else record.changes,
+                keyframe=None,
+                delta=None,
+            )
+            if len(survivors) % self.keyframe_interval == 0:
+                survivor.keyframe = state
+            else:
+                survivor.delta = diff_snapshots(previous_state, state)
+            merged = []
+            survivors.append(survivor)
+            self.versions[survivor.version_id] = survivor
+            previous_state = state
+        
+        self.canvas_versions[canvas_id] = survivors
+        # Cached diffs of this canvas may now report merged change lists
+        for key in [k for k, diff in self._diffs.items()
+                    if k[0] not in self.versions or k[1] not in self.versions
+                    or self.versions[k[0]].canvas_id == canvas_id]:
+            del self._diffs[key]
+        return len(records) - len(survivors)
+    
+    def _replay(self, records: List[_VersionRecord]):
+        """Yield (record, snapshot) in order; snapshots are shared, not copied."""
+        state: Dict[str, Any] = {}
+        for record in records:
+            if record.keyframe is not None:
+                state = record.keyframe
+            else:
+                state = apply_delta(state, record.delta)
+            yield record, state
+    
+    def _fingerprint(self, record: _VersionRecord, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        """Cached ``fingerprint_snapshot`` of a version."""
+        fingerprint = _cache_get(self._fingerprints, record.version_id)
+        if fingerprint is None:
+            fingerprint = fingerprint_snapshot(snapshot)
+            _cache_put(self._fingerprints, record.version_id, fingerprint, self.diff_cache_size)
+        return fingerprint
+    
+    def _changes_between(self, v1: _VersionRecord, v2: _VersionRecord) -> List[Change]:
+        """Recorded changes after ``v1`` up to and including ``v2`` (same canvas)."""
+        if v1.canvas_id != v2.canvas_id:
+            return []
+        records = self.canvas_versions[v1.canvas_id]
+        low, high = sorted((
+            _position(records, v1.version_number),
+            _position(records, v2.version_number),
+        ))
+        return [c for i in range(low + 1, high + 1) for c in records[i].changes]
+    
+    def _reconstruct(self, record: _VersionRecord) -> Dict[str, Any]:
+        """Snapshot of a version, replayed from the nearest earlier keyframe."""
+        records = self.canvas_versions[record.canvas_id]
+        position = _position(records, record.version_number)
+
+        start = position
+        while records[start].keyframe is None:
+            start -= 1
+        
+        state = records[start].keyframe
+        for i in range(start + 1, position + 1):
+            state = apply_delta(state, records[i].delta)
+        return _clone(state)
+
+
+def _insertion_point(records: List[_VersionRecord], version_number: int) -> int:
+    """Index of the first record numbered ``version_number`` or higher."""
+    index = version_number - 1
+    if 0 <= index < len(records) and records[index].version_number == version_number:
+        return index  # No squashed versions before this one
+    return bisect_left(records, version_number, key=lambda r: r.version_number)
+
+
+def _position(records: List[_VersionRecord], version_number: int) -> Optional[int]:
+    """Index of the record numbered ``version_number``, if it exists."""
+    index = _insertion_point(records, version_number)
+    if index < len(records) and records[index].version_number == version_number:
+        return index
+    return None
+
+
+def _summary(record: _VersionRecord) -> Dict[str, Any]:
+    """History entry for a version (no snapshot)."""
+    return {
+        'version_id': record.version_id,
+        'version_number': record.version_number,
+        'author': record.author,
+        'timestamp': record.timestamp.isoformat(),
+        'message': record.message,
+        'changes_count': len(record.changes),
+        'tags': list(record.tags),
+    }
+
+
+def _cache_get(cache: "OrderedDict", key: Any) -> Any:
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+
+def _cache_put(cache: "OrderedDict", key: Any, value: Any, size: int) -> None:
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > size:
+        cache.popitem(last=False)
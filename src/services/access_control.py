@@ -11,12 +11,41 @@ Key Responsibilities:
 - Manage user role assignments
 - Support resource-level permissions
 - Track permission history
+
+Permissions are also encoded as bits of an integer mask (``Permission.bit``),
+and each role carries the mask of its permissions, so combining roles is a
+bitwise OR and a permission test is a bitwise AND. The enum and permission
+sets remain the public API.
+
+Each user's effective permissions (globally and per resource) are computed
+once from their assignments and cached as masks, so a permission check is
+a dict lookup and an AND. The cache entry is rebuilt when the user's roles
+are assigned, revoked or expire, and when one of the roles it was built
+from changes.
+
+Time-bound assignments are kept in a min-heap ordered by expiry.
+``expire_assignments`` pops the due ones, deactivates them and invalidates
+the affected users' cache entries. Reads compare the current time with the
+heap's earliest expiry only, and expire due assignments before answering.
+``compact_history`` drops assignments that ended before the history
+retention window. ``ExpiryScheduler`` runs both from a background thread,
+so expiry and compaction also happen for users nobody checks.
+
+With a ``store`` (e.g. ``SQLiteRoleAssignmentStore``), assignments persist
+and are shared between processes. The in-memory assignments are a
+write-through cache: changes are written to the store as they are made, and
+reads first compare the store's change version with the last one applied
+(at most once per ``sync_interval``), fetching only rows written since.
 """
 
+import heapq
+import itertools
+import threading
+import time
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Dict, List, Optional, Set, Tuple
-from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from datetime import datetime, timedelta
 from uuid import uuid4
 
 
@@ -59,6 +88,33 @@ class Permission(str, Enum):
     
     # Admin permissions
     ADMIN_ALL = "admin:*"
+    
+    @property
+    def bit(self) -> int:
+        """This permission's bit in a permission mask."""
+        return _PERMISSION_BITS[self]
+
+
+_PERMISSION_BITS: Dict[Permission, int] = {
+    permission: 1 << index for index, permission in enumerate(Permission)
+}
+
+ALL_PERMISSIONS_MASK = (1 << len(Permission)) - 1
+
+
+def permissions_to_mask(permissions: Iterable[Permission]) -> int:
+    """Encode permissions as a mask (ADMIN_ALL sets every bit)."""
+    mask = 0
+    for permission in permissions:
+        mask |= _PERMISSION_BITS[permission]
+    if mask & _PERMISSION_BITS[Permission.ADMIN_ALL]:
+        return ALL_PERMISSIONS_MASK
+    return mask
+
+
+def mask_to_permissions(mask: int) -> Set[Permission]:
+    """Decode a mask into the permissions whose bits are set."""
+    return {permission for permission, bit in _PERMISSION_BITS.items() if mask & bit}
 
 
 @dataclass
@@ -66,23 +122,30 @@ class RoleDefinition:
     """Definition of a role and its permissions."""
     name: Role
     description: str
-    permissions: Set[Permission]
+    permissions: Set[Permission]  # Change through add/remove_permission to keep mask in sync
     is_custom: bool = False
+    revision: int = field(default=0, compare=False)  # Bumped when permissions change
+    mask: int = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.mask = permissions_to_mask(self.permissions)
     
     def has_permission(self, permission: Permission) -> bool:
         """Check if role has a permission."""
-        # Admin role has all permissions
-        if Permission.ADMIN_ALL in self.permissions:
-            return True
-        return permission in self.permissions
+        # Admin role has all permissions (its mask has every bit set)
+        return bool(self.mask & permission.bit)
     
     def add_permission(self, permission: Permission) -> None:
         """Add a permission to the role."""
         self.permissions.add(permission)
+        self.mask = permissions_to_mask(self.permissions)
+        self.revision += 1
     
     def remove_permission(self, permission: Permission) -> None:
         """Remove a permission from the role."""
         self.permissions.discard(permission)
+        self.mask = permissions_to_mask(self.permissions)
+        self.revision += 1
 
 
 @dataclass
@@ -96,6 +159,23 @@ class RoleAssignment:
     assigned_by: str
     expires_at: Optional[datetime] = None
     is_active: bool = True
+    ended_at: Optional[datetime] = None  # When revoked or expired
+
+
+@dataclass
+class _EffectivePermissions:
+    """A user's permission masks, precomputed from their active assignments."""
+    any_scope: int  # From every assignment (checks without a resource)
+    global_scope: int  # From global assignments
+    by_resource: Dict[str, int]  # Resource assignments plus global ones
+    roles: Tuple[Tuple[Role, RoleDefinition, int], ...]  # (role, definition, revision) used
+    
+    def is_current(self, role_definitions: Dict[Role, RoleDefinition]) -> bool:
+        """True unless a role used has changed."""
+        return all(
+            role_definitions.get(role) is definition and definition.revision == revision
+            for role, definition, revision in self.roles
+        )
 
 
 class AccessControl:
@@ -109,13 +189,42 @@ class AccessControl:
     - Principle of least privilege
     """
     
-    def __init__(self):
-        """Initialize access control with default roles."""
+    def __init__(
+        self,
+        history_retention: timedelta = timedelta(days=30),
+        store: Optional[Any] = None,
+        sync_interval: float = 1.0,
+    ):
+        """Initialize access control with default roles.
+        
+        Args:
+            history_retention: How long ended assignments stay in the history
+            store: Assignment store shared with other processes (None keeps
+                assignments in memory only)
+            sync_interval: Most seconds between checks for changes in the store
+        """
         self.role_definitions: Dict[Role, RoleDefinition] = {}
         self.user_roles: Dict[str, List[RoleAssignment]] = {}
         self.assignment_history: List[RoleAssignment] = []
+        self.history_retention = history_retention
+        self.store = store
+        self.sync_interval = sync_interval
+        self._assignments_by_id: Dict[str, RoleAssignment] = {}
+        self._permission_cache: Dict[str, _EffectivePermissions] = {}
+        # Min-heap of (expires_at, sequence, assignment) for time-bound assignments
+        self._expirations: List[Tuple[datetime, int, RoleAssignment]] = []
+        self._expiry_sequence = itertools.count()
+        self._lock = threading.RLock()
+        self._store_version = 0  # Last store change applied to the cache
+        self._last_sync = 0.0
         self._init_default_roles()
-    
+        
+        if store is not None:
+            self._store_version = store.get_change_version()
+            for assignment in store.get_all_assignments():
+                self._apply_stored(assignment)
+            self._last_sync = time.monotonic()
+
     def _init_default_roles(self) -> None:
         """Initialize predefined system roles."""
         
@@ -191,29 +300,226 @@ class AccessControl:
         Returns:
             True if user has permission, False otherwise
         """
-        assignments = self.user_roles.get(user_id, [])
+        effective = self._effective_permissions(user_id)
+        if resource_id:
+            # Global assignments apply to every resource
+            allowed = effective.by_resource.get(resource_id, effective.global_scope)
+        else:
+            allowed = effective.any_scope
+        return bool(allowed & permission.bit)
+    
+    def filter_authorized(
+        self,
+        user_id: str,
+        permission: Permission,
+        resource_ids: Iterable[str],
+    ) -> List[str]:
+        """
+        Keep the resources a user holds a permission on.
         
-        for assignment in assignments:
-            # Check if assignment is active
-            if not assignment.is_active:
-                continue
+        The user's assignments are evaluated once for the whole batch, so
+        filtering a list endpoint costs one dict lookup per resource.
+        
+        Args:
+            user_id: User to check
+            permission: Permission to verify on each resource
+            resource_ids: Resources to filter
+        
+        Returns:
+            The permitted resource IDs, in input order
+        """
+        effective = self._effective_permissions(user_id)
+        bit = permission.bit
+        if effective.global_scope & bit:
+            return list(resource_ids)
+        by_resource = effective.by_resource
+        return [rid for rid in resource_ids if by_resource.get(rid, 0) & bit]
+    
+    def invalidate_permissions(self, user_id: Optional[str] = None) -> None:
+        """Drop cached effective permissions for one user (or all users).
+        
+        Needed only after changing assignments or role definitions without
+        going through this class.
+        """
+        if user_id is None:
+            self._permission_cache.clear()
+        else:
+            self._permission_cache.pop(user_id, None)
+    
+    def _effective_permissions(self, user_id: str) -> _EffectivePermissions:
+        """Cached effective permissions, rebuilt from assignments when stale."""
+        self._refresh()
+        effective = self._permission_cache.get(user_id)
+        if effective is not None and effective.is_current(self.role_definitions):
+            return effective
+        
+        # Under the lock, so an expiry cannot land between the scan and the store
+        with self._lock:
+            any_scope = 0
+            global_scope = 0
+            resource_scope: Dict[str, int] = {}
+            roles: Dict[Role, RoleDefinition] = {}
             
-            # Check if assignment has expired
-            if assignment.expires_at and datetime.utcnow() > assignment.expires_at:
-                assignment.is_active = False
-                continue
+            for assignment in self.user_roles.get(user_id, []):
+                if not assignment.is_active:
+                    continue
+                role_def = self.role_definitions[assignment.role]
+                roles[assignment.role] = role_def
+                any_scope |= role_def.mask
+                if assignment.resource_id:
+                    resource = assignment.resource_id
+                    resource_scope[resource] = resource_scope.get(resource, 0) | role_def.mask
+                else:
+                    global_scope |= role_def.mask
             
-            # Check resource-level permission
-            if resource_id and assignment.resource_id and assignment.resource_id != resource_id:
-                continue
+            effective = _EffectivePermissions(
+                any_scope=any_scope,
+                global_scope=global_scope,
+                by_resource={
+                    resource: mask | global_scope
+                    for resource, mask in resource_scope.items()
+                },
+                roles=tuple(
+                    (role, role_def, role_def.revision) for role, role_def in roles.items()
+                ),
+            )
+            self._permission_cache[user_id] = effective
+        return effective
+    
+    def expire_assignments(self, now: Optional[datetime] = None) -> int:
+        """
+        Deactivate assignments whose expiry has passed.
+        
+        Args:
+            now: Current time (for testing)
+        
+        Returns:
+            Number of assignments deactivated
+        """
+        now = now or datetime.utcnow()
+        expired: List[RoleAssignment] = []
+        with self._lock:
+            while self._expirations and self._expirations[0][0] <= now:
+                _, _, assignment = heapq.heappop(self._expirations)
+                if not assignment.is_active or assignment.expires_at is None:
+                    continue
+                if assignment.expires_at > now:
+                    # Extended since it was scheduled
+                    self._schedule_expiry(assignment)
+                    continue
+                assignment.is_active = False
+                assignment.ended_at = assignment.expires_at
+                self._permission_cache.pop(assignment.user_id, None)
+                expired.append(assignment)
+            if expired:
+                self._persist(expired)
+        return len(expired)
+    
+    def compact_history(self, now: Optional[datetime] = None) -> int:
+        """
+        Drop ended assignments.
+        
+        Inactive assignments leave ``user_roles`` at once; they leave the
+        assignment history once they ended more than ``history_retention``
+        ago.
+        
+        Args:
+            now: Current time (for testing)
+        
+        Returns:
+            Number of assignments removed from the history
+        """
+        cutoff = (now or datetime.utcnow()) - self.history_retention
+        with self._lock:
+            # Lists are replaced rather than edited, so readers never see them change
+            for user_id, assignments in list(self.user_roles.items()):
+                active = [a for a in assignments if a.is_active]
+                if not active:
+                    del self.user_roles[user_id]
+                elif len(active) < len(assignments):
+                    self.user_roles[user_id] = active
             
-            # Check if role has permission
-            role_def = self.role_definitions[assignment.role]
-            if role_def.has_permission(permission):
-                return True
+            kept = [
+                a for a in self.assignment_history
+                if a.is_active or a.ended_at is None or a.ended_at >= cutoff
+            ]
+            removed = len(self.assignment_history) - len(kept)
+            if removed:
+                self.assignment_history = kept
+                self._assignments_by_id = {a.assignment_id: a for a in kept}
+            if self.store is not None:
+                self.store.delete_ended_before(cutoff)
+        return removed
+    
+    def sync(self) -> bool:
+        """
+        Apply assignment changes other processes wrote to the store.
         
-        return False
+        Returns:
+            True if there were changes to apply
+        """
+        if self.store is None:
+            return False
+        self._last_sync = time.monotonic()
+        if self.store.get_change_version() == self._store_version:
+            return False
+        with self._lock:
+            changes, version = self.store.get_changes_since(self._store_version)
+            for assignment in changes:
+                self._apply_stored(assignment)
+            self._store_version = max(self._store_version, version)
+        return True
+    
+    def _refresh(self) -> None:
+        """Catch up with the store and expire due assignments before a read."""
+        if self.store is not None:
+            self._maybe_sync()
+        # One comparison with the earliest expiry, not a scan of assignments
+        expirations = self._expirations
+        if expirations and expirations[0][0] <= datetime.utcnow():
+            self.expire_assignments()
+    
+    def _maybe_sync(self) -> None:
+        """Sync with the store unless that was done within sync_interval."""
+        if time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
     
+    def _apply_stored(self, stored: RoleAssignment) -> None:
+        """Merge an assignment read from the store into the cache."""
+        current = self._assignments_by_id.get(stored.assignment_id)
+        if current is None:
+            self._assignments_by_id[stored.assignment_id] = stored
+            self.assignment_history.append(stored)
+            if stored.is_active:
+                self.user_roles.setdefault(stored.user_id, []).append(stored)
+                if stored.expires_at is not None:
+                    self._schedule_expiry(stored)
+        else:
+            # Only these fields change once an assignment exists
+            if (stored.is_active and stored.expires_at is not None
+                    and stored.expires_at != current.expires_at):
+                self._schedule_expiry(stored)
+            current.expires_at = stored.expires_at
+            current.is_active = stored.is_active
+            current.ended_at = stored.ended_at
+        self._permission_cache.pop(stored.user_id, None)
+    
+    def _persist(self, assignments: List[RoleAssignment]) -> None:
+        """Write assignments through to the store (caller holds the lock)."""
+        if self.store is None:
+            return
+        version = self.store.save_assignments(assignments)
+        if version == self._store_version + 1:
+            # Nothing else was written in between, so the cache is current
+            self._store_version = version
+    
+    def _schedule_expiry(self, assignment: RoleAssignment) -> None:
+        """Queue an assignment for expire_assignments."""
+        heapq.heappush(
+            self._expirations,
+            (assignment.expires_at, next(self._expiry_sequence), assignment),
+        )
+
     def assign_role(
         self,
         user_id: str,
@@ -240,21 +546,34 @@ class AccessControl:
         if assigned_by != "system" and not self.check_permission(assigned_by, Permission.PERMISSION_GRANT):
             raise PermissionError(f"User {assigned_by} cannot grant permissions")
         
+        now = datetime.utcnow()
         assignment = RoleAssignment(
             assignment_id=str(uuid4()),
             user_id=user_id,
             role=role,
             resource_id=resource_id,
-            assigned_at=datetime.utcnow(),
+            assigned_at=now,
             assigned_by=assigned_by,
             expires_at=expires_at,
         )
         
-        if user_id not in self.user_roles:
-            self.user_roles[user_id] = []
-        
-        self.user_roles[user_id].append(assignment)
-        self.assignment_history.append(assignment)
+        with self._lock:
+            if expires_at is not None:
+                if expires_at <= now:
+                    # Recorded, but never in effect
+                    assignment.is_active = False
+                    assignment.ended_at = expires_at
+                else:
+                    self._schedule_expiry(assignment)
+            
+            if user_id not in self.user_roles:
+                self.user_roles[user_id] = []
+            
+            self.user_roles[user_id].append(assignment)
+            self.assignment_history.append(assignment)
+            self._assignments_by_id[assignment.assignment_id] = assignment
+            self._permission_cache.pop(user_id, None)
+            self._persist([assignment])
         
         return assignment
     
@@ -282,14 +601,18 @@ class AccessControl:
         if revoked_by != "system" and not self.check_permission(revoked_by, Permission.PERMISSION_REVOKE):
             raise PermissionError(f"User {revoked_by} cannot revoke permissions")
         
-        assignments = self.user_roles.get(user_id, [])
-        
-        for assignment in assignments:
-            if (assignment.role == role and
-                assignment.is_active and
-                (resource_id is None or assignment.resource_id == resource_id)):
-                assignment.is_active = False
-                return True
+        with self._lock:
+            # The assignment may have been made by another process
+            self.sync()
+            for assignment in self.user_roles.get(user_id, []):
+                if (assignment.role == role and
+                    assignment.is_active and
+                    (resource_id is None or assignment.resource_id == resource_id)):
+                    assignment.is_active = False
+                    assignment.ended_at = datetime.utcnow()
+                    self._permission_cache.pop(user_id, None)
+                    self._persist([assignment])
+                    return True
         
         return False
     
@@ -303,6 +626,7 @@ class AccessControl:
         Returns:
             Dict mapping resource to list of permissions
         """
+        self._refresh()
         permissions_by_resource: Dict[str, Set[Permission]] = {}
         assignments = self.user_roles.get(user_id, [])
         
@@ -310,9 +634,6 @@ class AccessControl:
             if not assignment.is_active:
                 continue
             
-            if assignment.expires_at and datetime.utcnow() > assignment.expires_at:
-                continue
-            
             resource = assignment.resource_id or "global"
             if resource not in permissions_by_resource:
                 permissions_by_resource[resource] = set()
@@ -336,12 +657,9 @@ class AccessControl:
         Returns:
             List of (role, resource_id) tuples
         """
+        self._refresh()
         assignments = self.user_roles.get(user_id, [])
-        active_roles = [
-            (a.role, a.resource_id)
-            for a in assignments
-            if a.is_active and (not a.expires_at or datetime.utcnow() <= a.expires_at)
-        ]
+        active_roles = [(a.role, a.resource_id) for a in assignments if a.is_active]
         return active_roles
     
     def grant_permission(
@@ -387,6 +705,7 @@ class AccessControl:
         Returns:
             List of role assignments
         """
+        self._refresh()
         if user_id:
             return [a for a in self.assignment_history if a.user_id == user_id]
         return self.assignment_history
@@ -414,3 +733,58 @@ class AccessControl:
         # For this implementation, we work with predefined roles
         # Full implementation would support custom role creation
         raise NotImplementedError("Custom roles not yet implemented")
+
+
+class ExpiryScheduler:
+    """Expires role assignments and compacts history from a background thread.
+    
+    Reads already expire due assignments; the scheduler also expires them
+    for users nobody checks and compacts the history.
+    """
+    
+    def __init__(
+        self,
+        access_control: AccessControl,
+        interval: float = 1.0,
+        compact_interval: float = 300.0,
+    ):
+        """Initialize the scheduler.
+        
+        Args:
+            access_control: Access control whose assignments expire
+            interval: Seconds between expiry passes
+            compact_interval: Seconds between history compactions
+        """
+        self.access_control = access_control
+        self.interval = interval
+        self.compact_interval = compact_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self) -> None:
+        """Start the background thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="rbac-expiry", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the background thread.
+        
+        Args:
+            timeout: Maximum seconds to wait for the current pass to finish
+        """
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+    
+    def _run(self) -> None:
+        last_compaction = time.monotonic()
+        while not self._stop.wait(self.interval):
+            self.access_control.expire_assignments()
+            if time.monotonic() - last_compaction >= self.compact_interval:
+                self.access_control.compact_history()
+                last_compaction = time.monotonic()
@@ -0,0 +1,287 @@
+"""
+Canvas Patch Service
+====================
+
+Applies a batch of node/edge operations to a canvas all-or-nothing.
+
+A patch is a list of operations:
+
+    {"op": "add_node", "node": {"id": "n1", "type": "EVENT", "title": "..."}}
+    {"op": "update_node", "id": "n1", "node": {"title": "...", "position": {"x": 1}}}
+    {"op": "remove_node", "id": "n1"}
+    {"op": "add_edge", "edge": {"source_id": "n1", "target_id": "n2", "type": "SEQUENCE"}}
+    {"op": "update_edge", "id": "e1", "edge": {"label": "...", "strength": 0.5}}
+    {"op": "remove_edge", "id": "e1"}
+
+Operations are parsed and checked up front, then applied in order. Each
+applied operation records its inverse; if a later operation fails (e.g. an
+edge referencing a node removed earlier in the batch) the inverses are
+replayed and the canvas is left as it was, including its revision and
+``updated_at`` (the inverses go through ``Canvas`` methods that touch the
+canvas, so both are restored afterwards). Elements added without an
+``id`` get a generated one, and later operations in the same batch may
+refer to client-chosen ids. Updates that set every field to its current
+value leave the element untouched and record no change.
+"""
+
+import copy
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from src.models.canvas import Canvas, CanvasEdge, CanvasNode, EdgeType, NodeType
+from src.models.canvas_version import Change, ChangeType
+
+
+OPERATIONS = ('add_node', 'update_node', 'remove_node', 'add_edge', 'update_edge', 'remove_edge')
+
+_NODE_FIELDS = ('title', 'description', 'data', 'metadata', 'position', 'size')
+_EDGE_FIELDS = ('type', 'label', 'strength', 'metadata')
+
+
+class PatchError(ValueError):
+    """An operation in a patch is invalid or cannot be applied."""
+
+    def __init__(self, index: int, message: str):
+        super().__init__(f"Operation {index}: {message}")
+        self.index = index
+        self.message = message
+
+
+@dataclass
+class PatchResult:
+    """Outcome of applying a patch."""
+
+    changes: List[Change] = field(default_factory=list)
+    results: List[Dict[str, Any]] = field(default_factory=list)  # Per operation
+    node_ids: Set[str] = field(default_factory=set)  # Nodes added, updated or removed
+    edge_ids: Set[str] = field(default_factory=set)  # Edges added, updated or removed
+
+
+class CanvasPatch:
+    """A validated list of canvas operations."""
+
+    def __init__(self, operations: List[Dict[str, Any]]):
+        """Parse and validate operations.
+
+        Args:
+            operations: Operation dictionaries (see module docstring)
+
+        Raises:
+            PatchError: If an operation is malformed
+        """
+        if not isinstance(operations, list) or not operations:
+            raise PatchError(0, 'operations must be a non-empty list')
+        self.operations = [self._parse(i, op) for i, op in enumerate(operations)]
+        self._undo: List[Callable[[], None]] = []
+        self._canvas: Optional[Canvas] = None
+        self._touched: Tuple[int, str] = (0, '')
+
+    def apply(self, canvas: Canvas) -> PatchResult:
+        """Apply every operation, or none of them.
+
+        Args:
+            canvas: Canvas to modify in place
+
+        Returns:
+            PatchResult describing what changed
+
+        Raises:
+            PatchError: If an operation fails; the canvas is restored first
+        """
+        self._undo = []
+        self._canvas = canvas
+        self._touched = (canvas.revision, canvas.updated_at)
+        result = PatchResult()
+        for index, op in enumerate(self.operations):
+            try:
+                getattr(self, f"_{op['op']}")(canvas, op, result)
+            except PatchError:
+                self.rollback()
+                raise
+            except (ValueError, KeyError, TypeError) as e:
+                self.rollback()
+                raise PatchError(index, str(e)) from e
+        return result
+
+    def rollback(self) -> None:
+        """Undo the operations applied by the last ``apply``."""
+        while self._undo:
+            self._undo.pop()()
+        if self._canvas is not None:
+            self._canvas.revision, self._canvas.updated_at = self._touched
+
+    # ------------------------------------------------------------------
+    # Parsing
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _parse(index: int, op: Any) -> Dict[str, Any]:
+        if not isinstance(op, dict) or op.get('op') not in OPERATIONS:
+            raise PatchError(index, f"op must be one of {', '.join(OPERATIONS)}")
+        kind = op['op']
+        parsed: Dict[str, Any] = {'op': kind, 'index': index}
+
+        if kind.startswith(('update', 'remove')):
+            if not op.get('id'):
+                raise PatchError(index, 'Missing id')
+            parsed['id'] = op['id']
+
+        try:
+            if kind == 'add_node':
+                fields = op.get('node') or {}
+                if 'type' not in fields or 'title' not in fields:
+                    raise PatchError(index, 'Missing required fields')
+                parsed['id'] = fields.get('id') or f"node-{uuid.uuid4().hex}"
+                parsed['type'] = NodeType(fields['type'])
+                parsed['fields'] = _node_fields(fields)
+            elif kind == 'update_node':
+                parsed['fields'] = _node_fields(op.get('node') or {})
+            elif kind == 'add_edge':
+                fields = op.get('edge') or {}
+                if 'source_id' not in fields or 'target_id' not in fields:
+                    raise PatchError(index, 'Missing source/target')
+                if 'type' not in fields:
+                    raise PatchError(index, 'Missing edge type')
+                parsed['id'] = fields.get('id') or f"edge-{uuid.uuid4().hex}"
+                parsed['source_id'] = fields['source_id']
+                parsed['target_id'] = fields['target_id']
+                parsed['fields'] = _edge_fields(fields)
+            elif kind == 'update_edge':
+                parsed['fields'] = _edge_fields(op.get('edge') or {})
+        except (ValueError, TypeError, AttributeError) as e:
+            raise PatchError(index, str(e)) from e
+
+        return parsed
+
+    # ------------------------------------------------------------------
+    # Operations (each registers its inverse)
+    # ------------------------------------------------------------------
+
+    def _add_node(self, canvas: Canvas, op: Dict[str, Any], result: PatchResult) -> None:
+        if op['id'] in canvas.nodes:
+            raise PatchError(op['index'], f"Node {op['id']} already exists")
+        node = CanvasNode(id=op['id'], type=op['type'], title=op['fields']['title'])
+        _assign(node, op['fields'])
+        canvas.add_node(node)
+        self._undo.append(lambda: canvas.remove_node(node.id))
+        self._record(result, ChangeType.NODE_ADDED, 'node', node)
+
+    def _update_node(self, canvas: Canvas, op: Dict[str, Any], result: PatchResult) -> None:
+        previous = canvas.get_node(op['id'])
+        if previous is None:
+            raise PatchError(op['index'], f"Node {op['id']} not found")
+        # Replace rather than mutate so the inverse can put the old node back
+        node = copy.copy(previous)
+        _assign(node, op['fields'])
+        if _unchanged(node, previous, op['fields']):
+            self._record(result, ChangeType.NODE_UPDATED, 'node', previous, changed=False)
+            return
+        node.updated_at = datetime.utcnow().isoformat()
+        canvas.add_node(node)
+        self._undo.append(lambda: canvas.add_node(previous))
+        self._record(result, ChangeType.NODE_UPDATED, 'node', node)
+
+    def _remove_node(self, canvas: Canvas, op: Dict[str, Any], result: PatchResult) -> None:
+        node = canvas.get_node(op['id'])
+        if node is None:
+            raise PatchError(op['index'], f"Node {op['id']} not found")
+        edges = {e.id: e for e in canvas.get_outgoing_edges(node.id)}
+        edges.update((e.id, e) for e in canvas.get_incoming_edges(node.id))
+        canvas.remove_node(node.id)
+
+        def restore():
+            canvas.add_node(node)
+            for edge in edges.values():
+                canvas.add_edge(edge)
+
+        self._undo.append(restore)
+        result.edge_ids.update(edges)
+        result.node_ids.add(node.id)
+        result.changes.append(Change(ChangeType.NODE_REMOVED, {'node_id': node.id}))
+        result.results.append({'op': 'remove_node', 'id': node.id})
+
+    def _add_edge(self, canvas: Canvas, op: Dict[str, Any], result: PatchResult) -> None:
+        if op['id'] in canvas.edges:
+            raise PatchError(op['index'], f"Edge {op['id']} already exists")
+        edge = CanvasEdge(
+            id=op['id'],
+            source_id=op['source_id'],
+            target_id=op['target_id'],
+            type=op['fields']['type'],
+        )
+        _assign(edge, op['fields'])
+        canvas.add_edge(edge)
+        self._undo.append(lambda: canvas.remove_edge(edge.id))
+        self._record(result, ChangeType.EDGE_ADDED, 'edge', edge)
+
+    def _update_edge(self, canvas: Canvas, op: Dict[str, Any], result: PatchResult) -> None:
+        previous = canvas.get_edge(op['id'])
+        if previous is None:
+            raise PatchError(op['index'], f"Edge {op['id']} not found")
+        edge = copy.copy(previous)
+        _assign(edge, op['fields'])
+        if _unchanged(edge, previous, op['fields']):
+            self._record(result, ChangeType.EDGE_UPDATED, 'edge', previous, changed=False)
+            return
+        canvas.add_edge(edge)  # Re-indexes the edge if its type changed
+        self._undo.append(lambda: canvas.add_edge(previous))
+        self._record(result, ChangeType.EDGE_UPDATED, 'edge', edge)
+
+    def _remove_edge(self, canvas: Canvas, op: Dict[str, Any], result: PatchResult) -> None:
+        edge = canvas.get_edge(op['id'])
+        if edge is None:
+            raise PatchError(op['index'], f"Edge {op['id']} not found")
+        canvas.remove_edge(edge.id)
+        self._undo.append(lambda: canvas.add_edge(edge))
+        result.edge_ids.add(edge.id)
+        result.changes.append(Change(ChangeType.EDGE_REMOVED, {'edge_id': edge.id}))
+        result.results.append({'op': 'remove_edge', 'id': edge.id})
+
+    @staticmethod
+    def _record(
+        result: PatchResult,
+        change_type: ChangeType,
+        kind: str,
+        element,
+        changed: bool = True,
+    ) -> None:
+        if changed:
+            (result.node_ids if kind == 'node' else result.edge_ids).add(element.id)
+            result.changes.append(Change(change_type, {f'{kind}_id': element.id}))
+        result.results.append({'op': change_type.value, 'id': element.id, kind: element.to_dict()})
+
+
+def _node_fields(fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Node attributes set by an operation (geometry values as floats)."""
+    parsed = {k: fields[k] for k in _NODE_FIELDS if k in fields}
+    for name in ('position', 'size'):
+        if name in parsed:
+            parsed[name] = {axis: float(value) for axis, value in parsed[name].items()}
+    return parsed
+
+
+def _edge_fields(fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Edge attributes set by an operation."""
+    parsed = {k: fields[k] for k in _EDGE_FIELDS if k in fields}
+    if 'type' in parsed:
+        parsed['type'] = EdgeType(parsed['type'])
+    if 'strength' in parsed:
+        parsed['strength'] = float(parsed['strength'])
+    return parsed
+
+
+def _unchanged(element: Any, previous: Any, fields: Dict[str, Any]) -> bool:
+    """Whether assigning ``fields`` left every attribute as it was."""
+    return all(getattr(element, name) == getattr(previous, name) for name in fields)
+
+
+def _assign(element: Any, fields: Dict[str, Any]) -> None:
+    """Set attributes; partial position/size dicts keep the other axis."""
+    for name, value in fields.items():
+        if name == 'position':
+            value = (value.get('x', element.position[0]), value.get('y', element.position[1]))
+        elif name == 'size':
+            value = (value.get('width', element.size[0]), value.get('height', element.size[1]))
+        setattr(element, name, value)
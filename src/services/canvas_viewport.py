@@ -0,0 +1,161 @@
+"""
+Canvas Viewport Service
+=======================
+
+Builds the part of a canvas a client actually shows.
+
+A viewport request names a bounding box in canvas coordinates. Nodes are
+found through the canvas's spatial index, and edges through the adjacency
+index of the visible nodes, so the cost follows what is on screen rather
+than the size of the canvas. Edges are included when at least one
+endpoint is visible.
+
+When more nodes intersect the box than ``max_nodes`` (a zoomed-out view),
+the box is divided into a grid and each occupied grid cell is returned as
+a cluster (node count, centroid, bounding box and node types), with
+edges aggregated between clusters.
+"""
+
+import math
+from typing import Any, Dict, List, Tuple
+
+from src.models.canvas import Canvas, CanvasNode
+
+
+def build_viewport(
+    canvas: Canvas,
+    min_x: float,
+    min_y: float,
+    max_x: float,
+    max_y: float,
+    max_nodes: int = 500,
+) -> Dict[str, Any]:
+    """Get the nodes and edges of a canvas inside a bounding box.
+
+    Args:
+        canvas: Canvas to query
+        min_x: Left edge of the viewport
+        min_y: Top edge of the viewport
+        max_x: Right edge of the viewport
+        max_y: Bottom edge of the viewport
+        max_nodes: Most individual nodes returned before switching to clusters
+
+    Returns:
+        Dictionary with 'nodes' and 'edges' (detail view) or 'clusters' and
+        'cluster_edges' (level-of-detail view), plus 'lod' and 'total_nodes'
+
+    Raises:
+        ValueError: If the box is empty or max_nodes is not positive
+    """
+    if max_x < min_x or max_y < min_y:
+        raise ValueError("Viewport max must not be less than min")
+    if max_nodes < 1:
+        raise ValueError("max_nodes must be positive")
+
+    visible = canvas.query_region(min_x, min_y, max_x, max_y)
+    response: Dict[str, Any] = {
+        'canvas_id': canvas.id,
+        'revision': canvas.revision,
+        'viewport': {'min_x': min_x, 'min_y': min_y, 'max_x': max_x, 'max_y': max_y},
+        'total_nodes': len(visible),
+    }
+
+    if len(visible) <= max_nodes:
+        response['lod'] = 'detail'
+        response['nodes'] = [node.to_dict() for node in visible]
+        response['edges'] = [edge.to_dict() for edge in _visible_edges(canvas, visible)]
+        return response
+
+    response['lod'] = 'clusters'
+    response.update(_cluster(canvas, visible, min_x, min_y, max_x, max_y, max_nodes))
+    return response
+
+
+def _visible_edges(canvas: Canvas, visible: List[CanvasNode]):
+    """Edges with at least one visible endpoint, each once."""
+    edges = {}
+    for node in visible:
+        for edge in canvas.get_outgoing_edges(node.id):
+            edges[edge.id] = edge
+        for edge in canvas.get_incoming_edges(node.id):
+            edges[edge.id] = edge
+    return edges.values()
+
+
+def _cluster(
+    canvas: Canvas,
+    visible: List[CanvasNode],
+    min_x: float,
+    min_y: float,
+    max_x: float,
+    max_y: float,
+    max_nodes: int,
+) -> Dict[str, Any]:
+    """Group visible nodes into at most ~max_nodes grid clusters."""
+    per_side = max(1, math.isqrt(max_nodes))
+    cell_width = max(max_x - min_x, 1.0) / per_side
+    cell_height = max(max_y - min_y, 1.0) / per_side
+
+    clusters: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    cluster_of: Dict[str, Tuple[int, int]] = {}
+    for node in visible:
+        x, y = node.position
+        cx = x + node.size[0] / 2
+        cy = y + node.size[1] / 2
+        key = (
+            min(per_side - 1, max(0, int((cx - min_x) // cell_width))),
+            min(per_side - 1, max(0, int((cy - min_y) // cell_height))),
+        )
+        cluster_of[node.id] = key
+
+        cluster = clusters.get(key)
+        if cluster is None:
+            cluster = clusters[key] = {
+                'id': f"cluster-{key[0]}-{key[1]}",
+                'count': 0,
+                'sum_x': 0.0,
+                'sum_y': 0.0,
+                'bounds': [x, y, x + node.size[0], y + node.size[1]],
+                'types': {},
+            }
+        cluster['count'] += 1
+        cluster['sum_x'] += cx
+        cluster['sum_y'] += cy
+        bounds = cluster['bounds']
+        bounds[0] = min(bounds[0], x)
+        bounds[1] = min(bounds[1], y)
+        bounds[2] = max(bounds[2], x + node.size[0])
+        bounds[3] = max(bounds[3], y + node.size[1])
+        types = cluster['types']
+        types[node.type.value] = types.get(node.type.value, 0) + 1
+
+    # Aggregate edges between clusters (both endpoints visible)
+    links: Dict[Tuple[str, str], int] = {}
+    for node in visible:
+        source_key = cluster_of[node.id]
+        for edge in canvas.get_outgoing_edges(node.id):
+            target_key = cluster_of.get(edge.target_id)
+            if target_key is None or target_key == source_key:
+                continue
+            pair = (clusters[source_key]['id'], clusters[target_key]['id'])
+            links[pair] = links.get(pair, 0) + 1
+
+    return {
+        'clusters': [
+            {
+                'id': cluster['id'],
+                'count': cluster['count'],
+                'center': {
+                    'x': cluster['sum_x'] / cluster['count'],
+                    'y': cluster['sum_y'] / cluster['count'],
+                },
+                'bounds': dict(zip(('min_x', 'min_y', 'max_x', 'max_y'), cluster['bounds'])),
+                'types': cluster['types'],
+            }
+            for cluster in clusters.values()
+        ],
+        'cluster_edges': [
+            {'source': source, 'target': target, 'count': count}
+            for (source, target), count in links.items()
+        ],
+    }
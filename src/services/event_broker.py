@@ -0,0 +1,268 @@
+"""
+Event Broker Service
+====================
+
+Fans ``CanvasChangeEvent``s out across worker processes on one node.
+
+Each worker's ``EventStream`` is an in-process singleton, so under a
+pre-forking server a subscriber in worker A would never see publishes
+from worker B. ``SQLiteEventBroker`` relays events through a shared
+SQLite database in WAL mode:
+
+- local publishes are queued and written in batches (one transaction per
+  batch), so a burst of publishes costs a single commit
+- a tail thread polls ``PRAGMA data_version``, which only changes when
+  another connection commits, and reads new rows only then
+- rows written by the same broker are skipped, so events are never
+  delivered twice in the publishing process
+- rows older than the retention window are deleted periodically
+- a batch whose write fails is put back and retried with exponential
+  backoff; it is only dropped (and logged) after ``max_retries`` attempts
+"""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from src.services.event_stream import CanvasChangeEvent
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteEventBroker:
+    """Relay events between EventStreams through a shared SQLite WAL database."""
+
+    def __init__(
+        self,
+        db_path: str,
+        poll_interval: float = 0.005,
+        batch_size: int = 500,
+        retention_seconds: float = 300.0,
+        max_retries: int = 5,
+        retry_backoff: float = 0.05,
+    ):
+        """Initialize the broker.
+
+        Args:
+            db_path: Path of the database shared by all workers
+            poll_interval: Seconds between checks for new events
+            batch_size: Maximum events written or read per transaction
+            retention_seconds: How long relayed events are kept
+            max_retries: Failed writes of a batch retried before it is dropped
+            retry_backoff: Seconds before the first retry, doubled on each
+                further failure
+        """
+        self.db_path = db_path
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.retention_seconds = retention_seconds
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.origin = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._stream = None
+        self._pending: List[CanvasChangeEvent] = []
+        self._pending_cond = threading.Condition()
+        self._running = False
+        self._threads: List[threading.Thread] = []
+        self._last_seq = 0
+        self._last_purge = 0.0
+        self._stats = {'sent': 0, 'received': 0, 'batches': 0, 'retries': 0, 'dropped': 0}
+
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=10.0, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _init_db(self) -> None:
+        """Create the relay table."""
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS broker_events (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    origin TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_broker_events_created_at
+                ON broker_events(created_at)
+            """)
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self, stream) -> None:
+        """Start relaying for an EventStream.
+
+        Only events published after this call are received from other
+        workers.
+
+        Args:
+            stream: EventStream that local publishes come from and remote
+                events are delivered to
+        """
+        if self._running:
+            return
+
+        self._stream = stream
+        with self._connect() as conn:
+            row = conn.execute("SELECT MAX(seq) FROM broker_events").fetchone()
+        self._last_seq = row[0] or 0
+        self._running = True
+
+        for target, name in ((self._write_loop, 'writer'), (self._tail_loop, 'tail')):
+            thread = threading.Thread(
+                target=target,
+                name=f"event-broker-{name}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Flush pending events and stop the relay threads.
+
+        Args:
+            timeout: Maximum seconds to wait for each thread to exit
+        """
+        if not self._running:
+            return
+
+        with self._pending_cond:
+            self._running = False
+            self._pending_cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+
+    def send(self, event: CanvasChangeEvent) -> None:
+        """Queue a locally published event for the other workers."""
+        with self._pending_cond:
+            self._pending.append(event)
+            self._pending_cond.notify()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get relay counters for this worker."""
+        with self._pending_cond:
+            return {**self._stats, 'pending': len(self._pending), 'origin': self.origin}
+
+    def _write_loop(self) -> None:
+        """Write queued events, batching whatever accumulated during the last commit."""
+        conn = self._connect()
+        failures = 0
+        try:
+            while True:
+                with self._pending_cond:
+                    while self._running and not self._pending:
+                        self._pending_cond.wait()
+                    if not self._pending:
+                        return
+                    batch = self._pending[:self.batch_size]
+                    del self._pending[:self.batch_size]
+
+                now = time.time()
+                rows = [(self.origin, json.dumps(e.to_dict(), default=str), now) for e in batch]
+                try:
+                    with conn:
+                        conn.executemany(
+                            "INSERT INTO broker_events (origin, payload, created_at) "
+                            "VALUES (?, ?, ?)",
+                            rows,
+                        )
+                        if now - self._last_purge >= self.retention_seconds / 10:
+                            conn.execute(
+                                "DELETE FROM broker_events WHERE created_at < ?",
+                                (now - self.retention_seconds,),
+                            )
+                            self._last_purge = now
+                except sqlite3.Error:
+                    failures += 1
+                    if failures > self.max_retries:
+                        # Keep the worker alive; the batch is lost for other workers only
+                        logger.exception(
+                            "Dropping %d events after %d failed relay writes",
+                            len(batch), failures,
+                        )
+                        failures = 0
+                        with self._pending_cond:
+                            self._stats['dropped'] += len(batch)
+                        continue
+
+                    logger.warning(
+                        "Relay write of %d events failed (attempt %d), retrying",
+                        len(batch), failures, exc_info=True,
+                    )
+                    with self._pending_cond:
+                        # Ahead of anything published since, to keep the order
+                        self._pending[:0] = batch
+                        self._stats['retries'] += 1
+                    time.sleep(self.retry_backoff * 2 ** (failures - 1))
+                    continue
+
+                failures = 0
+                with self._pending_cond:
+                    self._stats['sent'] += len(batch)
+                    self._stats['batches'] += 1
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # Receiving
+    # ------------------------------------------------------------------
+
+    def _tail_loop(self) -> None:
+        """Deliver events committed by other workers to the local stream."""
+        conn = self._connect()
+        data_version = None
+        try:
+            while self._running:
+                try:
+                    version = conn.execute("PRAGMA data_version").fetchone()[0]
+                    if version != data_version:
+                        data_version = version
+                        while self._poll(conn):
+                            pass
+                except sqlite3.Error:
+                    pass
+                time.sleep(self.poll_interval)
+        finally:
+            conn.close()
+
+    def _poll(self, conn: sqlite3.Connection) -> bool:
+        """Deliver one batch of new rows; True if the batch was full."""
+        rows = conn.execute(
+            "SELECT seq, origin, payload FROM broker_events WHERE seq > ? ORDER BY seq LIMIT ?",
+            (self._last_seq, self.batch_size),
+        ).fetchall()
+
+        for seq, origin, payload in rows:
+            self._last_seq = seq
+            if origin == self.origin:
+                continue
+            try:
+                event = CanvasChangeEvent.from_dict(json.loads(payload))
+            except (ValueError, KeyError, TypeError):
+                continue
+            # Offsets belong to the publishing worker's log
+            event.offset = None
+            self._stream.publish(event, forward=False)
+            with self._pending_cond:
+                self._stats['received'] += 1
+
+        return len(rows) == self.batch_size
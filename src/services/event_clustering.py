@@ -0,0 +1,245 @@
+"""
+Event Clustering Service
+========================
+
+Groups near-duplicate events at ingest time so that noisy services do not
+flood the event store and the linker with thousands of copies of the same
+log line or span error.
+
+Messages are normalized (numbers, hex IDs and UUIDs replaced by
+placeholders), shingled into word n-grams and fingerprinted with MinHash.
+Signatures are split into LSH bands; events that share a band bucket are
+candidates, and a candidate joins a cluster when its estimated Jaccard
+similarity with the cluster representative reaches the threshold.
+"""
+
+import hashlib
+import random
+import re
+import uuid
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+
+# Mersenne prime used for the universal hash family (a * x + b) mod P
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+_UUID_RE = re.compile(r'\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b')
+_HEX_RE = re.compile(r'\b(?:0x)?[0-9a-f]{8,}\b')
+_NUMBER_RE = re.compile(r'\d+(?:\.\d+)?')
+_TOKEN_RE = re.compile(r'[a-z_<>]+')
+
+# Event types that are clustered by default (high-volume, repetitive signals)
+DEFAULT_CLUSTERED_EVENT_TYPES = ('log_entry', 'span_error')
+
+_CLUSTER_NAMESPACE = uuid.UUID('6f1c3a52-8d3e-4b8e-9a51-2f0d6c7e4b19')
+
+
+def cluster_id_for(representative_id: str) -> str:
+    """Stable cluster ID derived from the ID of the cluster's representative."""
+    return str(uuid.uuid5(_CLUSTER_NAMESPACE, representative_id))
+
+
+class EventClusterer:
+    """MinHash/LSH fingerprinting for near-duplicate event detection."""
+
+    def __init__(
+        self,
+        num_perm: int = 128,
+        bands: int = 32,
+        threshold: float = 0.7,
+        shingle_size: int = 2,
+        event_types: Optional[Sequence[str]] = DEFAULT_CLUSTERED_EVENT_TYPES,
+        seed: int = 1,
+    ):
+        """Initialize the clusterer.
+
+        Args:
+            num_perm: Number of MinHash permutations (signature length)
+            bands: Number of LSH bands (must divide num_perm)
+            threshold: Minimum estimated Jaccard similarity to join a cluster
+            shingle_size: Word n-gram size used for shingling
+            event_types: Event types eligible for clustering (None = all)
+            seed: Seed for the permutation coefficients (keeps signatures stable
+                across processes and restarts)
+        """
+        if num_perm % bands != 0:
+            raise ValueError("bands must divide num_perm")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.event_types = set(event_types) if event_types is not None else None
+
+        rng = random.Random(seed)
+        self._coefficients = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+
+    # ------------------------------------------------------------------
+    # Fingerprinting
+    # ------------------------------------------------------------------
+
+    def should_cluster(self, event: Any) -> bool:
+        """Check whether an Event is eligible for clustering."""
+        return self.accepts_type(getattr(event, 'event_type', None))
+
+    def accepts_type(self, event_type: Optional[str]) -> bool:
+        """Check whether events of the given type are eligible for clustering."""
+        if self.event_types is None:
+            return True
+        return event_type in self.event_types
+
+    @staticmethod
+    def fingerprint_text(event: Any) -> str:
+        """Build the text that identifies an Event for clustering.
+
+        Source, event type and service are included so that similar messages
+        from different producers never collapse together.
+        """
+        data = getattr(event, 'data', None) or {}
+        source = getattr(event, 'source', '')
+        source = getattr(source, 'value', source)
+        message = (
+            data.get('message')
+            or data.get('error_message')
+            or data.get('operation')
+            or ''
+        )
+        return ' '.join(str(part) for part in (
+            source,
+            getattr(event, 'event_type', ''),
+            data.get('service') or '',
+            data.get('operation') or '',
+            message,
+        ) if part)
+
+    @staticmethod
+    def normalize(text: str) -> List[str]:
+        """Lowercase text and mask volatile tokens (IDs, numbers)."""
+        text = text.lower()
+        text = _UUID_RE.sub(' <uuid> ', text)
+        text = _HEX_RE.sub(' <hex> ', text)
+        text = _NUMBER_RE.sub(' <num> ', text)
+        return _TOKEN_RE.findall(text)
+
+    def shingles(self, text: str) -> set:
+        """Split text into a set of word n-gram shingles."""
+        tokens = self.normalize(text)
+        if len(tokens) <= self.shingle_size:
+            return {' '.join(tokens)}
+        return {
+            ' '.join(tokens[i:i + self.shingle_size])
+            for i in range(len(tokens) - self.shingle_size + 1)
+        }
+
+    def signature(self, text: str) -> List[int]:
+        """Compute the MinHash signature of a text."""
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'big')
+            for s in self.shingles(text)
+        ]
+        return [
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._coefficients
+        ]
+
+    def band_keys(self, signature: Sequence[int]) -> List[Tuple[int, str]]:
+        """Split a signature into (band, bucket) LSH keys."""
+        keys = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            bucket = hashlib.blake2b(
+                ','.join(str(v) for v in rows).encode('ascii'), digest_size=8
+            ).hexdigest()
+            keys.append((band, bucket))
+        return keys
+
+    @staticmethod
+    def similarity(sig_a: Sequence[int], sig_b: Sequence[int]) -> float:
+        """Estimate Jaccard similarity from two MinHash signatures."""
+        if not sig_a or len(sig_a) != len(sig_b):
+            return 0.0
+        return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+    # ------------------------------------------------------------------
+    # In-memory clustering
+    # ------------------------------------------------------------------
+
+    def collapse(
+        self,
+        items: List[Any],
+        text_fn: Callable[[Any], str],
+        id_fn: Optional[Callable[[Any], str]] = None,
+        key_fn: Optional[Callable[[Any], Optional[Hashable]]] = None,
+    ) -> List[Tuple[Any, Dict[str, Any]]]:
+        """Collapse near-duplicate items, keeping the first of each cluster.
+
+        Cluster IDs are derived from the representative (see
+        ``cluster_id_for``), so the same representative gets the same ID on
+        every call.
+
+        Args:
+            items: Items in priority order (the first member of a cluster is
+                kept as its representative)
+            text_fn: Function returning the text to fingerprint for an item
+            id_fn: Function returning an item's ID (defaults to its text)
+            key_fn: Function returning a key that must be equal for two items
+                to cluster together; items whose key is None are kept as
+                singletons without being fingerprinted
+
+        Returns:
+            List of (representative, cluster_info) tuples where cluster_info
+            holds 'cluster_id' and 'cluster_size'
+        """
+        buckets: Dict[Tuple[int, str, Optional[Hashable]], List[int]] = {}
+        clusters: List[Dict[str, Any]] = []
+
+        for item in items:
+            group: Optional[Hashable] = None
+            if key_fn is not None:
+                group = key_fn(item)
+                if group is None:
+                    clusters.append({
+                        'item': item,
+                        'signature': None,
+                        'cluster_id': cluster_id_for(id_fn(item) if id_fn else text_fn(item)),
+                        'cluster_size': 1,
+                    })
+                    continue
+
+            sig = self.signature(text_fn(item))
+            keys = [(band, bucket, group) for band, bucket in self.band_keys(sig)]
+
+            match = None
+            best = 0.0
+            seen = set()
+            for key in keys:
+                for index in buckets.get(key, ()):
+                    if index in seen:
+                        continue
+                    seen.add(index)
+                    score = self.similarity(sig, clusters[index]['signature'])
+                    if score >= self.threshold and score > best:
+                        match, best = index, score
+
+            if match is not None:
+                clusters[match]['cluster_size'] += 1
+                continue
+
+            clusters.append({
+                'item': item,
+                'signature': sig,
+                'cluster_id': cluster_id_for(id_fn(item) if id_fn else text_fn(item)),
+                'cluster_size': 1,
+            })
+            for key in keys:
+                buckets.setdefault(key, []).append(len(clusters) - 1)
+
+        return [
+            (c['item'], {'cluster_id': c['cluster_id'], 'cluster_size': c['cluster_size']})
+            for c in clusters
+        ]
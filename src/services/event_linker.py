@@ -15,18 +15,26 @@ import re
 from src.models.investigation import InvestigationEvent
 from src.store.investigation_store import InvestigationStore
 from src.connectors import git_connector, ci_connector
+from src.services.event_clustering import EventClusterer
 
 
 class EventLinker:
     """Service for automatically linking events to investigations."""
     
-    def __init__(self, investigation_store: InvestigationStore):
+    def __init__(
+        self,
+        investigation_store: InvestigationStore,
+        clusterer: Optional[EventClusterer] = None,
+    ):
         """Initialize event linker with investigation store.
         
         Args:
             investigation_store: Investigation store instance
+            clusterer: Optional EventClusterer; when set, near-duplicate
+                events are collapsed to one representative per cluster
         """
         self.store = investigation_store
+        self.clusterer = clusterer
         
     def auto_link_events(
         self,
@@ -87,6 +95,16 @@ class EventLinker:
                 if self._semantic_match(investigation.title, event)
             ]
         
+        # Collapse near-duplicates so each cluster is linked once
+        if self.clusterer:
+            all_events = [
+                item for item, _ in self.clusterer.collapse(
+                    all_events,
+                    lambda item: self._cluster_text(item[0], item[1]),
+                    key_fn=lambda item: self._cluster_key(item[0], item[1]),
+                )
+            ]
+        
         # Link events to investigation
         linked_events = []
         for source, event in all_events:
@@ -161,7 +179,7 @@ class EventLinker:
         # Sort by timestamp (newest first)
         results.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
         
-        return results[:limit]
+        return self._collapse_results(results)[:limit]
 
     def suggest_events(
         self,
@@ -235,16 +253,81 @@ class EventLinker:
                         'type': event.get('type'),
                         'message': event.get('message'),
                         'timestamp': event.get('timestamp'),
+                        'status': event.get('status'),
                         'relevance': 'high',
                     })
         
         # Sort by timestamp (newest first)
         suggestions.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
         
-        return suggestions[:limit]
+        return self._collapse_results(suggestions)[:limit]
 
     # Helper methods
     
+    def _collapse_results(self, results: List[Dict]) -> List[Dict]:
+        """Collapse near-duplicate result dicts by cluster.
+        
+        Keeps the first (newest) result of each cluster and annotates it with
+        'cluster_id' and 'cluster_size'. No-op without a clusterer.
+        
+        Args:
+            results: Result dictionaries with 'source', 'type' and 'message'
+            
+        Returns:
+            Collapsed list of result dictionaries
+        """
+        if not self.clusterer:
+            return results
+        
+        collapsed = []
+        for result, cluster in self.clusterer.collapse(
+            results,
+            lambda r: self._cluster_text(r.get('source', ''), r),
+            self._result_id,
+            lambda r: self._cluster_key(r.get('source', ''), r),
+        ):
+            collapsed.append({**result, **cluster})
+        return collapsed
+    
+    @staticmethod
+    def _result_id(result: Dict) -> str:
+        """Identify a result dict (search results carry no event ID)."""
+        if result.get('event_id'):
+            return str(result['event_id'])
+        return '|'.join(
+            str(result.get(key) or '') for key in ('source', 'type', 'timestamp', 'message')
+        )
+    
+    @staticmethod
+    def _cluster_text(source: str, event: Dict) -> str:
+        """Build the text used to fingerprint a connector event."""
+        return ' '.join(str(part) for part in (
+            source,
+            event.get('type') or '',
+            event.get('job') or event.get('repo') or '',
+            event.get('status') or '',
+            event.get('message') or '',
+        ) if part)
+    
+    def _cluster_key(self, source: str, event: Dict) -> Optional[Tuple]:
+        """Key that must match for two connector events to collapse.
+        
+        Returns None for event types the clusterer does not accept, so e.g. git
+        pushes and CI builds stay separate under the default clusterer. Status,
+        commit and build ID are part of the key because message normalization
+        drops hex SHAs and numbers, and a failed build must never collapse into
+        a successful one.
+        """
+        if not self.clusterer.accepts_type(event.get('type')):
+            return None
+        return (
+            source,
+            event.get('type'),
+            event.get('status'),
+            event.get('sha') or event.get('commit'),
+            event.get('build_id'),
+        )
+    
     @staticmethod
     def _is_in_time_window(
         event: Dict,
@@ -0,0 +1,343 @@
+"""
+Event Log Service
+=================
+
+Append-only, segmented event log on disk backing ``EventStream``.
+
+Every appended event gets a monotonically increasing offset. Events are
+written as JSON lines into segment files named after the first offset they
+hold (``00000000000000000000.log``); when the active segment is full a new
+one is rolled and the retention policy trims old segments. Consumers commit
+the last offset they processed, so a restarted or reconnecting consumer can
+replay everything after its cursor. Cursors are written to disk every
+``cursor_flush_interval`` commits, on segment roll and on close; after a
+crash a consumer may replay the few events committed since the last write.
+
+On open, the log recovers its next offset from the last segment and
+truncates a torn trailing write left behind by a crash.
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+SEGMENT_SUFFIX = ".log"
+CURSORS_FILE = "cursors.json"
+
+
+@dataclass
+class RetentionPolicy:
+    """Which closed segments to keep (None = unlimited)."""
+
+    max_segments: Optional[int] = None
+    max_age_seconds: Optional[float] = None
+    max_bytes: Optional[int] = None
+
+
+class EventLog:
+    """Durable, replayable, segmented append-only log of event dicts."""
+
+    def __init__(
+        self,
+        directory: str,
+        segment_max_events: int = 10000,
+        retention: Optional[RetentionPolicy] = None,
+        fsync: bool = False,
+        cursor_flush_interval: int = 100,
+    ):
+        """Open (or create) an event log.
+
+        Args:
+            directory: Directory holding segment files and consumer cursors
+            segment_max_events: Events per segment before rolling a new one
+            retention: Retention policy applied when segments roll
+            fsync: fsync every append (slower, survives power loss)
+            cursor_flush_interval: Commits between writes of the cursor file
+        """
+        if segment_max_events < 1:
+            raise ValueError("segment_max_events must be at least 1")
+        if cursor_flush_interval < 1:
+            raise ValueError("cursor_flush_interval must be at least 1")
+
+        self.directory = directory
+        self.segment_max_events = segment_max_events
+        self.retention = retention or RetentionPolicy()
+        self.fsync = fsync
+        self.cursor_flush_interval = cursor_flush_interval
+
+        self._lock = threading.RLock()
+        self._segments: List[int] = []  # base offsets, ascending
+        self._next_offset = 0
+        self._active_count = 0
+        self._active_file = None
+        self._cursors: Dict[str, int] = {}
+        self._unflushed_commits = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def append(self, record: Dict[str, Any]) -> int:
+        """Append a record and return its offset."""
+        with self._lock:
+            if self._active_file is None or self._active_count >= self.segment_max_events:
+                self._roll_segment()
+
+            offset = self._next_offset
+            line = json.dumps({"offset": offset, "record": record}, default=str)
+            self._active_file.write(line + "\n")
+            self._active_file.flush()
+            if self.fsync:
+                os.fsync(self._active_file.fileno())
+
+            self._next_offset += 1
+            self._active_count += 1
+            return offset
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    @property
+    def first_offset(self) -> int:
+        """Oldest offset still retained (equals next_offset when empty)."""
+        with self._lock:
+            return self._segments[0] if self._segments else self._next_offset
+
+    @property
+    def next_offset(self) -> int:
+        """Offset the next appended record will get."""
+        return self._next_offset
+
+    def read_from(
+        self, offset: int, limit: Optional[int] = None
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Iterate (offset, record) pairs starting at ``offset``.
+
+        Offsets older than the retained range start from the first retained
+        record. Records appended while iterating are not guaranteed to be
+        included.
+
+        Args:
+            offset: First offset to return
+            limit: Maximum number of records (None = all)
+        """
+        with self._lock:
+            end = self._next_offset
+            segments = list(self._segments)
+
+        if limit is not None and limit <= 0:
+            return
+        start = max(offset, segments[0] if segments else end)
+        index = max(0, bisect.bisect_right(segments, start) - 1)
+
+        returned = 0
+        for base in segments[index:]:
+            try:
+                handle = open(self._segment_path(base), "r", encoding="utf-8")
+            except FileNotFoundError:
+                continue  # trimmed by retention while reading
+            with handle:
+                for line in handle:
+                    entry = self._parse_line(line)
+                    if entry is None:
+                        break
+                    entry_offset, record = entry
+                    if entry_offset >= end:
+                        return
+                    if entry_offset < start:
+                        continue
+                    yield entry_offset, record
+                    returned += 1
+                    if limit is not None and returned >= limit:
+                        return
+
+    def read_last(self, count: int) -> List[Tuple[int, Dict[str, Any]]]:
+        """Return the most recent ``count`` records, oldest first."""
+        return list(self.read_from(max(self.first_offset, self._next_offset - count)))
+
+    # ------------------------------------------------------------------
+    # Consumer cursors
+    # ------------------------------------------------------------------
+
+    def commit(self, consumer_id: str, offset: int) -> None:
+        """Record that ``consumer_id`` has processed everything up to ``offset``."""
+        with self._lock:
+            if self._cursors.get(consumer_id, -1) >= offset:
+                return
+            self._cursors[consumer_id] = offset
+            self._unflushed_commits += 1
+            if self._unflushed_commits >= self.cursor_flush_interval:
+                self._flush_cursors()
+
+    def get_committed(self, consumer_id: str) -> Optional[int]:
+        """Get the last committed offset for a consumer (None if never committed)."""
+        with self._lock:
+            return self._cursors.get(consumer_id)
+
+    def resume_offset(self, consumer_id: str) -> int:
+        """Offset a consumer should resume reading from."""
+        committed = self.get_committed(consumer_id)
+        return 0 if committed is None else committed + 1
+
+    # ------------------------------------------------------------------
+    # Retention and lifecycle
+    # ------------------------------------------------------------------
+
+    def apply_retention(self) -> int:
+        """Delete closed segments outside the retention policy.
+
+        The active segment is never deleted.
+
+        Returns:
+            Number of segments deleted
+        """
+        with self._lock:
+            closed = self._segments[:-1]
+            sizes = {base: self._segment_size(base) for base in closed}
+            now = time.time()
+            policy = self.retention
+
+            doomed = set()
+            if policy.max_segments is not None:
+                excess = len(self._segments) - max(1, policy.max_segments)
+                doomed.update(closed[:max(0, excess)])
+            if policy.max_age_seconds is not None:
+                for base in closed:
+                    if now - self._segment_mtime(base) > policy.max_age_seconds:
+                        doomed.add(base)
+            if policy.max_bytes is not None:
+                total = sum(sizes.values())
+                if self._segments:
+                    total += self._segment_size(self._segments[-1])
+                for base in closed:
+                    if total <= policy.max_bytes:
+                        break
+                    doomed.add(base)
+                    total -= sizes[base]
+
+            # Segments are trimmed oldest-first so retained offsets stay contiguous
+            deleted = 0
+            while self._segments[:-1] and self._segments[0] in doomed:
+                base = self._segments.pop(0)
+                try:
+                    os.remove(self._segment_path(base))
+                except FileNotFoundError:
+                    pass
+                deleted += 1
+            return deleted
+
+    def close(self) -> None:
+        """Write pending cursor commits and close the active segment file."""
+        with self._lock:
+            self._flush_cursors()
+            if self._active_file is not None:
+                self._active_file.close()
+                self._active_file = None
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _segment_path(self, base: int) -> str:
+        return os.path.join(self.directory, f"{base:020d}{SEGMENT_SUFFIX}")
+
+    def _segment_size(self, base: int) -> int:
+        try:
+            return os.path.getsize(self._segment_path(base))
+        except FileNotFoundError:
+            return 0
+
+    def _segment_mtime(self, base: int) -> float:
+        try:
+            return os.path.getmtime(self._segment_path(base))
+        except FileNotFoundError:
+            return 0.0
+
+    @staticmethod
+    def _parse_line(line: str) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """Parse a log line; None for a torn or corrupt write."""
+        if not line.endswith("\n"):
+            return None
+        try:
+            entry = json.loads(line)
+            return entry["offset"], entry["record"]
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    def _roll_segment(self) -> None:
+        """Close the active segment and start a new one at the next offset."""
+        if self._active_file is not None:
+            self._active_file.close()
+        self._flush_cursors()
+
+        base = self._next_offset
+        self._active_file = open(self._segment_path(base), "a", encoding="utf-8")
+        if not self._segments or self._segments[-1] != base:
+            self._segments.append(base)
+        self._active_count = 0
+        self.apply_retention()
+
+    def _recover(self) -> None:
+        """Rebuild segment list, next offset and cursors from disk."""
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(SEGMENT_SUFFIX) and name[:-len(SEGMENT_SUFFIX)].isdigit():
+                self._segments.append(int(name[:-len(SEGMENT_SUFFIX)]))
+        self._segments.sort()
+
+        if self._segments:
+            base = self._segments[-1]
+            path = self._segment_path(base)
+            valid_bytes = 0
+            count = 0
+            last_offset = base - 1
+            with open(path, "r", encoding="utf-8") as handle:
+                for line in handle:
+                    entry = self._parse_line(line)
+                    if entry is None:
+                        break
+                    last_offset = entry[0]
+                    valid_bytes += len(line.encode("utf-8"))
+                    count += 1
+
+            # Drop a torn trailing write so the next append starts on a clean line
+            if valid_bytes < os.path.getsize(path):
+                with open(path, "r+b") as handle:
+                    handle.truncate(valid_bytes)
+
+            self._next_offset = last_offset + 1
+            self._active_count = count
+            self._active_file = open(path, "a", encoding="utf-8")
+
+        cursors_path = os.path.join(self.directory, CURSORS_FILE)
+        if os.path.exists(cursors_path):
+            try:
+                with open(cursors_path, "r", encoding="utf-8") as handle:
+                    self._cursors = {k: int(v) for k, v in json.load(handle).items()}
+            except (ValueError, TypeError):
+                self._cursors = {}
+
+    def _flush_cursors(self) -> None:
+        """Persist cursors if any commit has not been written yet."""
+        if self._unflushed_commits:
+            self._write_cursors()
+            self._unflushed_commits = 0
+
+    def _write_cursors(self) -> None:
+        """Atomically persist consumer cursors."""
+        path = os.path.join(self.directory, CURSORS_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(self._cursors, handle)
+            handle.flush()
+            if self.fsync:
+                os.fsync(handle.fileno())
+        os.replace(tmp_path, path)
@@ -7,12 +7,21 @@ and other system events. Enables real-time notifications and event-driven
 architecture for investigation canvas operations.
 """
 
+from collections import deque
+from itertools import islice, takewhile
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Callable, Dict, List, Optional, Set
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
 from enum import Enum
+import atexit
+import os
+import queue
+import threading
+import time
 import uuid
 
+from src.services.event_log import EventLog
+
 
 class EventType(Enum):
     """Types of events that can be streamed."""
@@ -22,6 +31,7 @@ class EventType(Enum):
     CANVAS_UPDATED = "canvas_updated"
     CANVAS_DELETED = "canvas_deleted"
     CANVAS_REVERTED = "canvas_reverted"
+    CANVAS_PATCHED = "canvas_patched"  # Batch of node/edge changes
     
     # Node events
     NODE_ADDED = "node_added"
@@ -57,6 +67,7 @@ class CanvasChangeEvent:
     timestamp: datetime = field(default_factory=datetime.utcnow)
     data: Dict[str, Any] = field(default_factory=dict)
     metadata: Dict[str, Any] = field(default_factory=dict)
+    offset: Optional[int] = None  # Position in the durable event log, if any
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert event to dictionary."""
@@ -68,6 +79,7 @@ class CanvasChangeEvent:
             "timestamp": self.timestamp.isoformat(),
             "data": self.data,
             "metadata": self.metadata,
+            "offset": self.offset,
         }
     
     @classmethod
@@ -81,9 +93,25 @@ class CanvasChangeEvent:
             timestamp=datetime.fromisoformat(data.get("timestamp", datetime.utcnow().isoformat())),
             data=data.get("data", {}),
             metadata=data.get("metadata", {}),
+            offset=data.get("offset"),
         )
 
 
+class DeliveryMode(Enum):
+    """How events are delivered to a subscription's handler."""
+    
+    SYNC = "sync"      # Handler runs on the publishing thread
+    ASYNC = "async"    # Handler runs on a delivery worker via a bounded queue
+
+
+class OverflowPolicy(Enum):
+    """What to do when an async subscription's queue is full."""
+    
+    DROP_OLDEST = "drop_oldest"  # Discard the oldest queued event
+    BLOCK = "block"              # Block the publisher until there is room
+    COALESCE = "coalesce"        # Replace queued updates with the same key
+
+
 @dataclass
 class EventSubscription:
     """A subscription to events."""
@@ -94,35 +122,531 @@ class EventSubscription:
     canvas_id: Optional[str] = None
     user_id: Optional[str] = None
     active: bool = True
+    delivery_mode: DeliveryMode = DeliveryMode.SYNC
+
+
+def default_coalesce_key(event: CanvasChangeEvent) -> Hashable:
+    """Coalesce events that touch the same canvas element."""
+    element_id = event.data.get("node_id") or event.data.get("edge_id")
+    return (event.event_type, event.canvas_id, element_id)
+
+
+# Event types where only the latest state of an element matters
+COALESCIBLE_EVENT_TYPES = frozenset({
+    EventType.CANVAS_UPDATED,
+    EventType.NODE_UPDATED,
+    EventType.EDGE_UPDATED,
+})
+
+
+def coalesce_events(
+    events: List[CanvasChangeEvent],
+    key: Callable[[CanvasChangeEvent], Hashable] = default_coalesce_key,
+) -> List[CanvasChangeEvent]:
+    """Collapse bursts of updates to the same element into the latest one.
+    
+    Only ``COALESCIBLE_EVENT_TYPES`` are merged; adds and deletes always pass
+    through. A merged update is kept at the position of its last occurrence,
+    so output order (and log offsets) stays increasing and a client resuming
+    from the last delivered event never skips an earlier one.
+    
+    Args:
+        events: Events in publish order
+        key: Function identifying the element an event updates
+        
+    Returns:
+        Coalesced events in publish order
+    """
+    last_index: Dict[Hashable, int] = {}
+    for index, event in enumerate(events):
+        if event.event_type in COALESCIBLE_EVENT_TYPES:
+            last_index[key(event)] = index
+    
+    return [
+        event for index, event in enumerate(events)
+        if event.event_type not in COALESCIBLE_EVENT_TYPES
+        or last_index[key(event)] == index
+    ]
+
+
+@dataclass
+class DeliveryMetrics:
+    """Per-subscription delivery counters for async subscriptions."""
+    
+    enqueued: int = 0
+    delivered: int = 0
+    dropped: int = 0
+    coalesced: int = 0
+    handler_errors: int = 0
+    max_lag_seconds: float = 0.0
+
+
+class SubscriberQueue:
+    """Bounded delivery queue for one async subscription.
+    
+    Entries are ``[coalesce_key, enqueued_at, event]`` lists so a coalesced
+    event can replace a pending one in place, keeping its queue position and
+    original enqueue time (lag is measured from the first pending change).
+    """
+    
+    def __init__(
+        self,
+        subscription: EventSubscription,
+        max_size: int = 1000,
+        overflow_policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        block_timeout: Optional[float] = None,
+        coalesce_key: Callable[[CanvasChangeEvent], Hashable] = default_coalesce_key,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        
+        self.subscription = subscription
+        self.max_size = max_size
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.coalesce_key = coalesce_key
+        self.metrics = DeliveryMetrics()
+        
+        self._entries: deque = deque()
+        self._pending: Dict[Hashable, list] = {}
+        self._condition = threading.Condition()
+        self._scheduled = False
+        self._closed = False
+    
+    def put(self, event: CanvasChangeEvent) -> bool:
+        """Enqueue an event according to the overflow policy.
+        
+        Returns:
+            True if the queue needs to be scheduled on a delivery worker
+        """
+        with self._condition:
+            if self._closed:
+                return False
+            
+            key = None
+            if self.overflow_policy == OverflowPolicy.COALESCE:
+                if event.event_type in COALESCIBLE_EVENT_TYPES:
+                    key = self.coalesce_key(event)
+                    entry = self._pending.get(key)
+                    if entry is not None:
+                        entry[2] = event
+                        self.metrics.coalesced += 1
+                        return False
+                else:
+                    # Adds, deletes and patches are never merged, and later
+                    # updates must not jump ahead of them
+                    self._pending.clear()
+            
+            if len(self._entries) >= self.max_size:
+                if self.overflow_policy == OverflowPolicy.BLOCK:
+                    self._condition.wait_for(
+                        lambda: self._closed or len(self._entries) < self.max_size,
+                        timeout=self.block_timeout,
+                    )
+                    if self._closed or len(self._entries) >= self.max_size:
+                        self.metrics.dropped += 1
+                        return False
+                else:
+                    oldest = self._entries.popleft()
+                    if self._pending.get(oldest[0]) is oldest:
+                        del self._pending[oldest[0]]
+                    self.metrics.dropped += 1
+            
+            entry = [key, time.monotonic(), event]
+            self._entries.append(entry)
+            if key is not None:
+                self._pending[key] = entry
+            self.metrics.enqueued += 1
+            
+            if self._scheduled:
+                return False
+            self._scheduled = True
+            return True
+    
+    def drain(self, max_batch: int) -> bool:
+        """Deliver up to ``max_batch`` queued events to the handler.
+        
+        Returns:
+            True if events remain and the queue should be rescheduled
+        """
+        for _ in range(max_batch):
+            with self._condition:
+                if not self._entries or self._closed:
+                    self._scheduled = False
+                    self._condition.notify_all()
+                    return False
+                key, enqueued_at, event = self._entries.popleft()
+                if key is not None:
+                    self._pending.pop(key, None)
+                self._condition.notify_all()
+            
+            lag = time.monotonic() - enqueued_at
+            try:
+                self.subscription.handler(event)
+            except Exception:
+                # Handler error - don't propagate
+                self.metrics.handler_errors += 1
+            self.metrics.delivered += 1
+            self.metrics.max_lag_seconds = max(self.metrics.max_lag_seconds, lag)
+        
+        with self._condition:
+            if self._entries and not self._closed:
+                return True
+            self._scheduled = False
+            self._condition.notify_all()
+            return False
+    
+    def get(self, timeout: Optional[float] = None) -> Optional[CanvasChangeEvent]:
+        """Take the next queued event, for consumers that pull instead of
+        being drained by a delivery worker.
+        
+        Returns:
+            The event, or None if none arrived within ``timeout`` or the
+            queue was closed
+        """
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: self._closed or self._entries, timeout=timeout,
+            ) or self._closed:
+                return None
+            key, enqueued_at, event = self._entries.popleft()
+            if key is not None:
+                self._pending.pop(key, None)
+            self.metrics.delivered += 1
+            self.metrics.max_lag_seconds = max(
+                self.metrics.max_lag_seconds, time.monotonic() - enqueued_at,
+            )
+            self._condition.notify_all()
+            return event
+    
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued event has been delivered."""
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._closed or (not self._entries and not self._scheduled),
+                timeout=timeout,
+            )
+    
+    def close(self) -> None:
+        """Discard pending events and release blocked publishers."""
+        with self._condition:
+            self._closed = True
+            self._entries.clear()
+            self._pending.clear()
+            self._condition.notify_all()
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get delivery metrics including current lag."""
+        with self._condition:
+            lag_events = len(self._entries)
+            lag_seconds = time.monotonic() - self._entries[0][1] if self._entries else 0.0
+        
+        return {
+            "subscription_id": self.subscription.subscription_id,
+            "overflow_policy": self.overflow_policy.value,
+            "max_queue_size": self.max_size,
+            "lag_events": lag_events,
+            "lag_seconds": lag_seconds,
+            "max_lag_seconds": self.metrics.max_lag_seconds,
+            "enqueued": self.metrics.enqueued,
+            "delivered": self.metrics.delivered,
+            "dropped": self.metrics.dropped,
+            "coalesced": self.metrics.coalesced,
+            "handler_errors": self.metrics.handler_errors,
+        }
+
+
+class EventHistory:
+    """Fixed-capacity ring buffer of events with secondary indexes.
+    
+    Every event gets a monotonically increasing sequence number and lives in
+    slot ``seq % capacity``. Per-canvas, per-user and per-type index rings hold
+    sequence numbers in publish order, so eviction always pops the left end
+    of each ring and all indexes stay consistent with the buffer.
+    
+    Supports ``len()``, iteration and indexing (index 0 is the oldest event).
+    """
+    
+    def __init__(self, capacity: int = 10000):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        
+        self.capacity = capacity
+        self._buffer: List[Optional[CanvasChangeEvent]] = [None] * capacity
+        self._next_seq = 0
+        self._size = 0
+        self._by_id: Dict[str, int] = {}
+        self._by_canvas: Dict[str, deque] = {}
+        self._by_user: Dict[str, deque] = {}
+        self._by_type: Dict[EventType, deque] = {}
+        self._lock = threading.RLock()
+    
+    def append(self, event: CanvasChangeEvent) -> None:
+        """Append an event, evicting the oldest one when full."""
+        with self._lock:
+            if self._size == self.capacity:
+                self._evict_oldest()
+            
+            seq = self._next_seq
+            self._next_seq += 1
+            self._size += 1
+            self._buffer[seq % self.capacity] = event
+            
+            self._by_id[event.event_id] = seq
+            for index, key in self._index_keys(event):
+                index.setdefault(key, deque()).append(seq)
+    
+    def get(self, event_id: str) -> Optional[CanvasChangeEvent]:
+        """Get an event by ID in O(1)."""
+        with self._lock:
+            seq = self._by_id.get(event_id)
+            return None if seq is None else self._buffer[seq % self.capacity]
+    
+    def latest(
+        self,
+        limit: int,
+        canvas_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        event_type: Optional[EventType] = None,
+    ) -> List[CanvasChangeEvent]:
+        """Get up to ``limit`` most recent events (newest first).
+        
+        Uses the most selective index among the given filters and only checks
+        the remaining filters on the events it walks.
+        """
+        if limit <= 0:
+            return []
+        
+        with self._lock:
+            candidates = []
+            if canvas_id:
+                candidates.append(self._by_canvas.get(canvas_id, ()))
+            if user_id:
+                candidates.append(self._by_user.get(user_id, ()))
+            if event_type:
+                candidates.append(self._by_type.get(event_type, ()))
+            
+            if candidates:
+                seqs = reversed(min(candidates, key=len))
+            else:
+                seqs = range(self._next_seq - 1, self._next_seq - self._size - 1, -1)
+            
+            events = (self._buffer[seq % self.capacity] for seq in seqs)
+            if len(candidates) > 1:
+                events = (
+                    e for e in events
+                    if (not canvas_id or e.canvas_id == canvas_id)
+                    and (not user_id or e.user_id == user_id)
+                    and (not event_type or e.event_type == event_type)
+                )
+            return list(islice(events, limit))
+    
+    def since(self, event_id: str, canvas_id: Optional[str] = None) -> List[CanvasChangeEvent]:
+        """Get events published after ``event_id`` (oldest first).
+        
+        If ``event_id`` has already been evicted (or never existed), every
+        retained event is returned so the caller can resynchronize.
+        """
+        with self._lock:
+            after = self._by_id.get(event_id, self._next_seq - self._size - 1)
+            if canvas_id:
+                ring = self._by_canvas.get(canvas_id, ())
+                # Ring is ordered, so stop scanning at the first older entry
+                seqs = list(takewhile(lambda seq: seq > after, reversed(ring)))[::-1]
+            else:
+                seqs = range(after + 1, self._next_seq)
+            return [self._buffer[seq % self.capacity] for seq in seqs]
+    
+    def count(self, canvas_id: Optional[str] = None) -> int:
+        """Count events, optionally for one canvas, in O(1)."""
+        with self._lock:
+            if canvas_id:
+                return len(self._by_canvas.get(canvas_id, ()))
+            return self._size
+    
+    def clear(self) -> int:
+        """Remove all events.
+        
+        Returns:
+            Number of events removed
+        """
+        with self._lock:
+            count = self._size
+            self._buffer = [None] * self.capacity
+            self._size = 0
+            self._by_id.clear()
+            self._by_canvas.clear()
+            self._by_user.clear()
+            self._by_type.clear()
+            return count
+    
+    def resize(self, capacity: int) -> None:
+        """Change capacity, keeping the most recent events."""
+        with self._lock:
+            events = list(self)[-capacity:]
+            self.capacity = capacity
+            self.clear()
+            for event in events:
+                self.append(event)
+    
+    def _index_keys(self, event: CanvasChangeEvent) -> Iterable[Tuple[Dict[Any, deque], Any]]:
+        """Yield (index, key) pairs for an event's secondary indexes."""
+        if event.canvas_id:
+            yield self._by_canvas, event.canvas_id
+        if event.user_id:
+            yield self._by_user, event.user_id
+        yield self._by_type, event.event_type
+    
+    def _evict_oldest(self) -> None:
+        """Drop the oldest event from the buffer and every index."""
+        seq = self._next_seq - self._size
+        slot = seq % self.capacity
+        event = self._buffer[slot]
+        self._buffer[slot] = None
+        self._size -= 1
+        
+        if self._by_id.get(event.event_id) == seq:
+            del self._by_id[event.event_id]
+        for index, key in self._index_keys(event):
+            ring = index[key]
+            ring.popleft()
+            if not ring:
+                del index[key]
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def __iter__(self):
+        with self._lock:
+            first = self._next_seq - self._size
+            events = [self._buffer[seq % self.capacity] for seq in range(first, self._next_seq)]
+        return iter(events)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        with self._lock:
+            if index < 0:
+                index += self._size
+            if not 0 <= index < self._size:
+                raise IndexError("event history index out of range")
+            return self._buffer[(self._next_seq - self._size + index) % self.capacity]
 
 
 class EventStream:
-    """Manages event streaming with publish/subscribe pattern."""
+    """Manages event streaming with publish/subscribe pattern.
+    
+    Subscriptions are indexed so that publishing only touches handlers that
+    can match the event:
+    
+    - subscriptions without a user filter are keyed by
+      ``(event_type, canvas_id)`` for every event type they accept
+      (``canvas_id`` is None for "all canvases")
+    - subscriptions with a user filter are keyed by ``user_id``
+    
+    Async subscriptions get a bounded ``SubscriberQueue``; a small pool of
+    delivery workers drains ready queues, so slow handlers never run on the
+    publishing thread. Each queue is drained by one worker at a time, which
+    keeps per-subscription ordering.
+    
+    With an ``EventLog`` attached, every published event is appended to the
+    durable log first and stamped with its offset; history is reloaded from
+    the log on startup and consumers can ``subscribe_from`` an offset or
+    their last committed cursor.
+    
+    With a broker attached (see ``attach_broker``), local publishes are
+    also relayed to the streams of other worker processes, and their
+    publishes are delivered here.
+    """
     
-    def __init__(self):
-        """Initialize the event stream."""
+    # Events delivered from one queue before yielding to other subscribers
+    DELIVERY_BATCH_SIZE = 64
+    
+    def __init__(self, delivery_workers: int = 4, event_log: Optional[EventLog] = None):
+        """Initialize the event stream.
+        
+        Args:
+            delivery_workers: Number of worker threads for async delivery
+                (started on the first async subscription)
+            event_log: Optional durable log backing publish and replay
+        """
         self.subscriptions: Dict[str, EventSubscription] = {}
-        self.event_history: List[CanvasChangeEvent] = []
-        self.max_history_size = 10000
+        self.event_history = EventHistory(capacity=10000)
         self.event_handlers: Dict[str, List[Callable]] = {}
+        
+        # Dispatch indexes (values are insertion-ordered sets of subscription IDs)
+        self._type_canvas_index: Dict[Tuple[EventType, Optional[str]], Dict[str, None]] = {}
+        self._user_index: Dict[str, Dict[str, None]] = {}
+        self._subscription_order: Dict[str, int] = {}
+        self._next_order = 0
+        
+        # Async delivery
+        self.delivery_workers = delivery_workers
+        self._delivery_queues: Dict[str, SubscriberQueue] = {}
+        self._ready_queues: "queue.Queue[Optional[SubscriberQueue]]" = queue.Queue()
+        self._workers: List[threading.Thread] = []
+        self._workers_lock = threading.Lock()
+        
+        # Durable log; the publish lock orders log appends with replay+subscribe
+        self.event_log = event_log
+        self._publish_lock = threading.RLock()
+        if event_log is not None:
+            self._recover_history()
+        
+        # Cross-process relay (see attach_broker)
+        self.broker = None
+    
+    @property
+    def max_history_size(self) -> int:
+        """Maximum number of events kept in history."""
+        return self.event_history.capacity
     
-    def publish(self, event: CanvasChangeEvent) -> None:
+    @max_history_size.setter
+    def max_history_size(self, size: int) -> None:
+        self.event_history.resize(size)
+    
+    def publish(self, event: CanvasChangeEvent, forward: bool = True) -> None:
         """Publish an event to all matching subscribers.
         
         Args:
             event: The event to publish
+            forward: Relay the event to other workers through the attached
+                broker (False for events that came from the broker)
         """
-        # Add to history
-        self._add_to_history(event)
+        with self._publish_lock:
+            if self.event_log is not None:
+                event.offset = self.event_log.append(event.to_dict())
+            
+            # Add to history
+            self._add_to_history(event)
+            matching = self._matching_subscriptions(event)
         
         # Notify subscribers
-        for subscription in self.subscriptions.values():
-            if self._matches_subscription(event, subscription):
-                try:
-                    subscription.handler(event)
-                except Exception:
-                    # Handler error - don't propagate
-                    pass
+        for subscription in matching:
+            delivery_queue = self._delivery_queues.get(subscription.subscription_id)
+            if delivery_queue is not None:
+                if delivery_queue.put(event):
+                    self._ready_queues.put(delivery_queue)
+                continue
+            
+            try:
+                subscription.handler(event)
+            except Exception:
+                # Handler error - don't propagate
+                pass
+        
+        if forward and self.broker is not None:
+            self.broker.send(event)
+    
+    def attach_broker(self, broker) -> None:
+        """Relay events to and from other worker processes.
+        
+        Args:
+            broker: Broker such as ``SQLiteEventBroker``; it is started with
+                this stream and receives every local publish
+        """
+        self.broker = broker
+        broker.start(self)
     
     def subscribe(
         self,
@@ -130,6 +654,11 @@ class EventStream:
         event_types: Optional[Set[EventType]] = None,
         canvas_id: Optional[str] = None,
         user_id: Optional[str] = None,
+        delivery_mode: DeliveryMode = DeliveryMode.SYNC,
+        max_queue_size: int = 1000,
+        overflow_policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        block_timeout: Optional[float] = None,
+        coalesce_key: Optional[Callable[[CanvasChangeEvent], Hashable]] = None,
     ) -> str:
         """Subscribe to events.
         
@@ -138,6 +667,12 @@ class EventStream:
             event_types: Types of events to subscribe to (None = all)
             canvas_id: Filter by canvas ID (None = all canvases)
             user_id: Filter by user ID (None = all users)
+            delivery_mode: SYNC (publisher thread) or ASYNC (bounded queue)
+            max_queue_size: Queue capacity for ASYNC delivery
+            overflow_policy: Behaviour when the ASYNC queue is full
+            block_timeout: Max seconds a BLOCK publisher waits (None = forever)
+            coalesce_key: Key function for COALESCE (default: event type,
+                canvas and node/edge ID)
             
         Returns:
             Subscription ID
@@ -147,11 +682,128 @@ class EventStream:
             event_types=event_types or set(EventType),
             canvas_id=canvas_id,
             user_id=user_id,
+            delivery_mode=delivery_mode,
         )
         
-        self.subscriptions[subscription.subscription_id] = subscription
+        # Subscription tables are only changed under the publish lock, which
+        # publish holds while it reads them
+        with self._publish_lock:
+            if delivery_mode == DeliveryMode.ASYNC:
+                self._delivery_queues[subscription.subscription_id] = SubscriberQueue(
+                    subscription,
+                    max_size=max_queue_size,
+                    overflow_policy=overflow_policy,
+                    block_timeout=block_timeout,
+                    coalesce_key=coalesce_key or default_coalesce_key,
+                )
+                self._ensure_delivery_workers()
+            
+            self.subscriptions[subscription.subscription_id] = subscription
+            self._index_subscription(subscription)
         return subscription.subscription_id
     
+    def subscribe_from(
+        self,
+        handler: Callable[[CanvasChangeEvent], None],
+        offset: Optional[int] = None,
+        consumer_id: Optional[str] = None,
+        after_event_id: Optional[str] = None,
+        event_types: Optional[Set[EventType]] = None,
+        canvas_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        **subscribe_options: Any,
+    ) -> str:
+        """Replay past events, then subscribe to live events.
+        
+        Replay runs on the calling thread before the live subscription is
+        registered; no event is missed or delivered twice across the switch.
+        The backlog is replayed without holding the publish lock, so a long
+        catch-up does not block publishers; only the events published during
+        that catch-up are replayed under the lock, together with registering
+        the subscription.
+        With a ``consumer_id`` the handler's progress is committed to the log
+        after each successful call, and replay resumes after the last
+        committed cursor when ``offset`` is None.
+        
+        Without an event log, ``after_event_id`` replays the in-memory
+        history published after that event instead.
+        
+        Args:
+            handler: Function to call for each event
+            offset: First offset to replay (None = resume from consumer cursor,
+                or only live events without a consumer_id)
+            consumer_id: Durable consumer name for cursor commits
+            after_event_id: Replay in-memory history after this event ID
+            event_types: Types of events to subscribe to (None = all)
+            canvas_id: Filter by canvas ID (None = all canvases)
+            user_id: Filter by user ID (None = all users)
+            **subscribe_options: Extra options passed to ``subscribe``
+            
+        Returns:
+            Subscription ID
+            
+        Raises:
+            RuntimeError: If an offset or consumer is given without an event log
+        """
+        if self.event_log is None and (offset is not None or consumer_id is not None):
+            raise RuntimeError("offset replay requires an event log")
+        
+        if consumer_id is not None:
+            handler = self._committing_handler(handler, consumer_id)
+            if offset is None:
+                offset = self.event_log.resume_offset(consumer_id)
+        
+        replay_filter = EventSubscription(
+            event_types=event_types or set(EventType),
+            canvas_id=canvas_id,
+            user_id=user_id,
+        )
+        
+        # Catch up on everything published so far without the lock
+        replayed: Set[str] = set()
+        if offset is not None:
+            end = self.event_log.next_offset
+            self._replay(handler, replay_filter, self._log_backlog(offset, end))
+            offset = max(offset, end)
+        elif after_event_id is not None:
+            backlog = self.event_history.since(after_event_id, canvas_id=canvas_id)
+            replayed = {event.event_id for event in backlog}
+            self._replay(handler, replay_filter, backlog)
+        
+        # Publishes are blocked from here on, so only the tail published
+        # during catch-up remains before the subscription goes live
+        with self._publish_lock:
+            if offset is not None:
+                tail = self._log_backlog(offset, self.event_log.next_offset)
+            elif after_event_id is not None:
+                tail = (
+                    event
+                    for event in self.event_history.since(after_event_id, canvas_id=canvas_id)
+                    if event.event_id not in replayed
+                )
+            else:
+                tail = ()
+            self._replay(handler, replay_filter, tail)
+            
+            return self.subscribe(
+                handler=handler,
+                event_types=event_types,
+                canvas_id=canvas_id,
+                user_id=user_id,
+                **subscribe_options,
+            )
+    
+    def commit_offset(self, consumer_id: str, offset: int) -> None:
+        """Commit a consumer's cursor in the event log.
+        
+        Args:
+            consumer_id: Durable consumer name
+            offset: Last offset the consumer has processed
+        """
+        if self.event_log is None:
+            raise RuntimeError("commit_offset requires an event log")
+        self.event_log.commit(consumer_id, offset)
+    
     def unsubscribe(self, subscription_id: str) -> bool:
         """Unsubscribe from events.
         
@@ -161,10 +813,14 @@ class EventStream:
         Returns:
             True if subscription existed and was removed
         """
-        if subscription_id in self.subscriptions:
-            del self.subscriptions[subscription_id]
-            return True
-        return False
+        with self._publish_lock:
+            if subscription_id not in self.subscriptions:
+                return False
+            self._unindex_subscription(self.subscriptions.pop(subscription_id))
+            delivery_queue = self._delivery_queues.pop(subscription_id, None)
+        if delivery_queue is not None:
+            delivery_queue.close()
+        return True
     
     def get_subscriptions(self) -> List[EventSubscription]:
         """Get all active subscriptions.
@@ -183,10 +839,12 @@ class EventStream:
         Returns:
             True if subscription was paused
         """
-        if subscription_id in self.subscriptions:
-            self.subscriptions[subscription_id].active = False
+        with self._publish_lock:
+            subscription = self.subscriptions.get(subscription_id)
+            if subscription is None:
+                return False
+            subscription.active = False
             return True
-        return False
     
     def resume_subscription(self, subscription_id: str) -> bool:
         """Resume a paused subscription.
@@ -197,10 +855,62 @@ class EventStream:
         Returns:
             True if subscription was resumed
         """
-        if subscription_id in self.subscriptions:
-            self.subscriptions[subscription_id].active = True
+        with self._publish_lock:
+            subscription = self.subscriptions.get(subscription_id)
+            if subscription is None:
+                return False
+            subscription.active = True
             return True
-        return False
+    
+    def get_delivery_metrics(self, subscription_id: str) -> Optional[Dict[str, Any]]:
+        """Get lag and drop metrics for an async subscription.
+        
+        Args:
+            subscription_id: ID of the subscription
+            
+        Returns:
+            Metrics dictionary, or None if the subscription is not async
+        """
+        delivery_queue = self._delivery_queues.get(subscription_id)
+        return delivery_queue.get_metrics() if delivery_queue else None
+    
+    def get_all_delivery_metrics(self) -> List[Dict[str, Any]]:
+        """Get lag and drop metrics for every async subscription.
+        
+        Returns:
+            List of metrics dictionaries
+        """
+        return [q.get_metrics() for q in list(self._delivery_queues.values())]
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all async subscriptions have drained their queues.
+        
+        Args:
+            timeout: Maximum seconds to wait per subscription (None = forever)
+            
+        Returns:
+            True if every queue drained in time
+        """
+        return all(q.wait_idle(timeout) for q in list(self._delivery_queues.values()))
+    
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        """Stop the delivery workers, discarding undelivered events.
+        
+        Args:
+            timeout: Maximum seconds to wait for each worker to exit
+        """
+        if self.broker is not None:
+            self.broker.stop(timeout)
+        
+        with self._workers_lock:
+            workers, self._workers = self._workers, []
+        
+        for delivery_queue in list(self._delivery_queues.values()):
+            delivery_queue.close()
+        for _ in workers:
+            self._ready_queues.put(None)
+        for worker in workers:
+            worker.join(timeout)
     
     def get_event_history(
         self,
@@ -218,16 +928,7 @@ class EventStream:
         Returns:
             List of events
         """
-        filtered = self.event_history
-        
-        if canvas_id:
-            filtered = [e for e in filtered if e.canvas_id == canvas_id]
-        
-        if event_type:
-            filtered = [e for e in filtered if e.event_type == event_type]
-        
-        # Return most recent first
-        return list(reversed(filtered[-limit:]))
+        return self.event_history.latest(limit, canvas_id=canvas_id, event_type=event_type)
     
     def get_event_by_id(self, event_id: str) -> Optional[CanvasChangeEvent]:
         """Get a specific event by ID.
@@ -238,10 +939,7 @@ class EventStream:
         Returns:
             Event if found, None otherwise
         """
-        for event in self.event_history:
-            if event.event_id == event_id:
-                return event
-        return None
+        return self.event_history.get(event_id)
     
     def get_canvas_events(
         self,
@@ -273,8 +971,7 @@ class EventStream:
         Returns:
             List of events
         """
-        filtered = [e for e in self.event_history if e.user_id == user_id]
-        return list(reversed(filtered[-limit:]))
+        return self.event_history.latest(limit, user_id=user_id)
     
     def get_event_count(self, canvas_id: Optional[str] = None) -> int:
         """Get count of events.
@@ -285,9 +982,7 @@ class EventStream:
         Returns:
             Number of events
         """
-        if canvas_id:
-            return len([e for e in self.event_history if e.canvas_id == canvas_id])
-        return len(self.event_history)
+        return self.event_history.count(canvas_id)
     
     def clear_history(self) -> int:
         """Clear all event history.
@@ -295,17 +990,134 @@ class EventStream:
         Returns:
             Number of events cleared
         """
-        count = len(self.event_history)
-        self.event_history = []
-        return count
+        return self.event_history.clear()
     
     def _add_to_history(self, event: CanvasChangeEvent) -> None:
-        """Add event to history, maintaining size limit."""
+        """Add event to history, evicting the oldest event when full."""
         self.event_history.append(event)
+    
+    def _committing_handler(
+        self,
+        handler: Callable[[CanvasChangeEvent], None],
+        consumer_id: str,
+    ) -> Callable[[CanvasChangeEvent], None]:
+        """Wrap a handler so successful calls commit the consumer cursor."""
+        def committing(event: CanvasChangeEvent) -> None:
+            handler(event)
+            if event.offset is not None:
+                self.event_log.commit(consumer_id, event.offset)
+        return committing
+    
+    def _log_backlog(self, start: int, end: int) -> Iterable[CanvasChangeEvent]:
+        """Iterate logged events with offsets in [start, end)."""
+        entries = takewhile(lambda entry: entry[0] < end, self.event_log.read_from(start))
+        return (self._event_from_log(log_offset, record) for log_offset, record in entries)
+    
+    def _replay(
+        self,
+        handler: Callable[[CanvasChangeEvent], None],
+        replay_filter: EventSubscription,
+        events: Iterable[CanvasChangeEvent],
+    ) -> None:
+        """Call a handler for each replayed event matching the filter."""
+        for event in events:
+            if self._matches_subscription(event, replay_filter):
+                try:
+                    handler(event)
+                except Exception:
+                    # Handler error - don't propagate
+                    pass
+    
+    def _recover_history(self) -> None:
+        """Reload the most recent logged events into history."""
+        for log_offset, record in self.event_log.read_last(self.event_history.capacity):
+            self.event_history.append(self._event_from_log(log_offset, record))
+    
+    @staticmethod
+    def _event_from_log(offset: int, record: Dict[str, Any]) -> CanvasChangeEvent:
+        """Rebuild a logged event, stamped with its log offset."""
+        event = CanvasChangeEvent.from_dict(record)
+        event.offset = offset
+        return event
+    
+    def _ensure_delivery_workers(self) -> None:
+        """Start the async delivery workers if they are not running."""
+        with self._workers_lock:
+            if self._workers:
+                return
+            for i in range(max(1, self.delivery_workers)):
+                worker = threading.Thread(
+                    target=self._delivery_loop,
+                    name=f"event-stream-delivery-{i}",
+                    daemon=True,
+                )
+                worker.start()
+                self._workers.append(worker)
+    
+    def _delivery_loop(self) -> None:
+        """Drain ready subscriber queues until shut down."""
+        while True:
+            delivery_queue = self._ready_queues.get()
+            if delivery_queue is None:
+                return
+            if delivery_queue.drain(self.DELIVERY_BATCH_SIZE):
+                self._ready_queues.put(delivery_queue)
+    
+    def _index_keys(
+        self,
+        subscription: EventSubscription,
+    ) -> Iterable[Tuple[Dict[Any, Dict[str, None]], Any]]:
+        """Yield (index, key) pairs under which a subscription is registered."""
+        if subscription.user_id:
+            yield self._user_index, subscription.user_id
+            return
+        
+        for event_type in subscription.event_types or EventType:
+            yield self._type_canvas_index, (event_type, subscription.canvas_id or None)
+    
+    def _index_subscription(self, subscription: EventSubscription) -> None:
+        """Add a subscription to the dispatch indexes."""
+        self._subscription_order[subscription.subscription_id] = self._next_order
+        self._next_order += 1
+        
+        for index, key in self._index_keys(subscription):
+            index.setdefault(key, {})[subscription.subscription_id] = None
+    
+    def _unindex_subscription(self, subscription: EventSubscription) -> None:
+        """Remove a subscription from the dispatch indexes."""
+        self._subscription_order.pop(subscription.subscription_id, None)
         
-        # Trim history if too large
-        if len(self.event_history) > self.max_history_size:
-            self.event_history = self.event_history[-self.max_history_size:]
+        for index, key in self._index_keys(subscription):
+            bucket = index.get(key)
+            if bucket is None:
+                continue
+            bucket.pop(subscription.subscription_id, None)
+            if not bucket:
+                del index[key]
+    
+    def _matching_subscriptions(self, event: CanvasChangeEvent) -> List[EventSubscription]:
+        """Find subscriptions matching an event using the dispatch indexes.
+        
+        Returns:
+            Matching subscriptions in subscription order
+        """
+        candidate_ids: List[str] = []
+        for bucket in (
+            self._type_canvas_index.get((event.event_type, event.canvas_id or None)),
+            self._type_canvas_index.get((event.event_type, None)) if event.canvas_id else None,
+            self._user_index.get(event.user_id) if event.user_id else None,
+        ):
+            if bucket:
+                candidate_ids.extend(bucket)
+        
+        candidate_ids.sort(key=self._subscription_order.__getitem__)
+        
+        matches = []
+        for subscription_id in candidate_ids:
+            subscription = self.subscriptions[subscription_id]
+            if self._matches_subscription(event, subscription):
+                matches.append(subscription)
+        return matches
     
     def _matches_subscription(
         self,
@@ -335,17 +1147,84 @@ class EventStream:
 _event_stream: Optional[EventStream] = None
 
 
-def initialize_event_stream() -> EventStream:
+def initialize_event_stream(event_log: Optional[EventLog] = None, broker=None) -> EventStream:
     """Initialize the global event stream.
     
+    Args:
+        event_log: Optional durable log backing the stream
+        broker: Optional broker relaying events between worker processes
+    
     Returns:
         The event stream instance
     """
     global _event_stream
-    _event_stream = EventStream()
+    _event_stream = EventStream(event_log=event_log)
+    if broker is not None:
+        _event_stream.attach_broker(broker)
     return _event_stream
 
 
+def init_event_stream(app) -> EventStream:
+    """Initialize the global event stream from Flask app configuration.
+    
+    Each key is read from ``app.config`` and falls back to the environment
+    variable of the same name:
+    
+    - ``EVENT_BROKER_ENABLED``: relay events between worker processes through
+      a ``SQLiteEventBroker``. Defaults to on when ``WEB_CONCURRENCY`` (the
+      worker count used by gunicorn) is above 1, off for a single process.
+    - ``EVENT_BROKER_DB``: database shared by all workers on the node
+      (default ``event_broker.db``)
+    - ``EVENT_LOG_DIR``: directory of a durable ``EventLog`` backing the
+      stream, so offset replay and history survive restarts. Unset keeps
+      in-memory history only. A log directory must belong to one process;
+      with several workers, give each worker its own directory.
+    
+    The broker starts threads, so it must be created in each worker after
+    the fork (i.e. do not preload the app in the master process). Calling
+    this again in a process whose stream already has a broker or an event
+    log keeps the existing stream.
+    
+    Usage:
+        app = create_app()
+        init_event_stream(app)
+    
+    Args:
+        app: Flask application
+    
+    Returns:
+        The event stream instance
+    """
+    def setting(key: str, default: Optional[str] = None) -> Optional[str]:
+        value = app.config.get(key, os.getenv(key, default))
+        return None if value is None else str(value)
+    
+    if _event_stream is not None and (
+        _event_stream.broker is not None or _event_stream.event_log is not None
+    ):
+        return _event_stream
+    
+    enabled = setting('EVENT_BROKER_ENABLED')
+    if enabled is None:
+        broker_on = int(setting('WEB_CONCURRENCY', '1')) > 1
+    else:
+        broker_on = enabled.strip().lower() in ('1', 'true', 'yes', 'on')
+    
+    broker = None
+    if broker_on:
+        from src.services.event_broker import SQLiteEventBroker
+        broker = SQLiteEventBroker(setting('EVENT_BROKER_DB', 'event_broker.db'))
+        atexit.register(broker.stop)
+    
+    event_log = None
+    log_dir = setting('EVENT_LOG_DIR')
+    if log_dir:
+        event_log = EventLog(log_dir)
+        atexit.register(event_log.close)
+    
+    return initialize_event_stream(event_log=event_log, broker=broker)
+
+
 def get_event_stream() -> EventStream:
     """Get the global event stream instance.
     
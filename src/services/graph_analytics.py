@@ -0,0 +1,366 @@
+"""
+Graph Analytics Service
+=======================
+
+Structural analysis of investigation canvases:
+
+- degree centrality (distinct neighbours, in/out edge counts)
+- betweenness centrality (Brandes; pivot-sampled on large canvases)
+- cycles in cause-effect edges (Tarjan strongly connected components)
+- longest causal path and root-cause candidates
+- weakly connected components
+
+Everything except betweenness is O(N + E). Exact betweenness is O(N·E);
+above ``exact_betweenness_limit`` nodes it is estimated from a fixed number
+of pivots, which keeps it O(k·E). Results are cached per canvas and
+reused until the canvas revision changes.
+"""
+
+import random
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.models.canvas import Canvas, EdgeType
+
+
+@dataclass
+class CanvasAnalysis:
+    """Graph metrics for one canvas revision."""
+
+    canvas_id: str
+    revision: int
+    degree: Dict[str, int] = field(default_factory=dict)
+    in_degree: Dict[str, int] = field(default_factory=dict)
+    out_degree: Dict[str, int] = field(default_factory=dict)
+    betweenness: Dict[str, float] = field(default_factory=dict)
+    betweenness_exact: bool = True
+    causal_cycles: List[List[str]] = field(default_factory=list)
+    longest_causal_path: List[str] = field(default_factory=list)
+    root_cause_candidates: List[str] = field(default_factory=list)
+    components: List[List[str]] = field(default_factory=list)
+
+    @property
+    def most_connected(self) -> Tuple[Optional[str], int]:
+        """Node with the most distinct neighbours and its neighbour count."""
+        best, best_degree = None, 0
+        for node_id, degree in self.degree.items():
+            if degree > best_degree:
+                best, best_degree = node_id, degree
+        return best, best_degree
+
+    def top_betweenness(self, limit: int = 5) -> List[Tuple[str, float]]:
+        """Nodes with the highest betweenness (ties keep canvas order)."""
+        ranked = sorted(self.betweenness.items(), key=lambda item: -item[1])
+        return [(node_id, score) for node_id, score in ranked[:limit] if score > 0]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert analysis to dictionary."""
+        return {
+            'canvas_id': self.canvas_id,
+            'revision': self.revision,
+            'degree': self.degree,
+            'in_degree': self.in_degree,
+            'out_degree': self.out_degree,
+            'betweenness': self.betweenness,
+            'betweenness_exact': self.betweenness_exact,
+            'causal_cycles': self.causal_cycles,
+            'longest_causal_path': self.longest_causal_path,
+            'root_cause_candidates': self.root_cause_candidates,
+            'components': self.components,
+        }
+
+
+class CanvasAnalyzer:
+    """Computes and caches CanvasAnalysis per canvas revision."""
+
+    def __init__(
+        self,
+        exact_betweenness_limit: int = 500,
+        betweenness_samples: int = 64,
+        cache_size: int = 256,
+        seed: int = 1,
+    ):
+        """Initialize the analyzer.
+
+        Args:
+            exact_betweenness_limit: Largest canvas (in nodes) that gets exact
+                betweenness
+            betweenness_samples: Pivots used to estimate betweenness above
+                the limit
+            cache_size: Number of canvases whose analysis is kept
+            seed: Seed for pivot sampling (keeps estimates stable)
+        """
+        self.exact_betweenness_limit = exact_betweenness_limit
+        self.betweenness_samples = betweenness_samples
+        self.cache_size = cache_size
+        self.seed = seed
+
+        self._cache: "OrderedDict[str, CanvasAnalysis]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def analyze(self, canvas: Canvas) -> CanvasAnalysis:
+        """Get the analysis for the canvas's current revision.
+
+        Args:
+            canvas: Canvas to analyze
+
+        Returns:
+            Cached analysis if the revision is unchanged, otherwise a fresh one
+        """
+        with self._lock:
+            cached = self._cache.get(canvas.id)
+            if cached is not None and cached.revision == canvas.revision:
+                self._cache.move_to_end(canvas.id)
+                return cached
+
+        analysis = self._compute(canvas)
+
+        with self._lock:
+            self._cache[canvas.id] = analysis
+            self._cache.move_to_end(canvas.id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return analysis
+
+    def invalidate(self, canvas_id: Optional[str] = None) -> None:
+        """Drop cached analysis for one canvas (or all canvases)."""
+        with self._lock:
+            if canvas_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(canvas_id, None)
+
+    # ------------------------------------------------------------------
+    # Computation
+    # ------------------------------------------------------------------
+
+    def _compute(self, canvas: Canvas) -> CanvasAnalysis:
+        node_ids = list(canvas.nodes)
+        neighbours = self._undirected_neighbours(canvas, node_ids)
+        effects = {
+            node_id: [
+                e.target_id
+                for e in canvas.get_outgoing_edges(node_id, EdgeType.CAUSE_EFFECT)
+            ]
+            for node_id in node_ids
+        }
+
+        betweenness, exact = self._betweenness(node_ids, neighbours)
+        cycles, component_of = self._strongly_connected(node_ids, effects)
+        path, roots = self._longest_causal_path(node_ids, effects, component_of)
+
+        return CanvasAnalysis(
+            canvas_id=canvas.id,
+            revision=canvas.revision,
+            degree={n: len(neighbours[n]) for n in node_ids},
+            in_degree={n: len(canvas.get_incoming_edges(n)) for n in node_ids},
+            out_degree={n: len(canvas.get_outgoing_edges(n)) for n in node_ids},
+            betweenness=betweenness,
+            betweenness_exact=exact,
+            causal_cycles=cycles,
+            longest_causal_path=path,
+            root_cause_candidates=roots,
+            components=self._components(node_ids, neighbours),
+        )
+
+    @staticmethod
+    def _undirected_neighbours(canvas: Canvas, node_ids: List[str]) -> Dict[str, List[str]]:
+        """Distinct neighbours of each node, ignoring direction and self-loops."""
+        neighbours: Dict[str, Dict[str, None]] = {n: {} for n in node_ids}
+        for edge in canvas.edges.values():
+            if edge.source_id != edge.target_id:
+                neighbours[edge.source_id][edge.target_id] = None
+                neighbours[edge.target_id][edge.source_id] = None
+        return {n: list(adjacent) for n, adjacent in neighbours.items()}
+
+    def _betweenness(
+        self,
+        node_ids: List[str],
+        neighbours: Dict[str, List[str]],
+    ) -> Tuple[Dict[str, float], bool]:
+        """Normalized undirected betweenness (Brandes' algorithm)."""
+        n = len(node_ids)
+        scores = {node_id: 0.0 for node_id in node_ids}
+        if n < 3:
+            return scores, True
+
+        exact = n <= self.exact_betweenness_limit
+        if exact:
+            pivots = node_ids
+        else:
+            pivots = random.Random(self.seed).sample(node_ids, min(n, self.betweenness_samples))
+
+        for source in pivots:
+            # Single-source shortest paths (BFS), counting paths per node
+            order = []
+            predecessors: Dict[str, List[str]] = {source: []}
+            paths = {source: 1}
+            distance = {source: 0}
+            frontier = deque([source])
+            while frontier:
+                v = frontier.popleft()
+                order.append(v)
+                for w in neighbours[v]:
+                    if w not in distance:
+                        distance[w] = distance[v] + 1
+                        paths[w] = 0
+                        predecessors[w] = []
+                        frontier.append(w)
+                    if distance[w] == distance[v] + 1:
+                        paths[w] += paths[v]
+                        predecessors[w].append(v)
+
+            # Accumulate dependencies in reverse BFS order
+            dependency = dict.fromkeys(order, 0.0)
+            for w in reversed(order):
+                for v in predecessors[w]:
+                    dependency[v] += paths[v] / paths[w] * (1.0 + dependency[w])
+                if w != source:
+                    scores[w] += dependency[w]
+
+        # Each undirected pair was counted from both ends
+        scale = 1.0 / ((n - 1) * (n - 2))
+        if not exact:
+            scale *= n / len(pivots)
+        return {node_id: score * scale for node_id, score in scores.items()}, exact
+
+    @staticmethod
+    def _strongly_connected(
+        node_ids: List[str],
+        effects: Dict[str, List[str]],
+    ) -> Tuple[List[List[str]], Dict[str, int]]:
+        """Tarjan's SCC over cause-effect edges (iterative).
+
+        Returns:
+            (cycles, component_of) where cycles are SCCs with more than one
+            node or a self-loop, and component_of maps node -> SCC index
+        """
+        index: Dict[str, int] = {}
+        lowlink: Dict[str, int] = {}
+        on_stack = set()
+        stack: List[str] = []
+        component_of: Dict[str, int] = {}
+        cycles: List[List[str]] = []
+        counter = 0
+        scc_count = 0
+
+        for root in node_ids:
+            if root in index:
+                continue
+            work = [(root, 0)]
+            while work:
+                v, child = work[-1]
+                if child == 0:
+                    index[v] = lowlink[v] = counter
+                    counter += 1
+                    stack.append(v)
+                    on_stack.add(v)
+
+                successors = effects.get(v, ())
+                if child < len(successors):
+                    work[-1] = (v, child + 1)
+                    w = successors[child]
+                    if w not in index:
+                        work.append((w, 0))
+                    elif w in on_stack:
+                        lowlink[v] = min(lowlink[v], index[w])
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[v])
+
+                if lowlink[v] == index[v]:
+                    members = []
+                    while True:
+                        w = stack.pop()
+                        on_stack.discard(w)
+                        component_of[w] = scc_count
+                        members.append(w)
+                        if w == v:
+                            break
+                    scc_count += 1
+                    if len(members) > 1 or v in successors:
+                        cycles.append(list(reversed(members)))
+
+        return cycles, component_of
+
+    @staticmethod
+    def _longest_causal_path(
+        node_ids: List[str],
+        effects: Dict[str, List[str]],
+        component_of: Dict[str, int],
+    ) -> Tuple[List[str], List[str]]:
+        """Longest cause-effect chain and root-cause candidates.
+
+        Edges inside a cycle are ignored, so the remaining cause-effect
+        graph is a DAG and the longest path is found in O(N + E).
+
+        Returns:
+            (path, roots) where roots are nodes with no cause that start a
+            chain, ordered by the length of the longest chain they start
+        """
+        successors = {
+            v: [w for w in effects[v] if component_of[w] != component_of[v]]
+            for v in node_ids
+        }
+        has_cause = {w for targets in successors.values() for w in targets}
+
+        # Topological order (Kahn), then chain length from each node backwards
+        pending = {v: 0 for v in node_ids}
+        for targets in successors.values():
+            for w in targets:
+                pending[w] += 1
+        ready = deque(v for v in node_ids if pending[v] == 0)
+        order = []
+        while ready:
+            v = ready.popleft()
+            order.append(v)
+            for w in successors[v]:
+                pending[w] -= 1
+                if pending[w] == 0:
+                    ready.append(w)
+
+        length: Dict[str, int] = {}
+        following: Dict[str, Optional[str]] = {}
+        for v in reversed(order):
+            best, best_length = None, 0
+            for w in successors[v]:
+                if length[w] > best_length:
+                    best, best_length = w, length[w]
+            length[v] = best_length + 1
+            following[v] = best
+
+        roots = [v for v in node_ids if v not in has_cause and successors[v]]
+        roots.sort(key=lambda v: -length[v])
+        if not roots:
+            return [], []
+
+        path = [roots[0]]
+        while following[path[-1]] is not None:
+            path.append(following[path[-1]])
+        return path, roots
+
+    @staticmethod
+    def _components(node_ids: List[str], neighbours: Dict[str, List[str]]) -> List[List[str]]:
+        """Weakly connected components, largest first."""
+        seen = set()
+        components = []
+        for start in node_ids:
+            if start in seen:
+                continue
+            seen.add(start)
+            component = [start]
+            frontier = deque([start])
+            while frontier:
+                for w in neighbours[frontier.popleft()]:
+                    if w not in seen:
+                        seen.add(w)
+                        component.append(w)
+                        frontier.append(w)
+            components.append(component)
+        components.sort(key=len, reverse=True)
+        return components
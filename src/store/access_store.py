@@ -0,0 +1,230 @@
+"""
+Access Store - SQL Data Access Layer
+
+Persists RBAC role assignments in SQLite so grants survive restarts and are
+shared between worker processes.
+
+Assignments live in a ``role_assignments`` table indexed by user and by
+resource. Every write bumps a single ``change_version`` counter and stamps
+the rows it wrote with the new value, so a worker can tell whether anything
+changed with a one-row lookup and then fetch only the rows written since
+the version it last saw.
+
+Used as the ``store`` of ``src.services.access_control.AccessControl``,
+whose in-memory assignments act as a write-through cache.
+"""
+
+import sqlite3
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from src.services.access_control import Role, RoleAssignment
+
+
+class SQLiteRoleAssignmentStore:
+    """Data access layer for role assignments."""
+
+    def __init__(self, db_path: str = 'access_control.db'):
+        """Initialize the assignment store.
+
+        Args:
+            db_path: Path to SQLite database file
+        """
+        self.db_path = db_path
+        self.initialize()
+
+    def initialize(self) -> None:
+        """Initialize database schema."""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS role_assignments (
+                    assignment_id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    resource_id TEXT,
+                    assigned_at TEXT NOT NULL,
+                    assigned_by TEXT NOT NULL,
+                    expires_at TEXT,
+                    is_active INTEGER NOT NULL DEFAULT 1,
+                    ended_at TEXT,
+                    change_version INTEGER NOT NULL
+                )
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_role_assignments_user
+                ON role_assignments(user_id)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_role_assignments_resource
+                ON role_assignments(resource_id)
+            ''')
+            # Workers catching up read rows by the version that wrote them
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_role_assignments_version
+                ON role_assignments(change_version)
+            ''')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS rbac_meta (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+            ''')
+            cursor.execute(
+                "INSERT OR IGNORE INTO rbac_meta (name, value) VALUES ('change_version', 0)"
+            )
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def save_assignments(self, assignments: Iterable[RoleAssignment]) -> int:
+        """
+        Insert or update assignments as one change.
+
+        Args:
+            assignments: Assignments to write
+
+        Returns:
+            The change version stamped on the written rows
+        """
+        rows = [self._to_row(a) for a in assignments]
+        with sqlite3.connect(self.db_path) as conn:
+            # Writers are serialized, so versions commit in order
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute("UPDATE rbac_meta SET value = value + 1 WHERE name = 'change_version'")
+            version = conn.execute(
+                "SELECT value FROM rbac_meta WHERE name = 'change_version'"
+            ).fetchone()[0]
+            conn.executemany('''
+                INSERT INTO role_assignments (
+                    assignment_id, user_id, role, resource_id, assigned_at,
+                    assigned_by, expires_at, is_active, ended_at, change_version
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(assignment_id) DO UPDATE SET
+                    expires_at = excluded.expires_at,
+                    is_active = excluded.is_active,
+                    ended_at = excluded.ended_at,
+                    change_version = excluded.change_version
+            ''', [row + (version,) for row in rows])
+        return version
+
+    def delete_ended_before(self, cutoff: datetime) -> int:
+        """
+        Delete inactive assignments that ended before ``cutoff``.
+
+        Not a change: every worker compacts its own cache by the same rule.
+
+        Returns:
+            Number of assignments deleted
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute(
+                'DELETE FROM role_assignments WHERE is_active = 0 AND ended_at < ?',
+                (cutoff.isoformat(),),
+            )
+            return cursor.rowcount
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get_change_version(self) -> int:
+        """Get the version of the latest change (a single-row lookup)."""
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute(
+                "SELECT value FROM rbac_meta WHERE name = 'change_version'"
+            ).fetchone()[0]
+
+    def get_changes_since(self, version: int) -> Tuple[List[RoleAssignment], int]:
+        """
+        Get assignments written after a change version.
+
+        Args:
+            version: Change version the caller has already applied
+
+        Returns:
+            (assignments in write order, current change version)
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            # One read transaction, so the rows and the version agree
+            conn.execute('BEGIN')
+            current = conn.execute(
+                "SELECT value FROM rbac_meta WHERE name = 'change_version'"
+            ).fetchone()[0]
+            rows = conn.execute('''
+                SELECT * FROM role_assignments
+                WHERE change_version > ? AND change_version <= ?
+                ORDER BY change_version, assigned_at
+            ''', (version, current)).fetchall()
+            conn.commit()
+        return [self._from_row(row) for row in rows], current
+
+    def get_all_assignments(self) -> List[RoleAssignment]:
+        """Get every stored assignment, oldest first."""
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                'SELECT * FROM role_assignments ORDER BY assigned_at, rowid'
+            ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def get_user_assignments(self, user_id: str, active_only: bool = False) -> List[RoleAssignment]:
+        """Get a user's assignments, oldest first."""
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute('''
+                SELECT * FROM role_assignments
+                WHERE user_id = ? AND (? = 0 OR is_active = 1)
+                ORDER BY assigned_at, rowid
+            ''', (user_id, int(active_only))).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def get_resource_assignments(
+        self,
+        resource_id: str,
+        active_only: bool = False,
+    ) -> List[RoleAssignment]:
+        """Get the assignments scoped to a resource, oldest first."""
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute('''
+                SELECT * FROM role_assignments
+                WHERE resource_id = ? AND (? = 0 OR is_active = 1)
+                ORDER BY assigned_at, rowid
+            ''', (resource_id, int(active_only))).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    # Helper methods
+
+    @staticmethod
+    def _to_row(assignment: RoleAssignment) -> tuple:
+        return (
+            assignment.assignment_id,
+            assignment.user_id,
+            assignment.role.value,
+            assignment.resource_id,
+            assignment.assigned_at.isoformat(),
+            assignment.assigned_by,
+            assignment.expires_at.isoformat() if assignment.expires_at else None,
+            int(assignment.is_active),
+            assignment.ended_at.isoformat() if assignment.ended_at else None,
+        )
+
+    @staticmethod
+    def _from_row(row: tuple) -> RoleAssignment:
+        return RoleAssignment(
+            assignment_id=row[0],
+            user_id=row[1],
+            role=Role(row[2]),
+            resource_id=row[3],
+            assigned_at=datetime.fromisoformat(row[4]),
+            assigned_by=row[5],
+            expires_at=_parse_time(row[6]),
+            is_active=bool(row[7]),
+            ended_at=_parse_time(row[8]),
+        )
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
@@ -0,0 +1,392 @@
+"""
+Canvas Store - SQL Data Access Layer
+
+Persists investigation canvases in SQLite so they survive restarts and are
+shared between worker processes.
+
+Canvases live in a ``canvases`` table indexed by ``investigation_id``;
+nodes and edges live in their own tables keyed by (canvas_id, id). Node
+and edge mutations are written as single-row upserts/deletes instead of
+rewriting the whole canvas, and deleting a node cascades to its edges.
+
+Implements the ``CanvasStore`` interface from ``src.models.canvas``.
+"""
+
+import json
+import sqlite3
+from typing import Iterable, List, Optional
+
+from src.models.canvas import (
+    Canvas, CanvasEdge, CanvasNode, EdgeType, NodeType, RevisionConflictError,
+)
+
+
+class SQLiteCanvasStore:
+    """Data access layer for canvases."""
+
+    def __init__(self, db_path: str = 'canvases.db'):
+        """Initialize the canvas store.
+
+        Args:
+            db_path: Path to SQLite database file
+        """
+        self.db_path = db_path
+        self.initialize()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('PRAGMA foreign_keys = ON')  # Enable cascade deletes
+        return conn
+
+    def initialize(self) -> None:
+        """Initialize database schema."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS canvases (
+                    id TEXT PRIMARY KEY,
+                    investigation_id TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    description TEXT DEFAULT '',
+                    layout_type TEXT DEFAULT 'force-directed',
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    revision INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_canvases_investigation
+                ON canvases(investigation_id)
+            ''')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS canvas_nodes (
+                    canvas_id TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    description TEXT DEFAULT '',
+                    data TEXT DEFAULT '{}',
+                    x REAL DEFAULT 0,
+                    y REAL DEFAULT 0,
+                    width REAL DEFAULT 200,
+                    height REAL DEFAULT 100,
+                    metadata TEXT DEFAULT '{}',
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (canvas_id, id),
+                    FOREIGN KEY (canvas_id) REFERENCES canvases(id) ON DELETE CASCADE
+                )
+            ''')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS canvas_edges (
+                    canvas_id TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    source_id TEXT NOT NULL,
+                    target_id TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    label TEXT DEFAULT '',
+                    strength REAL DEFAULT 1.0,
+                    metadata TEXT DEFAULT '{}',
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (canvas_id, id),
+                    FOREIGN KEY (canvas_id) REFERENCES canvases(id) ON DELETE CASCADE,
+                    FOREIGN KEY (canvas_id, source_id)
+                        REFERENCES canvas_nodes(canvas_id, id) ON DELETE CASCADE,
+                    FOREIGN KEY (canvas_id, target_id)
+                        REFERENCES canvas_nodes(canvas_id, id) ON DELETE CASCADE
+                )
+            ''')
+            # Cascading node deletes look edges up by endpoint
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_canvas_edges_source
+                ON canvas_edges(canvas_id, source_id)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_canvas_edges_target
+                ON canvas_edges(canvas_id, target_id)
+            ''')
+
+    # ------------------------------------------------------------------
+    # Canvases
+    # ------------------------------------------------------------------
+
+    def add(self, canvas: Canvas) -> None:
+        """Add a canvas (with its nodes and edges) to the store."""
+        self.update(canvas)
+
+    def get(self, canvas_id: str) -> Optional[Canvas]:
+        """Get a canvas by ID."""
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM canvases WHERE id = ?', (canvas_id,)).fetchone()
+            if not row:
+                return None
+            return self._load(conn, row)
+
+    def get_revision(self, canvas_id: str) -> Optional[int]:
+        """Get a canvas's revision without loading its nodes and edges."""
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT revision FROM canvases WHERE id = ?', (canvas_id,)
+            ).fetchone()
+            return row[0] if row else None
+
+    def get_by_investigation(self, investigation_id: str) -> List[Canvas]:
+        """Get all canvases for an investigation."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT * FROM canvases WHERE investigation_id = ? ORDER BY rowid',
+                (investigation_id,),
+            ).fetchall()
+            return [self._load(conn, row) for row in rows]
+
+    def delete(self, canvas_id: str) -> None:
+        """Delete a canvas (cascades to nodes and edges)."""
+        with self._connect() as conn:
+            conn.execute('DELETE FROM canvases WHERE id = ?', (canvas_id,))
+
+    def update(self, canvas: Canvas) -> None:
+        """Save a whole canvas, replacing its stored nodes and edges."""
+        with self._connect() as conn:
+            self._write_canvas(conn, canvas)
+            conn.execute('DELETE FROM canvas_edges WHERE canvas_id = ?', (canvas.id,))
+            conn.execute('DELETE FROM canvas_nodes WHERE canvas_id = ?', (canvas.id,))
+            for node in canvas.nodes.values():
+                self._write_node(conn, canvas.id, node)
+            for edge in canvas.edges.values():
+                self._write_edge(conn, canvas.id, edge)
+
+    def get_all(self) -> List[Canvas]:
+        """Get all canvases."""
+        with self._connect() as conn:
+            rows = conn.execute('SELECT * FROM canvases ORDER BY rowid').fetchall()
+            return [self._load(conn, row) for row in rows]
+
+    def count(self) -> int:
+        """Get total canvas count."""
+        with self._connect() as conn:
+            return conn.execute('SELECT COUNT(*) FROM canvases').fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # Row-level mutations
+    # ------------------------------------------------------------------
+
+    def save_metadata(self, canvas: Canvas, expected_revision: Optional[int] = None) -> None:
+        """Persist canvas fields (title, description, layout) and bump the revision."""
+        with self._connect() as conn:
+            self._write_canvas(conn, canvas, expected_revision)
+
+    def save_node(self, canvas: Canvas, node: CanvasNode) -> None:
+        """Persist one added or updated node."""
+        with self._connect() as conn:
+            self._write_canvas(conn, canvas)
+            self._write_node(conn, canvas.id, node)
+
+    def delete_node(self, canvas: Canvas, node_id: str) -> None:
+        """Delete one node; its edges are removed by cascade."""
+        with self._connect() as conn:
+            self._write_canvas(conn, canvas)
+            conn.execute(
+                'DELETE FROM canvas_nodes WHERE canvas_id = ? AND id = ?',
+                (canvas.id, node_id),
+            )
+
+    def save_edge(self, canvas: Canvas, edge: CanvasEdge) -> None:
+        """Persist one added or updated edge."""
+        with self._connect() as conn:
+            self._write_canvas(conn, canvas)
+            self._write_edge(conn, canvas.id, edge)
+
+    def delete_edge(self, canvas: Canvas, edge_id: str) -> None:
+        """Delete one edge."""
+        with self._connect() as conn:
+            self._write_canvas(conn, canvas)
+            conn.execute(
+                'DELETE FROM canvas_edges WHERE canvas_id = ? AND id = ?',
+                (canvas.id, edge_id),
+            )
+
+    def save_batch(
+        self,
+        canvas: Canvas,
+        node_ids: Iterable[str],
+        edge_ids: Iterable[str],
+        expected_revision: Optional[int] = None,
+    ) -> None:
+        """Persist several node/edge changes in one transaction.
+
+        Ids still on the canvas are upserted, the others are deleted.
+        """
+        node_ids, edge_ids = set(node_ids), set(edge_ids)
+        with self._connect() as conn:
+            self._write_canvas(conn, canvas, expected_revision)
+            conn.executemany(
+                'DELETE FROM canvas_edges WHERE canvas_id = ? AND id = ?',
+                [(canvas.id, edge_id) for edge_id in edge_ids if edge_id not in canvas.edges],
+            )
+            conn.executemany(
+                'DELETE FROM canvas_nodes WHERE canvas_id = ? AND id = ?',
+                [(canvas.id, node_id) for node_id in node_ids if node_id not in canvas.nodes],
+            )
+            for node_id in node_ids & canvas.nodes.keys():
+                self._write_node(conn, canvas.id, canvas.nodes[node_id])
+            for edge_id in edge_ids & canvas.edges.keys():
+                self._write_edge(conn, canvas.id, canvas.edges[edge_id])
+
+    # Helper methods
+
+    @staticmethod
+    def _write_canvas(
+        conn: sqlite3.Connection,
+        canvas: Canvas,
+        expected_revision: Optional[int] = None,
+    ) -> None:
+        """Upsert the canvas row (keeps its rowid, so listing order is stable).
+
+        An existing row's revision is incremented in SQL rather than copied
+        from ``canvas``, so two workers saving the same canvas never store
+        the same revision for different content. ``canvas.revision`` is
+        set to the stored value.
+
+        With ``expected_revision`` the row is only updated while it is still
+        at that revision; otherwise RevisionConflictError is raised and the
+        caller's transaction rolls back.
+        """
+        if expected_revision is not None:
+            updated = conn.execute('''
+                UPDATE canvases SET
+                    investigation_id = ?, title = ?, description = ?, layout_type = ?,
+                    updated_at = ?, revision = revision + 1
+                WHERE id = ? AND revision = ?
+            ''', (
+                canvas.investigation_id, canvas.title, canvas.description, canvas.layout_type,
+                canvas.updated_at, canvas.id, expected_revision,
+            )).rowcount
+            if not updated:
+                raise RevisionConflictError(
+                    f'Canvas {canvas.id} is no longer at revision {expected_revision}'
+                )
+            canvas.revision = expected_revision + 1
+            return
+
+        conn.execute('''
+            INSERT INTO canvases
+            (id, investigation_id, title, description, layout_type,
+             created_at, updated_at, revision)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                investigation_id = excluded.investigation_id,
+                title = excluded.title,
+                description = excluded.description,
+                layout_type = excluded.layout_type,
+                updated_at = excluded.updated_at,
+                revision = canvases.revision + 1
+        ''', (
+            canvas.id, canvas.investigation_id, canvas.title, canvas.description,
+            canvas.layout_type, canvas.created_at, canvas.updated_at, canvas.revision,
+        ))
+        canvas.revision = conn.execute(
+            'SELECT revision FROM canvases WHERE id = ?', (canvas.id,)
+        ).fetchone()[0]
+
+    @staticmethod
+    def _write_node(conn: sqlite3.Connection, canvas_id: str, node: CanvasNode) -> None:
+        conn.execute('''
+            INSERT INTO canvas_nodes
+            (canvas_id, id, type, title, description, data, x, y, width, height,
+             metadata, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(canvas_id, id) DO UPDATE SET
+                type = excluded.type,
+                title = excluded.title,
+                description = excluded.description,
+                data = excluded.data,
+                x = excluded.x,
+                y = excluded.y,
+                width = excluded.width,
+                height = excluded.height,
+                metadata = excluded.metadata,
+                updated_at = excluded.updated_at
+        ''', (
+            canvas_id, node.id, node.type.value, node.title, node.description,
+            json.dumps(node.data), node.position[0], node.position[1],
+            node.size[0], node.size[1], json.dumps(node.metadata),
+            node.created_at, node.updated_at,
+        ))
+
+    @staticmethod
+    def _write_edge(conn: sqlite3.Connection, canvas_id: str, edge: CanvasEdge) -> None:
+        conn.execute('''
+            INSERT INTO canvas_edges
+            (canvas_id, id, source_id, target_id, type, label, strength, metadata, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(canvas_id, id) DO UPDATE SET
+                source_id = excluded.source_id,
+                target_id = excluded.target_id,
+                type = excluded.type,
+                label = excluded.label,
+                strength = excluded.strength,
+                metadata = excluded.metadata
+        ''', (
+            canvas_id, edge.id, edge.source_id, edge.target_id, edge.type.value,
+            edge.label, edge.strength, json.dumps(edge.metadata), edge.created_at,
+        ))
+
+    def _load(self, conn: sqlite3.Connection, row) -> Canvas:
+        """Build a Canvas from its row plus its node and edge rows."""
+        canvas = Canvas(
+            id=row[0],
+            investigation_id=row[1],
+            title=row[2],
+            description=row[3],
+            layout_type=row[4],
+        )
+
+        for node_row in conn.execute(
+            'SELECT * FROM canvas_nodes WHERE canvas_id = ? ORDER BY rowid', (canvas.id,)
+        ):
+            canvas.add_node(self._row_to_node(node_row))
+        for edge_row in conn.execute(
+            'SELECT * FROM canvas_edges WHERE canvas_id = ? ORDER BY rowid', (canvas.id,)
+        ):
+            canvas.add_edge(self._row_to_edge(edge_row))
+
+        # Loading went through add_node/add_edge; restore the stored values
+        canvas.created_at = row[5]
+        canvas.updated_at = row[6]
+        canvas.revision = row[7]
+        return canvas
+
+    @staticmethod
+    def _row_to_node(row) -> CanvasNode:
+        """Convert database row to CanvasNode instance."""
+        node = CanvasNode(
+            id=row[1],
+            type=NodeType(row[2]),
+            title=row[3],
+            description=row[4],
+            data=json.loads(row[5]),
+            position=(row[6], row[7]),
+            size=(row[8], row[9]),
+            metadata=json.loads(row[10]),
+        )
+        node.created_at = row[11]
+        node.updated_at = row[12]
+        return node
+
+    @staticmethod
+    def _row_to_edge(row) -> CanvasEdge:
+        """Convert database row to CanvasEdge instance."""
+        edge = CanvasEdge(
+            id=row[1],
+            source_id=row[2],
+            target_id=row[3],
+            type=EdgeType(row[4]),
+            label=row[5],
+            strength=row[6],
+            metadata=json.loads(row[7]),
+        )
+        edge.created_at = row[8]
+        return edge
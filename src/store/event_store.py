@@ -6,6 +6,8 @@ Provides CRUD operations for Event objects and advanced queries for:
 - Event retrieval by source type
 - Event retrieval by time range
 - Event filtering by severity and tags
+- Cross-source correlation by trace_id / request_id / correlation_id
+- Optional near-duplicate clustering at ingest (one row per cluster)
 """
 
 import sqlite3
@@ -14,14 +16,28 @@ from datetime import datetime
 from typing import List, Optional, Dict, Any
 from uuid import uuid4
 from src.models.event import Event, EventSource, EventSeverity
+from src.services.event_clustering import EventClusterer, cluster_id_for
 
 
 class EventStore:
     """SQLite-based persistent storage for events."""
     
-    def __init__(self, db_path: str = "data/events.db"):
-        """Initialize event store with database connection."""
+    # Identifiers shared between log, trace and other sources that tie
+    # events from the same request together.
+    CORRELATION_KEYS = ('trace_id', 'request_id', 'correlation_id')
+    
+    def __init__(self, db_path: str = "data/events.db",
+                 clusterer: Optional[EventClusterer] = None):
+        """
+        Initialize event store with database connection.
+        
+        Args:
+            db_path: SQLite database path
+            clusterer: Optional EventClusterer; when set, near-duplicate events
+                are folded into an existing cluster instead of stored as rows
+        """
         self.db_path = db_path
+        self.clusterer = clusterer
         self._init_db()
     
     def _init_db(self):
@@ -81,12 +97,85 @@ class EventStore:
                 )
             ''')
             
+            # Correlation index: (key_type, key_value) -> event_id
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'event_correlations'"
+            )
+            backfill_correlations = cursor.fetchone() is None
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS event_correlations (
+                    key_type TEXT NOT NULL,
+                    key_value TEXT NOT NULL,
+                    event_id TEXT NOT NULL,
+                    PRIMARY KEY (key_type, key_value, event_id),
+                    FOREIGN KEY (event_id) REFERENCES events(id)
+                )
+            ''')
+            
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_event_correlations_event_id
+                ON event_correlations(event_id)
+            ''')
+            
+            # Databases created before the index existed: index stored events
+            if backfill_correlations:
+                self._backfill_correlations(conn)
+            
+            # Near-duplicate clusters: one representative event per cluster
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS event_clusters (
+                    cluster_id TEXT PRIMARY KEY,
+                    representative_id TEXT NOT NULL,
+                    signature TEXT NOT NULL,
+                    event_count INTEGER NOT NULL DEFAULT 1,
+                    first_seen TEXT NOT NULL,
+                    last_seen TEXT NOT NULL,
+                    FOREIGN KEY (representative_id) REFERENCES events(id)
+                )
+            ''')
+            
+            # LSH buckets: (band, bucket) -> candidate clusters
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS event_cluster_buckets (
+                    band INTEGER NOT NULL,
+                    bucket TEXT NOT NULL,
+                    cluster_id TEXT NOT NULL,
+                    PRIMARY KEY (band, bucket, cluster_id),
+                    FOREIGN KEY (cluster_id) REFERENCES event_clusters(cluster_id)
+                )
+            ''')
+            
+            # Events folded into a cluster, so redeliveries are recognised
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS event_cluster_members (
+                    event_id TEXT PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    source_id TEXT,
+                    cluster_id TEXT NOT NULL,
+                    representative_id TEXT NOT NULL,
+                    FOREIGN KEY (cluster_id) REFERENCES event_clusters(cluster_id)
+                )
+            ''')
+            
+            cursor.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_event_cluster_members_source
+                ON event_cluster_members(source_id, source)
+            ''')
+            
             conn.commit()
     
     def create_event(self, event: Event) -> bool:
         """
         Create a new event in the store.
         
+        When a clusterer is configured and the event is a near-duplicate of
+        an existing cluster, the cluster count is incremented and the event's
+        correlation keys are attached to the cluster representative instead
+        of storing a new row. The folded event is recorded as a cluster
+        member, so delivering it again is rejected like any stored event.
+        ``event.metadata['cluster_id']`` is set either way; it is derived
+        from the representative's ID.
+        
         Args:
             event: Event object to store
             
@@ -97,6 +186,40 @@ class EventStore:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 
+                signature = None
+                if self.clusterer and self.clusterer.should_cluster(event):
+                    if self._event_exists(cursor, event):
+                        return False
+                    
+                    signature = self.clusterer.signature(self.clusterer.fingerprint_text(event))
+                    cluster = self._find_cluster(cursor, signature)
+                    if cluster:
+                        cluster_id, representative_id = cluster
+                        cursor.execute('''
+                            UPDATE event_clusters SET
+                                event_count = event_count + 1,
+                                first_seen = MIN(first_seen, ?),
+                                last_seen = MAX(last_seen, ?)
+                            WHERE cluster_id = ?
+                        ''', (event.timestamp, event.timestamp, cluster_id))
+                        cursor.execute('''
+                            INSERT INTO event_cluster_members (
+                                event_id, source, source_id, cluster_id, representative_id
+                            ) VALUES (?, ?, ?, ?, ?)
+                        ''', (
+                            event.id,
+                            event.source.value,
+                            event.source_id,
+                            cluster_id,
+                            representative_id,
+                        ))
+                        self._index_correlations(cursor, event, representative_id)
+                        event.metadata['cluster_id'] = cluster_id
+                        conn.commit()
+                        return True
+                    
+                    event.metadata['cluster_id'] = cluster_id_for(event.id)
+                
                 cursor.execute('''
                     INSERT INTO events (
                         id, timestamp, source, event_type, severity,
@@ -121,6 +244,30 @@ class EventStore:
                     event.deleted_at,
                 ))
                 
+                self._index_correlations(cursor, event, event.id)
+                
+                if signature is not None:
+                    cluster_id = event.metadata['cluster_id']
+                    cursor.execute('''
+                        INSERT INTO event_clusters (
+                            cluster_id, representative_id, signature,
+                            event_count, first_seen, last_seen
+                        ) VALUES (?, ?, ?, 1, ?, ?)
+                    ''', (
+                        cluster_id,
+                        event.id,
+                        json.dumps(signature),
+                        event.timestamp,
+                        event.timestamp,
+                    ))
+                    cursor.executemany('''
+                        INSERT OR IGNORE INTO event_cluster_buckets (band, bucket, cluster_id)
+                        VALUES (?, ?, ?)
+                    ''', [
+                        (band, bucket, cluster_id)
+                        for band, bucket in self.clusterer.band_keys(signature)
+                    ])
+                
                 conn.commit()
                 return True
         except sqlite3.IntegrityError:
@@ -147,6 +294,93 @@ class EventStore:
             
             return self._row_to_event(row)
     
+    def get_cluster(self, cluster_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve near-duplicate cluster details.
+        
+        Args:
+            cluster_id: Cluster ID (from ``event.metadata['cluster_id']``)
+            
+        Returns:
+            Dict with representative_id, event_count, first_seen and last_seen,
+            or None if not found
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT cluster_id, representative_id, event_count, first_seen, last_seen
+                FROM event_clusters WHERE cluster_id = ?
+            ''', (cluster_id,))
+            row = cursor.fetchone()
+            
+            if not row:
+                return None
+            
+            return {
+                'cluster_id': row[0],
+                'representative_id': row[1],
+                'event_count': row[2],
+                'first_seen': row[3],
+                'last_seen': row[4],
+            }
+    
+    def get_correlated_events(self, event_id: str) -> List[Event]:
+        """
+        Retrieve all events sharing a correlation identifier with an event.
+        
+        Uses the correlation index, so a log entry with a trace_id returns the
+        matching trace events (and vice versa) without scanning the table.
+        
+        Args:
+            event_id: Event ID to correlate from
+            
+        Returns:
+            List of correlated Event objects (excluding the event itself),
+            ordered by timestamp
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT e.* FROM events e
+                WHERE e.id IN (
+                    SELECT c.event_id FROM event_correlations src
+                    JOIN event_correlations c
+                        ON c.key_type = src.key_type
+                        AND c.key_value = src.key_value
+                    WHERE src.event_id = ? AND c.event_id != src.event_id
+                )
+                AND e.deleted_at IS NULL
+                ORDER BY e.timestamp ASC
+            ''', (event_id,))
+            
+            return [self._row_to_event(row) for row in cursor.fetchall()]
+    
+    def get_events_by_correlation_key(self, key_type: str, key_value: str) -> List[Event]:
+        """
+        Retrieve all events carrying a specific correlation identifier.
+        
+        Args:
+            key_type: One of CORRELATION_KEYS (e.g. 'trace_id')
+            key_value: Identifier value
+            
+        Returns:
+            List of Event objects ordered by timestamp
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT e.* FROM event_correlations c
+                JOIN events e ON e.id = c.event_id
+                WHERE c.key_type = ? AND c.key_value = ?
+                AND e.deleted_at IS NULL
+                ORDER BY e.timestamp ASC
+            ''', (key_type, str(key_value)))
+            
+            return [self._row_to_event(row) for row in cursor.fetchall()]
+    
     def get_events_by_investigation(self, investigation_id: str) -> List[Event]:
         """
         Retrieve all events linked to an investigation.
@@ -273,6 +507,10 @@ class EventStore:
         """
         Update specific fields of an event.
         
+        The event's correlation keys are re-indexed from the stored row.
+        Keys it no longer carries are removed, unless near-duplicates were
+        folded into it (their keys are indexed under its ID too).
+        
         Args:
             event_id: Event ID to update
             updates: Dictionary of field updates
@@ -283,6 +521,7 @@ class EventStore:
         event = self.get_event(event_id)
         if not event:
             return False
+        old_keys = set(self._extract_correlation_keys(event))
         
         # Update event object
         for key, value in updates.items():
@@ -310,6 +549,21 @@ class EventStore:
                 event_id,
             ))
             
+            cursor.execute('SELECT * FROM events WHERE id = ?', (event_id,))
+            stored = self._row_to_event(cursor.fetchone())
+            self._index_correlations(cursor, stored, event_id)
+            stale_keys = old_keys - set(self._extract_correlation_keys(stored))
+            if stale_keys:
+                cursor.execute(
+                    'SELECT 1 FROM event_cluster_members WHERE representative_id = ? LIMIT 1',
+                    (event_id,),
+                )
+                if cursor.fetchone() is None:
+                    cursor.executemany('''
+                        DELETE FROM event_correlations
+                        WHERE key_type = ? AND key_value = ? AND event_id = ?
+                    ''', [(key_type, key_value, event_id) for key_type, key_value in stale_keys])
+            
             conn.commit()
             return True
     
@@ -462,6 +716,71 @@ class EventStore:
             
             return events
     
+    def _event_exists(self, cursor: sqlite3.Cursor, event: Event) -> bool:
+        """Check whether an event (by ID or source ID) is stored or folded into a cluster."""
+        params = (event.id, event.source_id, event.source.value)
+        cursor.execute('''
+            SELECT 1 FROM events
+            WHERE id = ? OR (source_id IS NOT NULL AND source_id = ? AND source = ?)
+            UNION ALL
+            SELECT 1 FROM event_cluster_members
+            WHERE event_id = ? OR (source_id IS NOT NULL AND source_id = ? AND source = ?)
+            LIMIT 1
+        ''', params + params)
+        return cursor.fetchone() is not None
+    
+    def _find_cluster(self, cursor: sqlite3.Cursor, signature: List[int]) -> Optional[tuple]:
+        """Find the most similar cluster sharing an LSH bucket with a signature."""
+        keys = self.clusterer.band_keys(signature)
+        cursor.execute('''
+            SELECT c.cluster_id, c.representative_id, c.signature
+            FROM event_clusters c
+            WHERE c.cluster_id IN (
+                SELECT cluster_id FROM event_cluster_buckets
+                WHERE ''' + ' OR '.join(['(band = ? AND bucket = ?)'] * len(keys)) + '''
+            )
+        ''', [value for key in keys for value in key])
+        
+        best = None
+        best_score = 0.0
+        for cluster_id, representative_id, stored_signature in cursor.fetchall():
+            score = self.clusterer.similarity(signature, json.loads(stored_signature))
+            if score >= self.clusterer.threshold and score > best_score:
+                best, best_score = (cluster_id, representative_id), score
+        return best
+    
+    def _index_correlations(self, cursor: sqlite3.Cursor, event: Event, target_id: str) -> None:
+        """Add an event's correlation keys to the index, pointing at target_id."""
+        cursor.executemany('''
+            INSERT OR IGNORE INTO event_correlations (key_type, key_value, event_id)
+            VALUES (?, ?, ?)
+        ''', [
+            (key_type, key_value, target_id)
+            for key_type, key_value in self._extract_correlation_keys(event)
+        ])
+    
+    def _backfill_correlations(self, conn: sqlite3.Connection) -> None:
+        """Index the correlation keys of every stored event."""
+        rows = conn.execute('SELECT * FROM events')
+        cursor = conn.cursor()
+        while True:
+            batch = rows.fetchmany(500)
+            if not batch:
+                break
+            for row in batch:
+                event = self._row_to_event(row)
+                self._index_correlations(cursor, event, event.id)
+    
+    def _extract_correlation_keys(self, event: Event) -> List[tuple]:
+        """Collect (key_type, key_value) pairs from event data and metadata."""
+        keys = set()
+        for source in (event.data or {}, event.metadata or {}):
+            for key_type in self.CORRELATION_KEYS:
+                value = source.get(key_type)
+                if value:
+                    keys.add((key_type, str(value)))
+        return sorted(keys)
+    
     def _row_to_event(self, row: tuple) -> Event:
         """Convert database row to Event object."""
         return Event(
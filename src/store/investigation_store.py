@@ -15,6 +15,10 @@ from typing import List, Optional, Dict, Any
 from src.models.investigation import Investigation, InvestigationEvent, Annotation
 
 
+class RevisionConflictError(Exception):
+    """An update expected a revision the investigation no longer has."""
+
+
 class InvestigationStore:
     """Data access layer for investigations."""
     
@@ -46,10 +50,18 @@ class InvestigationStore:
                 fix TEXT DEFAULT '',
                 prevention TEXT DEFAULT '',
                 description TEXT DEFAULT '',
-                impact TEXT DEFAULT ''
+                impact TEXT DEFAULT '',
+                revision INTEGER NOT NULL DEFAULT 0
             )
         ''')
         
+        # Databases created before revisions were tracked
+        columns = {row[1] for row in cursor.execute('PRAGMA table_info(investigations)')}
+        if 'revision' not in columns:
+            cursor.execute(
+                'ALTER TABLE investigations ADD COLUMN revision INTEGER NOT NULL DEFAULT 0'
+            )
+        
         # Investigation events junction table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS investigation_events (
@@ -149,6 +161,27 @@ class InvestigationStore:
         
         return self._row_to_investigation(row)
 
+    def get_revision(self, investigation_id: str) -> Optional[int]:
+        """Get an investigation's revision without loading it.
+        
+        The revision is bumped whenever the investigation, its linked
+        events or its annotations change.
+        
+        Args:
+            investigation_id: Investigation ID
+            
+        Returns:
+            Revision number or None if not found
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT revision FROM investigations WHERE id = ?', (investigation_id,))
+        row = cursor.fetchone()
+        conn.close()
+        
+        return row[0] if row else None
+
     def list_investigations(
         self,
         status: Optional[str] = None,
@@ -193,16 +226,22 @@ class InvestigationStore:
     def update_investigation(
         self,
         investigation_id: str,
+        expected_revision: Optional[int] = None,
         **fields,
     ) -> Optional[Investigation]:
         """Update an investigation.
         
         Args:
             investigation_id: Investigation ID
+            expected_revision: Only update if the investigation is still at
+                this revision (optimistic concurrency)
             **fields: Fields to update (title, status, severity, root_cause, fix, prevention, impact, description)
             
         Returns:
             Updated Investigation instance or None if not found
+            
+        Raises:
+            RevisionConflictError: If expected_revision no longer matches
         """
         investigation = self.get_investigation(investigation_id)
         if not investigation:
@@ -221,16 +260,30 @@ class InvestigationStore:
         update_fields['updated_at'] = datetime.utcnow().isoformat()
         
         set_clause = ', '.join([f'{k} = ?' for k in update_fields.keys()])
+        set_clause += ', revision = revision + 1'
         values = list(update_fields.values()) + [investigation_id]
         
+        where_clause = 'id = ?'
+        if expected_revision is not None:
+            where_clause += ' AND revision = ?'
+            values.append(expected_revision)
+        
         cursor.execute(
-            f'UPDATE investigations SET {set_clause} WHERE id = ?',
+            f'UPDATE investigations SET {set_clause} WHERE {where_clause}',
             values,
         )
+        updated = cursor.rowcount > 0
         
         conn.commit()
         conn.close()
         
+        if not updated:
+            if expected_revision is None:
+                return None  # Deleted concurrently
+            raise RevisionConflictError(
+                f'Investigation {investigation_id} is no longer at revision {expected_revision}'
+            )
+        
         investigation.update(**update_fields)
         return investigation
 
@@ -288,6 +341,7 @@ class InvestigationStore:
             (id, investigation_id, event_id, event_type, source, message, timestamp, created_at)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         ''', (link_id, investigation_id, event_id, event_type, source, message, timestamp, now))
+        self._bump_revision(cursor, investigation_id)
         
         conn.commit()
         conn.close()
@@ -353,6 +407,7 @@ class InvestigationStore:
             (id, investigation_id, author, text, created_at, updated_at, parent_annotation_id)
             VALUES (?, ?, ?, ?, ?, ?, ?)
         ''', (annotation_id, investigation_id, author, text, now, now, parent_annotation_id))
+        self._bump_revision(cursor, investigation_id)
         
         conn.commit()
         conn.close()
@@ -424,6 +479,8 @@ class InvestigationStore:
         )
         
         deleted = cursor.rowcount > 0
+        if deleted:
+            self._bump_annotation_revision(cursor, annotation_id)
         conn.commit()
         
         if not deleted:
@@ -448,6 +505,7 @@ class InvestigationStore:
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
+        self._bump_annotation_revision(cursor, annotation_id)
         cursor.execute('DELETE FROM annotations WHERE id = ?', (annotation_id,))
         deleted = cursor.rowcount > 0
         
@@ -458,6 +516,23 @@ class InvestigationStore:
 
     # Helper methods
     
+    @staticmethod
+    def _bump_revision(cursor, investigation_id: str) -> None:
+        """Mark an investigation as changed (its events/annotations changed)."""
+        cursor.execute(
+            'UPDATE investigations SET revision = revision + 1 WHERE id = ?',
+            (investigation_id,),
+        )
+
+    @staticmethod
+    def _bump_annotation_revision(cursor, annotation_id: str) -> None:
+        """Bump the revision of the investigation an annotation belongs to."""
+        cursor.execute(
+            'UPDATE investigations SET revision = revision + 1 '
+            'WHERE id = (SELECT investigation_id FROM annotations WHERE id = ?)',
+            (annotation_id,),
+        )
+    
     @staticmethod
     def _row_to_investigation(row) -> Investigation:
         """Convert database row to Investigation instance."""
@@ -16,6 +16,7 @@ from typing import List, Optional, Dict, Any
 from src.models.investigation import (
     Investigation, InvestigationStatus, ImpactSeverity, Priority
 )
+from src.store.investigation_store import RevisionConflictError
 
 
 class InvestigationStore:
@@ -55,10 +56,18 @@ class InvestigationStore:
                     priority TEXT DEFAULT 'p2',
                     created_at TEXT NOT NULL,
                     updated_at TEXT NOT NULL,
-                    deleted_at TEXT
+                    deleted_at TEXT,
+                    revision INTEGER NOT NULL DEFAULT 0
                 )
             ''')
             
+            # Databases created before revisions were tracked
+            columns = {row[1] for row in cursor.execute('PRAGMA table_info(investigations)')}
+            if 'revision' not in columns:
+                cursor.execute(
+                    'ALTER TABLE investigations ADD COLUMN revision INTEGER NOT NULL DEFAULT 0'
+                )
+            
             # Create indexes for common queries
             cursor.execute('''
                 CREATE INDEX IF NOT EXISTS idx_investigations_status
@@ -272,16 +281,42 @@ class InvestigationStore:
             
             return [self._row_to_investigation(row) for row in cursor.fetchall()]
     
-    def update_investigation(self, investigation_id: str, updates: Dict[str, Any]) -> bool:
+    def get_revision(self, investigation_id: str) -> Optional[int]:
+        """
+        Get an investigation's revision without loading it.
+        
+        Args:
+            investigation_id: Investigation ID
+            
+        Returns:
+            Revision number (bumped on every update), or None if not found
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                'SELECT revision FROM investigations WHERE id = ?', (investigation_id,)
+            ).fetchone()
+            return row[0] if row else None
+    
+    def update_investigation(
+        self,
+        investigation_id: str,
+        updates: Dict[str, Any],
+        expected_revision: Optional[int] = None,
+    ) -> bool:
         """
         Update specific fields of an investigation.
         
         Args:
             investigation_id: Investigation ID to update
             updates: Dictionary of field updates
+            expected_revision: Only update if the investigation is still at
+                this revision (optimistic concurrency)
             
         Returns:
             bool: True if successful, False if investigation not found
+            
+        Raises:
+            RevisionConflictError: If expected_revision no longer matches
         """
         investigation = self.get_investigation(investigation_id)
         if not investigation:
@@ -315,8 +350,9 @@ class InvestigationStore:
                     related_investigation_ids = ?,
                     assigned_to = ?,
                     priority = ?,
-                    updated_at = ?
-                WHERE id = ?
+                    updated_at = ?,
+                    revision = revision + 1
+                WHERE id = ? AND (? IS NULL OR revision = ?)
             ''', (
                 investigation.title,
                 investigation.description,
@@ -334,10 +370,16 @@ class InvestigationStore:
                 investigation.priority.value,
                 investigation.updated_at,
                 investigation_id,
+                expected_revision,
+                expected_revision,
             ))
             
             conn.commit()
-            return True
+            if cursor.rowcount == 0 and expected_revision is not None:
+                raise RevisionConflictError(
+                    f'Investigation {investigation_id} is no longer at revision {expected_revision}'
+                )
+            return cursor.rowcount > 0
     
     def delete_investigation(self, investigation_id: str) -> bool:
         """
@@ -354,7 +396,7 @@ class InvestigationStore:
             
             cursor.execute('''
                 UPDATE investigations
-                SET deleted_at = ?
+                SET deleted_at = ?, revision = revision + 1
                 WHERE id = ?
             ''', (datetime.utcnow().isoformat(), investigation_id))
             
@@ -376,7 +418,7 @@ class InvestigationStore:
             
             cursor.execute('''
                 UPDATE investigations
-                SET deleted_at = NULL
+                SET deleted_at = NULL, revision = revision + 1
                 WHERE id = ?
             ''', (investigation_id,))
             
@@ -0,0 +1,677 @@
+"""
+Version Store - SQL Data Access Layer
+
+Persists canvas version history in SQLite so it survives restarts and is
+shared between worker processes.
+
+Node and edge payloads are content-addressed: each is stored once in
+``version_blobs`` under the SHA-256 of its canonical JSON, zlib-compressed.
+A version row holds a compressed manifest with the canvas's other fields
+and, for each list of nodes/edges, the ordered (id, blob hash) pairs. Versions
+that share unchanged nodes therefore share their storage, and a version
+costs roughly one hash per element plus the elements that actually changed.
+
+Comparing two versions compares their manifests' hashes and only loads the
+blobs of elements that were added, removed or modified.
+
+Versions are indexed by (canvas_id, version_number). Version numbers are
+assigned inside the INSERT, so concurrent workers never reuse one.
+
+Each blob counts the versions whose manifests reference it. When retention
+squashes a version (see ``RetentionPolicy``), its references are released
+and blobs no longer referenced are deleted, so disk use follows the
+versions that are kept.
+
+Implements the ``VersionStore`` interface from ``src.models.canvas_version``.
+"""
+
+import hashlib
+import json
+import sqlite3
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import uuid4
+
+from src.models.canvas_version import (
+    CanvasVersion,
+    Change,
+    ChangeType,
+    RetentionPolicy,
+    compare_fingerprints,
+    content_hash,
+    describe_diff,
+    is_keyed_list,
+)
+
+# Stay well under SQLite's bound-parameter limit
+_QUERY_CHUNK = 500
+
+
+def _canonical(value: Any) -> bytes:
+    return json.dumps(value, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+class SQLiteVersionStore:
+    """Data access layer for canvas versions."""
+
+    def __init__(
+        self,
+        db_path: str = 'canvas_versions.db',
+        compression_level: int = 6,
+        retention: Optional[RetentionPolicy] = None,
+    ):
+        """Initialize the version store.
+
+        Args:
+            db_path: Path to SQLite database file
+            compression_level: zlib level for blobs and manifests (1-9)
+            retention: Policy applied by ``apply_retention`` (None keeps
+                every version)
+        """
+        self.db_path = db_path
+        self.compression_level = compression_level
+        self.retention = retention
+        self._retention_cursor = ''  # Last canvas id handled by apply_retention
+        self.initialize()
+
+    def initialize(self) -> None:
+        """Initialize database schema."""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS version_blobs (
+                    hash TEXT PRIMARY KEY,
+                    data BLOB NOT NULL,
+                    refs INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS canvas_versions (
+                    version_id TEXT PRIMARY KEY,
+                    canvas_id TEXT NOT NULL,
+                    version_number INTEGER NOT NULL,
+                    previous_version_id TEXT,
+                    author TEXT NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    message TEXT DEFAULT '',
+                    changes TEXT DEFAULT '[]',
+                    manifest BLOB NOT NULL,
+                    tags TEXT DEFAULT '[]'
+                )
+            ''')
+            cursor.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_canvas_versions_number
+                ON canvas_versions(canvas_id, version_number)
+            ''')
+
+            # Migrate databases created before retention
+            version_columns = {
+                row[1] for row in cursor.execute('PRAGMA table_info(canvas_versions)')
+            }
+            if 'tags' not in version_columns:
+                cursor.execute("ALTER TABLE canvas_versions ADD COLUMN tags TEXT DEFAULT '[]'")
+            blob_columns = {row[1] for row in cursor.execute('PRAGMA table_info(version_blobs)')}
+            if 'refs' not in blob_columns:
+                cursor.execute(
+                    'ALTER TABLE version_blobs ADD COLUMN refs INTEGER NOT NULL DEFAULT 0'
+                )
+                counts: Dict[str, int] = {}
+                for (manifest,) in cursor.execute('SELECT manifest FROM canvas_versions'):
+                    for digest in self._manifest_hashes(manifest):
+                        counts[digest] = counts.get(digest, 0) + 1
+                cursor.executemany(
+                    'UPDATE version_blobs SET refs = ? WHERE hash = ?',
+                    [(count, digest) for digest, count in counts.items()],
+                )
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def create_version(
+        self,
+        canvas_id: str,
+        canvas_data: Dict[str, Any],
+        changes: List[Change],
+        author: str,
+        message: str = "",
+    ) -> CanvasVersion:
+        """
+        Create a new canvas version.
+
+        Args:
+            canvas_id: ID of the canvas
+            canvas_data: Complete canvas snapshot
+            changes: List of changes from previous version
+            author: User creating the version
+            message: Version message/description
+
+        Returns:
+            CanvasVersion: The created version
+        """
+        manifest: Dict[str, Any] = {'fields': {}, 'lists': {}}
+        blobs: Dict[str, bytes] = {}
+        for key, value in canvas_data.items():
+            if isinstance(value, list) and value and is_keyed_list(value):
+                entries = []
+                for item in value:
+                    payload = _canonical(item)
+                    digest = hashlib.sha256(payload).hexdigest()
+                    blobs[digest] = payload
+                    entries.append([item['id'], digest])
+                manifest['lists'][key] = entries
+            else:
+                manifest['fields'][key] = value
+
+        version_id = str(uuid4())
+        timestamp = datetime.utcnow()
+
+        with sqlite3.connect(self.db_path) as conn:
+            # Write lock first, so retention cannot delete a blob found here
+            conn.execute('BEGIN IMMEDIATE')
+            known = self._existing_hashes(conn, blobs)
+            conn.executemany(
+                'UPDATE version_blobs SET refs = refs + 1 WHERE hash = ?',
+                [(digest,) for digest in known],
+            )
+            # Only compress payloads this database has not seen yet
+            conn.executemany(
+                'INSERT INTO version_blobs (hash, data, refs) VALUES (?, ?, 1)',
+                [
+                    (digest, zlib.compress(payload, self.compression_level))
+                    for digest, payload in blobs.items() if digest not in known
+                ],
+            )
+
+            # Number and previous version are read in the same statement
+            conn.execute('''
+                INSERT INTO canvas_versions
+                (version_id, canvas_id, version_number, previous_version_id,
+                 author, timestamp, message, changes, manifest)
+                SELECT ?, ?, COALESCE(MAX(version_number), 0) + 1,
+                       (SELECT version_id FROM canvas_versions WHERE canvas_id = ?
+                        ORDER BY version_number DESC LIMIT 1),
+                       ?, ?, ?, ?, ?
+                FROM canvas_versions WHERE canvas_id = ?
+            ''', (
+                version_id, canvas_id, canvas_id,
+                author, timestamp.isoformat(), message,
+                json.dumps([c.to_dict() for c in changes]),
+                zlib.compress(_canonical(manifest), self.compression_level),
+                canvas_id,
+            ))
+            version_number, previous_version_id = conn.execute(
+                'SELECT version_number, previous_version_id FROM canvas_versions '
+                'WHERE version_id = ?',
+                (version_id,),
+            ).fetchone()
+
+        return CanvasVersion(
+            version_id=version_id,
+            canvas_id=canvas_id,
+            version_number=version_number,
+            previous_version_id=previous_version_id,
+            data=canvas_data,
+            changes=changes,
+            author=author,
+            timestamp=timestamp,
+            message=message,
+        )
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def get_version(self, version_id: str) -> Optional[CanvasVersion]:
+        """Get a specific version."""
+        return self._load_one('WHERE version_id = ?', (version_id,))
+
+    def get_canvas_versions(self, canvas_id: str) -> List[CanvasVersion]:
+        """Get all versions of a canvas."""
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                'SELECT * FROM canvas_versions WHERE canvas_id = ? ORDER BY version_number',
+                (canvas_id,),
+            ).fetchall()
+            return self._rows_to_versions(conn, rows)
+
+    def get_latest_version(self, canvas_id: str) -> Optional[CanvasVersion]:
+        """Get the latest version of a canvas."""
+        return self._load_one(
+            'WHERE canvas_id = ? ORDER BY version_number DESC LIMIT 1', (canvas_id,)
+        )
+
+    def get_version_by_number(self, canvas_id: str, version_number: int) -> Optional[CanvasVersion]:
+        """Get a specific version by number."""
+        return self._load_one(
+            'WHERE canvas_id = ? AND version_number = ?', (canvas_id, version_number)
+        )
+
+    def rollback(self, canvas_id: str, version_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Rollback canvas to a specific version.
+
+        Args:
+            canvas_id: Canvas to rollback
+            version_id: Version to rollback to
+
+        Returns:
+            Canvas data from that version, or None if not found
+        """
+        version = self.get_version(version_id)
+        if not version or version.canvas_id != canvas_id:
+            return None
+        return version.data
+
+    def get_version_diff(self, version_id1: str, version_id2: str) -> Dict[str, Any]:
+        """
+        Compare two versions.
+
+        Args:
+            version_id1: First version
+            version_id2: Second version
+
+        Returns:
+            Dictionary with differences (see ``VersionStore.get_version_diff``)
+        """
+        query = (
+            'SELECT canvas_id, version_number, manifest FROM canvas_versions '
+            'WHERE version_id = ?'
+        )
+        with sqlite3.connect(self.db_path) as conn:
+            v1 = conn.execute(query, (version_id1,)).fetchone()
+            v2 = conn.execute(query, (version_id2,)).fetchone()
+            if not v1 or not v2:
+                return {}
+
+            changes = []
+            if v1[0] == v2[0]:
+                low, high = sorted((v1[1], v2[1]))
+                for (row,) in conn.execute('''
+                    SELECT changes FROM canvas_versions
+                    WHERE canvas_id = ? AND version_number > ? AND version_number <= ?
+                    ORDER BY version_number
+                ''', (v1[0], low, high)):
+                    changes.extend(json.loads(row))
+
+            old = json.loads(zlib.decompress(v1[2]))
+            new = json.loads(zlib.decompress(v2[2]))
+            comparison = compare_fingerprints(self._fingerprint(old), self._fingerprint(new))
+
+            # Only blobs of elements that differ are loaded
+            wanted: Dict[str, Dict[str, Dict[str, str]]] = {'old': {}, 'new': {}}
+            for key, ids in comparison['lists'].items():
+                old_hashes = dict(old['lists'].get(key, []))
+                new_hashes = dict(new['lists'].get(key, []))
+                wanted['old'][key] = {i: old_hashes[i] for i in ids['removed'] + ids['modified']}
+                wanted['new'][key] = {i: new_hashes[i] for i in ids['added'] + ids['modified']}
+            blobs = self._load_blobs(conn, {
+                digest
+                for side in wanted.values()
+                for hashes in side.values()
+                for digest in hashes.values()
+            })
+
+        items = {
+            side: {
+                key: {item_id: json.loads(blobs[digest]) for item_id, digest in hashes.items()}
+                for key, hashes in lists.items()
+            }
+            for side, lists in wanted.items()
+        }
+        diff = {
+            'version1_id': version_id1,
+            'version1_number': v1[1],
+            'version2_id': version_id2,
+            'version2_number': v2[1],
+            'changes': changes,
+        }
+        diff.update(describe_diff(
+            comparison, old['fields'], new['fields'], items['old'], items['new'],
+        ))
+        return diff
+
+    def get_version_history(self, canvas_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Get version history for a canvas (latest first, without snapshots).
+
+        Args:
+            canvas_id: Canvas to get history for
+            limit: Maximum number of versions to return
+
+        Returns:
+            List of version summaries
+        """
+        return self.get_version_history_page(canvas_id, limit=limit)['versions']
+
+    def get_version_history_page(
+        self,
+        canvas_id: str,
+        limit: int = 10,
+        cursor: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Get one page of version history, latest first.
+
+        Args:
+            canvas_id: Canvas to get history for
+            limit: Maximum number of versions to return
+            cursor: ``next_cursor`` of the previous page (None = latest)
+
+        Returns:
+            Dictionary with 'versions' (summaries) and 'next_cursor'
+            (None on the last page)
+        """
+        limit = max(limit, 0)
+        with sqlite3.connect(self.db_path) as conn:
+            # One extra row tells whether another page follows
+            rows = conn.execute('''
+                SELECT version_id, version_number, author, timestamp, message, changes, tags
+                FROM canvas_versions
+                WHERE canvas_id = ? AND (? IS NULL OR version_number < ?)
+                ORDER BY version_number DESC LIMIT ?
+            ''', (canvas_id, cursor, cursor, limit + 1)).fetchall()
+
+        history = [
+            {
+                'version_id': row[0],
+                'version_number': row[1],
+                'author': row[2],
+                'timestamp': row[3],
+                'message': row[4],
+                'changes_count': len(json.loads(row[5])),
+                'tags': json.loads(row[6]),
+            }
+            for row in rows[:limit]
+        ]
+        return {
+            'versions': history,
+            'next_cursor': history[-1]['version_number'] if len(rows) > limit and history else None,
+        }
+
+    def get_version_count(self, canvas_id: str) -> int:
+        """Get total version count for a canvas."""
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute(
+                'SELECT COUNT(*) FROM canvas_versions WHERE canvas_id = ?', (canvas_id,)
+            ).fetchone()[0]
+
+    def compare_with_latest(self, canvas_id: str, version_id: str) -> Dict[str, Any]:
+        """
+        Compare a version with the latest version.
+
+        Args:
+            canvas_id: Canvas ID
+            version_id: Version to compare
+
+        Returns:
+            Comparison result
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            version = conn.execute(
+                'SELECT version_number FROM canvas_versions WHERE version_id = ?', (version_id,)
+            ).fetchone()
+            latest = conn.execute('''
+                SELECT version_id, version_number FROM canvas_versions
+                WHERE canvas_id = ? ORDER BY version_number DESC LIMIT 1
+            ''', (canvas_id,)).fetchone()
+
+        if not version or not latest:
+            return {}
+
+        return {
+            'comparing_version': version_id,
+            'comparing_number': version[0],
+            'latest_version': latest[0],
+            'latest_number': latest[1],
+            'versions_ahead': latest[1] - version[0],
+        }
+
+    def get_storage_stats(self) -> Dict[str, int]:
+        """Get row counts and stored (compressed) bytes."""
+        with sqlite3.connect(self.db_path) as conn:
+            blob_count, blob_bytes = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM version_blobs'
+            ).fetchone()
+            version_count, manifest_bytes = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(LENGTH(manifest)), 0) FROM canvas_versions'
+            ).fetchone()
+        return {
+            'versions': version_count,
+            'blobs': blob_count,
+            'blob_bytes': blob_bytes,
+            'manifest_bytes': manifest_bytes,
+        }
+
+    # ------------------------------------------------------------------
+    # Tags and retention
+    # ------------------------------------------------------------------
+
+    def tag_version(self, version_id: str, tag: str) -> bool:
+        """Tag a version, which exempts it from retention.
+
+        Returns:
+            True if the version exists
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                'SELECT tags FROM canvas_versions WHERE version_id = ?', (version_id,)
+            ).fetchone()
+            if not row:
+                return False
+            tags = json.loads(row[0])
+            if tag not in tags:
+                tags.append(tag)
+                conn.execute(
+                    'UPDATE canvas_versions SET tags = ? WHERE version_id = ?',
+                    (json.dumps(tags), version_id),
+                )
+            return True
+
+    def untag_version(self, version_id: str, tag: str) -> bool:
+        """Remove a tag from a version.
+
+        Returns:
+            True if the version had the tag
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                'SELECT tags FROM canvas_versions WHERE version_id = ?', (version_id,)
+            ).fetchone()
+            if not row or tag not in json.loads(row[0]):
+                return False
+            tags = [t for t in json.loads(row[0]) if t != tag]
+            conn.execute(
+                'UPDATE canvas_versions SET tags = ? WHERE version_id = ?',
+                (json.dumps(tags), version_id),
+            )
+            return True
+
+    def apply_retention(
+        self,
+        canvas_id: Optional[str] = None,
+        max_canvases: Optional[int] = None,
+        now: Optional[datetime] = None,
+    ) -> int:
+        """
+        Squash versions the retention policy does not keep.
+
+        Without ``canvas_id``, canvases with more than ``keep_last`` versions
+        are visited in id order, continuing after the canvas the previous
+        call stopped at and wrapping around at the end.
+
+        Args:
+            canvas_id: Only this canvas
+            max_canvases: Most canvases processed by this call (None = all)
+            now: Current time (for testing)
+
+        Returns:
+            Number of versions removed
+        """
+        if self.retention is None:
+            return 0
+        now = now or datetime.utcnow()
+
+        if canvas_id is not None:
+            canvas_ids = [canvas_id]
+        else:
+            with sqlite3.connect(self.db_path) as conn:
+                candidates = [row[0] for row in conn.execute('''
+                    SELECT canvas_id FROM canvas_versions
+                    GROUP BY canvas_id HAVING COUNT(*) > ?
+                    ORDER BY canvas_id
+                ''', (self.retention.keep_last,))]
+            after = [cid for cid in candidates if cid > self._retention_cursor]
+            canvas_ids = after + candidates[:len(candidates) - len(after)]
+            if max_canvases is not None:
+                canvas_ids = canvas_ids[:max_canvases]
+            if canvas_ids:
+                self._retention_cursor = canvas_ids[-1]
+
+        # One transaction per canvas, so writers are not blocked for long
+        return sum(self._squash(cid, now) for cid in canvas_ids)
+
+    def _squash(self, canvas_id: str, now: datetime) -> int:
+        """Apply the retention policy to one canvas."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            rows = conn.execute('''
+                SELECT version_id, timestamp, tags, changes, previous_version_id
+                FROM canvas_versions
+                WHERE canvas_id = ? ORDER BY version_number
+            ''', (canvas_id,)).fetchall()
+            keep = self.retention.retained(
+                [(datetime.fromisoformat(row[1]), bool(json.loads(row[2]))) for row in rows], now
+            )
+            dropped = [row[0] for row, kept in zip(rows, keep) if not kept]
+            if not dropped:
+                return 0
+
+            # Release the dropped versions' blob references
+            released: Dict[str, int] = {}
+            for chunk in self._chunks(dropped):
+                placeholders = ','.join('?' * len(chunk))
+                for (manifest,) in conn.execute(
+                    f'SELECT manifest FROM canvas_versions '
+                    f'WHERE version_id IN ({placeholders})',
+                    chunk,
+                ):
+                    for digest in self._manifest_hashes(manifest):
+                        released[digest] = released.get(digest, 0) + 1
+                conn.execute(
+                    f'DELETE FROM canvas_versions WHERE version_id IN ({placeholders})', chunk
+                )
+            conn.executemany(
+                'UPDATE version_blobs SET refs = refs - ? WHERE hash = ?',
+                [(count, digest) for digest, count in released.items()],
+            )
+            for chunk in self._chunks(released):
+                placeholders = ','.join('?' * len(chunk))
+                conn.execute(
+                    f'DELETE FROM version_blobs WHERE refs <= 0 AND hash IN ({placeholders})', chunk
+                )
+
+            # Merge squashed change lists into the next kept version
+            merged: List[Any] = []
+            previous_id: Optional[str] = None
+            for row, kept in zip(rows, keep):
+                if not kept:
+                    merged.extend(json.loads(row[3]))
+                    continue
+                if merged or previous_id != row[4]:
+                    conn.execute(
+                        'UPDATE canvas_versions SET changes = ?, previous_version_id = ? '
+                        'WHERE version_id = ?',
+                        (json.dumps(merged + json.loads(row[3])), previous_id, row[0]),
+                    )
+                merged = []
+                previous_id = row[0]
+        return len(dropped)
+
+    # Helper methods
+
+    @staticmethod
+    def _manifest_hashes(manifest: bytes) -> set:
+        """Distinct blob hashes a compressed manifest references."""
+        entries = json.loads(zlib.decompress(manifest))['lists'].values()
+        return {digest for pairs in entries for _, digest in pairs}
+
+    def _load_one(self, where: str, params: tuple) -> Optional[CanvasVersion]:
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(f'SELECT * FROM canvas_versions {where}', params).fetchone()
+            if not row:
+                return None
+            return self._rows_to_versions(conn, [row])[0]
+
+    def _rows_to_versions(self, conn: sqlite3.Connection, rows) -> List[CanvasVersion]:
+        """Convert version rows to CanvasVersions, fetching each blob once."""
+        manifests = [json.loads(zlib.decompress(row[8])) for row in rows]
+        needed = {
+            digest
+            for manifest in manifests
+            for entries in manifest['lists'].values()
+            for _, digest in entries
+        }
+        blobs = self._load_blobs(conn, needed)
+
+        versions = []
+        for row, manifest in zip(rows, manifests):
+            data = dict(manifest['fields'])
+            for key, entries in manifest['lists'].items():
+                data[key] = [json.loads(blobs[digest]) for _, digest in entries]
+            versions.append(CanvasVersion(
+                version_id=row[0],
+                canvas_id=row[1],
+                version_number=row[2],
+                previous_version_id=row[3],
+                data=data,
+                changes=[
+                    Change(
+                        change_type=ChangeType(c['change_type']),
+                        details=c['details'],
+                        timestamp=datetime.fromisoformat(c['timestamp']),
+                    )
+                    for c in json.loads(row[7])
+                ],
+                author=row[4],
+                timestamp=datetime.fromisoformat(row[5]),
+                message=row[6],
+                tags=json.loads(row[9]),
+            ))
+        return versions
+
+    @staticmethod
+    def _fingerprint(manifest: Dict[str, Any]) -> Dict[str, Any]:
+        """``fingerprint_snapshot`` equivalent read straight from a manifest."""
+        return {
+            'fields': {key: content_hash(value) for key, value in manifest['fields'].items()},
+            'lists': {key: dict(entries) for key, entries in manifest['lists'].items()},
+        }
+
+    @staticmethod
+    def _chunks(values: Iterable[str]):
+        values = list(values)
+        for start in range(0, len(values), _QUERY_CHUNK):
+            yield values[start:start + _QUERY_CHUNK]
+
+    def _existing_hashes(self, conn: sqlite3.Connection, hashes: Iterable[str]) -> set:
+        found = set()
+        for chunk in self._chunks(hashes):
+            placeholders = ','.join('?' * len(chunk))
+            found.update(row[0] for row in conn.execute(
+                f'SELECT hash FROM version_blobs WHERE hash IN ({placeholders})', chunk
+            ))
+        return found
+
+    def _load_blobs(self, conn: sqlite3.Connection, hashes: Iterable[str]) -> Dict[str, bytes]:
+        blobs = {}
+        for chunk in self._chunks(hashes):
+            placeholders = ','.join('?' * len(chunk))
+            for digest, data in conn.execute(
+                f'SELECT hash, data FROM version_blobs WHERE hash IN ({placeholders})', chunk
+            ):
+                blobs[digest] = zlib.decompress(data)
+        return blobs
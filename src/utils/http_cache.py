@@ -0,0 +1,39 @@
+"""Conditional request helpers (ETag / If-None-Match / If-Match).
+
+Resources that keep a revision counter (bumped on every mutation) use
+``"<id>-<revision>"`` as a strong ETag. Handlers look the revision up
+first, so a matching ``If-None-Match`` is answered with 304 before the
+resource (or its child rows) is loaded and serialized.
+"""
+
+from typing import Optional
+
+from flask import Response, request
+
+
+def revision_etag(resource_id: str, revision: int) -> str:
+    """Strong ETag value (unquoted) for one revision of a resource."""
+    return f"{resource_id}-{revision}"
+
+
+def not_modified(etag: str) -> Optional[Response]:
+    """304 response if the client's If-None-Match matches ``etag``, else None."""
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+
+def if_match_failed(etag: str) -> bool:
+    """True if the request sent If-Match and none of its tags match ``etag``.
+
+    Uses strong comparison, so weak tags never match (RFC 9110 13.1.1).
+    """
+    return bool(request.if_match) and not request.if_match.contains(etag)
+
+
+def with_etag(response: Response, etag: str) -> Response:
+    """Attach ``etag`` to a response and return it."""
+    response.set_etag(etag)
+    return response
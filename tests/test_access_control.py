@@ -8,16 +8,24 @@ Comprehensive test suite for role-based access control, including:
 - Role revocation
 - User permissions retrieval
 - Default role validation
+- Effective-permission cache (invalidation and microbenchmark)
+- Bitmask encoding of permissions and roles
 """
 
+import time
+
 import pytest
 from datetime import datetime, timedelta
 from src.services.access_control import (
+    ALL_PERMISSIONS_MASK,
     AccessControl,
+    ExpiryScheduler,
     Role,
     Permission,
     RoleDefinition,
     RoleAssignment,
+    mask_to_permissions,
+    permissions_to_mask,
 )
 
 
@@ -105,6 +113,50 @@ class TestRoleDefinition:
         assert not role.has_permission(Permission.CANVAS_UPDATE)
 
 
+class TestPermissionMasks:
+    """Tests for the bitmask encoding of permissions."""
+    
+    def test_bits_are_distinct(self):
+        """Test every permission has its own single bit."""
+        bits = [p.bit for p in Permission]
+        assert len(set(bits)) == len(bits)
+        assert all(bit & (bit - 1) == 0 for bit in bits)
+    
+    def test_round_trip(self):
+        """Test encoding then decoding gives the same permissions."""
+        permissions = {Permission.CANVAS_READ, Permission.EDGE_DELETE}
+        assert mask_to_permissions(permissions_to_mask(permissions)) == permissions
+        assert permissions_to_mask([]) == 0
+    
+    def test_admin_all_sets_every_bit(self):
+        """Test ADMIN_ALL encodes as the full mask."""
+        assert permissions_to_mask({Permission.ADMIN_ALL}) == ALL_PERMISSIONS_MASK
+        assert mask_to_permissions(ALL_PERMISSIONS_MASK) == set(Permission)
+    
+    def test_role_mask_tracks_permissions(self):
+        """Test a role's mask follows add/remove_permission."""
+        role = RoleDefinition(
+            name=Role.VIEWER,
+            description="Test viewer role",
+            permissions={Permission.CANVAS_READ},
+        )
+        assert role.mask == Permission.CANVAS_READ.bit
+        role.add_permission(Permission.NODE_CREATE)
+        assert role.mask == Permission.CANVAS_READ.bit | Permission.NODE_CREATE.bit
+        role.remove_permission(Permission.CANVAS_READ)
+        assert role.mask == Permission.NODE_CREATE.bit
+    
+    def test_cached_masks_are_role_unions(self, access_control, admin_user):
+        """Test a user's cached mask is the OR of their roles' masks."""
+        access_control.assign_role("user-1", Role.VIEWER, assigned_by=admin_user)
+        access_control.assign_role("user-1", Role.INVESTIGATOR, assigned_by=admin_user)
+        access_control.check_permission("user-1", Permission.CANVAS_READ)
+        
+        roles = access_control.role_definitions
+        effective = access_control._permission_cache["user-1"]
+        assert effective.global_scope == roles[Role.VIEWER].mask | roles[Role.INVESTIGATOR].mask
+
+
 class TestDefaultRoles:
     """Tests for default role initialization."""
     
@@ -491,3 +543,218 @@ class TestAssignmentHistory:
         
         assert len(history) == 2
         assert all(a.user_id == "user-1" for a in history)
+
+
+class TestPermissionCache:
+    """Tests for cached effective permissions."""
+    
+    def test_assign_invalidates(self, access_control, admin_user):
+        """Test a new assignment is visible to the next check."""
+        assert not access_control.check_permission("user-1", Permission.CANVAS_READ)
+        access_control.assign_role("user-1", Role.VIEWER, assigned_by=admin_user)
+        assert access_control.check_permission("user-1", Permission.CANVAS_READ)
+    
+    def test_revoke_invalidates(self, access_control, admin_user):
+        """Test a revoked role stops granting immediately."""
+        access_control.assign_role("user-1", Role.ANALYST, assigned_by=admin_user)
+        assert access_control.check_permission("user-1", Permission.CANVAS_UPDATE)
+        access_control.revoke_role("user-1", Role.ANALYST, revoked_by=admin_user)
+        assert not access_control.check_permission("user-1", Permission.CANVAS_UPDATE)
+    
+    def test_expiry_invalidates(self, access_control, admin_user):
+        """Test a cached grant ends when its assignment expires."""
+        access_control.assign_role(
+            "user-1", Role.ANALYST, assigned_by=admin_user,
+            expires_at=datetime.utcnow() + timedelta(hours=1),
+        )
+        assert access_control.check_permission("user-1", Permission.CANVAS_UPDATE)
+        
+        assert access_control.expire_assignments(now=datetime.utcnow() + timedelta(hours=2)) == 1
+        assert not access_control.check_permission("user-1", Permission.CANVAS_UPDATE)
+        assert not access_control.user_roles["user-1"][0].is_active
+    
+    def test_role_change_invalidates(self, access_control, admin_user):
+        """Test editing a role definition is picked up by cached users."""
+        access_control.assign_role("user-1", Role.VIEWER, assigned_by=admin_user)
+        assert not access_control.check_permission("user-1", Permission.CANVAS_UPDATE)
+        access_control.role_definitions[Role.VIEWER].add_permission(Permission.CANVAS_UPDATE)
+        assert access_control.check_permission("user-1", Permission.CANVAS_UPDATE)
+    
+    def test_resource_and_global_scopes(self, access_control, admin_user):
+        """Test resource grants combine with global ones."""
+        access_control.assign_role("user-1", Role.VIEWER, assigned_by=admin_user)
+        access_control.assign_role("user-1", Role.ANALYST, assigned_by=admin_user,
+                                   resource_id="canvas-1")
+        
+        assert access_control.check_permission("user-1", Permission.CANVAS_UPDATE, "canvas-1")
+        assert access_control.check_permission("user-1", Permission.CANVAS_READ, "canvas-2")
+        assert not access_control.check_permission("user-1", Permission.CANVAS_UPDATE, "canvas-2")
+        # Without a resource, any assignment counts
+        assert access_control.check_permission("user-1", Permission.CANVAS_UPDATE)
+    
+    def test_admin_all_expands(self, access_control, admin_user):
+        """Test ADMIN_ALL grants every permission on every resource."""
+        assert access_control.check_permission(admin_user, Permission.EDGE_DELETE, "canvas-9")
+
+
+class TestAssignmentExpiry:
+    """Tests for the expiry heap, history compaction and scheduler."""
+    
+    def test_expires_due_assignments_only(self, access_control, admin_user):
+        """Test only assignments whose expiry has passed are deactivated."""
+        now = datetime.utcnow()
+        for hours in (3, 1, 2):
+            access_control.assign_role(
+                f"user-{hours}", Role.VIEWER, assigned_by=admin_user,
+                expires_at=now + timedelta(hours=hours),
+            )
+        access_control.assign_role("user-4", Role.VIEWER, assigned_by=admin_user)
+        
+        assert access_control.expire_assignments(now=now + timedelta(hours=2, minutes=30)) == 2
+        assert access_control.get_user_roles("user-1") == []
+        assert access_control.get_user_permissions("user-2") == {}
+        assert access_control.check_permission("user-3", Permission.CANVAS_READ)
+        assert access_control.check_permission("user-4", Permission.CANVAS_READ)
+        assert access_control.user_roles["user-1"][0].ended_at == now + timedelta(hours=1)
+        # Nothing left to do until the next expiry
+        assert access_control.expire_assignments(now=now + timedelta(hours=2, minutes=30)) == 0
+    
+    def test_revoked_and_extended_assignments(self, access_control, admin_user):
+        """Test revoked entries are skipped and extended ones rescheduled."""
+        now = datetime.utcnow()
+        access_control.assign_role("user-1", Role.VIEWER, assigned_by=admin_user,
+                                   expires_at=now + timedelta(hours=1))
+        extended = access_control.assign_role("user-2", Role.VIEWER, assigned_by=admin_user,
+                                              expires_at=now + timedelta(hours=1))
+        access_control.revoke_role("user-1", Role.VIEWER, revoked_by=admin_user)
+        extended.expires_at = now + timedelta(hours=5)
+        
+        assert access_control.expire_assignments(now=now + timedelta(hours=2)) == 0
+        assert access_control.check_permission("user-2", Permission.CANVAS_READ)
+        assert access_control.expire_assignments(now=now + timedelta(hours=6)) == 1
+        assert not access_control.check_permission("user-2", Permission.CANVAS_READ)
+    
+    def test_compact_history(self, access_control, admin_user):
+        """Test ended assignments are dropped after the retention window."""
+        now = datetime.utcnow()
+        access_control.assign_role("user-1", Role.VIEWER, assigned_by=admin_user,
+                                   expires_at=now + timedelta(hours=1))
+        access_control.assign_role("user-1", Role.ANALYST, assigned_by=admin_user)
+        access_control.assign_role("user-2", Role.VIEWER, assigned_by=admin_user,
+                                   expires_at=now + timedelta(hours=1))
+        access_control.expire_assignments(now=now + timedelta(hours=1))
+        
+        # Ended assignments leave user_roles, but stay in the history for a while
+        assert access_control.compact_history(now=now + timedelta(days=1)) == 0
+        assert [a.role for a in access_control.user_roles["user-1"]] == [Role.ANALYST]
+        assert "user-2" not in access_control.user_roles
+        assert len(access_control.get_assignment_history("user-2")) == 1
+        
+        assert access_control.compact_history(now=now + timedelta(days=31)) == 2
+        assert access_control.get_assignment_history("user-2") == []
+        assert [a.role for a in access_control.get_assignment_history("user-1")] == [Role.ANALYST]
+        assert access_control.check_permission("user-1", Permission.CANVAS_UPDATE)
+    
+    def test_reads_expire_without_scheduler(self, access_control, admin_user):
+        """Test an expired grant is denied even when no scheduler runs."""
+        access_control.assign_role("user-1", Role.ANALYST, assigned_by=admin_user,
+                                   expires_at=datetime.utcnow() + timedelta(milliseconds=50))
+        access_control.assign_role("user-2", Role.VIEWER, assigned_by=admin_user,
+                                   expires_at=datetime.utcnow() + timedelta(milliseconds=50))
+        access_control.assign_role("user-3", Role.VIEWER, assigned_by=admin_user,
+                                   expires_at=datetime.utcnow() + timedelta(milliseconds=50))
+        assert access_control.check_permission("user-1", Permission.CANVAS_UPDATE)
+        
+        time.sleep(0.2)
+        assert not access_control.check_permission("user-1", Permission.CANVAS_UPDATE)
+        assert access_control.get_user_roles("user-2") == []
+        assert access_control.get_user_permissions("user-3") == {}
+    
+    def test_scheduler_expires_in_background(self, access_control, admin_user):
+        """Test the scheduler deactivates assignments without a check."""
+        access_control.assign_role("user-1", Role.VIEWER, assigned_by=admin_user,
+                                   expires_at=datetime.utcnow() + timedelta(milliseconds=50))
+        assert access_control.check_permission("user-1", Permission.CANVAS_READ)
+        
+        scheduler = ExpiryScheduler(access_control, interval=0.01, compact_interval=0.0)
+        scheduler.start()
+        try:
+            deadline = time.monotonic() + 5
+            while "user-1" in access_control.user_roles and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            scheduler.stop(timeout=5)
+        
+        assert "user-1" not in access_control.user_roles
+        assert not access_control.check_permission("user-1", Permission.CANVAS_READ)
+
+
+class TestFilterAuthorized:
+    """Tests for batch authorization of resource lists."""
+    
+    def test_filters_resource_grants(self, access_control, admin_user):
+        """Test only resources with a matching grant are kept, in order."""
+        access_control.assign_role("user-1", Role.VIEWER, assigned_by=admin_user,
+                                   resource_id="canvas-3")
+        access_control.assign_role("user-1", Role.ANALYST, assigned_by=admin_user,
+                                   resource_id="canvas-1")
+        
+        resources = ["canvas-1", "canvas-2", "canvas-3"]
+        assert access_control.filter_authorized(
+            "user-1", Permission.CANVAS_READ, resources) == ["canvas-1", "canvas-3"]
+        assert access_control.filter_authorized(
+            "user-1", Permission.CANVAS_UPDATE, resources) == ["canvas-1"]
+    
+    def test_global_grant_keeps_all(self, access_control, admin_user):
+        """Test a global grant keeps every resource."""
+        access_control.assign_role("user-1", Role.VIEWER, assigned_by=admin_user)
+        resources = (f"canvas-{i}" for i in range(3))
+        assert access_control.filter_authorized(
+            "user-1", Permission.CANVAS_READ, resources) == ["canvas-0", "canvas-1", "canvas-2"]
+        assert access_control.filter_authorized(admin_user, Permission.EDGE_DELETE, ["x"]) == ["x"]
+    
+    def test_unassigned_user_gets_nothing(self, access_control):
+        """Test a user without roles is denied every resource."""
+        assert access_control.filter_authorized(
+            "nobody", Permission.CANVAS_READ, ["canvas-1"]
+        ) == []
+    
+    def test_matches_check_permission(self, access_control, admin_user):
+        """Test filtering agrees with per-resource checks."""
+        access_control.assign_role("user-1", Role.VIEWER, assigned_by=admin_user)
+        access_control.assign_role("user-1", Role.ANALYST, assigned_by=admin_user,
+                                   resource_id="canvas-2")
+        resources = [f"canvas-{i}" for i in range(5)]
+        for permission in Permission:
+            assert access_control.filter_authorized("user-1", permission, resources) == [
+                r for r in resources if access_control.check_permission("user-1", permission, r)
+            ]
+
+
+class TestPermissionCheckBenchmark:
+    """Microbenchmark: cached checks against rebuilding from assignments."""
+    
+    def test_cached_checks_are_faster(self, access_control, admin_user):
+        """Test cached checks beat a full assignment scan by a wide margin."""
+        for i in range(200):
+            access_control.assign_role(
+                "user-1", Role.ANALYST, assigned_by=admin_user,
+                resource_id=f"canvas-{i}",
+                expires_at=datetime.utcnow() + timedelta(days=1),
+            )
+        checks = [(Permission.CANVAS_UPDATE, f"canvas-{i % 250}") for i in range(2000)]
+        
+        start = time.perf_counter()
+        cached = [access_control.check_permission("user-1", p, r) for p, r in checks]
+        cached_time = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        uncached = []
+        for p, r in checks:
+            access_control.invalidate_permissions("user-1")  # Forces a scan, as before caching
+            uncached.append(access_control.check_permission("user-1", p, r))
+        uncached_time = time.perf_counter() - start
+        
+        assert cached == uncached
+        assert sum(cached) == 1600
+        assert cached_time * 10 < uncached_time
@@ -0,0 +1,129 @@
+"""
+Tests for the SQLite role assignment store and AccessControl's write-through cache.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.services.access_control import AccessControl, Permission, Role
+from src.store.access_store import SQLiteRoleAssignmentStore
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "access.db")
+
+
+@pytest.fixture
+def store(db_path):
+    return SQLiteRoleAssignmentStore(db_path)
+
+
+def _worker(store):
+    """An AccessControl that checks the store for changes on every read."""
+    return AccessControl(store=store, sync_interval=0.0)
+
+
+class TestSQLiteRoleAssignmentStore:
+    """Tests for persisting assignments."""
+
+    def test_round_trip_and_indexes(self, store):
+        """Test assignments are read back by user and by resource."""
+        access_control = _worker(store)
+        expires_at = datetime.utcnow() + timedelta(hours=1)
+        access_control.assign_role("user-1", Role.ANALYST, assigned_by="system",
+                                   resource_id="canvas-1", expires_at=expires_at)
+        access_control.assign_role("user-1", Role.VIEWER, assigned_by="system")
+        access_control.assign_role("user-2", Role.VIEWER, assigned_by="system",
+                                   resource_id="canvas-1")
+
+        user_assignments = store.get_user_assignments("user-1")
+        assert [a.role for a in user_assignments] == [Role.ANALYST, Role.VIEWER]
+        assert user_assignments[0].expires_at == expires_at
+        assert user_assignments[0].resource_id == "canvas-1"
+        resource_assignments = store.get_resource_assignments("canvas-1")
+        assert {a.user_id for a in resource_assignments} == {"user-1", "user-2"}
+
+        access_control.revoke_role("user-2", Role.VIEWER, revoked_by="system")
+        active = store.get_resource_assignments("canvas-1", active_only=True)
+        assert [a.user_id for a in active] == ["user-1"]
+        assert store.get_user_assignments("user-2")[0].ended_at is not None
+
+    def test_change_version(self, store):
+        """Test each write is one change and only later rows are returned."""
+        access_control = _worker(store)
+        assert store.get_change_version() == 0
+        access_control.assign_role("user-1", Role.VIEWER, assigned_by="system")
+        access_control.assign_role("user-2", Role.VIEWER, assigned_by="system")
+        assert store.get_change_version() == 2
+
+        changes, version = store.get_changes_since(1)
+        assert version == 2
+        assert [a.user_id for a in changes] == ["user-2"]
+        assert store.get_changes_since(2) == ([], 2)
+
+    def test_delete_ended_before(self, store):
+        """Test only assignments that ended before the cutoff are deleted."""
+        access_control = _worker(store)
+        now = datetime.utcnow()
+        access_control.assign_role("user-1", Role.VIEWER, assigned_by="system",
+                                   expires_at=now + timedelta(hours=1))
+        access_control.assign_role("user-2", Role.VIEWER, assigned_by="system")
+        access_control.expire_assignments(now=now + timedelta(hours=2))
+
+        assert store.delete_ended_before(now) == 0
+        assert store.delete_ended_before(now + timedelta(days=1)) == 1
+        assert [a.user_id for a in store.get_all_assignments()] == ["user-2"]
+
+
+class TestSharedAccessControl:
+    """Tests for several AccessControl instances sharing one store."""
+
+    def test_restart_keeps_grants(self, db_path):
+        """Test a new instance loads the stored assignments."""
+        first = AccessControl(store=SQLiteRoleAssignmentStore(db_path))
+        first.assign_role("user-1", Role.ANALYST, assigned_by="system", resource_id="canvas-1")
+        first.assign_role("user-1", Role.VIEWER, assigned_by="system",
+                          expires_at=datetime.utcnow() + timedelta(hours=1))
+
+        restarted = AccessControl(store=SQLiteRoleAssignmentStore(db_path))
+        assert restarted.check_permission("user-1", Permission.CANVAS_UPDATE, "canvas-1")
+        assert restarted.check_permission("user-1", Permission.CANVAS_READ, "canvas-2")
+        assert len(restarted.get_assignment_history("user-1")) == 2
+        # Stored expiries are scheduled again
+        assert restarted.expire_assignments(now=datetime.utcnow() + timedelta(hours=2)) == 1
+        assert not restarted.check_permission("user-1", Permission.CANVAS_READ, "canvas-2")
+
+    def test_workers_pick_up_changes(self, db_path):
+        """Test grants and revocations made by one worker reach another."""
+        worker_a = _worker(SQLiteRoleAssignmentStore(db_path))
+        worker_b = _worker(SQLiteRoleAssignmentStore(db_path))
+        assert not worker_b.check_permission("user-1", Permission.CANVAS_READ)
+
+        worker_a.assign_role("user-1", Role.VIEWER, assigned_by="system")
+        assert worker_b.check_permission("user-1", Permission.CANVAS_READ)
+        assert worker_b.get_user_roles("user-1") == [(Role.VIEWER, None)]
+
+        # Revoking in B finds the assignment A made, and A sees the revocation
+        assert worker_b.revoke_role("user-1", Role.VIEWER, revoked_by="system")
+        assert not worker_a.check_permission("user-1", Permission.CANVAS_READ)
+        assert len(worker_a.get_assignment_history("user-1")) == 1
+
+    def test_sync_is_skipped_within_interval(self, db_path):
+        """Test changes are picked up at most once per sync interval."""
+        worker_a = _worker(SQLiteRoleAssignmentStore(db_path))
+        worker_b = AccessControl(store=SQLiteRoleAssignmentStore(db_path), sync_interval=3600)
+        worker_a.assign_role("user-1", Role.VIEWER, assigned_by="system")
+
+        assert not worker_b.check_permission("user-1", Permission.CANVAS_READ)
+        assert worker_b.sync()
+        assert worker_b.check_permission("user-1", Permission.CANVAS_READ)
+        assert not worker_b.sync()
+
+    def test_own_writes_do_not_trigger_reload(self, store):
+        """Test a worker's own writes leave its cache current."""
+        access_control = _worker(store)
+        access_control.assign_role("user-1", Role.VIEWER, assigned_by="system")
+        access_control.revoke_role("user-1", Role.VIEWER, revoked_by="system")
+        assert not access_control.sync()
@@ -10,3 +10,29 @@ def test_index():
     assert resp.status_code == 200
     data = resp.get_json()
     assert data.get('message') == 'Git RCA Workspace - MVP skeleton'
+
+
+def test_investigation_conditional_get(tmp_path, monkeypatch):
+    from src.store.investigation_store import InvestigationStore
+
+    store = InvestigationStore(db_path=str(tmp_path / 'inv.db'))
+    monkeypatch.setattr(app, 'investigation_store', store)
+    inv = store.create_investigation(title='Outage')
+    store.add_annotation(inv.id, 'alice', 'First note')
+    client = app.test_client()
+
+    resp = client.get(f'/api/investigations/{inv.id}/annotations')
+    assert resp.status_code == 200
+    etag = resp.headers['ETag']
+
+    # Unchanged investigation: 304 without loading it
+    resp = client.get(f'/api/investigations/{inv.id}', headers={'If-None-Match': etag})
+    assert resp.status_code == 304
+    assert client.get(f'/api/investigations/{inv.id}/annotations',
+                      headers={'If-None-Match': etag}).status_code == 304
+
+    store.add_annotation(inv.id, 'bob', 'Second note')
+    resp = client.get(f'/api/investigations/{inv.id}/annotations', headers={'If-None-Match': etag})
+    assert resp.status_code == 200
+    assert resp.get_json()['count'] == 2
+    assert client.get('/api/investigations/missing').status_code == 404
@@ -0,0 +1,189 @@
+"""
+Tests for Canvas Layout Service
+
+Test cases for:
+- Grid and hierarchical (layered) layouts
+- Force-directed layout with and without NumPy
+- Barnes-Hut repulsion accuracy
+- Per-revision caching and incremental updates
+"""
+
+import math
+import random
+import pytest
+
+from src.models.canvas import Canvas, CanvasEdge, CanvasNode, EdgeType, NodeType
+from src.services import canvas_layout
+from src.services.canvas_layout import LayoutEngine
+
+
+def _canvas(node_count, edges, edge_type=EdgeType.CAUSE_EFFECT, layout_type="force-directed"):
+    """Build a canvas with nodes n0..n{count-1} and (source, target) index pairs."""
+    canvas = Canvas(id="canvas-1", investigation_id="inv-1", title="Layout",
+                    layout_type=layout_type)
+    for i in range(node_count):
+        canvas.add_node(CanvasNode(id=f"n{i}", type=NodeType.EVENT, title=f"N{i}"))
+    for s, t in edges:
+        canvas.add_edge(CanvasEdge(id=f"e{s}-{t}", source_id=f"n{s}", target_id=f"n{t}",
+                                   type=edge_type))
+    return canvas
+
+
+def _distance(layout, a, b):
+    (ax, ay), (bx, by) = layout.positions[a], layout.positions[b]
+    return math.hypot(ax - bx, ay - by)
+
+
+@pytest.fixture(params=["numpy", "python"])
+def engine(request, monkeypatch):
+    """Layout engine on each simulation backend."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(canvas_layout, "np", None)
+    return LayoutEngine(iterations=100)
+
+
+class TestStaticLayouts:
+    """Test grid and hierarchical layouts."""
+
+    def test_grid(self):
+        """Test nodes fill rows of ceil(sqrt(N)) columns."""
+        layout = LayoutEngine(node_spacing=100).layout(_canvas(5, []), "grid")
+
+        assert layout.positions["n0"] == (0, 0)
+        assert layout.positions["n2"] == (200, 0)
+        assert layout.positions["n3"] == (0, 100)
+        assert layout.positions["n4"] == (100, 100)
+
+    def test_hierarchical_layers(self):
+        """Test causes sit above their effects, one layer per step."""
+        # n0 -> n1 -> n3, n0 -> n2 -> n3, n3 -> n4
+        canvas = _canvas(5, [(0, 1), (0, 2), (1, 3), (2, 3), (3, 4)])
+
+        layout = LayoutEngine(layer_spacing=100).layout(canvas, "hierarchical")
+
+        ys = {node_id: y for node_id, (_, y) in layout.positions.items()}
+        assert ys == {"n0": 0, "n1": 100, "n2": 100, "n3": 200, "n4": 300}
+        assert layout.positions["n1"][0] != layout.positions["n2"][0]
+
+    def test_hierarchical_tolerates_cycles(self):
+        """Test causal cycles are broken instead of looping."""
+        canvas = _canvas(3, [(0, 1), (1, 2), (2, 0)])
+
+        layout = LayoutEngine(layer_spacing=100).layout(canvas, "hierarchical")
+
+        assert sorted(y for _, y in layout.positions.values()) == [0, 100, 200]
+
+    def test_hierarchical_ignores_undirected_edges(self):
+        """Test correlation edges do not create layers."""
+        canvas = _canvas(2, [(0, 1)], edge_type=EdgeType.CORRELATION)
+
+        layout = LayoutEngine().layout(canvas, "hierarchical")
+
+        assert layout.positions["n0"][1] == layout.positions["n1"][1]
+
+    def test_unknown_layout_type(self):
+        """Test unknown layout types are rejected."""
+        with pytest.raises(ValueError):
+            LayoutEngine().layout(_canvas(1, []), "spiral")
+
+
+class TestForceDirected:
+    """Test the force simulation."""
+
+    def test_connected_nodes_are_closer(self, engine):
+        """Test two clusters joined by one edge separate cleanly."""
+        edges = [(a, b) for a in range(5) for b in range(a + 1, 5)]
+        edges += [(a, b) for a in range(5, 10) for b in range(a + 1, 10)]
+        canvas = _canvas(10, edges + [(0, 5)])
+
+        layout = engine.layout(canvas)
+
+        assert _distance(layout, "n1", "n2") < _distance(layout, "n1", "n7")
+        assert _distance(layout, "n6", "n8") < _distance(layout, "n2", "n8")
+
+    def test_deterministic(self, engine):
+        """Test the same canvas gives the same positions."""
+        canvas = _canvas(8, [(i, i + 1) for i in range(7)])
+
+        first = engine.layout(canvas).positions
+        engine.invalidate()
+
+        assert engine.layout(canvas).positions == first
+
+    def test_barnes_hut_matches_exact_repulsion(self):
+        """Test the quadtree approximation stays close to exact forces."""
+        np = pytest.importorskip("numpy")
+        pos = np.random.default_rng(0).uniform(0, 3000, (800, 2))
+        engine = LayoutEngine(theta=0.5)
+
+        exact = engine.exact_repulsion(pos, 150.0 ** 2)
+        approx = engine.barnes_hut_repulsion(pos, 150.0 ** 2)
+
+        error = np.linalg.norm(exact - approx, axis=1)
+        typical = np.linalg.norm(exact, axis=1).mean()
+        assert np.median(error) < 0.01 * typical
+        assert error.max() < 0.1 * typical
+
+    def test_large_canvas_uses_barnes_hut(self):
+        """Test large canvases lay out with the approximation."""
+        pytest.importorskip("numpy")
+        rng = random.Random(1)
+        canvas = _canvas(300, [(rng.randrange(i), i) for i in range(1, 300)])
+
+        layout = LayoutEngine(iterations=30, barnes_hut_threshold=100).layout(canvas)
+
+        assert len(set(layout.positions.values())) == 300
+
+
+class TestLayoutCache:
+    """Test caching and incremental updates."""
+
+    def test_cached_per_revision(self, engine):
+        """Test the same revision returns the cached layout."""
+        canvas = _canvas(4, [(0, 1)])
+
+        first = engine.layout(canvas)
+
+        assert engine.layout(canvas) is first
+
+    def test_non_structural_change_reuses_positions(self, engine):
+        """Test a title change keeps positions without re-simulating."""
+        canvas = _canvas(4, [(0, 1)])
+        first = engine.layout(canvas)
+
+        canvas.get_node("n0").title = "Renamed"
+        canvas.touch()
+        second = engine.layout(canvas)
+
+        assert second.revision == canvas.revision
+        assert second.positions is first.positions
+
+    def test_small_change_is_incremental(self, engine):
+        """Test adding one node warm-starts from the cached layout."""
+        canvas = _canvas(30, [(i, i + 1) for i in range(29)])
+        first = engine.layout(canvas)
+
+        canvas.add_node(CanvasNode(id="new", type=NodeType.EVENT, title="New"))
+        canvas.add_edge(CanvasEdge(id="e-new", source_id="n29", target_id="new",
+                                   type=EdgeType.CAUSE_EFFECT))
+        second = engine.layout(canvas)
+
+        assert second.incremental is True
+        assert "new" in second.positions
+        assert _distance(second, "n29", "new") < 3 * engine.node_spacing
+        # Existing nodes keep their shape: the chain ends stay about as far apart
+        assert _distance(second, "n0", "n29") == pytest.approx(
+            _distance(first, "n0", "n29"), rel=0.25
+        )
+
+    def test_large_change_is_full_layout(self, engine):
+        """Test replacing most of the graph recomputes from scratch."""
+        canvas = _canvas(10, [(i, i + 1) for i in range(9)])
+        engine.layout(canvas)
+
+        for i in range(10, 20):
+            canvas.add_node(CanvasNode(id=f"n{i}", type=NodeType.EVENT, title=f"N{i}"))
+
+        assert engine.layout(canvas).incremental is False
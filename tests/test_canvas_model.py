@@ -419,6 +419,129 @@ class TestCanvas:
         assert remaining_edges[0].target_id != "node-1"
 
 
+class TestCanvasAdjacency:
+    """Test suite for Canvas adjacency indexes and traversal"""
+
+    @staticmethod
+    def _chain_canvas(length):
+        canvas = Canvas(id="c", investigation_id="inv", title="Chain")
+        for i in range(length):
+            canvas.add_node(CanvasNode(id=f"n{i}", type=NodeType.EVENT, title=f"N{i}"))
+        for i in range(length - 1):
+            canvas.add_edge(CanvasEdge(
+                id=f"e{i}", source_id=f"n{i}", target_id=f"n{i + 1}", type=EdgeType.CAUSE_EFFECT,
+            ))
+        return canvas
+
+    def test_incoming_and_outgoing_edges_by_type(self, sample_canvas):
+        """Test typed adjacency lookups"""
+        sample_canvas.add_edge(CanvasEdge(
+            id="edge-3", source_id="node-2", target_id="node-3", type=EdgeType.CORRELATION,
+        ))
+
+        assert [e.id for e in sample_canvas.get_outgoing_edges("node-2")] == ["edge-2", "edge-3"]
+        correlations = sample_canvas.get_outgoing_edges("node-2", EdgeType.CORRELATION)
+        assert [e.id for e in correlations] == ["edge-3"]
+        assert [e.id for e in sample_canvas.get_incoming_edges("node-3")] == ["edge-2", "edge-3"]
+        assert sample_canvas.get_incoming_edges("node-1") == []
+
+    def test_indexes_follow_removals(self, sample_canvas):
+        """Test removing edges and nodes keeps the indexes consistent"""
+        sample_canvas.remove_edge("edge-1")
+        assert sample_canvas.get_outgoing_edges("node-1") == []
+        assert [n.id for n in sample_canvas.get_connected_nodes("node-2")] == ["node-3"]
+
+        sample_canvas.remove_node("node-3")
+        assert sample_canvas.edges == {}
+        assert sample_canvas.get_outgoing_edges("node-2") == []
+        assert sample_canvas._outgoing == {} and sample_canvas._incoming == {}
+
+    def test_replacing_edge_reindexes(self, sample_canvas):
+        """Test re-adding an edge ID moves it in the indexes"""
+        sample_canvas.add_edge(CanvasEdge(
+            id="edge-1", source_id="node-1", target_id="node-3", type=EdgeType.SEQUENCE,
+        ))
+
+        assert sample_canvas.get_incoming_edges("node-2") == []
+        sequences = sample_canvas.get_incoming_edges("node-3", EdgeType.SEQUENCE)
+        assert [e.id for e in sequences] == ["edge-1"]
+
+    def test_causality_chain_is_depth_first(self):
+        """Test diamond-shaped chains visit each node once, in DFS order"""
+        canvas = self._chain_canvas(4)
+        canvas.add_node(CanvasNode(id="x", type=NodeType.EVENT, title="X"))
+        canvas.add_edge(CanvasEdge(id="ex", source_id="n0", target_id="x",
+                                   type=EdgeType.CAUSE_EFFECT))
+        canvas.add_edge(CanvasEdge(id="ex2", source_id="x", target_id="n2",
+                                   type=EdgeType.CAUSE_EFFECT))
+
+        assert [n.id for n in canvas.get_causality_chain("n0")] == ["n0", "n1", "n2", "n3", "x"]
+
+    def test_deep_causality_chain(self):
+        """Test chains deeper than the recursion limit"""
+        canvas = self._chain_canvas(5000)
+
+        chain = canvas.get_causality_chain("n0")
+
+        assert len(chain) == 5000
+        assert chain[-1].id == "n4999"
+
+
+class TestCanvasSpatialIndex:
+    """Test suite for Canvas region queries"""
+
+    @staticmethod
+    def _grid_canvas(side, spacing=300.0):
+        canvas = Canvas(id="c", investigation_id="inv", title="Grid")
+        for i in range(side):
+            for j in range(side):
+                canvas.add_node(CanvasNode(
+                    id=f"n{i}-{j}", type=NodeType.EVENT, title="N",
+                    position=(i * spacing, j * spacing), size=(100.0, 50.0),
+                ))
+        return canvas
+
+    def test_query_region(self):
+        """Test only nodes intersecting the box are returned"""
+        canvas = self._grid_canvas(20)
+
+        found = canvas.query_region(250, 250, 650, 650)
+
+        assert sorted(n.id for n in found) == ["n1-1", "n1-2", "n2-1", "n2-2"]
+
+    def test_partial_overlap(self):
+        """Test nodes overlapping the box edge are included"""
+        canvas = self._grid_canvas(3)
+
+        # n0-0 spans x 0..100, y 0..50
+        assert [n.id for n in canvas.query_region(90, 40, 95, 45)] == ["n0-0"]
+        assert canvas.query_region(101, 0, 150, 10) == []
+
+    def test_large_region_scans(self):
+        """Test a zoomed-out box returns everything"""
+        canvas = self._grid_canvas(5)
+
+        assert len(canvas.query_region(-1e6, -1e6, 1e6, 1e6)) == 25
+
+    def test_move_and_remove_update_index(self):
+        """Test moved and removed nodes are found at their new place only"""
+        canvas = self._grid_canvas(3)
+        revision = canvas.revision
+
+        canvas.move_node("n0-0", position=(5000.0, 5000.0))
+        canvas.remove_node("n1-1")
+
+        assert canvas.revision > revision
+        assert canvas.query_region(0, 0, 10, 10) == []
+        assert [n.id for n in canvas.query_region(5050, 5010, 5060, 5020)] == ["n0-0"]
+        assert canvas.query_region(300, 300, 350, 320) == []
+
+    def test_move_missing_node(self):
+        """Test moving an unknown node raises"""
+        with pytest.raises(ValueError):
+            Canvas(id="c", investigation_id="inv", title="Empty").move_node("nope", (0.0, 0.0))
+
+
 class TestCanvasStore:
     """Test suite for CanvasStore"""
 
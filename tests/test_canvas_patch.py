@@ -0,0 +1,161 @@
+"""
+Tests for Canvas Patch Service
+
+Test cases for:
+- Applying mixed add/update/remove batches
+- References between operations in one batch
+- All-or-nothing rollback on failure
+- Validation of malformed operations
+"""
+
+import pytest
+
+from src.models.canvas import Canvas, CanvasEdge, CanvasNode, EdgeType, NodeType
+from src.models.canvas_version import ChangeType
+from src.services.canvas_patch import CanvasPatch, PatchError
+
+
+@pytest.fixture
+def canvas():
+    canvas = Canvas(id="canvas-1", investigation_id="inv-1", title="Outage")
+    canvas.add_node(CanvasNode(id="n1", type=NodeType.EVENT, title="Deploy", position=(10.0, 20.0)))
+    canvas.add_node(CanvasNode(id="n2", type=NodeType.METRIC, title="Latency"))
+    canvas.add_edge(CanvasEdge(id="e1", source_id="n1", target_id="n2", type=EdgeType.CAUSE_EFFECT))
+    return canvas
+
+
+def _snapshot(canvas):
+    data = canvas.to_dict()
+    return data["nodes"], data["edges"]
+
+
+class TestApply:
+    """Test successful patches."""
+
+    def test_mixed_batch(self, canvas):
+        """Test adds, updates and removes applied in order"""
+        result = CanvasPatch([
+            {"op": "add_node", "node": {"id": "n3", "type": "EVENT", "title": "Alert",
+                                        "position": {"x": 5, "y": 6}}},
+            {"op": "add_edge", "edge": {"id": "e2", "source_id": "n2", "target_id": "n3",
+                                        "type": "TRIGGERS"}},
+            {"op": "update_node", "id": "n1",
+             "node": {"title": "Deploy v2", "position": {"x": 99}}},
+            {"op": "update_edge", "id": "e1", "edge": {"type": "SEQUENCE", "label": "then"}},
+            {"op": "remove_node", "id": "n2"},
+        ]).apply(canvas)
+
+        assert set(canvas.nodes) == {"n1", "n3"}
+        assert canvas.nodes["n3"].position == (5.0, 6.0)
+        assert canvas.nodes["n1"].title == "Deploy v2"
+        assert canvas.nodes["n1"].position == (99.0, 20.0)
+        # Removing n2 removed both its edges
+        assert canvas.edges == {}
+        assert [c.change_type for c in result.changes] == [
+            ChangeType.NODE_ADDED, ChangeType.EDGE_ADDED, ChangeType.NODE_UPDATED,
+            ChangeType.EDGE_UPDATED, ChangeType.NODE_REMOVED,
+        ]
+        assert result.node_ids == {"n1", "n2", "n3"}
+        assert result.edge_ids == {"e1", "e2"}
+
+    def test_generated_ids(self, canvas):
+        """Test elements added without an id get unique ones"""
+        result = CanvasPatch([
+            {"op": "add_node", "node": {"type": "EVENT", "title": "A"}},
+            {"op": "add_node", "node": {"type": "EVENT", "title": "B"}},
+        ]).apply(canvas)
+
+        ids = [r["id"] for r in result.results]
+        assert len(set(ids)) == 2 and all(i in canvas.nodes for i in ids)
+
+    def test_updated_edge_is_reindexed(self, canvas):
+        """Test changing an edge's type updates typed adjacency lookups"""
+        CanvasPatch([{"op": "update_edge", "id": "e1", "edge": {"type": "SEQUENCE"}}]).apply(canvas)
+
+        assert canvas.get_outgoing_edges("n1", EdgeType.CAUSE_EFFECT) == []
+        assert [e.id for e in canvas.get_outgoing_edges("n1", EdgeType.SEQUENCE)] == ["e1"]
+
+    def test_moved_node_is_reindexed(self, canvas):
+        """Test region queries see nodes moved by a patch"""
+        CanvasPatch([
+            {"op": "update_node", "id": "n1", "node": {"position": {"x": 5000, "y": 5000}}},
+        ]).apply(canvas)
+
+        assert [n.id for n in canvas.query_region(5000, 5000, 5010, 5010)] == ["n1"]
+        assert [n.id for n in canvas.query_region(10, 20, 15, 25)] == ["n2"]
+
+
+class TestRollback:
+    """Test failed patches leave the canvas unchanged."""
+
+    def test_unchanged_update_records_nothing(self, canvas):
+        """Test updates to current values leave the element and change list alone"""
+        node = canvas.nodes["n1"]
+        result = CanvasPatch([
+            {"op": "update_node", "id": "n1", "node": {"title": node.title}},
+            {"op": "update_edge", "id": "e1", "edge": {"type": canvas.edges["e1"].type.value}},
+        ]).apply(canvas)
+
+        assert canvas.nodes["n1"] is node
+        assert result.changes == []
+        assert result.node_ids == set() and result.edge_ids == set()
+        assert [r["id"] for r in result.results] == ["n1", "e1"]
+
+    def test_failure_restores_canvas(self, canvas):
+        """Test a failing operation undoes the earlier ones"""
+        before = _snapshot(canvas)
+        touched = (canvas.revision, canvas.updated_at)
+
+        with pytest.raises(PatchError) as excinfo:
+            CanvasPatch([
+                {"op": "add_node", "node": {"id": "n3", "type": "EVENT", "title": "Alert"}},
+                {"op": "update_node", "id": "n1",
+                 "node": {"title": "Changed", "position": {"x": 1}}},
+                {"op": "update_edge", "id": "e1", "edge": {"type": "SEQUENCE"}},
+                {"op": "remove_node", "id": "n2"},
+                {"op": "add_edge",
+                 "edge": {"source_id": "n1", "target_id": "n2", "type": "TRIGGERS"}},
+            ]).apply(canvas)
+
+        assert excinfo.value.index == 4
+        assert _snapshot(canvas) == before
+        assert (canvas.revision, canvas.updated_at) == touched
+        assert [e.id for e in canvas.get_outgoing_edges("n1", EdgeType.CAUSE_EFFECT)] == ["e1"]
+        assert sorted(n.id for n in canvas.query_region(10, 20, 15, 25)) == ["n1", "n2"]
+
+    def test_duplicate_add_is_rejected(self, canvas):
+        """Test adding an existing id fails instead of replacing"""
+        with pytest.raises(PatchError):
+            CanvasPatch([
+                {"op": "add_node", "node": {"id": "n1", "type": "EVENT", "title": "X"}},
+            ]).apply(canvas)
+        assert canvas.nodes["n1"].title == "Deploy"
+
+    def test_missing_element(self, canvas):
+        """Test updating or removing unknown ids fails"""
+        for op in ("update_node", "remove_node", "update_edge", "remove_edge"):
+            with pytest.raises(PatchError, match="not found"):
+                CanvasPatch([{"op": op, "id": "missing"}]).apply(canvas)
+
+
+class TestValidation:
+    """Test malformed patches are rejected before anything is applied."""
+
+    @pytest.mark.parametrize("operations", [
+        None,
+        [],
+        [{"op": "explode"}],
+        [{"op": "remove_node"}],
+        [{"op": "add_node", "node": {"title": "No type"}}],
+        [{"op": "add_node", "node": {"type": "NOT_A_TYPE", "title": "X"}}],
+        [{"op": "add_edge", "edge": {"source_id": "n1", "target_id": "n2"}}],
+        [{"op": "update_edge", "id": "e1", "edge": {"strength": "high"}}],
+    ])
+    def test_malformed(self, operations):
+        with pytest.raises(PatchError):
+            CanvasPatch(operations)
+
+    def test_error_names_operation(self):
+        with pytest.raises(PatchError) as excinfo:
+            CanvasPatch([{"op": "remove_edge", "id": "e1"}, {"op": "add_edge", "edge": {}}])
+        assert excinfo.value.index == 1
@@ -0,0 +1,298 @@
+"""
+Tests for the SQLite Canvas Store
+
+Test cases for:
+- Canvas round-trips (nodes, edges, timestamps, revision)
+- Per-investigation lookup through the index
+- Row-level node and edge mutations
+- Persistence across store instances
+"""
+
+import json
+import sqlite3
+import pytest
+from flask import Flask
+
+from src.api.canvas_ui_api import CanvasUIAPI
+from src.models.canvas import (
+    Canvas, CanvasEdge, CanvasNode, CanvasStore, EdgeType, NodeType, RevisionConflictError,
+)
+from src.services.event_stream import EventStream
+from src.store.canvas_store import SQLiteCanvasStore
+from src.store.investigation_store import InvestigationStore
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "canvases.db")
+
+
+@pytest.fixture
+def store(db_path):
+    return SQLiteCanvasStore(db_path=db_path)
+
+
+@pytest.fixture
+def investigation_store(tmp_path):
+    return InvestigationStore(db_path=str(tmp_path / "inv.db"))
+
+
+def _canvas(canvas_id="canvas-1", investigation_id="inv-1"):
+    canvas = Canvas(id=canvas_id, investigation_id=investigation_id, title="Outage")
+    canvas.add_node(CanvasNode(
+        id="n1", type=NodeType.EVENT, title="Deploy",
+        data={"sha": "abc"}, position=(10.0, 20.0), metadata={"pinned": True},
+    ))
+    canvas.add_node(CanvasNode(id="n2", type=NodeType.METRIC, title="Latency"))
+    canvas.add_node(CanvasNode(id="n3", type=NodeType.RESOLUTION, title="Rollback"))
+    canvas.add_edge(CanvasEdge(id="e1", source_id="n1", target_id="n2", type=EdgeType.CAUSE_EFFECT))
+    canvas.add_edge(CanvasEdge(id="e2", source_id="n2", target_id="n3", type=EdgeType.RELATES_TO,
+                               label="fixed by", strength=0.5))
+    return canvas
+
+
+class TestSQLiteCanvasStore:
+    """Test suite for SQLiteCanvasStore"""
+
+    def test_round_trip(self, store):
+        """Test a canvas is restored with all fields"""
+        canvas = _canvas()
+        store.add(canvas)
+
+        loaded = store.get("canvas-1")
+
+        assert loaded.to_dict() == canvas.to_dict()
+        assert loaded.revision == canvas.revision
+        assert [e.id for e in loaded.get_outgoing_edges("n1")] == ["e1"]
+
+    def test_get_revision(self, store):
+        """Test the revision is read without loading the canvas"""
+        canvas = _canvas()
+        store.add(canvas)
+
+        assert store.get_revision("canvas-1") == canvas.revision
+        assert store.get_revision("missing") is None
+
+    def test_get_missing(self, store):
+        """Test unknown canvases return None"""
+        assert store.get("missing") is None
+
+    def test_persists_across_instances(self, store, db_path):
+        """Test canvases survive a restart"""
+        store.add(_canvas())
+
+        assert SQLiteCanvasStore(db_path=db_path).get("canvas-1").title == "Outage"
+
+    def test_get_by_investigation(self, store, db_path):
+        """Test lookup by investigation uses the index"""
+        store.add(_canvas("c1", "inv-1"))
+        store.add(_canvas("c2", "inv-2"))
+        store.add(_canvas("c3", "inv-1"))
+
+        assert [c.id for c in store.get_by_investigation("inv-1")] == ["c1", "c3"]
+        assert store.count() == 3
+
+        with sqlite3.connect(db_path) as conn:
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM canvases WHERE investigation_id = ?", ("inv-1",)
+            ).fetchall()
+        assert "idx_canvases_investigation" in str(plan)
+
+    def test_delete_cascades(self, store, db_path):
+        """Test deleting a canvas removes its nodes and edges"""
+        store.add(_canvas())
+        store.delete("canvas-1")
+
+        with sqlite3.connect(db_path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM canvas_nodes").fetchone()[0] == 0
+            assert conn.execute("SELECT COUNT(*) FROM canvas_edges").fetchone()[0] == 0
+        assert store.get_all() == []
+
+
+class TestRowLevelMutations:
+    """Test single node/edge writes"""
+
+    @staticmethod
+    def _rowids(db_path, table):
+        with sqlite3.connect(db_path) as conn:
+            return dict(conn.execute(f"SELECT id, rowid FROM {table}").fetchall())
+
+    def test_save_node_touches_one_row(self, store, db_path):
+        """Test updating a node leaves the other rows alone"""
+        store.add(_canvas())
+        before = self._rowids(db_path, "canvas_nodes")
+
+        canvas = store.get("canvas-1")
+        node = canvas.get_node("n2")
+        node.title = "p99 latency"
+        canvas.touch()
+        store.save_node(canvas, node)
+
+        assert self._rowids(db_path, "canvas_nodes") == before
+        loaded = store.get("canvas-1")
+        assert loaded.get_node("n2").title == "p99 latency"
+        assert loaded.revision == canvas.revision
+
+    def test_delete_node_cascades_to_edges(self, store):
+        """Test deleting a node removes only its edges"""
+        store.add(_canvas())
+        canvas = store.get("canvas-1")
+        canvas.remove_node("n1")
+        store.delete_node(canvas, "n1")
+
+        loaded = store.get("canvas-1")
+        assert sorted(loaded.nodes) == ["n2", "n3"]
+        assert list(loaded.edges) == ["e2"]
+
+    def test_edge_mutations(self, store):
+        """Test adding and deleting single edges"""
+        store.add(_canvas())
+        canvas = store.get("canvas-1")
+        edge = CanvasEdge(id="e3", source_id="n1", target_id="n3", type=EdgeType.SEQUENCE)
+        canvas.add_edge(edge)
+        store.save_edge(canvas, edge)
+        canvas.remove_edge("e1")
+        store.delete_edge(canvas, "e1")
+
+        assert list(store.get("canvas-1").edges) == ["e2", "e3"]
+
+    def test_save_batch(self, store):
+        """Test a batch saves present ids and deletes missing ones"""
+        store.add(_canvas())
+        canvas = store.get("canvas-1")
+        canvas.remove_node("n1")  # Also drops e1
+        canvas.add_node(CanvasNode(id="n4", type=NodeType.INSIGHT, title="Cause"))
+        canvas.add_edge(CanvasEdge(id="e3", source_id="n4", target_id="n3", type=EdgeType.TRIGGERS))
+        canvas.get_node("n2").title = "p99 latency"
+        store.save_batch(canvas, ["n1", "n2", "n4"], ["e1", "e3"])
+
+        loaded = store.get("canvas-1")
+        assert sorted(loaded.nodes) == ["n2", "n3", "n4"]
+        assert sorted(loaded.edges) == ["e2", "e3"]
+        assert loaded.get_node("n2").title == "p99 latency"
+        assert loaded.revision == canvas.revision
+
+    def test_concurrent_saves_get_distinct_revisions(self, db_path, store):
+        """Test two workers saving the same canvas never share a revision"""
+        store.add(_canvas())
+        other = SQLiteCanvasStore(db_path=db_path)
+        mine, theirs = store.get("canvas-1"), other.get("canvas-1")
+        start = mine.revision
+
+        mine.title, theirs.title = "Mine", "Theirs"
+        mine.touch()
+        theirs.touch()
+        store.save_metadata(mine)
+        other.save_metadata(theirs)
+
+        assert (mine.revision, theirs.revision) == (start + 1, start + 2)
+        assert store.get_revision("canvas-1") == start + 2
+
+    def test_api_writes_through(self, db_path, investigation_store):
+        """Test API mutations are visible to another store instance"""
+        store = SQLiteCanvasStore(db_path=db_path)
+        store.add(Canvas(id="canvas-1", investigation_id="inv-1", title="Live"))
+        app = Flask(__name__)
+        CanvasUIAPI(store, investigation_store, EventStream()).register_routes(app)
+        client = app.test_client()
+
+        node_id = json.loads(client.post("/api/canvas/canvas-1/nodes", json={
+            "type": "EVENT", "title": "Deploy",
+        }).data)["id"]
+        client.put(f"/api/canvas/canvas-1/nodes/{node_id}", json={"title": "Deploy v2"})
+
+        other_worker = SQLiteCanvasStore(db_path=db_path)
+        assert other_worker.get("canvas-1").get_node(node_id).title == "Deploy v2"
+
+        client.delete(f"/api/canvas/canvas-1/nodes/{node_id}")
+        assert other_worker.get("canvas-1").nodes == {}
+
+
+class _RacingStore(SQLiteCanvasStore):
+    """Lets another worker rename the canvas between this worker's first load and save."""
+
+    raced = False
+
+    def get(self, canvas_id):
+        canvas = super().get(canvas_id)
+        if self.raced:
+            return canvas
+        self.raced = True
+        other_worker = SQLiteCanvasStore(db_path=self.db_path)
+        theirs = other_worker.get(canvas_id)
+        theirs.title = "Theirs"
+        other_worker.save_metadata(theirs)
+        return canvas
+
+
+class TestConditionalSaves:
+    """Test saves that expect a revision"""
+
+    def test_stale_expected_revision_rejected(self, store):
+        """Test a save only applies while the stored revision matches"""
+        store.add(_canvas())
+        canvas = store.get("canvas-1")
+        start = canvas.revision
+
+        canvas.title = "First"
+        store.save_metadata(canvas, expected_revision=start)
+        assert canvas.revision == start + 1
+
+        stale = canvas.revision - 1
+        canvas.title = "Second"
+        with pytest.raises(RevisionConflictError):
+            store.save_metadata(canvas, expected_revision=stale)
+        with pytest.raises(RevisionConflictError):
+            store.save_batch(canvas, ["n1"], [], expected_revision=stale)
+        loaded = store.get("canvas-1")
+        assert (loaded.title, loaded.revision) == ("First", start + 1)
+
+    def test_in_memory_store_checks_revision(self):
+        """Test the in-memory store applies the same rule"""
+        store = CanvasStore()
+        canvas = _canvas()
+        store.add(canvas)
+        start = canvas.revision
+
+        canvas.touch()
+        store.save_metadata(canvas, expected_revision=start)
+        with pytest.raises(RevisionConflictError):
+            store.save_batch(canvas, [], [], expected_revision=start)
+
+    @pytest.fixture
+    def racing_client(self, db_path, investigation_store):
+        SQLiteCanvasStore(db_path=db_path).add(_canvas())
+        app = Flask(__name__)
+        api = CanvasUIAPI(_RacingStore(db_path=db_path), investigation_store, EventStream())
+        api.register_routes(app)
+        return app.test_client()
+
+    def test_put_loses_race_with_412(self, db_path, racing_client):
+        """Test If-Match holds when another worker writes after the check"""
+        etag = f'"canvas-1-{SQLiteCanvasStore(db_path=db_path).get_revision("canvas-1")}"'
+
+        response = racing_client.put("/api/canvas/canvas-1", json={"title": "Mine"},
+                                     headers={"If-Match": etag})
+
+        assert response.status_code == 412
+        current = SQLiteCanvasStore(db_path=db_path).get("canvas-1")
+        assert current.title == "Theirs"
+        assert response.headers["ETag"] == f'"canvas-1-{current.revision}"'
+
+    def test_patch_loses_race_with_412(self, db_path, racing_client):
+        """Test a PATCH with If-Match is not applied over a concurrent write"""
+        etag = f'"canvas-1-{SQLiteCanvasStore(db_path=db_path).get_revision("canvas-1")}"'
+
+        response = racing_client.patch("/api/canvas/canvas-1", headers={"If-Match": etag}, json={
+            "operations": [{"op": "remove_node", "id": "n1"}],
+        })
+
+        assert response.status_code == 412
+        assert "n1" in SQLiteCanvasStore(db_path=db_path).get("canvas-1").nodes
+
+    def test_unconditional_put_still_applies(self, db_path, racing_client):
+        """Test writes without If-Match are last-writer-wins"""
+        response = racing_client.put("/api/canvas/canvas-1", json={"title": "Mine"})
+
+        assert response.status_code == 200
+        assert SQLiteCanvasStore(db_path=db_path).get("canvas-1").title == "Mine"
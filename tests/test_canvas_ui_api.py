@@ -6,10 +6,12 @@ Focuses on core API endpoint testing.
 
 import pytest
 import json
-from flask import Flask
+from flask import Flask, request
 from src.api.canvas_ui_api import CanvasUIAPI, register_canvas_ui_api
 from src.models.canvas import Canvas, CanvasStore, NodeType, EdgeType, CanvasNode, CanvasEdge
 from src.models.investigation import Investigation
+from src.services.access_control import AccessControl, Role
+from src.services.event_stream import CanvasChangeEvent, EventStream, EventType
 from src.store.investigation_store import InvestigationStore
 
 
@@ -186,3 +188,516 @@ class TestCanvasUIIntegration:
 
         # 7. Verify canvas is deleted
         response = test_client.get(f'/api/canvas/{canvas_id}')
+
+
+class TestCanvasEventStreaming:
+    """Tests for change events and the SSE stream endpoint"""
+
+    @pytest.fixture
+    def stream(self):
+        """Create an isolated event stream"""
+        return EventStream(delivery_workers=1)
+
+    @pytest.fixture
+    def api(self, app, canvas_store, investigation_store, stream):
+        """Register the API with a canvas already in the store"""
+        canvas_store.add(Canvas(id='canvas-1', investigation_id='inv-1', title='Live'))
+        api = CanvasUIAPI(canvas_store, investigation_store, stream)
+        api.register_routes(app)
+        api.SSE_COALESCE_WINDOW = 0.05
+        return api
+
+    @staticmethod
+    def _frames(chunk):
+        """Parse SSE frames into (id, event, data) tuples"""
+        frames = []
+        for block in chunk.strip().split('\n\n'):
+            fields = dict(line.split(': ', 1) for line in block.split('\n'))
+            frames.append((fields['id'], fields['event'], json.loads(fields['data'])))
+        return frames
+
+    def _update(self, stream, node_id, title):
+        stream.publish(CanvasChangeEvent(
+            event_type=EventType.NODE_UPDATED,
+            canvas_id='canvas-1',
+            data={'node_id': node_id, 'node': {'title': title}},
+        ))
+
+    def test_mutations_publish_events(self, app, api, stream):
+        """Test that node add/update/delete publish change events"""
+        test_client = app.test_client()
+
+        response = test_client.post('/api/canvas/canvas-1/nodes', json={
+            'type': 'EVENT',
+            'title': 'Deploy',
+        })
+        node_id = json.loads(response.data)['id']
+        response = test_client.put(f'/api/canvas/canvas-1/nodes/{node_id}', json={
+            'title': 'Deploy v2',
+            'position': {'x': 10},
+        })
+        assert response.status_code == 200
+        assert json.loads(response.data)['position'] == {'x': 10, 'y': 0}
+        test_client.delete(f'/api/canvas/canvas-1/nodes/{node_id}')
+
+        events = list(reversed(stream.get_canvas_events('canvas-1')))
+        assert [e.event_type for e in events] == [
+            EventType.NODE_ADDED, EventType.NODE_UPDATED, EventType.NODE_DELETED,
+        ]
+        assert events[1].data['node']['title'] == 'Deploy v2'
+        assert all(e.data['node_id'] == node_id for e in events)
+
+    def test_update_missing_node(self, app, api):
+        """Test updating a node that does not exist"""
+        response = app.test_client().put('/api/canvas/canvas-1/nodes/nope', json={})
+        assert response.status_code == 404
+
+    def test_stream_endpoint(self, app, api):
+        """Test the stream endpoint content type and missing canvas"""
+        test_client = app.test_client()
+
+        response = test_client.get('/api/canvas/canvas-1/stream')
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        response.close()
+
+        assert test_client.get('/api/canvas/missing/stream').status_code == 404
+
+    def test_stream_coalesces_updates(self, api, stream):
+        """Test a burst of updates to one node is sent once"""
+        frames = api.stream_canvas_events('canvas-1')
+        assert next(frames).startswith('retry: ')
+
+        for title in ('a', 'b', 'c'):
+            self._update(stream, 'n1', title)
+        self._update(stream, 'n2', 'x')
+
+        sent = self._frames(next(frames))
+        assert [(e, d['data']['node_id'], d['data']['node']['title']) for _, e, d in sent] == [
+            ('node_updated', 'n1', 'c'),
+            ('node_updated', 'n2', 'x'),
+        ]
+        frames.close()
+
+    def test_stream_queue_is_bounded(self, api, stream):
+        """Test a client that falls behind keeps only the newest events"""
+        api.SSE_MAX_QUEUE_SIZE = 2
+        frames = api.stream_canvas_events('canvas-1')
+        next(frames)
+
+        for node_id in ('n1', 'n2', 'n3'):
+            self._update(stream, node_id, node_id)
+
+        sent = self._frames(next(frames))
+        assert [d['data']['node_id'] for _, _, d in sent] == ['n2', 'n3']
+        frames.close()
+
+    def test_stream_keeps_patches_and_add_delete_order(self, api, stream):
+        """Test only updates are merged while a client is behind"""
+        frames = api.stream_canvas_events('canvas-1')
+        next(frames)
+
+        for event_type, data in (
+            (EventType.CANVAS_PATCHED, {'version_id': 'v1'}),
+            (EventType.CANVAS_PATCHED, {'version_id': 'v2'}),
+            (EventType.NODE_ADDED, {'node_id': 'n1', 'node': {'title': 'v1'}}),
+            (EventType.NODE_DELETED, {'node_id': 'n1'}),
+            (EventType.NODE_ADDED, {'node_id': 'n1', 'node': {'title': 'v2'}}),
+        ):
+            stream.publish(CanvasChangeEvent(
+                event_type=event_type, canvas_id='canvas-1', data=data,
+            ))
+
+        sent = self._frames(next(frames))
+        assert [(e, d['data'].get('version_id') or d['data']['node_id']) for _, e, d in sent] == [
+            ('canvas_patched', 'v1'),
+            ('canvas_patched', 'v2'),
+            ('node_added', 'n1'),
+            ('node_deleted', 'n1'),
+            ('node_added', 'n1'),
+        ]
+        assert sent[-1][2]['data']['node']['title'] == 'v2'
+        frames.close()
+
+    def test_stream_heartbeat_and_unsubscribe(self, api, stream):
+        """Test idle streams send keep-alives and closing unsubscribes"""
+        api.SSE_HEARTBEAT_INTERVAL = 0.01
+        frames = api.stream_canvas_events('canvas-1')
+        next(frames)
+
+        assert next(frames) == ': keep-alive\n\n'
+        assert len(stream.get_subscriptions()) == 1
+
+        frames.close()
+        assert len(stream.get_subscriptions()) == 0
+
+    def test_stream_resumes_from_last_event_id(self, api, stream):
+        """Test a reconnecting client receives the events it missed"""
+        self._update(stream, 'n1', 'seen')
+        last_seen = stream.get_canvas_events('canvas-1')[0].event_id
+        self._update(stream, 'n2', 'missed')
+
+        frames = api.stream_canvas_events('canvas-1', last_event_id=last_seen)
+        next(frames)
+
+        sent = self._frames(next(frames))
+        assert [d['data']['node']['title'] for _, _, d in sent] == ['missed']
+        frames.close()
+
+    def test_stream_resumes_from_log_offset(self, canvas_store, investigation_store, tmp_path):
+        """Test resuming by log offset when the stream is log-backed"""
+        from src.services.event_log import EventLog
+
+        stream = EventStream(delivery_workers=1, event_log=EventLog(str(tmp_path / 'log')))
+        api = CanvasUIAPI(canvas_store, investigation_store, stream)
+        api.SSE_COALESCE_WINDOW = 0.05
+        for title in ('a', 'b', 'c'):
+            self._update(stream, f'n-{title}', title)
+
+        frames = api.stream_canvas_events('canvas-1', last_event_id='0')
+        next(frames)
+
+        sent = self._frames(next(frames))
+        assert [(i, d['data']['node']['title']) for i, _, d in sent] == [('1', 'b'), ('2', 'c')]
+        frames.close()
+        stream.event_log.close()
+
+
+class TestCanvasAnalysisEndpoint:
+    """Tests for graph metrics in the analysis endpoint"""
+
+    def test_analysis_reports_graph_metrics(self, app, canvas_store, investigation_store):
+        """Test causal path, cycles and centrality in the analysis response"""
+        canvas = Canvas(id='canvas-1', investigation_id='inv-1', title='Incident')
+        for node_id in ('deploy', 'latency', 'timeouts', 'retry'):
+            canvas.add_node(CanvasNode(id=node_id, type=NodeType.EVENT, title=node_id))
+        for source, target in (('deploy', 'latency'), ('latency', 'timeouts'),
+                               ('timeouts', 'retry'), ('retry', 'timeouts')):
+            canvas.add_edge(CanvasEdge(
+                id=f'{source}-{target}', source_id=source, target_id=target,
+                type=EdgeType.CAUSE_EFFECT,
+            ))
+        canvas_store.add(canvas)
+        CanvasUIAPI(canvas_store, investigation_store, EventStream()).register_routes(app)
+
+        response = app.test_client().get('/api/canvas/canvas-1/analysis')
+
+        assert response.status_code == 200
+        analysis = json.loads(response.data)
+        assert analysis['longest_causal_path'] == ['deploy', 'latency', 'timeouts']
+        assert analysis['root_cause_candidates'] == ['deploy']
+        assert analysis['causal_cycles'] == [['timeouts', 'retry']]
+        assert {n for n, _ in analysis['central_nodes']} == {'latency', 'timeouts'}
+        assert analysis['revision'] == canvas.revision
+        assert any('Circular causality' in i['message'] for i in analysis['insights'])
+
+
+class TestCanvasLayoutEndpoint:
+    """Tests for server-side layout"""
+
+    def test_layout_endpoint(self, app, canvas_store, investigation_store):
+        """Test layouts by type, and unknown types"""
+        canvas = Canvas(id='canvas-1', investigation_id='inv-1', title='Incident')
+        for node_id in ('deploy', 'latency'):
+            canvas.add_node(CanvasNode(id=node_id, type=NodeType.EVENT, title=node_id))
+        canvas.add_edge(CanvasEdge(id='e1', source_id='deploy', target_id='latency',
+                                   type=EdgeType.CAUSE_EFFECT))
+        canvas_store.add(canvas)
+        CanvasUIAPI(canvas_store, investigation_store, EventStream()).register_routes(app)
+        test_client = app.test_client()
+
+        response = test_client.get('/api/canvas/canvas-1/layout?type=hierarchical')
+        assert response.status_code == 200
+        layout = json.loads(response.data)
+        assert layout['layout_type'] == 'hierarchical'
+        assert layout['positions']['deploy']['y'] < layout['positions']['latency']['y']
+
+        response = test_client.get('/api/canvas/canvas-1/layout')
+        assert json.loads(response.data)['layout_type'] == 'force-directed'
+
+        assert test_client.get('/api/canvas/canvas-1/layout?type=spiral').status_code == 400
+        assert test_client.get('/api/canvas/missing/layout').status_code == 404
+
+
+class TestCanvasViewportEndpoint:
+    """Tests for viewport queries"""
+
+    def test_viewport_endpoint(self, app, canvas_store, investigation_store):
+        """Test bounding-box queries and validation"""
+        canvas = Canvas(id='canvas-1', investigation_id='inv-1', title='Huge')
+        for i in range(10):
+            canvas.add_node(CanvasNode(id=f'n{i}', type=NodeType.EVENT, title='N',
+                                       position=(i * 1000.0, 0.0)))
+        canvas_store.add(canvas)
+        CanvasUIAPI(canvas_store, investigation_store, EventStream()).register_routes(app)
+        test_client = app.test_client()
+
+        response = test_client.get(
+            '/api/canvas/canvas-1/viewport?min_x=0&min_y=0&max_x=1500&max_y=500'
+        )
+        assert response.status_code == 200
+        assert [n['id'] for n in json.loads(response.data)['nodes']] == ['n0', 'n1']
+
+        # Moving a node through the API updates the index
+        test_client.put('/api/canvas/canvas-1/nodes/n9', json={'position': {'x': 500}})
+        response = test_client.get(
+            '/api/canvas/canvas-1/viewport?min_x=0&min_y=0&max_x=1500&max_y=500'
+        )
+        assert sorted(n['id'] for n in json.loads(response.data)['nodes']) == ['n0', 'n1', 'n9']
+
+        response = test_client.get(
+            '/api/canvas/canvas-1/viewport?min_x=0&min_y=0&max_x=9999&max_y=9&max_nodes=2'
+        )
+        assert json.loads(response.data)['lod'] == 'clusters'
+
+        assert test_client.get('/api/canvas/canvas-1/viewport?min_x=0').status_code == 400
+        response = test_client.get('/api/canvas/canvas-1/viewport?min_x=a&min_y=0&max_x=1&max_y=1')
+        assert response.status_code == 400
+
+
+class TestCanvasPatchEndpoint:
+    """Tests for batched canvas patches"""
+
+    @pytest.fixture
+    def stream(self):
+        return EventStream(delivery_workers=1)
+
+    @pytest.fixture
+    def api(self, app, canvas_store, investigation_store, stream):
+        canvas = Canvas(id='canvas-1', investigation_id='inv-1', title='Outage')
+        canvas.add_node(CanvasNode(id='n1', type=NodeType.EVENT, title='Deploy'))
+        canvas_store.add(canvas)
+        api = CanvasUIAPI(canvas_store, investigation_store, stream)
+        api.register_routes(app)
+        return api
+
+    def test_patch_applies_batch(self, app, api, canvas_store, stream):
+        """Test one request adds linked elements, with one event and one version"""
+        response = app.test_client().patch('/api/canvas/canvas-1', json={
+            'operations': [
+                {'op': 'add_node', 'node': {'id': 'n2', 'type': 'METRIC', 'title': 'Latency'}},
+                {'op': 'add_node', 'node': {'id': 'n3', 'type': 'EVENT', 'title': 'Alert'}},
+                {'op': 'add_edge',
+                 'edge': {'source_id': 'n1', 'target_id': 'n2', 'type': 'CAUSE_EFFECT'}},
+                {'op': 'add_edge',
+                 'edge': {'source_id': 'n2', 'target_id': 'n3', 'type': 'TRIGGERS'}},
+                {'op': 'update_node', 'id': 'n1', 'node': {'title': 'Deploy v2'}},
+            ],
+            'message': 'Link alert chain',
+        })
+
+        assert response.status_code == 200
+        body = json.loads(response.data)
+        assert len(body['results']) == 5
+        assert body['version_number'] == 1
+
+        canvas = canvas_store.get('canvas-1')
+        assert sorted(canvas.nodes) == ['n1', 'n2', 'n3']
+        assert len(canvas.edges) == 2
+
+        events = stream.get_canvas_events('canvas-1')
+        assert [e.event_type for e in events] == [EventType.CANVAS_PATCHED]
+        assert events[0].data['version_id'] == body['version_id']
+
+        versions = api.version_store.get_canvas_versions('canvas-1')
+        assert len(versions) == 1
+        assert versions[0].message == 'Link alert chain'
+        assert len(versions[0].changes) == 5
+        assert len(versions[0].data['nodes']) == 3
+
+    def test_patch_is_all_or_nothing(self, app, api, canvas_store, stream):
+        """Test a failing operation leaves the canvas, versions and events untouched"""
+        before = canvas_store.get('canvas-1').to_dict()
+
+        response = app.test_client().patch('/api/canvas/canvas-1', json={'operations': [
+            {'op': 'add_node', 'node': {'id': 'n2', 'type': 'METRIC', 'title': 'Latency'}},
+            {'op': 'add_edge',
+             'edge': {'source_id': 'n1', 'target_id': 'missing', 'type': 'TRIGGERS'}},
+        ]})
+
+        assert response.status_code == 400
+        assert json.loads(response.data)['operation'] == 1
+        after = canvas_store.get('canvas-1').to_dict()
+        assert after['nodes'] == before['nodes'] and after['edges'] == before['edges']
+        assert api.version_store.get_canvas_versions('canvas-1') == []
+        assert stream.get_canvas_events('canvas-1') == []
+
+    def test_patch_without_changes_is_a_no_op(self, app, api, canvas_store, stream):
+        """Test a batch that changes nothing saves, versions and publishes nothing"""
+        revision = canvas_store.get('canvas-1').revision
+
+        response = app.test_client().patch('/api/canvas/canvas-1', json={'operations': [
+            {'op': 'update_node', 'id': 'n1', 'node': {'title': 'Deploy'}},
+        ]})
+
+        assert response.status_code == 200
+        body = json.loads(response.data)
+        assert body['revision'] == revision
+        assert body['version_id'] is None
+        assert body['results'][0]['node']['title'] == 'Deploy'
+        assert canvas_store.get('canvas-1').revision == revision
+        assert api.version_store.get_canvas_versions('canvas-1') == []
+        assert stream.get_canvas_events('canvas-1') == []
+
+    def test_patch_validation(self, app, api):
+        """Test malformed bodies and unknown canvases"""
+        client = app.test_client()
+        assert client.patch('/api/canvas/canvas-1', json={}).status_code == 400
+        response = client.patch('/api/canvas/canvas-1', json={'operations': [{'op': 'nope'}]})
+        assert response.status_code == 400
+        assert client.patch('/api/canvas/missing', json={'operations': []}).status_code == 404
+
+
+class TestCanvasConditionalRequests:
+    """Tests for ETags, If-None-Match and If-Match"""
+
+    @pytest.fixture
+    def test_client(self, app, canvas_store, investigation_store):
+        canvas = Canvas(id='canvas-1', investigation_id='inv-1', title='Outage')
+        canvas.add_node(CanvasNode(id='n1', type=NodeType.EVENT, title='Deploy'))
+        canvas_store.add(canvas)
+        CanvasUIAPI(canvas_store, investigation_store, EventStream()).register_routes(app)
+        return app.test_client()
+
+    def test_if_none_match(self, test_client, canvas_store, monkeypatch):
+        """Test an unchanged canvas is answered with 304 without loading it"""
+        response = test_client.get('/api/canvas/canvas-1')
+        etag = response.headers['ETag']
+        assert response.status_code == 200
+        assert not etag.startswith('W/')
+
+        loads = []
+        get = canvas_store.get
+        monkeypatch.setattr(canvas_store, 'get',
+                            lambda canvas_id: loads.append(canvas_id) or get(canvas_id))
+
+        response = test_client.get('/api/canvas/canvas-1', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.data == b''
+        assert response.headers['ETag'] == etag
+        assert loads == []
+
+        test_client.put('/api/canvas/canvas-1/nodes/n1', json={'title': 'Deploy v2'})
+        response = test_client.get('/api/canvas/canvas-1', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+
+    def test_if_match_on_put(self, test_client):
+        """Test PUT with a stale ETag is rejected"""
+        etag = test_client.get('/api/canvas/canvas-1').headers['ETag']
+
+        response = test_client.put('/api/canvas/canvas-1', json={'title': 'A'},
+                                   headers={'If-Match': etag})
+        assert response.status_code == 200
+        new_etag = response.headers['ETag']
+        assert new_etag != etag
+
+        response = test_client.put('/api/canvas/canvas-1', json={'title': 'B'},
+                                   headers={'If-Match': etag})
+        assert response.status_code == 412
+        assert response.headers['ETag'] == new_etag
+        assert json.loads(test_client.get('/api/canvas/canvas-1').data)['title'] == 'A'
+
+        # Without If-Match the update is unconditional
+        assert test_client.put('/api/canvas/canvas-1', json={'title': 'C'}).status_code == 200
+
+    def test_lost_put_changes_nothing(self, test_client, canvas_store):
+        """Test a PUT that loses the conditional save leaves title and ETag as they were"""
+        etag = test_client.get('/api/canvas/canvas-1').headers['ETag']
+        # Another worker saved after this one read the canvas
+        canvas_store._saved_revisions['canvas-1'] += 1
+
+        response = test_client.put('/api/canvas/canvas-1', json={'title': 'new2'},
+                                   headers={'If-Match': etag})
+        assert response.status_code == 412
+
+        response = test_client.get('/api/canvas/canvas-1')
+        assert json.loads(response.data)['title'] == 'Outage'
+        assert response.headers['ETag'] == etag
+
+        response = test_client.patch('/api/canvas/canvas-1', json={'operations': [
+            {'op': 'update_node', 'id': 'n1', 'node': {'title': 'Deploy v2'}},
+        ]}, headers={'If-Match': etag})
+        assert response.status_code == 412
+
+        response = test_client.get('/api/canvas/canvas-1')
+        assert json.loads(response.data)['nodes'][0]['title'] == 'Deploy'
+        assert response.headers['ETag'] == etag
+
+    def test_rejected_patch_keeps_etag(self, test_client):
+        """Test a PATCH answered 400 leaves the ETag usable for the next write"""
+        etag = test_client.get('/api/canvas/canvas-1').headers['ETag']
+
+        response = test_client.patch('/api/canvas/canvas-1', json={'operations': [
+            {'op': 'add_node', 'node': {'id': 'n2', 'type': 'EVENT', 'title': 'Alert'}},
+            {'op': 'remove_node', 'id': 'missing'},
+        ]}, headers={'If-Match': etag})
+        assert response.status_code == 400
+        assert test_client.get('/api/canvas/canvas-1').headers['ETag'] == etag
+
+        response = test_client.put('/api/canvas/canvas-1', json={'title': 'A'},
+                                   headers={'If-Match': etag})
+        assert response.status_code == 200
+
+    def test_if_match_on_patch(self, test_client):
+        """Test PATCH with a stale ETag is rejected"""
+        etag = test_client.get('/api/canvas/canvas-1').headers['ETag']
+        test_client.put('/api/canvas/canvas-1', json={'title': 'Changed'})
+
+        response = test_client.patch('/api/canvas/canvas-1', headers={'If-Match': etag}, json={
+            'operations': [{'op': 'remove_node', 'id': 'n1'}],
+        })
+        assert response.status_code == 412
+        assert 'nodes' in json.loads(test_client.get('/api/canvas/canvas-1').data)
+        assert len(json.loads(test_client.get('/api/canvas/canvas-1').data)['nodes']) == 1
+
+
+class TestCanvasListEndpoint:
+    """Tests for listing canvases"""
+
+    @pytest.fixture
+    def canvases(self, canvas_store):
+        for i, inv_id in enumerate(['inv-1', 'inv-1', 'inv-2']):
+            canvas = Canvas(id=f'canvas-{i}', investigation_id=inv_id, title=f'Canvas {i}')
+            canvas.add_node(CanvasNode(id='n1', type=NodeType.EVENT, title='N'))
+            canvas_store.add(canvas)
+        return canvas_store
+
+    def test_list_without_access_control(self, app, canvases, investigation_store):
+        """Test every canvas is listed as a summary"""
+        CanvasUIAPI(canvases, investigation_store, EventStream()).register_routes(app)
+        test_client = app.test_client()
+
+        data = json.loads(test_client.get('/api/canvas').data)
+        assert data['total_count'] == 3
+        assert data['canvases'][0]['node_count'] == 1
+        assert 'nodes' not in data['canvases'][0]
+
+        data = json.loads(test_client.get('/api/canvas?investigation_id=inv-2').data)
+        assert [c['id'] for c in data['canvases']] == ['canvas-2']
+
+    def test_list_filters_by_permission(self, app, canvases, investigation_store):
+        """Test only canvases the user may read are listed"""
+        access_control = AccessControl()
+        access_control.assign_role('admin', Role.ADMIN, assigned_by='system')
+        for canvas_id in ('canvas-0', 'canvas-2'):
+            access_control.assign_role('user-1', Role.VIEWER, assigned_by='admin',
+                                       resource_id=canvas_id)
+
+        @app.before_request
+        def set_user():
+            # Stands in for the auth middleware
+            request.user_id = request.headers.get('X-User-ID', '')
+
+        register_canvas_ui_api(app, canvases, investigation_store, EventStream(),
+                               access_control=access_control)
+        test_client = app.test_client()
+
+        def listed(user, query=''):
+            response = test_client.get(f'/api/canvas{query}', headers={'X-User-ID': user})
+            return [c['id'] for c in json.loads(response.data)['canvases']]
+
+        assert listed('user-1') == ['canvas-0', 'canvas-2']
+        assert listed('user-1', '?investigation_id=inv-1') == ['canvas-0']
+        assert listed('admin') == ['canvas-0', 'canvas-1', 'canvas-2']
+        assert listed('nobody') == []
@@ -0,0 +1,450 @@
+"""
+Tests for delta-encoded canvas versions
+
+Test cases for:
+- Snapshot diff/apply round-trips
+- Keyframe placement and reconstruction by replay
+- Isolation of stored history from caller mutations
+- Structural diffs between arbitrary versions
+- Indexed lookups and cursor-paged history
+- Retention policy and squashing
+- Memory benchmark against full snapshots
+"""
+
+import copy
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.canvas import Canvas, CanvasEdge, CanvasNode, EdgeType, NodeType
+from src.models.canvas_version import (
+    Change,
+    ChangeType,
+    RetentionPolicy,
+    RetentionRunner,
+    VersionStore,
+    apply_delta,
+    compare_fingerprints,
+    diff_snapshots,
+    fingerprint_snapshot,
+)
+
+
+def _canvas(node_count):
+    canvas = Canvas(id="canvas-1", investigation_id="inv-1", title="Incident")
+    for i in range(node_count):
+        canvas.add_node(CanvasNode(
+            id=f"n{i}", type=NodeType.EVENT, title=f"Event {i}",
+            description="x" * 200, data={"index": i}, position=(i * 10.0, 0.0),
+        ))
+    for i in range(1, node_count):
+        canvas.add_edge(CanvasEdge(id=f"e{i}", source_id=f"n{i - 1}", target_id=f"n{i}",
+                                   type=EdgeType.SEQUENCE))
+    return canvas
+
+
+def _edit(canvas, rng, step):
+    """One small edit: retitle, move, add or remove a node."""
+    choice = rng.random()
+    node_ids = list(canvas.nodes)
+    if choice < 0.5:
+        canvas.nodes[rng.choice(node_ids)].title = f"Edited {step}"
+    elif choice < 0.8:
+        canvas.move_node(rng.choice(node_ids), position=(rng.random() * 1000, rng.random() * 1000))
+    elif choice < 0.9 or len(node_ids) < 3:
+        canvas.add_node(CanvasNode(id=f"new-{step}", type=NodeType.INSIGHT, title="New"))
+    else:
+        canvas.remove_node(rng.choice(node_ids))
+
+
+class TestSnapshotDelta:
+    """Test diff_snapshots / apply_delta."""
+
+    def test_round_trip(self):
+        """Test applying a diff reproduces the new snapshot exactly"""
+        old = {
+            "title": "A", "gone": 1,
+            "nodes": [{"id": "a", "v": 1}, {"id": "b", "v": 2}, {"id": "c", "v": 3}],
+        }
+        new = {
+            "title": "B", "added": True,
+            "nodes": [{"id": "a", "v": 1}, {"id": "c", "v": 30}, {"id": "d", "v": 4}],
+        }
+
+        delta = diff_snapshots(old, new)
+
+        assert apply_delta(old, delta) == new
+        assert delta["lists"]["nodes"] == {"upsert": [{"id": "c", "v": 30}, {"id": "d", "v": 4}],
+                                           "remove": ["b"]}
+        assert old["nodes"][2] == {"id": "c", "v": 3}  # Input untouched
+
+    def test_reordered_list(self):
+        """Test a changed order is recorded and restored"""
+        old = {"nodes": [{"id": "a"}, {"id": "b"}]}
+        new = {"nodes": [{"id": "b"}, {"id": "a"}]}
+
+        delta = diff_snapshots(old, new)
+
+        assert delta["lists"]["nodes"]["order"] == ["b", "a"]
+        assert apply_delta(old, delta) == new
+
+    def test_unkeyed_values_are_replaced(self):
+        """Test lists without distinct ids are stored whole"""
+        old = {"tags": ["a", "b"], "items": [{"id": 1}, {"id": 1}]}
+        new = {"tags": ["a"], "items": [{"id": 1}]}
+
+        delta = diff_snapshots(old, new)
+
+        assert delta == {"set": {"tags": ["a"], "items": [{"id": 1}]}}
+        assert diff_snapshots(new, new) == {}
+
+
+class TestDeltaVersionStore:
+    """Test VersionStore keyframes and reconstruction."""
+
+    def test_keyframes_every_interval(self):
+        """Test only every Nth version holds a full snapshot"""
+        store = VersionStore(keyframe_interval=4)
+        for i in range(10):
+            store.create_version("canvas-1", {"value": i}, [], "user-1")
+
+        records = store.canvas_versions["canvas-1"]
+        assert [r.keyframe is not None for r in records] == [i % 4 == 0 for i in range(10)]
+
+    def test_reconstructs_every_version(self):
+        """Test each version reads back exactly as it was saved"""
+        rng = random.Random(7)
+        canvas = _canvas(30)
+        store = VersionStore(keyframe_interval=8)
+        saved = []
+        for step in range(60):
+            _edit(canvas, rng, step)
+            saved.append(store.create_version("canvas-1", canvas.to_dict(), [], "user-1"))
+
+        for version in saved:
+            assert store.get_version(version.version_id).data == version.data
+            assert store.rollback("canvas-1", version.version_id) == version.data
+            assert store.get_version_by_number("canvas-1", version.version_number) == version
+        assert store.get_canvas_versions("canvas-1") == saved
+        assert store.get_latest_version("canvas-1") == saved[-1]
+
+    def test_history_is_isolated_from_callers(self):
+        """Test mutating saved or returned data does not alter history"""
+        store = VersionStore(keyframe_interval=2)
+        data = {"nodes": [{"id": "a", "title": "A"}]}
+        v1 = store.create_version("canvas-1", data, [], "user-1")
+        data["nodes"][0]["title"] = "mutated"
+        store.create_version("canvas-1", {"nodes": [{"id": "a", "title": "B"}]}, [], "user-1")
+
+        returned = store.rollback("canvas-1", v1.version_id)
+        returned["nodes"].clear()
+
+        assert store.rollback("canvas-1", v1.version_id) == {"nodes": [{"id": "a", "title": "A"}]}
+
+    def test_rollback_to_latest_returns_current_state(self):
+        """Test rolling back to the current version neither replays nor adds versions"""
+        store = VersionStore(keyframe_interval=2)
+        store.create_version("canvas-1", {"nodes": [{"id": "a", "title": "A"}]}, [], "user-1")
+        current = {"nodes": [{"id": "a", "title": "B"}]}
+        latest = store.create_version("canvas-1", current, [], "user-1")
+
+        store._reconstruct = None  # Any replay would now fail
+        assert store.rollback("canvas-1", latest.version_id) == current
+        assert len(store.get_canvas_versions("canvas-1")) == 2
+
+    def test_invalid_interval(self):
+        with pytest.raises(ValueError):
+            VersionStore(keyframe_interval=0)
+
+
+class TestVersionDiff:
+    """Test structural diffs between versions."""
+
+    def _store_with_history(self):
+        store = VersionStore(keyframe_interval=3)
+        canvas = _canvas(5)
+        v1 = store.create_version("canvas-1", canvas.to_dict(), [], "alice")
+        canvas.nodes["n1"].title = "Renamed"
+        canvas.add_node(CanvasNode(id="n9", type=NodeType.INSIGHT, title="New"))
+        v2 = store.create_version("canvas-1", canvas.to_dict(),
+                                  [Change(ChangeType.NODE_UPDATED, {"node_id": "n1"})], "alice")
+        canvas.remove_node("n4")
+        canvas.title = "Incident (resolved)"
+        v3 = store.create_version("canvas-1", canvas.to_dict(),
+                                  [Change(ChangeType.NODE_REMOVED, {"node_id": "n4"})], "alice")
+        return store, v1, v2, v3
+
+    def test_non_adjacent_versions(self):
+        """Test diffing v1 against v3 covers every change in between"""
+        store, v1, _, v3 = self._store_with_history()
+        diff = store.get_version_diff(v1.version_id, v3.version_id)
+
+        assert [n["id"] for n in diff["nodes"]["added"]] == ["n9"]
+        assert [n["id"] for n in diff["nodes"]["removed"]] == ["n4"]
+        assert [m["id"] for m in diff["nodes"]["modified"]] == ["n1"]
+        assert diff["nodes"]["modified"][0]["fields"]["title"] == {
+            "old": "Event 1", "new": "Renamed",
+        }
+        assert [e["id"] for e in diff["edges"]["removed"]] == ["e4"]
+        assert diff["fields"]["title"] == {"old": "Incident", "new": "Incident (resolved)"}
+        assert [c["change_type"] for c in diff["changes"]] == ["node_updated", "node_removed"]
+        assert diff["summary"]["nodes_added"] == 1
+
+    def test_reverse_direction(self):
+        """Test diffing backwards swaps added and removed"""
+        store, v1, _, v3 = self._store_with_history()
+        diff = store.get_version_diff(v3.version_id, v1.version_id)
+
+        assert [n["id"] for n in diff["nodes"]["added"]] == ["n4"]
+        assert [n["id"] for n in diff["nodes"]["removed"]] == ["n9"]
+        assert diff["nodes"]["modified"][0]["fields"]["title"] == {
+            "old": "Renamed", "new": "Event 1",
+        }
+
+    def test_identical_versions(self):
+        """Test a version diffed with itself is empty"""
+        store, v1, _, _ = self._store_with_history()
+        diff = store.get_version_diff(v1.version_id, v1.version_id)
+
+        assert diff["fields"] == {}
+        assert diff["nodes"] == {"added": [], "removed": [], "modified": []}
+        assert diff["changes"] == []
+
+    def test_diffs_are_cached(self):
+        """Test repeated comparisons do not rebuild snapshots"""
+        store, v1, _, v3 = self._store_with_history()
+        first = store.get_version_diff(v1.version_id, v3.version_id)
+
+        store._reconstruct = None  # Any rebuild would now fail
+        assert store.get_version_diff(v1.version_id, v3.version_id) == first
+
+    def test_cached_diff_is_isolated_from_callers(self):
+        """Test mutating a returned diff does not alter the cached one"""
+        store, v1, _, v3 = self._store_with_history()
+        first = store.get_version_diff(v1.version_id, v3.version_id)
+        expected = copy.deepcopy(first)
+
+        first["nodes"]["added"].clear()
+        first["changes"].append({"bogus": True})
+
+        assert store.get_version_diff(v1.version_id, v3.version_id) == expected
+
+    def test_compares_hashes_only(self):
+        """Test fingerprints flag exactly the changed items"""
+        old = {"title": "A", "nodes": [{"id": "a", "v": 1}, {"id": "b", "v": 2}]}
+        new = {"title": "A", "nodes": [{"id": "b", "v": 3}, {"id": "a", "v": 1}]}
+        comparison = compare_fingerprints(fingerprint_snapshot(old), fingerprint_snapshot(new))
+
+        assert comparison["fields"] == []
+        assert comparison["lists"]["nodes"] == {"added": [], "removed": [], "modified": ["b"]}
+
+    def test_missing_version(self):
+        """Test unknown versions give an empty diff"""
+        store, v1, _, _ = self._store_with_history()
+        assert store.get_version_diff(v1.version_id, "missing") == {}
+
+
+class TestVersionIndex:
+    """Test lookups by number and paged history."""
+
+    def _store(self, count):
+        store = VersionStore(keyframe_interval=4)
+        for i in range(count):
+            store.create_version("canvas-1", {"value": i}, [], "user-1", message=f"v{i + 1}")
+        return store
+
+    def test_lookup_by_number(self):
+        """Test every number maps to its version and out-of-range numbers miss"""
+        store = self._store(10)
+        for number in range(1, 11):
+            version = store.get_version_by_number("canvas-1", number)
+            assert version.version_number == number
+            assert version.data == {"value": number - 1}
+        assert store.get_version_by_number("canvas-1", 0) is None
+        assert store.get_version_by_number("canvas-1", 11) is None
+        assert store.get_version_by_number("canvas-2", 1) is None
+
+    def test_pages_cover_history_once(self):
+        """Test following next_cursor walks every version, latest first"""
+        store = self._store(11)
+        numbers, cursor, pages = [], None, 0
+        while True:
+            page = store.get_version_history_page("canvas-1", limit=4, cursor=cursor)
+            numbers += [entry["version_number"] for entry in page["versions"]]
+            pages += 1
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        assert numbers == list(range(11, 0, -1))
+        assert pages == 3
+
+    def test_exact_last_page(self):
+        """Test a page ending at version 1 has no next cursor"""
+        store = self._store(4)
+        page = store.get_version_history_page("canvas-1", limit=4)
+        assert page["next_cursor"] is None
+        assert store.get_version_history_page("canvas-2")["versions"] == []
+
+
+class TestRetentionPolicy:
+    """Test which versions a policy keeps."""
+
+    NOW = datetime(2026, 1, 10, 12, 0)
+
+    def test_keep_last_and_recent(self):
+        """Test the last N and everything younger than a day survive"""
+        policy = RetentionPolicy(keep_last=2)
+        versions = [(self.NOW - timedelta(minutes=m), False) for m in (50, 40, 30, 20, 10)]
+        assert policy.retained(versions, self.NOW) == [True] * 5
+
+    def test_hourly_after_a_day(self):
+        """Test old versions thin out to the latest one per hour"""
+        policy = RetentionPolicy(keep_last=1)
+        old = self.NOW - timedelta(days=2)
+        versions = [
+            (old.replace(minute=5), False),
+            (old.replace(minute=50), False),   # Latest of its hour
+            (old.replace(minute=55) + timedelta(hours=1), False),
+            (self.NOW, False),
+        ]
+        assert policy.retained(versions, self.NOW) == [False, True, True, True]
+
+    def test_tags_and_cap(self):
+        """Test tagged versions survive the max_versions cap"""
+        policy = RetentionPolicy(keep_last=1, max_versions=2)
+        versions = [(self.NOW - timedelta(minutes=m), m == 40) for m in (50, 40, 30, 20, 10)]
+        assert policy.retained(versions, self.NOW) == [False, True, False, False, True]
+
+    def test_invalid(self):
+        """Test keep_last must be positive and not above max_versions"""
+        with pytest.raises(ValueError):
+            RetentionPolicy(keep_last=0)
+        with pytest.raises(ValueError):
+            RetentionPolicy(keep_last=5, max_versions=3)
+
+
+class TestVersionRetention:
+    """Test squashing in VersionStore."""
+
+    def _store(self, count, keep_last=3, keyframe_interval=2):
+        store = VersionStore(keyframe_interval=keyframe_interval,
+                             retention=RetentionPolicy(keep_last=keep_last, max_versions=keep_last))
+        rng = random.Random(3)
+        canvas = _canvas(8)
+        saved = []
+        for step in range(count):
+            _edit(canvas, rng, step)
+            change = Change(ChangeType.CANVAS_UPDATED, {"step": step})
+            saved.append(store.create_version("canvas-1", canvas.to_dict(), [change], "user-1"))
+        return store, saved
+
+    def test_squash_merges_changes(self):
+        """Test squashed versions fold their changes into the next kept one"""
+        store, saved = self._store(8)
+        removed = store.apply_retention("canvas-1")
+
+        assert removed == 5
+        assert store.get_version_count("canvas-1") == 3
+        first = store.get_version_by_number("canvas-1", 6)
+        assert [c.details["step"] for c in first.changes] == [0, 1, 2, 3, 4, 5]
+        assert first.previous_version_id is None
+        assert store.get_version(saved[0].version_id) is None
+        assert store.get_version_by_number("canvas-1", 2) is None
+
+    def test_kept_versions_unchanged(self):
+        """Test surviving versions still reconstruct exactly"""
+        store, saved = self._store(12, keep_last=5, keyframe_interval=3)
+        store.tag_version(saved[1].version_id, "release")
+        store.apply_retention("canvas-1")
+
+        kept = [v.version_number for v in store.get_canvas_versions("canvas-1")]
+        assert kept == [2, 8, 9, 10, 11, 12]  # Tags may exceed max_versions
+        for version in saved:
+            if version.version_number in kept:
+                assert store.get_version(version.version_id).data == version.data
+        assert store.get_version_by_number("canvas-1", 2).tags == ["release"]
+
+        next_version = store.create_version("canvas-1", {"title": "after"}, [], "user-1")
+        assert next_version.version_number == 13
+        assert next_version.previous_version_id == saved[-1].version_id
+
+    def test_diff_and_history_after_squash(self):
+        """Test diffs and pages work across the gaps"""
+        store, saved = self._store(8)
+        store.apply_retention("canvas-1")
+
+        diff = store.get_version_diff(saved[5].version_id, saved[7].version_id)
+        assert [c["details"]["step"] for c in diff["changes"]] == [6, 7]
+        page = store.get_version_history_page("canvas-1", limit=2)
+        assert [h["version_number"] for h in page["versions"]] == [8, 7]
+        rest = store.get_version_history_page("canvas-1", limit=2, cursor=page["next_cursor"])
+        assert [h["version_number"] for h in rest["versions"]] == [6]
+
+    def test_incremental_passes(self):
+        """Test max_canvases bounds the work per call"""
+        store = VersionStore(retention=RetentionPolicy(keep_last=1, max_versions=1))
+        for canvas_id in ("a", "b", "c"):
+            for i in range(3):
+                store.create_version(canvas_id, {"i": i}, [], "user-1")
+
+        assert store.apply_retention(max_canvases=2) == 4
+        assert store.apply_retention(max_canvases=2) == 2
+        assert store.apply_retention(max_canvases=2) == 0
+
+    def test_no_policy(self):
+        """Test retention is a no-op without a policy"""
+        store = VersionStore()
+        store.create_version("canvas-1", {}, [], "user-1")
+        assert store.apply_retention() == 0
+
+    def test_runner(self):
+        """Test the background runner squashes and stops"""
+        store, _ = self._store(6)
+        runner = RetentionRunner(store, interval=0.01)
+        runner.start()
+        try:
+            deadline = datetime.utcnow() + timedelta(seconds=5)
+            while store.get_version_count("canvas-1") > 3 and datetime.utcnow() < deadline:
+                time.sleep(0.01)
+        finally:
+            runner.stop(timeout=5)
+        assert store.get_version_count("canvas-1") == 3
+
+
+class TestVersionMemoryBenchmark:
+    """Memory benchmark: deltas vs a full snapshot per version."""
+
+    @staticmethod
+    def _measure(keyframe_interval, node_count=100, edits=150):
+        rng = random.Random(1)
+        canvas = _canvas(node_count)
+        snapshots = []
+        for step in range(edits):
+            _edit(canvas, rng, step)
+            snapshots.append(canvas.to_dict())
+
+        tracemalloc.start()
+        try:
+            store = VersionStore(keyframe_interval=keyframe_interval)
+            before = tracemalloc.get_traced_memory()[0]
+            for snapshot in snapshots:
+                store.create_version("canvas-1", snapshot, [], "user-1")
+            used = tracemalloc.get_traced_memory()[0] - before
+        finally:
+            tracemalloc.stop()
+        return used, store
+
+    def test_deltas_use_far_less_memory(self):
+        """Test 150 single-element edits of a 100-node canvas"""
+        full_bytes, _ = self._measure(keyframe_interval=1)
+        delta_bytes, store = self._measure(keyframe_interval=50)
+
+        assert delta_bytes * 5 < full_bytes, (
+            f"full snapshots: {full_bytes / 1e6:.1f} MB, "
+            f"deltas + keyframes: {delta_bytes / 1e6:.1f} MB"
+        )
+        assert store.get_version_by_number("canvas-1", 140).data["title"] == "Incident"
@@ -0,0 +1,88 @@
+"""
+Tests for Canvas Viewport Service
+
+Test cases for:
+- Detail views (nodes and edges in a bounding box)
+- Level-of-detail clustering for zoomed-out views
+- Input validation
+"""
+
+import pytest
+
+from src.models.canvas import Canvas, CanvasEdge, CanvasNode, EdgeType, NodeType
+from src.services.canvas_viewport import build_viewport
+
+
+@pytest.fixture
+def canvas():
+    """A 30x30 grid of nodes 200 units apart, each linked to its right neighbour."""
+    canvas = Canvas(id="canvas-1", investigation_id="inv-1", title="Huge")
+    for i in range(30):
+        for j in range(30):
+            canvas.add_node(CanvasNode(
+                id=f"n{i}-{j}", type=NodeType.EVENT if i % 2 else NodeType.METRIC,
+                title="N", position=(i * 200.0, j * 200.0), size=(100.0, 50.0),
+            ))
+    for i in range(29):
+        for j in range(30):
+            canvas.add_edge(CanvasEdge(
+                id=f"e{i}-{j}", source_id=f"n{i}-{j}", target_id=f"n{i + 1}-{j}",
+                type=EdgeType.SEQUENCE,
+            ))
+    return canvas
+
+
+class TestDetailView:
+    """Test viewports below the node limit."""
+
+    def test_nodes_and_edges_in_box(self, canvas):
+        """Test the box returns its nodes and their edges"""
+        view = build_viewport(canvas, 0, 0, 250, 50)
+
+        assert view["lod"] == "detail"
+        assert sorted(n["id"] for n in view["nodes"]) == ["n0-0", "n1-0"]
+        # e0-0 links the two visible nodes, e1-0 leaves the viewport
+        assert sorted(e["id"] for e in view["edges"]) == ["e0-0", "e1-0"]
+        assert view["revision"] == canvas.revision
+
+    def test_empty_region(self, canvas):
+        """Test a box with no nodes"""
+        view = build_viewport(canvas, -500, -500, -100, -100)
+
+        assert view["nodes"] == [] and view["edges"] == []
+
+
+class TestClusteredView:
+    """Test level-of-detail clustering."""
+
+    def test_zoomed_out_view_is_clustered(self, canvas):
+        """Test too many nodes collapse into grid clusters"""
+        view = build_viewport(canvas, 0, 0, 6000, 6000, max_nodes=16)
+
+        assert view["lod"] == "clusters"
+        assert "nodes" not in view
+        assert view["total_nodes"] == 900
+        assert len(view["clusters"]) <= 16
+        assert sum(c["count"] for c in view["clusters"]) == 900
+        assert sum(sum(c["types"].values()) for c in view["clusters"]) == 900
+
+    def test_cluster_edges_are_aggregated(self, canvas):
+        """Test edges between clusters are counted, internal edges dropped"""
+        view = build_viewport(canvas, 0, 0, 6000, 6000, max_nodes=4)
+
+        by_pair = {(e["source"], e["target"]): e["count"] for e in view["cluster_edges"]}
+        # 2x2 clusters: 30 rows cross the vertical boundary, split over the two halves
+        assert sum(by_pair.values()) == 30
+        assert all(source != target for source, target in by_pair)
+
+
+class TestValidation:
+    """Test invalid viewport arguments."""
+
+    def test_inverted_box(self, canvas):
+        with pytest.raises(ValueError):
+            build_viewport(canvas, 100, 100, 0, 0)
+
+    def test_non_positive_limit(self, canvas):
+        with pytest.raises(ValueError):
+            build_viewport(canvas, 0, 0, 100, 100, max_nodes=0)
@@ -0,0 +1,332 @@
+"""
+Tests for Event Broker Service
+==============================
+
+Cross-worker fan-out of canvas change events through a shared SQLite log.
+"""
+
+import logging
+import multiprocessing
+import sqlite3
+import time
+import pytest
+from flask import Flask
+
+from src.services import event_stream
+from src.services.event_broker import SQLiteEventBroker
+from src.services.event_log import EventLog
+from src.services.event_stream import (
+    CanvasChangeEvent, EventStream, EventType, get_event_stream, init_event_stream,
+)
+
+
+def _wait_for(predicate, timeout=10.0):
+    """Poll until predicate() is true or the timeout expires."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def _event(user_id, i):
+    return CanvasChangeEvent(
+        event_type=EventType.NODE_ADDED,
+        canvas_id="canvas-1",
+        user_id=user_id,
+        data={"node_id": f"{user_id}-{i}"},
+    )
+
+
+def _worker(db_path, name, count, expected, ready, go, results):
+    """Worker process: publish ``count`` events, report what others sent."""
+    stream = EventStream()
+    stream.attach_broker(SQLiteEventBroker(db_path))
+    received = []
+
+    def on_event(event):
+        if event.user_id != name:
+            received.append(event.data["node_id"])
+
+    stream.subscribe(on_event)
+
+    ready.set()
+    go.wait(10)
+    for i in range(count):
+        stream.publish(_event(name, i))
+
+    _wait_for(lambda: len(received) >= expected)
+    results.put((name, sorted(received)))
+    stream.shutdown(timeout=5)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "broker.db")
+
+
+def _connect(db_path):
+    stream = EventStream()
+    broker = SQLiteEventBroker(db_path, poll_interval=0.001)
+    stream.attach_broker(broker)
+    return stream, broker
+
+
+class _FlakyConnection:
+    """Connection whose first ``failures`` batch writes raise."""
+
+    def __init__(self, conn, failures):
+        self._conn = conn
+        self.failures = failures
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._conn.__exit__(*exc_info)
+
+    def executemany(self, *args):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        return self._conn.executemany(*args)
+
+
+class _FlakyBroker(SQLiteEventBroker):
+    def __init__(self, db_path, failures, **kwargs):
+        self.failures = failures
+        super().__init__(db_path, poll_interval=0.001, retry_backoff=0.001, **kwargs)
+
+    def _connect(self):
+        return _FlakyConnection(super()._connect(), self.failures)
+
+
+class TestSQLiteEventBroker:
+    """Tests for relaying between streams."""
+
+    def test_relays_between_streams(self, db_path):
+        """Test events published on one stream reach the other, once."""
+        stream_a, broker_a = _connect(db_path)
+        stream_b, broker_b = _connect(db_path)
+        seen_a, seen_b = [], []
+        stream_a.subscribe(seen_a.append)
+        stream_b.subscribe(seen_b.append)
+
+        try:
+            for i in range(20):
+                stream_a.publish(_event("a", i))
+            stream_b.publish(_event("b", 0))
+
+            assert _wait_for(lambda: len(seen_b) == 21 and len(seen_a) == 21)
+            time.sleep(0.05)
+
+            # Locally published events are not echoed back
+            assert len(seen_a) == 21
+            assert len(seen_b) == 21
+            relayed = [e for e in seen_b if e.user_id == "a"]
+            assert [e.data["node_id"] for e in relayed] == [f"a-{i}" for i in range(20)]
+            assert relayed[0].event_id == seen_a[0].event_id
+            assert broker_b.get_stats()["received"] == 20
+        finally:
+            stream_a.shutdown(timeout=5)
+            stream_b.shutdown(timeout=5)
+
+    def test_burst_is_batched(self, db_path):
+        """Test a burst of publishes is written in far fewer transactions."""
+        stream, broker = _connect(db_path)
+
+        try:
+            # Publish the whole burst before the writer can take any of it
+            with broker._pending_cond:
+                for i in range(200):
+                    stream.publish(_event("a", i))
+            assert _wait_for(lambda: broker.get_stats()["sent"] == 200)
+            assert broker.get_stats()["batches"] == 1
+        finally:
+            stream.shutdown(timeout=5)
+
+    def test_failed_write_is_retried(self, db_path, caplog):
+        """Test a batch whose write fails is retried in order and logged."""
+        stream = EventStream()
+        broker = _FlakyBroker(db_path, failures=2)
+        stream.attach_broker(broker)
+
+        try:
+            with caplog.at_level(logging.WARNING, logger="src.services.event_broker"):
+                for i in range(3):
+                    stream.publish(_event("a", i))
+                assert _wait_for(lambda: broker.get_stats()["sent"] == 3)
+            assert broker.get_stats()["retries"] == 2
+            assert broker.get_stats()["dropped"] == 0
+            assert any("retrying" in record.getMessage() for record in caplog.records)
+        finally:
+            stream.shutdown(timeout=5)
+
+        with sqlite3.connect(db_path) as conn:
+            payloads = conn.execute("SELECT payload FROM broker_events ORDER BY seq").fetchall()
+        assert [f"a-{i}" in payload for i, (payload,) in enumerate(payloads)] == [True] * 3
+
+    def test_batch_dropped_after_max_retries(self, db_path, caplog):
+        """Test a batch that keeps failing is dropped with an error log."""
+        stream = EventStream()
+        broker = _FlakyBroker(db_path, failures=10, max_retries=1)
+        stream.attach_broker(broker)
+
+        try:
+            with caplog.at_level(logging.ERROR, logger="src.services.event_broker"):
+                stream.publish(_event("a", 0))
+                assert _wait_for(lambda: broker.get_stats()["dropped"] == 1)
+            assert broker.get_stats()["sent"] == 0
+            assert any("Dropping 1 events" in record.getMessage() for record in caplog.records)
+        finally:
+            stream.shutdown(timeout=5)
+
+    def test_remote_events_are_not_forwarded_again(self, db_path):
+        """Test events received from the broker are not relayed back."""
+        stream_a, broker_a = _connect(db_path)
+        stream_b, broker_b = _connect(db_path)
+
+        try:
+            stream_a.publish(_event("a", 0))
+            assert _wait_for(lambda: broker_b.get_stats()["received"] == 1)
+            time.sleep(0.05)
+            assert broker_b.get_stats()["sent"] == 0
+        finally:
+            stream_a.shutdown(timeout=5)
+            stream_b.shutdown(timeout=5)
+
+    def test_only_new_events_after_start(self, db_path):
+        """Test a late-starting worker does not replay old relay rows."""
+        stream_a, _ = _connect(db_path)
+        try:
+            stream_a.publish(_event("a", 0))
+            assert _wait_for(lambda: stream_a.broker.get_stats()["sent"] == 1)
+
+            stream_b, broker_b = _connect(db_path)
+            seen = []
+            stream_b.subscribe(seen.append)
+            stream_a.publish(_event("a", 1))
+
+            assert _wait_for(lambda: len(seen) == 1)
+            time.sleep(0.05)
+            assert [e.data["node_id"] for e in seen] == ["a-1"]
+            stream_b.shutdown(timeout=5)
+        finally:
+            stream_a.shutdown(timeout=5)
+
+
+class TestMultiProcessFanOut:
+    """Tests delivery across real worker processes."""
+
+    def test_fan_out_across_processes(self, db_path):
+        """Test every process sees every other process's events."""
+        ctx = multiprocessing.get_context("spawn")
+        names = ["w1", "w2"]
+        per_worker = 50
+        results = ctx.Queue()
+        go = ctx.Event()
+        ready = [ctx.Event() for _ in names]
+
+        stream, _ = _connect(db_path)
+        received = []
+        stream.subscribe(lambda e: received.append(e.data["node_id"]))
+
+        # Each worker gets the other worker's events plus one from the parent
+        processes = [
+            ctx.Process(
+                target=_worker,
+                args=(db_path, name, per_worker, per_worker + 1, ready[i], go, results),
+            )
+            for i, name in enumerate(names)
+        ]
+        try:
+            for process in processes:
+                process.start()
+            for event in ready:
+                assert event.wait(30)
+
+            go.set()
+            stream.publish(_event("parent", 0))
+
+            reports = dict(results.get(timeout=30) for _ in names)
+            for process in processes:
+                process.join(10)
+
+            assert _wait_for(lambda: len(received) == 2 * per_worker + 1)
+            assert sorted(received) == sorted(
+                ["parent-0"] + [f"{name}-{i}" for name in names for i in range(per_worker)]
+            )
+            assert reports["w1"] == sorted(["parent-0"] + [f"w2-{i}" for i in range(per_worker)])
+            assert reports["w2"] == sorted(["parent-0"] + [f"w1-{i}" for i in range(per_worker)])
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            stream.shutdown(timeout=5)
+
+
+class TestStartupWiring:
+    """init_event_stream attaches a broker according to app configuration."""
+
+    @pytest.fixture
+    def app(self, monkeypatch, db_path):
+        monkeypatch.setattr(event_stream, "_event_stream", None)
+        monkeypatch.delenv("EVENT_BROKER_ENABLED", raising=False)
+        monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+        monkeypatch.delenv("EVENT_LOG_DIR", raising=False)
+        app = Flask(__name__)
+        app.config["EVENT_BROKER_DB"] = db_path
+        yield app
+        stream = event_stream._event_stream
+        if stream is not None:
+            stream.shutdown(timeout=5)
+
+    def test_single_process_has_no_broker(self, app):
+        stream = init_event_stream(app)
+
+        assert stream.broker is None
+        assert get_event_stream() is stream
+
+    def test_multiple_workers_enable_broker(self, app, monkeypatch, db_path):
+        monkeypatch.setenv("WEB_CONCURRENCY", "4")
+
+        stream = init_event_stream(app)
+
+        assert isinstance(stream.broker, SQLiteEventBroker)
+        assert stream.broker.db_path == db_path
+        # Re-initializing in the same worker keeps the running broker
+        assert init_event_stream(app) is stream
+
+    def test_config_overrides_worker_count(self, app, monkeypatch):
+        monkeypatch.setenv("WEB_CONCURRENCY", "4")
+        app.config["EVENT_BROKER_ENABLED"] = False
+
+        assert init_event_stream(app).broker is None
+
+    def test_workers_share_events(self, app, db_path):
+        app.config["EVENT_BROKER_ENABLED"] = "true"
+        stream = init_event_stream(app)
+        other, _ = _connect(db_path)
+        received = []
+        stream.subscribe(lambda event: received.append(event.data["node_id"]))
+        try:
+            other.publish(_event("w2", 0))
+
+            assert _wait_for(lambda: received == ["w2-0"])
+        finally:
+            other.shutdown(timeout=5)
+
+    def test_event_log_from_config(self, app, tmp_path):
+        app.config["EVENT_LOG_DIR"] = str(tmp_path / "events")
+        stream = init_event_stream(app)
+        stream.publish(_event("w1", 0))
+
+        assert isinstance(stream.event_log, EventLog)
+        assert stream.event_log.next_offset == 1
+        assert stream.broker is None
+        stream.event_log.close()
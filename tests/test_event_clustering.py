@@ -0,0 +1,282 @@
+"""
+Tests for Event Clustering Service
+
+Test cases for:
+- MinHash signatures and message normalization
+- LSH-based in-memory collapse
+- Ingest-time clustering in the event store
+- Linker search results collapsed by cluster
+"""
+
+import os
+import tempfile
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+from src.models.event import Event, EventSource, EventSeverity
+from src.services.event_clustering import EventClusterer, cluster_id_for
+from src.services.event_linker import EventLinker
+from src.store.event_store import EventStore
+from src.store.investigation_store import InvestigationStore
+
+
+@pytest.fixture
+def clusterer():
+    """Create a clusterer with default settings."""
+    return EventClusterer()
+
+
+@pytest.fixture
+def clustered_store(clusterer):
+    """Create an event store with ingest-time clustering enabled."""
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+
+    yield EventStore(db_path, clusterer=clusterer)
+
+    os.remove(db_path)
+
+
+def _log_event(message, **data):
+    """Build a log event with the given message."""
+    return Event(
+        timestamp=datetime.utcnow().isoformat(),
+        source=EventSource.LOGS,
+        event_type='log_entry',
+        severity=EventSeverity.HIGH,
+        data={'level': 'error', 'message': message, 'service': 'payments', **data},
+    )
+
+
+class TestMinHash:
+    """Test MinHash fingerprinting."""
+
+    def test_volatile_tokens_are_masked(self, clusterer):
+        """Test that numbers and IDs do not affect the signature."""
+        a = clusterer.signature('Connection timeout after 3012ms to db-7f3a9c21ab')
+        b = clusterer.signature('Connection timeout after 2999ms to db-0b1c2d3e4f')
+        assert clusterer.similarity(a, b) == 1.0
+
+    def test_different_messages_are_dissimilar(self, clusterer):
+        """Test that unrelated messages fall below the threshold."""
+        a = clusterer.signature('Connection timeout after 3012ms to database')
+        b = clusterer.signature('NullPointerException in OrderService.submit')
+        assert clusterer.similarity(a, b) < clusterer.threshold
+
+    def test_signature_is_deterministic(self):
+        """Test that signatures are stable across clusterer instances."""
+        text = 'disk quota exceeded on volume'
+        assert EventClusterer().signature(text) == EventClusterer().signature(text)
+
+    def test_band_keys(self, clusterer):
+        """Test that a signature splits into one key per band."""
+        keys = clusterer.band_keys(clusterer.signature('some message'))
+        assert len(keys) == clusterer.bands
+        assert [band for band, _ in keys] == list(range(clusterer.bands))
+
+    def test_bands_must_divide_permutations(self):
+        """Test invalid band configuration is rejected."""
+        with pytest.raises(ValueError):
+            EventClusterer(num_perm=100, bands=32)
+
+    def test_collapse_counts_cluster_members(self, clusterer):
+        """Test in-memory collapse keeps the first item of each cluster."""
+        items = [
+            'retry 1 failed for job 4411',
+            'retry 2 failed for job 4412',
+            'certificate expired for api.example.com',
+            'retry 3 failed for job 4413',
+        ]
+
+        collapsed = clusterer.collapse(items, lambda item: item)
+
+        assert [item for item, _ in collapsed] == [items[0], items[2]]
+        assert [info['cluster_size'] for _, info in collapsed] == [3, 1]
+
+    def test_collapse_cluster_ids_are_stable(self, clusterer):
+        """Test cluster IDs come from the representative, not the call."""
+        items = ['retry 1 failed for job 4411', 'retry 2 failed for job 4412']
+
+        first = clusterer.collapse(items, lambda item: item, lambda item: f'id-{item[6]}')
+        second = clusterer.collapse(items, lambda item: item, lambda item: f'id-{item[6]}')
+
+        assert first[0][1]['cluster_id'] == second[0][1]['cluster_id'] == cluster_id_for('id-1')
+
+
+class TestEventStoreClustering:
+    """Test ingest-time clustering in the event store."""
+
+    def test_near_duplicates_stored_once(self, clustered_store):
+        """Test that near-duplicate events fold into one representative."""
+        first = _log_event('Connection timeout after 3012ms to db-7f3a9c21ab')
+
+        assert clustered_store.create_event(first) is True
+        for i in range(5):
+            dup = _log_event(f'Connection timeout after {3000 + i}ms to db-0000{i}abcdef')
+            assert clustered_store.create_event(dup) is True
+            assert dup.metadata['cluster_id'] == first.metadata['cluster_id']
+
+        events = clustered_store.get_all_events()
+        assert [e.id for e in events] == [first.id]
+
+        cluster = clustered_store.get_cluster(first.metadata['cluster_id'])
+        assert cluster['representative_id'] == first.id
+        assert cluster['event_count'] == 6
+
+    def test_distinct_messages_form_separate_clusters(self, clustered_store):
+        """Test that unrelated events each get their own cluster."""
+        a = _log_event('Connection timeout to database')
+        b = _log_event('Certificate expired for upstream gateway')
+
+        clustered_store.create_event(a)
+        clustered_store.create_event(b)
+
+        assert len(clustered_store.get_all_events()) == 2
+        assert a.metadata['cluster_id'] != b.metadata['cluster_id']
+
+    def test_unclustered_event_types_are_stored(self, clustered_store):
+        """Test that event types outside the clustered set are untouched."""
+        for _ in range(3):
+            clustered_store.create_event(Event(
+                timestamp=datetime.utcnow().isoformat(),
+                source=EventSource.GIT,
+                event_type='commit',
+                data={'message': 'Merge branch main'},
+            ))
+
+        assert len(clustered_store.get_all_events()) == 3
+
+    def test_duplicate_event_id_rejected(self, clustered_store):
+        """Test that re-ingesting the same event is not counted twice."""
+        event = _log_event('Connection timeout to database')
+
+        assert clustered_store.create_event(event) is True
+        assert clustered_store.create_event(event) is False
+        assert clustered_store.get_cluster(event.metadata['cluster_id'])['event_count'] == 1
+
+    def test_folded_event_redelivery_rejected(self, clustered_store):
+        """Test that re-ingesting a folded event does not grow the cluster."""
+        first = _log_event('Connection timeout to database')
+        dup = _log_event('Connection timeout to database')
+        dup.source_id = 'log-42'
+        other = _log_event('Certificate expired for upstream gateway')
+
+        assert clustered_store.create_event(first) is True
+        assert clustered_store.create_event(other) is True
+        assert clustered_store.create_event(dup) is True
+        assert first.metadata['cluster_id'] == cluster_id_for(first.id)
+
+        for _ in range(3):
+            assert clustered_store.create_event(dup) is False
+        # Same delivery under a new event ID, matched by source ID
+        redelivered = _log_event('Connection timeout to database')
+        redelivered.source_id = 'log-42'
+        assert clustered_store.create_event(redelivered) is False
+
+        assert clustered_store.get_cluster(first.metadata['cluster_id'])['event_count'] == 2
+
+    def test_folded_events_keep_correlation_keys(self, clustered_store):
+        """Test that a folded event's trace_id still correlates via the representative."""
+        first = _log_event('Connection timeout to database', trace_id='t-1')
+        dup = _log_event('Connection timeout to database', trace_id='t-2')
+        span = Event(
+            timestamp=datetime.utcnow().isoformat(),
+            source=EventSource.TRACES,
+            event_type='slow_trace',
+            data={'trace_id': 't-2'},
+        )
+
+        for event in (first, dup, span):
+            clustered_store.create_event(event)
+
+        correlated = clustered_store.get_correlated_events(span.id)
+        assert [e.id for e in correlated] == [first.id]
+
+
+class TestLinkerCollapse:
+    """Test that linker results collapse by cluster."""
+
+    @pytest.fixture
+    def linker(self):
+        """Create an event linker that clusters every event type."""
+        fd, db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+
+        yield EventLinker(
+            InvestigationStore(db_path=db_path), clusterer=EventClusterer(event_types=None)
+        )
+
+        os.remove(db_path)
+
+    @patch('src.services.event_linker.git_connector.load_events')
+    @patch('src.services.event_linker.ci_connector.load_events')
+    def test_search_collapses_near_duplicates(self, mock_ci, mock_git, linker):
+        """Test search returns one result per cluster with its size."""
+        mock_git.return_value = []
+        mock_ci.return_value = [
+            {
+                'type': 'build_failure',
+                'job': 'integration',
+                'message': f'Build {n} failed: timeout waiting for database',
+                'timestamp': f'2026-01-27T10:0{n}:00Z',
+            }
+            for n in range(4)
+        ]
+
+        results = linker.search_events('timeout')
+
+        assert len(results) == 1
+        assert results[0]['cluster_size'] == 4
+        assert results[0]['timestamp'] == '2026-01-27T10:03:00Z'
+        # The same representative keeps its cluster ID across requests
+        assert linker.search_events('timeout')[0]['cluster_id'] == results[0]['cluster_id']
+
+    @patch('src.services.event_linker.git_connector.load_events')
+    @patch('src.services.event_linker.ci_connector.load_events')
+    def test_default_clusterer_keeps_ci_results(self, mock_ci, mock_git, linker, clusterer):
+        """Test CI builds are not collapsed unless their type is clustered."""
+        mock_git.return_value = []
+        mock_ci.return_value = [
+            {
+                'type': 'build_failure',
+                'job': 'integration',
+                'message': f'Build {n} failed: timeout waiting for database',
+                'timestamp': f'2026-01-27T10:0{n}:00Z',
+            }
+            for n in range(3)
+        ]
+        linker = EventLinker(linker.store, clusterer=clusterer)
+
+        results = linker.search_events('timeout')
+
+        assert len(results) == 3
+        assert all(r['cluster_size'] == 1 for r in results)
+
+    @patch('src.services.event_linker.git_connector.load_events')
+    @patch('src.services.event_linker.ci_connector.load_events')
+    def test_failure_and_success_both_linked(self, mock_ci, mock_git):
+        """Test a failed and a successful build of the same job never collapse."""
+        now = datetime.utcnow()
+        store = MagicMock()
+        store.get_investigation.return_value = MagicMock(
+            title='Integration build', created_at=now.isoformat()
+        )
+        store.add_event.side_effect = lambda **kwargs: kwargs['event_id']
+        linker = EventLinker(store, clusterer=EventClusterer(event_types=None))
+        mock_git.return_value = []
+        mock_ci.return_value = [
+            {
+                'id': f'ci-{status}',
+                'type': 'build',
+                'job': 'integration',
+                'status': status,
+                'message': 'Integration build finished',
+                'timestamp': (now - timedelta(minutes=minutes)).isoformat(),
+            }
+            for status, minutes in (('failed', 5), ('success', 10))
+        ]
+
+        linked = linker.auto_link_events('inv-1')
+
+        assert sorted(linked) == ['ci-failed', 'ci-success']
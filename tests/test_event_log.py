@@ -0,0 +1,252 @@
+"""
+Tests for Event Log Service
+===========================
+
+Test suite for the durable, segmented event log and its use as the
+backing store of EventStream.
+"""
+
+import json
+import os
+import threading
+import pytest
+from src.services.event_log import EventLog, RetentionPolicy
+from src.services.event_stream import CanvasChangeEvent, EventStream, EventType
+
+
+def _segment_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".log"))
+
+
+class TestEventLog:
+    """Tests for EventLog."""
+    
+    def test_offsets_are_monotonic(self, tmp_path):
+        """Test that appends return increasing offsets."""
+        log = EventLog(str(tmp_path))
+        
+        offsets = [log.append({"n": i}) for i in range(5)]
+        
+        assert offsets == [0, 1, 2, 3, 4]
+        assert log.next_offset == 5
+    
+    def test_read_from_offset(self, tmp_path):
+        """Test reading a range of records."""
+        log = EventLog(str(tmp_path), segment_max_events=3)
+        for i in range(10):
+            log.append({"n": i})
+        
+        assert [r["n"] for _, r in log.read_from(4)] == [4, 5, 6, 7, 8, 9]
+        assert [o for o, _ in log.read_from(2, limit=3)] == [2, 3, 4]
+        assert [o for o, _ in log.read_last(2)] == [8, 9]
+        assert len(_segment_files(str(tmp_path))) == 4
+    
+    def test_recovery_after_restart(self, tmp_path):
+        """Test that offsets continue after reopening the log."""
+        log = EventLog(str(tmp_path), segment_max_events=4)
+        for i in range(6):
+            log.append({"n": i})
+        log.close()
+        
+        reopened = EventLog(str(tmp_path), segment_max_events=4)
+        
+        assert reopened.next_offset == 6
+        assert reopened.append({"n": 6}) == 6
+        assert [r["n"] for _, r in reopened.read_from(0)] == list(range(7))
+    
+    def test_recovery_truncates_torn_write(self, tmp_path):
+        """Test that a partial trailing line is dropped on recovery."""
+        log = EventLog(str(tmp_path))
+        log.append({"n": 0})
+        log.append({"n": 1})
+        log.close()
+        
+        segment = os.path.join(str(tmp_path), _segment_files(str(tmp_path))[-1])
+        with open(segment, "a") as handle:
+            handle.write('{"offset": 2, "rec')
+        
+        reopened = EventLog(str(tmp_path))
+        
+        assert reopened.next_offset == 2
+        assert reopened.append({"n": 2}) == 2
+        assert [r["n"] for _, r in reopened.read_from(0)] == [0, 1, 2]
+    
+    def test_retention_max_segments(self, tmp_path):
+        """Test that old segments are trimmed on roll."""
+        log = EventLog(
+            str(tmp_path),
+            segment_max_events=2,
+            retention=RetentionPolicy(max_segments=2),
+        )
+        for i in range(9):
+            log.append({"n": i})
+        
+        assert len(_segment_files(str(tmp_path))) == 2
+        assert log.first_offset == 6
+        # Reading from a trimmed offset starts at the first retained record
+        assert [o for o, _ in log.read_from(0)] == [6, 7, 8]
+    
+    def test_retention_max_bytes(self, tmp_path):
+        """Test byte-based retention keeps the active segment."""
+        log = EventLog(
+            str(tmp_path),
+            segment_max_events=1,
+            retention=RetentionPolicy(max_bytes=1),
+        )
+        for i in range(5):
+            log.append({"n": i})
+        
+        assert _segment_files(str(tmp_path)) == [f"{4:020d}.log"]
+    
+    def test_consumer_cursors_persist(self, tmp_path):
+        """Test committed cursors survive a restart and never move back."""
+        log = EventLog(str(tmp_path))
+        assert log.resume_offset("audit") == 0
+        
+        log.commit("audit", 5)
+        log.commit("audit", 3)
+        log.close()
+        
+        reopened = EventLog(str(tmp_path))
+        assert reopened.get_committed("audit") == 5
+        assert reopened.resume_offset("audit") == 6
+        with open(os.path.join(str(tmp_path), "cursors.json")) as handle:
+            assert json.load(handle) == {"audit": 5}
+    
+    def test_cursor_writes_are_batched(self, tmp_path):
+        """Test cursors are written every N commits, on roll and on close."""
+        cursors_path = os.path.join(str(tmp_path), "cursors.json")
+        
+        def persisted():
+            with open(cursors_path) as handle:
+                return json.load(handle)
+        
+        log = EventLog(str(tmp_path), segment_max_events=10, cursor_flush_interval=3)
+        log.commit("audit", 0)
+        log.commit("audit", 1)
+        assert not os.path.exists(cursors_path)
+        
+        log.commit("audit", 2)
+        assert persisted() == {"audit": 2}
+        
+        log.commit("audit", 3)
+        for i in range(11):
+            log.append({"n": i})
+        assert persisted() == {"audit": 3}
+        
+        log.commit("audit", 4)
+        log.close()
+        assert persisted() == {"audit": 4}
+
+
+class TestEventStreamWithLog:
+    """Tests for EventStream backed by an EventLog."""
+    
+    @staticmethod
+    def _event(i, canvas_id="canvas-1"):
+        return CanvasChangeEvent(
+            event_type=EventType.NODE_ADDED,
+            canvas_id=canvas_id,
+            user_id="user-1",
+            data={"node_id": f"node-{i}"},
+        )
+    
+    def test_publish_stamps_offsets(self, tmp_path):
+        """Test that published events carry their log offset."""
+        stream = EventStream(event_log=EventLog(str(tmp_path)))
+        events = [self._event(i) for i in range(3)]
+        
+        for event in events:
+            stream.publish(event)
+        
+        assert [e.offset for e in events] == [0, 1, 2]
+    
+    def test_history_survives_restart(self, tmp_path):
+        """Test that history is reloaded from the log."""
+        stream = EventStream(event_log=EventLog(str(tmp_path)))
+        for i in range(3):
+            stream.publish(self._event(i))
+        stream.event_log.close()
+        
+        restarted = EventStream(event_log=EventLog(str(tmp_path)))
+        
+        assert restarted.get_event_count("canvas-1") == 3
+        latest = restarted.get_canvas_events("canvas-1", limit=1)[0]
+        assert latest.data["node_id"] == "node-2"
+        assert latest.offset == 2
+    
+    def test_subscribe_from_offset_replays_then_goes_live(self, tmp_path):
+        """Test catch-up from an offset followed by live delivery."""
+        stream = EventStream(event_log=EventLog(str(tmp_path)))
+        for i in range(4):
+            stream.publish(self._event(i, canvas_id="canvas-1" if i % 2 else "canvas-2"))
+        
+        received = []
+        stream.subscribe_from(lambda e: received.append(e.offset), offset=1, canvas_id="canvas-1")
+        stream.publish(self._event(4, canvas_id="canvas-1"))
+        
+        assert received == [1, 3, 4]
+    
+    def test_replay_does_not_block_publishers(self, tmp_path):
+        """Test publishing during catch-up neither blocks nor loses events."""
+        stream = EventStream(event_log=EventLog(str(tmp_path)))
+        for i in range(3):
+            stream.publish(self._event(i))
+        
+        received = []
+        published = threading.Event()
+        
+        def slow_consumer(event):
+            received.append(event.offset)
+            if event.offset == 0:
+                publisher = threading.Thread(
+                    target=lambda: (stream.publish(self._event(3)), published.set())
+                )
+                publisher.start()
+                # Would time out if replay held the publish lock
+                assert published.wait(timeout=5)
+        
+        stream.subscribe_from(slow_consumer, offset=0)
+        stream.publish(self._event(4))
+        
+        assert published.is_set()
+        assert received == [0, 1, 2, 3, 4]
+    
+    def test_consumer_resumes_from_committed_cursor(self, tmp_path):
+        """Test that a restarted consumer replays only what it missed."""
+        stream = EventStream(event_log=EventLog(str(tmp_path)))
+        first_run = []
+        sub_id = stream.subscribe_from(lambda e: first_run.append(e.offset), consumer_id="sse-1")
+        stream.publish(self._event(0))
+        stream.publish(self._event(1))
+        stream.unsubscribe(sub_id)
+        
+        # Published while the consumer was away
+        stream.publish(self._event(2))
+        stream.publish(self._event(3))
+        stream.event_log.close()
+        
+        restarted = EventStream(event_log=EventLog(str(tmp_path)))
+        second_run = []
+        restarted.subscribe_from(lambda e: second_run.append(e.offset), consumer_id="sse-1")
+        
+        assert first_run == [0, 1]
+        assert second_run == [2, 3]
+        assert restarted.event_log.get_committed("sse-1") == 3
+    
+    def test_failed_handler_does_not_commit(self, tmp_path):
+        """Test that the cursor only advances after successful handling."""
+        stream = EventStream(event_log=EventLog(str(tmp_path)))
+        
+        def failing(event):
+            raise RuntimeError("boom")
+        
+        stream.subscribe_from(failing, consumer_id="flaky")
+        stream.publish(self._event(0))
+        
+        assert stream.event_log.get_committed("flaky") is None
+    
+    def test_subscribe_from_requires_log(self):
+        """Test that replay without a log is rejected."""
+        with pytest.raises(RuntimeError):
+            EventStream().subscribe_from(lambda e: None, offset=0)
@@ -403,5 +403,138 @@ class TestEventStoreRetrieval:
         assert len(inv_events) == 2
 
 
+class TestEventStoreCorrelation:
+    """Test the cross-source correlation index."""
+    
+    def test_log_and_trace_events_correlate_by_trace_id(self, event_store):
+        """Test that logs and traces sharing a trace_id are joined."""
+        now = datetime.utcnow().isoformat()
+        
+        log_event = Event(
+            timestamp=now,
+            source=EventSource.LOGS,
+            event_type="log_entry",
+            data={"message": "upstream timeout", "trace_id": "trace-abc"},
+        )
+        trace_event = Event(
+            timestamp=now,
+            source=EventSource.TRACES,
+            event_type="span_error",
+            data={"trace_id": "trace-abc", "span_id": "span-1"},
+        )
+        unrelated = Event(
+            timestamp=now,
+            source=EventSource.TRACES,
+            event_type="span_error",
+            data={"trace_id": "trace-xyz"},
+        )
+        
+        for event in (log_event, trace_event, unrelated):
+            event_store.create_event(event)
+        
+        correlated = event_store.get_correlated_events(log_event.id)
+        assert [e.id for e in correlated] == [trace_event.id]
+        
+        correlated = event_store.get_correlated_events(trace_event.id)
+        assert [e.id for e in correlated] == [log_event.id]
+    
+    def test_correlation_across_multiple_key_types(self, event_store):
+        """Test that any shared identifier links events, without duplicates."""
+        now = datetime.utcnow().isoformat()
+        
+        origin = Event(
+            timestamp=now,
+            source=EventSource.LOGS,
+            event_type="log_entry",
+            data={"trace_id": "t-1", "request_id": "r-1"},
+        )
+        both = Event(
+            timestamp=now,
+            source=EventSource.LOGS,
+            event_type="log_entry",
+            data={"trace_id": "t-1", "request_id": "r-1"},
+        )
+        by_request = Event(
+            timestamp=now,
+            source=EventSource.CI,
+            event_type="build",
+            metadata={"request_id": "r-1"},
+        )
+        
+        for event in (origin, both, by_request):
+            event_store.create_event(event)
+        
+        correlated = event_store.get_correlated_events(origin.id)
+        assert sorted(e.id for e in correlated) == sorted([both.id, by_request.id])
+        
+        by_key = event_store.get_events_by_correlation_key("request_id", "r-1")
+        assert len(by_key) == 3
+    
+    def test_correlation_excludes_deleted_and_uncorrelated(self, event_store):
+        """Test that soft-deleted events and events without keys are excluded."""
+        now = datetime.utcnow().isoformat()
+        
+        origin = Event(
+            timestamp=now,
+            source=EventSource.LOGS,
+            event_type="log_entry",
+            data={"correlation_id": "c-1"},
+        )
+        deleted = Event(
+            timestamp=now,
+            source=EventSource.TRACES,
+            event_type="slow_trace",
+            data={"correlation_id": "c-1"},
+        )
+        no_keys = Event(timestamp=now, source=EventSource.GIT, event_type="commit")
+        
+        for event in (origin, deleted, no_keys):
+            event_store.create_event(event)
+        event_store.delete_event(deleted.id)
+        
+        assert event_store.get_correlated_events(origin.id) == []
+        assert event_store.get_correlated_events(no_keys.id) == []
+    
+    def test_update_reindexes_correlation_keys(self, event_store):
+        """Test that changed metadata keys are re-indexed on update."""
+        now = datetime.utcnow().isoformat()
+        
+        origin = Event(
+            timestamp=now,
+            source=EventSource.LOGS,
+            event_type="log_entry",
+            metadata={"request_id": "r-1"},
+        )
+        first = Event(timestamp=now, source=EventSource.CI, event_type="build",
+                      metadata={"request_id": "r-1"})
+        second = Event(timestamp=now, source=EventSource.CI, event_type="build",
+                       metadata={"request_id": "r-2"})
+        
+        for event in (origin, first, second):
+            event_store.create_event(event)
+        assert [e.id for e in event_store.get_correlated_events(origin.id)] == [first.id]
+        
+        assert event_store.update_event(origin.id, {"metadata": {"request_id": "r-2"}})
+        
+        assert [e.id for e in event_store.get_correlated_events(origin.id)] == [second.id]
+        assert [e.id for e in event_store.get_correlated_events(first.id)] == []
+    
+    def test_existing_events_are_backfilled(self, event_store):
+        """Test that a database created before the index gets it populated."""
+        now = datetime.utcnow().isoformat()
+        log_event = Event(timestamp=now, source=EventSource.LOGS, event_type="log_entry",
+                          data={"trace_id": "trace-abc"})
+        trace_event = Event(timestamp=now, source=EventSource.TRACES, event_type="span_error",
+                            data={"trace_id": "trace-abc"})
+        for event in (log_event, trace_event):
+            event_store.create_event(event)
+        
+        with sqlite3.connect(event_store.db_path) as conn:
+            conn.execute("DROP TABLE event_correlations")
+        
+        reopened = EventStore(event_store.db_path)
+        assert [e.id for e in reopened.get_correlated_events(log_event.id)] == [trace_event.id]
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -5,13 +5,20 @@ Tests for Event Stream Service
 Comprehensive test suite for event streaming and pub/sub functionality.
 """
 
+import threading
+import time
 import pytest
 from datetime import datetime
 from src.services.event_stream import (
     CanvasChangeEvent,
+    DeliveryMode,
+    EventHistory,
     EventStream,
     EventSubscription,
     EventType,
+    OverflowPolicy,
+    SubscriberQueue,
+    coalesce_events,
     initialize_event_stream,
     get_event_stream,
     publish_event,
@@ -524,6 +531,459 @@ class TestEventStream:
         assert stream.event_history[0].user_id == "user-50"
 
 
+class TestEventHistory:
+    """Tests for the ring-buffer event history and its indexes."""
+    
+    @staticmethod
+    def _event(i: int) -> CanvasChangeEvent:
+        return CanvasChangeEvent(
+            event_id=f"evt-{i}",
+            event_type=EventType.NODE_ADDED if i % 2 else EventType.EDGE_ADDED,
+            canvas_id=f"canvas-{i % 3}",
+            user_id=f"user-{i % 4}",
+        )
+    
+    def test_eviction_keeps_indexes_consistent(self):
+        """Test that evicted events disappear from every index."""
+        history = EventHistory(capacity=10)
+        for i in range(25):
+            history.append(self._event(i))
+        
+        assert len(history) == 10
+        assert [e.event_id for e in history] == [f"evt-{i}" for i in range(15, 25)]
+        assert history.get("evt-14") is None
+        assert history.get("evt-15").event_id == "evt-15"
+        
+        # canvas-0 holds events 15, 18, 21, 24 after eviction
+        assert history.count("canvas-0") == 4
+        assert [e.event_id for e in history.latest(10, canvas_id="canvas-0")] == [
+            "evt-24", "evt-21", "evt-18", "evt-15",
+        ]
+        assert [e.event_id for e in history.latest(2, user_id="user-1")] == ["evt-21", "evt-17"]
+        latest = history.latest(10, canvas_id="canvas-0", event_type=EventType.NODE_ADDED)
+        assert [e.event_id for e in latest] == [
+            "evt-21", "evt-15",
+        ]
+        
+        total = sum(history.count(f"canvas-{c}") for c in range(3))
+        assert total == len(history)
+    
+    def test_indexing_and_slicing(self):
+        """Test list-style access (index 0 is the oldest event)."""
+        history = EventHistory(capacity=3)
+        for i in range(5):
+            history.append(self._event(i))
+        
+        assert history[0].event_id == "evt-2"
+        assert history[-1].event_id == "evt-4"
+        assert [e.event_id for e in history[1:]] == ["evt-3", "evt-4"]
+        with pytest.raises(IndexError):
+            history[3]
+    
+    def test_resize_keeps_latest(self):
+        """Test shrinking the capacity keeps the most recent events."""
+        history = EventHistory(capacity=10)
+        for i in range(10):
+            history.append(self._event(i))
+        
+        history.resize(4)
+        
+        assert history.capacity == 4
+        assert [e.event_id for e in history] == ["evt-6", "evt-7", "evt-8", "evt-9"]
+        assert history.get("evt-5") is None
+        assert history.count("canvas-0") == 2
+    
+    def test_clear(self):
+        """Test clearing removes events and index entries."""
+        history = EventHistory(capacity=5)
+        for i in range(3):
+            history.append(self._event(i))
+        
+        assert history.clear() == 3
+        assert len(history) == 0
+        assert history.get("evt-1") is None
+        assert history.latest(10, canvas_id="canvas-1") == []
+    
+    def test_since(self):
+        """Test fetching events published after a given event."""
+        history = EventHistory(capacity=10)
+        for i in range(15):
+            history.append(self._event(i))
+        
+        assert [e.event_id for e in history.since("evt-11")] == ["evt-12", "evt-13", "evt-14"]
+        assert [e.event_id for e in history.since("evt-6", canvas_id="canvas-0")] == [
+            "evt-9", "evt-12",
+        ]
+        assert history.since("evt-14") == []
+        # Evicted or unknown IDs resynchronize with everything retained
+        assert len(history.since("evt-2")) == 10
+    
+    def test_replay_after_event_id_includes_catch_up_publishes(self):
+        """Test events published during history replay arrive once, in order."""
+        stream = EventStream()
+        for i in range(3):
+            stream.publish(self._event(i))
+        received = []
+        
+        def handler(event):
+            received.append(event.event_id)
+            if event.event_id == "evt-1":
+                publisher = threading.Thread(target=stream.publish, args=(self._event(3),))
+                publisher.start()
+                publisher.join(timeout=5)
+        
+        stream.subscribe_from(handler, after_event_id="evt-0")
+        stream.publish(self._event(4))
+        
+        assert received == ["evt-1", "evt-2", "evt-3", "evt-4"]
+
+
+class TestCoalesceEvents:
+    """Tests for coalescing bursts of element updates."""
+    
+    @staticmethod
+    def _update(event_id: str, node_id: str) -> CanvasChangeEvent:
+        return CanvasChangeEvent(
+            event_id=event_id,
+            event_type=EventType.NODE_UPDATED,
+            canvas_id="canvas-1",
+            data={"node_id": node_id},
+        )
+    
+    def test_keeps_latest_update_per_element(self):
+        """Test repeated updates to one node collapse to the last one."""
+        events = [
+            self._update("e1", "n1"),
+            self._update("e2", "n2"),
+            self._update("e3", "n1"),
+            self._update("e4", "n1"),
+        ]
+        
+        assert [e.event_id for e in coalesce_events(events)] == ["e2", "e4"]
+    
+    def test_adds_and_deletes_pass_through(self):
+        """Test that structural changes are never merged."""
+        events = [
+            CanvasChangeEvent(event_id="e1", event_type=EventType.NODE_ADDED,
+                              canvas_id="canvas-1", data={"node_id": "n1"}),
+            self._update("e2", "n1"),
+            self._update("e3", "n1"),
+            CanvasChangeEvent(event_id="e4", event_type=EventType.NODE_DELETED,
+                              canvas_id="canvas-1", data={"node_id": "n1"}),
+        ]
+        
+        assert [e.event_id for e in coalesce_events(events)] == ["e1", "e3", "e4"]
+
+
+class TestSubscriptionIndex:
+    """Tests for indexed subscription dispatch."""
+    
+    def test_dispatch_preserves_subscription_order(self):
+        """Test that matching handlers run in subscription order."""
+        stream = EventStream()
+        calls = []
+        
+        stream.subscribe(handler=lambda e: calls.append("all"))
+        stream.subscribe(handler=lambda e: calls.append("user"), user_id="user-1")
+        stream.subscribe(handler=lambda e: calls.append("canvas"), canvas_id="canvas-1")
+        stream.subscribe(
+            handler=lambda e: calls.append("typed"),
+            event_types={EventType.NODE_ADDED},
+            canvas_id="canvas-1",
+        )
+        
+        stream.publish(CanvasChangeEvent(
+            event_type=EventType.NODE_ADDED,
+            canvas_id="canvas-1",
+            user_id="user-1",
+        ))
+        
+        assert calls == ["all", "user", "canvas", "typed"]
+    
+    def test_user_subscription_checks_type_and_canvas(self):
+        """Test that user-indexed subscriptions still apply other filters."""
+        stream = EventStream()
+        received = []
+        
+        stream.subscribe(
+            handler=lambda e: received.append(e),
+            event_types={EventType.EDGE_ADDED},
+            canvas_id="canvas-1",
+            user_id="user-1",
+        )
+        
+        for event_type, canvas_id in (
+            (EventType.NODE_ADDED, "canvas-1"),
+            (EventType.EDGE_ADDED, "canvas-2"),
+            (EventType.EDGE_ADDED, "canvas-1"),
+        ):
+            stream.publish(CanvasChangeEvent(
+                event_type=event_type, canvas_id=canvas_id, user_id="user-1",
+            ))
+        
+        assert len(received) == 1
+    
+    def test_unsubscribe_cleans_indexes(self):
+        """Test that removing every subscription empties the indexes."""
+        stream = EventStream()
+        sub_ids = [
+            stream.subscribe(handler=lambda e: None, canvas_id="canvas-1"),
+            stream.subscribe(handler=lambda e: None, user_id="user-1"),
+            stream.subscribe(handler=lambda e: None),
+        ]
+        
+        for sub_id in sub_ids:
+            assert stream.unsubscribe(sub_id) is True
+        
+        assert stream._type_canvas_index == {}
+        assert stream._user_index == {}
+    
+    def test_publish_during_concurrent_unsubscribe(self):
+        """Test that subscribing and unsubscribing while publishing is safe."""
+        stream = EventStream()
+        stop = threading.Event()
+        errors = []
+        
+        def churn():
+            while not stop.is_set():
+                sub_id = stream.subscribe(handler=lambda e: None, canvas_id="canvas-1")
+                stream.pause_subscription(sub_id)
+                stream.resume_subscription(sub_id)
+                stream.unsubscribe(sub_id)
+        
+        workers = [threading.Thread(target=churn) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        try:
+            for _ in range(2000):
+                stream.publish(CanvasChangeEvent(
+                    event_type=EventType.NODE_ADDED,
+                    canvas_id="canvas-1",
+                ))
+        except KeyError as exc:
+            errors.append(exc)
+        finally:
+            stop.set()
+            for worker in workers:
+                worker.join()
+        
+        assert errors == []
+        assert stream.subscriptions == {}
+    
+    def test_publish_benchmark_10k_subscribers(self):
+        """Benchmark: publish cost tracks matching subscribers, not total."""
+        stream = EventStream()
+        received = []
+        
+        # One subscription per open canvas tab
+        for i in range(10000):
+            stream.subscribe(
+                handler=lambda e: received.append(e),
+                canvas_id=f"canvas-{i}",
+            )
+        
+        event = CanvasChangeEvent(
+            event_type=EventType.NODE_UPDATED,
+            canvas_id="canvas-42",
+            user_id="user-1",
+        )
+        
+        iterations = 200
+        start = time.perf_counter()
+        for _ in range(iterations):
+            stream.publish(event)
+        indexed_elapsed = time.perf_counter() - start
+        
+        assert len(received) == iterations
+        
+        # Baseline: linear scan over every subscription
+        subscriptions = list(stream.subscriptions.values())
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for subscription in subscriptions:
+                stream._matches_subscription(event, subscription)
+        scan_elapsed = time.perf_counter() - start
+        
+        assert indexed_elapsed * 10 < scan_elapsed, (
+            f"indexed publish {indexed_elapsed:.4f}s vs scan {scan_elapsed:.4f}s"
+        )
+
+
+class TestAsyncDelivery:
+    """Tests for asynchronous, backpressured delivery."""
+    
+    @staticmethod
+    def _node_event(node_id: str, label: str = "") -> CanvasChangeEvent:
+        return CanvasChangeEvent(
+            event_type=EventType.NODE_UPDATED,
+            canvas_id="canvas-1",
+            user_id="user-1",
+            data={"node_id": node_id, "label": label},
+        )
+    
+    def test_slow_handler_does_not_block_publisher(self):
+        """Test that publish returns before a slow async handler finishes."""
+        stream = EventStream()
+        release = threading.Event()
+        received = []
+        
+        def slow_handler(event):
+            release.wait(5)
+            received.append(event)
+        
+        stream.subscribe(handler=slow_handler, delivery_mode=DeliveryMode.ASYNC)
+        
+        start = time.perf_counter()
+        for i in range(10):
+            stream.publish(self._node_event(f"node-{i}"))
+        assert time.perf_counter() - start < 0.5
+        
+        release.set()
+        assert stream.flush(timeout=5)
+        assert [e.data["node_id"] for e in received] == [f"node-{i}" for i in range(10)]
+        stream.shutdown()
+    
+    def test_drop_oldest_policy(self):
+        """Test that a full queue drops its oldest events and counts them."""
+        stream = EventStream()
+        gate = threading.Event()
+        received = []
+        
+        def handler(event):
+            gate.wait(5)
+            received.append(event.data["node_id"])
+        
+        sub_id = stream.subscribe(
+            handler=handler,
+            delivery_mode=DeliveryMode.ASYNC,
+            max_queue_size=3,
+            overflow_policy=OverflowPolicy.DROP_OLDEST,
+        )
+        
+        stream.publish(self._node_event("first"))
+        # Wait until the worker has taken "first" and is blocked in the handler
+        deadline = time.time() + 5
+        while stream.get_delivery_metrics(sub_id)["lag_events"] and time.time() < deadline:
+            time.sleep(0.01)
+        
+        for i in range(6):
+            stream.publish(self._node_event(f"node-{i}"))
+        
+        metrics = stream.get_delivery_metrics(sub_id)
+        assert metrics["lag_events"] == 3
+        assert metrics["dropped"] == 3
+        
+        gate.set()
+        assert stream.flush(timeout=5)
+        assert received == ["first", "node-3", "node-4", "node-5"]
+        assert stream.get_delivery_metrics(sub_id)["delivered"] == 4
+        stream.shutdown()
+    
+    def test_block_policy_applies_backpressure(self):
+        """Test that BLOCK makes the publisher wait, then drops on timeout."""
+        stream = EventStream()
+        gate = threading.Event()
+        
+        sub_id = stream.subscribe(
+            handler=lambda e: gate.wait(5),
+            delivery_mode=DeliveryMode.ASYNC,
+            max_queue_size=1,
+            overflow_policy=OverflowPolicy.BLOCK,
+            block_timeout=0.1,
+        )
+        
+        stream.publish(self._node_event("a"))
+        deadline = time.time() + 5
+        while stream.get_delivery_metrics(sub_id)["lag_events"] and time.time() < deadline:
+            time.sleep(0.01)
+        
+        stream.publish(self._node_event("b"))  # fills the queue
+        start = time.perf_counter()
+        stream.publish(self._node_event("c"))  # blocks, then times out
+        assert time.perf_counter() - start >= 0.1
+        assert stream.get_delivery_metrics(sub_id)["dropped"] == 1
+        
+        gate.set()
+        assert stream.flush(timeout=5)
+        assert stream.get_delivery_metrics(sub_id)["delivered"] == 2
+        stream.shutdown()
+    
+    def test_coalesce_policy_keeps_latest_per_node(self):
+        """Test that bursts to the same node coalesce to the latest event."""
+        stream = EventStream()
+        gate = threading.Event()
+        received = []
+        
+        def handler(event):
+            gate.wait(5)
+            received.append((event.data["node_id"], event.data["label"]))
+        
+        sub_id = stream.subscribe(
+            handler=handler,
+            delivery_mode=DeliveryMode.ASYNC,
+            overflow_policy=OverflowPolicy.COALESCE,
+        )
+        
+        stream.publish(self._node_event("warmup"))
+        deadline = time.time() + 5
+        while stream.get_delivery_metrics(sub_id)["lag_events"] and time.time() < deadline:
+            time.sleep(0.01)
+        
+        for i in range(5):
+            stream.publish(self._node_event("node-1", label=f"v{i}"))
+        stream.publish(self._node_event("node-2", label="only"))
+        
+        gate.set()
+        assert stream.flush(timeout=5)
+        assert received == [("warmup", ""), ("node-1", "v4"), ("node-2", "only")]
+        assert stream.get_delivery_metrics(sub_id)["coalesced"] == 4
+        stream.shutdown()
+    
+    def test_coalesce_policy_merges_only_updates(self):
+        """Test that deletes are kept and later updates stay behind them."""
+        queue = SubscriberQueue(EventSubscription(), overflow_policy=OverflowPolicy.COALESCE)
+        deleted = CanvasChangeEvent(
+            event_type=EventType.NODE_DELETED,
+            canvas_id="canvas-1",
+            data={"node_id": "node-1"},
+        )
+        
+        for event in (
+            self._node_event("node-1", label="v1"),
+            deleted,
+            deleted,
+            self._node_event("node-1", label="v2"),
+        ):
+            queue.put(event)
+        
+        received = []
+        while True:
+            event = queue.get(timeout=0)
+            if event is None:
+                break
+            received.append((event.event_type, event.data.get("label")))
+        
+        assert received == [
+            (EventType.NODE_UPDATED, "v1"),
+            (EventType.NODE_DELETED, None),
+            (EventType.NODE_DELETED, None),
+            (EventType.NODE_UPDATED, "v2"),
+        ]
+    
+    def test_sync_subscriptions_have_no_delivery_metrics(self):
+        """Test that metrics are only tracked for async subscriptions."""
+        stream = EventStream()
+        sync_id = stream.subscribe(handler=lambda e: None)
+        async_id = stream.subscribe(handler=lambda e: None, delivery_mode=DeliveryMode.ASYNC)
+        
+        assert stream.get_delivery_metrics(sync_id) is None
+        assert [m["subscription_id"] for m in stream.get_all_delivery_metrics()] == [async_id]
+        
+        stream.unsubscribe(async_id)
+        assert stream.get_all_delivery_metrics() == []
+        stream.shutdown()
+
+
 class TestGlobalEventStream:
     """Tests for global event stream functions."""
     
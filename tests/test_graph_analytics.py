@@ -0,0 +1,157 @@
+"""
+Tests for Graph Analytics Service
+
+Test cases for:
+- Degree and betweenness centrality
+- Cause-effect cycle detection
+- Longest causal path and root-cause candidates
+- Connected components
+- Per-revision caching
+"""
+
+import pytest
+
+from src.models.canvas import Canvas, CanvasEdge, CanvasNode, EdgeType, NodeType
+from src.services.graph_analytics import CanvasAnalyzer
+
+
+def _canvas(node_ids, edges, edge_type=EdgeType.CAUSE_EFFECT):
+    """Build a canvas from node IDs and (source, target) pairs."""
+    canvas = Canvas(id="canvas-1", investigation_id="inv-1", title="Graph")
+    for node_id in node_ids:
+        canvas.add_node(CanvasNode(id=node_id, type=NodeType.EVENT, title=node_id))
+    for i, (source, target) in enumerate(edges):
+        canvas.add_edge(CanvasEdge(id=f"e{i}", source_id=source, target_id=target, type=edge_type))
+    return canvas
+
+
+@pytest.fixture
+def analyzer():
+    """Create an analyzer with default settings."""
+    return CanvasAnalyzer()
+
+
+@pytest.fixture
+def incident_canvas():
+    """a -> b -> c -> d, x -> b, d <-> e (cycle), y isolated."""
+    return _canvas(
+        ["a", "b", "c", "d", "e", "x", "y"],
+        [("a", "b"), ("b", "c"), ("c", "d"), ("x", "b"), ("d", "e"), ("e", "d")],
+    )
+
+
+class TestCentrality:
+    """Test degree and betweenness centrality."""
+
+    def test_degree(self, analyzer, incident_canvas):
+        """Test distinct-neighbour, in and out degree."""
+        analysis = analyzer.analyze(incident_canvas)
+
+        assert analysis.degree["b"] == 3
+        assert analysis.degree["d"] == 2
+        assert analysis.in_degree["d"] == 2
+        assert analysis.out_degree["y"] == 0
+        assert analysis.most_connected == ("b", 3)
+
+    def test_betweenness_on_star(self, analyzer):
+        """Test the hub of a star lies on every shortest path."""
+        analysis = analyzer.analyze(_canvas(
+            ["hub", "l1", "l2", "l3", "l4"],
+            [("hub", "l1"), ("hub", "l2"), ("l3", "hub"), ("l4", "hub")],
+            edge_type=EdgeType.RELATES_TO,
+        ))
+
+        assert analysis.betweenness["hub"] == pytest.approx(1.0)
+        assert analysis.betweenness["l1"] == 0.0
+        assert analysis.top_betweenness() == [("hub", pytest.approx(1.0))]
+
+    def test_betweenness_on_path(self, analyzer, incident_canvas):
+        """Test normalized betweenness matches a hand count."""
+        analysis = analyzer.analyze(incident_canvas)
+
+        # b lies on 7 of the 15 shortest paths between the 6 connected nodes
+        assert analysis.betweenness["b"] == pytest.approx(7 / 15)
+        assert analysis.betweenness["a"] == 0.0
+
+    def test_sampled_betweenness_on_large_canvas(self):
+        """Test large canvases fall back to pivot sampling."""
+        node_ids = [f"n{i}" for i in range(300)]
+        canvas = _canvas(node_ids, [("n0", n) for n in node_ids[1:]], edge_type=EdgeType.RELATES_TO)
+
+        analyzer = CanvasAnalyzer(exact_betweenness_limit=100, betweenness_samples=30)
+        analysis = analyzer.analyze(canvas)
+
+        assert analysis.betweenness_exact is False
+        assert analysis.top_betweenness(1)[0][0] == "n0"
+
+
+class TestCausalStructure:
+    """Test cycles, causal paths and components."""
+
+    def test_cycles(self, analyzer, incident_canvas):
+        """Test cause-effect cycles are reported once."""
+        assert analyzer.analyze(incident_canvas).causal_cycles == [["d", "e"]]
+
+    def test_self_loop_is_a_cycle(self, analyzer):
+        """Test a node causing itself is a cycle."""
+        assert analyzer.analyze(_canvas(["a"], [("a", "a")])).causal_cycles == [["a"]]
+
+    def test_longest_path_and_roots(self, analyzer, incident_canvas):
+        """Test the longest chain starts at the best root cause."""
+        analysis = analyzer.analyze(incident_canvas)
+
+        assert analysis.longest_causal_path == ["a", "b", "c", "d"]
+        assert analysis.root_cause_candidates == ["a", "x"]
+
+    def test_non_causal_edges_ignored(self, analyzer):
+        """Test correlation edges do not form causal paths."""
+        canvas = _canvas(["a", "b"], [("a", "b")], edge_type=EdgeType.CORRELATION)
+        analysis = analyzer.analyze(canvas)
+
+        assert analysis.longest_causal_path == []
+        assert analysis.root_cause_candidates == []
+
+    def test_components(self, analyzer, incident_canvas):
+        """Test weakly connected components, largest first."""
+        components = analyzer.analyze(incident_canvas).components
+
+        assert sorted(components[0]) == ["a", "b", "c", "d", "e", "x"]
+        assert components[1] == ["y"]
+
+    def test_deep_chain(self, analyzer):
+        """Test chains deeper than the recursion limit."""
+        node_ids = [f"n{i}" for i in range(5000)]
+        canvas = _canvas(node_ids, list(zip(node_ids, node_ids[1:])))
+
+        analysis = CanvasAnalyzer(exact_betweenness_limit=0, betweenness_samples=4).analyze(canvas)
+
+        assert len(analysis.longest_causal_path) == 5000
+        assert analysis.causal_cycles == []
+
+
+class TestAnalysisCache:
+    """Test per-revision caching."""
+
+    def test_cached_until_canvas_changes(self, analyzer, incident_canvas):
+        """Test results are reused until the revision changes."""
+        first = analyzer.analyze(incident_canvas)
+        assert analyzer.analyze(incident_canvas) is first
+
+        incident_canvas.remove_edge("e5")
+        second = analyzer.analyze(incident_canvas)
+
+        assert second is not first
+        assert second.revision == incident_canvas.revision
+        assert second.causal_cycles == []
+
+    def test_cache_is_bounded(self):
+        """Test least recently used canvases are evicted."""
+        analyzer = CanvasAnalyzer(cache_size=1)
+        a = _canvas(["a"], [])
+        b = _canvas(["b"], [])
+        b.id = "canvas-2"
+
+        first = analyzer.analyze(a)
+        analyzer.analyze(b)
+
+        assert analyzer.analyze(a) is not first
@@ -9,8 +9,13 @@ import pytest
 import os
 import tempfile
 from datetime import datetime
+from types import SimpleNamespace
 
+from flask import Flask, request
+
+from src.api.investigation_api import InvestigationAPI
 from src.models.investigation import Investigation, InvestigationEvent, Annotation
+from src.services.access_control import AccessControl, Role
 from src.store.investigation_store import InvestigationStore
 
 
@@ -360,3 +365,84 @@ class TestInvestigationStore:
         assert store.get_investigation(inv.id) is None
         assert len(store.get_investigation_events(inv.id)) == 0
         assert len(store.get_annotations(inv.id)) == 0
+
+
+class TestInvestigationRevisions:
+    """Test investigation revision counters."""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        return InvestigationStore(db_path=str(tmp_path / 'test.db'))
+
+    def test_child_changes_bump_revision(self, store):
+        """Test linked events and annotations change the investigation revision."""
+        inv = store.create_investigation(title='Outage')
+        assert store.get_revision(inv.id) == 0
+
+        store.add_event(inv.id, 'git-1', 'commit', 'git', 'Deploy', '2024-01-01T00:00:00')
+        annotation = store.add_annotation(inv.id, 'alice', 'Looks like the deploy')
+        store.update_annotation(annotation.id, 'It was the deploy')
+        store.delete_annotation(annotation.id)
+
+        assert store.get_revision(inv.id) == 4
+        assert store.get_revision('missing') is None
+
+
+class _ListedInvestigation(SimpleNamespace):
+    """Investigation record as the list endpoint reads it."""
+
+    def to_dict(self):
+        return {'id': self.id, 'title': self.title}
+
+
+class _ListStore:
+    """Store exposing only what the list endpoint needs."""
+
+    def __init__(self, investigations):
+        self.investigations = investigations
+
+    def get_all(self):
+        return list(self.investigations)
+
+
+class TestInvestigationListAccess:
+    """Tests for filtering the investigation list by permission."""
+
+    @pytest.fixture
+    def client(self):
+        access_control = AccessControl()
+        access_control.assign_role('admin', Role.ADMIN, assigned_by='system')
+        access_control.assign_role('user-1', Role.VIEWER, assigned_by='admin', resource_id='inv-2')
+        store = _ListStore([
+            _ListedInvestigation(id=f'inv-{i}', title=f'Investigation {i}', description='',
+                                 service='api', created_at=f'2025-01-0{i}T00:00:00')
+            for i in (1, 2, 3)
+        ])
+
+        app = Flask(__name__)
+        app.config['TESTING'] = True
+
+        @app.before_request
+        def set_user():
+            # Stands in for the auth middleware
+            request.user_id = request.environ.get('test.user_id', '')
+
+        InvestigationAPI(store, None, access_control).register_routes(app)
+        return app.test_client()
+
+    def _listed(self, client, user, headers=None):
+        response = client.get('/api/investigations', headers=headers or {},
+                              environ_overrides={'test.user_id': user})
+        assert response.status_code == 200
+        return [i['id'] for i in response.get_json()['investigations']]
+
+    def test_list_filters_by_authenticated_user(self, client):
+        """Test only investigations the user may read are listed."""
+        assert self._listed(client, 'user-1') == ['inv-2']
+        assert self._listed(client, 'admin') == ['inv-3', 'inv-2', 'inv-1']
+        assert self._listed(client, '') == []
+
+    def test_user_header_is_not_trusted(self, client):
+        """Test a client-supplied X-User-ID does not widen the results."""
+        assert self._listed(client, 'user-1', headers={'X-User-ID': 'system'}) == ['inv-2']
+        assert self._listed(client, '', headers={'X-User-ID': 'admin'}) == []
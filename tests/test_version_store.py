@@ -0,0 +1,274 @@
+"""
+Tests for the SQLite Version Store
+
+Test cases for:
+- Version round-trips (snapshot, changes, numbering, previous version)
+- Content-addressed blob sharing between versions
+- Compression of stored payloads
+- Structural diffs from manifests
+- Retention: squashing, tags and blob garbage collection
+- The (canvas_id, version_number) index
+- Persistence across store instances
+"""
+
+import copy
+import json
+import sqlite3
+import pytest
+
+from src.models.canvas import Canvas, CanvasNode, CanvasEdge, EdgeType, NodeType
+from src.models.canvas_version import Change, ChangeType, RetentionPolicy, VersionStore
+from src.store.version_store import SQLiteVersionStore
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "versions.db")
+
+
+@pytest.fixture
+def store(db_path):
+    return SQLiteVersionStore(db_path=db_path)
+
+
+def _canvas_data(node_count=20, title="Outage"):
+    canvas = Canvas(id="canvas-1", investigation_id="inv-1", title=title)
+    for i in range(node_count):
+        canvas.add_node(CanvasNode(
+            id=f"n{i}", type=NodeType.EVENT, title=f"Event {i}",
+            description="Connection pool exhausted on api-gateway " * 3,
+            position=(i * 40.0, 0.0),
+        ))
+    for i in range(node_count - 1):
+        canvas.add_edge(CanvasEdge(id=f"e{i}", source_id=f"n{i}", target_id=f"n{i + 1}",
+                                   type=EdgeType.SEQUENCE))
+    return canvas.to_dict()
+
+
+class TestVersionRoundTrip:
+    """Test storing and reading versions."""
+
+    def test_create_and_get(self, store):
+        """A stored version reads back identical."""
+        data = _canvas_data()
+        changes = [Change(ChangeType.NODE_ADDED, {'node_id': 'n1'})]
+        created = store.create_version("canvas-1", data, changes, "alice", "first")
+
+        loaded = store.get_version(created.version_id)
+        assert loaded.data == data
+        assert loaded.version_number == 1
+        assert loaded.previous_version_id is None
+        assert loaded.author == "alice"
+        assert loaded.message == "first"
+        assert loaded.timestamp == created.timestamp
+        assert [c.to_dict() for c in loaded.changes] == [c.to_dict() for c in changes]
+
+    def test_numbering_and_chain(self, store):
+        """Versions are numbered per canvas and linked to their predecessor."""
+        v1 = store.create_version("canvas-1", _canvas_data(), [], "alice")
+        v2 = store.create_version("canvas-1", _canvas_data(title="Renamed"), [], "alice")
+        other = store.create_version("canvas-2", _canvas_data(), [], "bob")
+
+        assert v2.version_number == 2
+        assert v2.previous_version_id == v1.version_id
+        assert other.version_number == 1
+        assert store.get_version_count("canvas-1") == 2
+
+    def test_lookups(self, store):
+        """Latest, by-number and full-history reads agree with what was written."""
+        snapshots = [_canvas_data(node_count=n) for n in (3, 5, 4)]
+        for snapshot in snapshots:
+            store.create_version("canvas-1", snapshot, [], "alice")
+
+        assert [v.data for v in store.get_canvas_versions("canvas-1")] == snapshots
+        assert store.get_latest_version("canvas-1").data == snapshots[-1]
+        assert store.get_version_by_number("canvas-1", 2).data == snapshots[1]
+        assert store.get_version_by_number("canvas-1", 9) is None
+        assert store.get_version("missing") is None
+
+    def test_rollback_and_history(self, store):
+        """Rollback returns the old snapshot; history is latest first."""
+        data = _canvas_data(node_count=2)
+        v1 = store.create_version("canvas-1", data, [], "alice", "one")
+        store.create_version("canvas-1", _canvas_data(node_count=3), [], "alice", "two")
+
+        assert store.rollback("canvas-1", v1.version_id) == data
+        assert store.rollback("canvas-2", v1.version_id) is None
+        assert [h['message'] for h in store.get_version_history("canvas-1")] == ["two", "one"]
+
+    def test_history_pages(self, store):
+        """Following next_cursor walks every version once, latest first."""
+        for i in range(5):
+            store.create_version("canvas-1", {'value': i}, [], "alice")
+
+        first = store.get_version_history_page("canvas-1", limit=3)
+        second = store.get_version_history_page("canvas-1", limit=3, cursor=first['next_cursor'])
+
+        assert [h['version_number'] for h in first['versions']] == [5, 4, 3]
+        assert [h['version_number'] for h in second['versions']] == [2, 1]
+        assert second['next_cursor'] is None
+
+
+class TestContentAddressing:
+    """Test that unchanged nodes and edges are stored once."""
+
+    def test_unchanged_elements_share_blobs(self, store):
+        """A version that edits one node adds a single blob."""
+        data = _canvas_data(node_count=20)
+        store.create_version("canvas-1", data, [], "alice")
+        before = store.get_storage_stats()
+        assert before['blobs'] == 39  # 20 nodes + 19 edges
+
+        data['nodes'][5]['title'] = "Edited"
+        store.create_version("canvas-1", data, [], "alice")
+        after = store.get_storage_stats()
+
+        assert after['versions'] == 2
+        assert after['blobs'] == before['blobs'] + 1
+
+    def test_identical_snapshots_share_all_blobs(self, store):
+        """Re-saving the same canvas adds no blobs, only a manifest."""
+        data = _canvas_data()
+        store.create_version("canvas-1", data, [], "alice")
+        store.create_version("canvas-2", data, [], "bob")
+        assert store.get_storage_stats()['blobs'] == 39
+
+    def test_payloads_are_compressed(self, store):
+        """Stored bytes are smaller than the raw node and edge JSON."""
+        data = _canvas_data(node_count=50)
+        store.create_version("canvas-1", data, [], "alice")
+
+        stats = store.get_storage_stats()
+        raw = sum(len(json.dumps(item)) for item in data['nodes'] + data['edges'])
+        assert stats['blob_bytes'] < raw
+
+
+class TestSQLiteVersionDiff:
+    """Test diffs computed from stored manifests."""
+
+    def test_matches_in_memory_diff(self, store):
+        """The SQLite diff reports the same node and edge changes."""
+        memory = VersionStore()
+        first = _canvas_data(node_count=6)
+        second = copy.deepcopy(first)
+        second['title'] = "Renamed"
+        second['nodes'][2]['title'] = "Edited"
+        second['nodes'].pop()
+        second['edges'].pop()
+
+        ids = [(s.create_version("canvas-1", first, [], "alice").version_id,
+                s.create_version("canvas-1", second, [], "alice").version_id)
+               for s in (store, memory)]
+        stored = store.get_version_diff(*ids[0])
+        expected = memory.get_version_diff(*ids[1])
+
+        for key in ('fields', 'nodes', 'edges', 'summary'):
+            assert stored[key] == expected[key]
+        assert stored['nodes']['modified'][0]['fields']['title'] == {
+            'old': "Event 2", 'new': "Edited",
+        }
+        assert [m['id'] for m in stored['nodes']['modified']] == ["n2"]
+        assert [n['id'] for n in stored['nodes']['removed']] == ["n5"]
+        assert stored['fields'] == {'title': {'old': "Outage", 'new': "Renamed"}}
+
+    def test_missing_version(self, store):
+        """Unknown versions give an empty diff."""
+        assert store.get_version_diff("a", "b") == {}
+
+
+class TestSQLiteRetention:
+    """Test squashing stored versions."""
+
+    @pytest.fixture
+    def store(self, db_path):
+        return SQLiteVersionStore(db_path=db_path,
+                                  retention=RetentionPolicy(keep_last=2, max_versions=2))
+
+    def _history(self, store, canvas_id="canvas-1", count=5):
+        data = _canvas_data(node_count=5)
+        saved = []
+        for step in range(count):
+            data = copy.deepcopy(data)
+            data['nodes'][0]['title'] = f"Step {step}"  # One new blob per version
+            change = Change(ChangeType.NODE_UPDATED, {'step': step})
+            saved.append(store.create_version(canvas_id, data, [change], "alice"))
+        return saved
+
+    def test_squash_merges_changes(self, store):
+        """Squashed versions fold their changes into the next kept one."""
+        saved = self._history(store)
+        assert store.apply_retention("canvas-1") == 3
+
+        versions = store.get_canvas_versions("canvas-1")
+        assert [v.version_number for v in versions] == [4, 5]
+        assert [c.details['step'] for c in versions[0].changes] == [0, 1, 2, 3]
+        assert versions[0].previous_version_id is None
+        assert versions[1].data == saved[-1].data
+
+    def test_unreferenced_blobs_deleted(self, store):
+        """Blobs only the squashed versions used are removed."""
+        self._history(store)
+        # node 0 per version, other nodes, edges
+        assert store.get_storage_stats()['blobs'] == 5 + 4 + 4
+        store.apply_retention("canvas-1")
+        assert store.get_storage_stats()['blobs'] == 2 + 4 + 4
+
+    def test_tagged_versions_kept(self, store):
+        """Tagged versions survive and report their tags."""
+        saved = self._history(store)
+        assert store.tag_version(saved[0].version_id, "baseline")
+        store.apply_retention("canvas-1")
+
+        assert store.get_version(saved[0].version_id).tags == ["baseline"]
+        assert store.get_version_history("canvas-1")[-1]['tags'] == ["baseline"]
+        assert store.untag_version(saved[0].version_id, "baseline")
+        assert not store.untag_version(saved[0].version_id, "baseline")
+        assert not store.tag_version("missing", "x")
+
+    def test_incremental_passes(self, store):
+        """Each call handles at most max_canvases, resuming where it stopped."""
+        for canvas_id in ("a", "b", "c"):
+            self._history(store, canvas_id, count=3)
+
+        assert store.apply_retention(max_canvases=2) == 2
+        assert store.apply_retention(max_canvases=2) == 1
+        assert store.apply_retention(max_canvases=2) == 0
+        assert all(store.get_version_count(c) == 2 for c in ("a", "b", "c"))
+
+    def test_migrates_reference_counts(self, db_path):
+        """A database without refs gets them counted from the manifests."""
+        SQLiteVersionStore(db_path=db_path).create_version("canvas-1", _canvas_data(3), [], "alice")
+        with sqlite3.connect(db_path) as conn:
+            conn.execute('ALTER TABLE version_blobs DROP COLUMN refs')
+            conn.execute('ALTER TABLE canvas_versions DROP COLUMN tags')
+
+        SQLiteVersionStore(db_path=db_path)
+        with sqlite3.connect(db_path) as conn:
+            refs = {row[0] for row in conn.execute('SELECT refs FROM version_blobs')}
+        assert refs == {1}
+
+
+class TestVersionStorePersistence:
+    """Test schema and durability."""
+
+    def test_version_number_index(self, db_path, store):
+        """Lookups by (canvas_id, version_number) use the unique index."""
+        with sqlite3.connect(db_path) as conn:
+            indexes = conn.execute("PRAGMA index_list('canvas_versions')").fetchall()
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM canvas_versions "
+                "WHERE canvas_id = ? AND version_number = ?", ("c", 1)
+            ).fetchall()
+        assert any(row[1] == 'idx_canvas_versions_number' and row[2] == 1 for row in indexes)
+        assert 'idx_canvas_versions_number' in str(plan)
+
+    def test_survives_new_instance(self, db_path, store):
+        """A second store on the same file sees and continues the history."""
+        data = _canvas_data()
+        v1 = store.create_version("canvas-1", data, [], "alice")
+
+        reopened = SQLiteVersionStore(db_path=db_path)
+        assert reopened.get_version(v1.version_id).data == data
+        v2 = reopened.create_version("canvas-1", _canvas_data(title="Next"), [], "alice")
+        assert v2.version_number == 2
+        assert v2.previous_version_id == v1.version_id